@@ -0,0 +1,34 @@
+"""Add ingestion_profile JSONB column to upload_batches.
+
+Stores the per-stage timing breakdown (wall time, rows, DB round-trips,
+Qdrant bytes, approximate RSS sampled at stage boundaries) of the last
+ingestion run for each batch.
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision: str = "018"
+down_revision: Union[str, None] = "017"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "upload_batches",
+        sa.Column("ingestion_profile", JSONB, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("upload_batches", "ingestion_profile")
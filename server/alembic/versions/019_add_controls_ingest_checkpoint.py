@@ -0,0 +1,62 @@
+"""Add controls_ingest_checkpoint table and ingest_staging schema.
+
+Supports resumable controls ingestion: each run commits its batches into
+run-scoped tables in the ``ingest_staging`` schema and records its
+progress in controls_ingest_checkpoint, then publishes everything in one
+transaction at the end.
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# revision identifiers, used by Alembic.
+revision: str = "019"
+down_revision: Union[str, None] = "018"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SCHEMA IF NOT EXISTS ingest_staging")
+
+    op.create_table(
+        "controls_ingest_checkpoint",
+        sa.Column("run_id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("upload_id", sa.Text(), nullable=False),
+        sa.Column("batch_id", sa.BigInteger(), nullable=False),
+        sa.Column("status", sa.Text(), nullable=False, server_default=sa.text("'staging'")),
+        sa.Column("tx_from", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("source_fingerprint", sa.Text(), nullable=False),
+        sa.Column("next_offset", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("total", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("counts", JSONB, nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.Column("published_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("run_id"),
+        sa.CheckConstraint(
+            "status IN ('staging', 'published', 'abandoned')",
+            name="chk_ingest_checkpoint_status",
+        ),
+    )
+    op.create_index(
+        "uq_ingest_checkpoint_active",
+        "controls_ingest_checkpoint",
+        ["upload_id"],
+        unique=True,
+        postgresql_where=sa.text("status = 'staging'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_ingest_checkpoint_active", table_name="controls_ingest_checkpoint")
+    op.drop_table("controls_ingest_checkpoint")
+    op.execute("DROP SCHEMA IF EXISTS ingest_staging CASCADE")
@@ -0,0 +1,32 @@
+"""Add checksum_crc32 column to tus_uploads.
+
+Running CRC-32 of the bytes received so far, updated with every PATCH so
+the completed file can be verified without re-reading it.
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "020"
+down_revision: Union[str, None] = "019"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tus_uploads",
+        sa.Column("checksum_crc32", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tus_uploads", "checksum_crc32")
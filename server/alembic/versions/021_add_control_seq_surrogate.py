@@ -0,0 +1,38 @@
+"""Add dense integer control_seq surrogate to src_controls_ref_control.
+
+Explorer sidebar filters build their candidate sets as bitsets over
+control_seq and pass them to PostgreSQL as one integer array instead of
+large IN lists of control_id strings. The identity column numbers the
+existing controls on upgrade and every ref row ingestion inserts.
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "021"
+down_revision: Union[str, None] = "020"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "src_controls_ref_control",
+        sa.Column("control_seq", sa.Integer(), sa.Identity(always=False), nullable=False),
+    )
+    op.create_unique_constraint(
+        "uq_ref_control_seq", "src_controls_ref_control", ["control_seq"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_ref_control_seq", "src_controls_ref_control", type_="unique")
+    op.drop_column("src_controls_ref_control", "control_seq")
@@ -0,0 +1,62 @@
+"""Add src_orgs_rel_closure (materialized org descendant closure).
+
+One row per (ancestor, descendant) pair reachable over the current
+src_orgs_rel_child edges, at the shortest depth. Explorer filters expand
+selected org nodes with one indexed lookup instead of a query per tree
+level; context-provider ingestion keeps it current. The upgrade backfills
+it from the current edges.
+
+Revision ID: 022
+Revises: 021
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "022"
+down_revision: Union[str, None] = "021"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "src_orgs_rel_closure",
+        sa.Column("ancestor_node_id", sa.Text(), nullable=False),
+        sa.Column("descendant_node_id", sa.Text(), nullable=False),
+        sa.Column("depth", sa.SmallInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("ancestor_node_id", "descendant_node_id", name="pk_rel_closure"),
+        sa.CheckConstraint("depth >= 1", name="ck_rel_closure_depth"),
+    )
+    op.create_index("ix_rel_closure_descendant", "src_orgs_rel_closure", ["descendant_node_id"])
+
+    # Depth bound matches CLOSURE_MAX_DEPTH in server/pipelines/orgs/closure.py
+    op.execute(
+        """
+        INSERT INTO src_orgs_rel_closure (ancestor_node_id, descendant_node_id, depth)
+        WITH RECURSIVE walk (ancestor_node_id, descendant_node_id, depth) AS (
+            SELECT in_node_id, out_node_id, 1
+            FROM src_orgs_rel_child
+            WHERE tx_to IS NULL
+            UNION ALL
+            SELECT w.ancestor_node_id, e.out_node_id, w.depth + 1
+            FROM walk w
+            JOIN src_orgs_rel_child e ON e.in_node_id = w.descendant_node_id AND e.tx_to IS NULL
+            WHERE w.depth < 10
+        )
+        SELECT ancestor_node_id, descendant_node_id, min(depth)
+        FROM walk
+        WHERE ancestor_node_id <> descendant_node_id
+        GROUP BY ancestor_node_id, descendant_node_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rel_closure_descendant", table_name="src_orgs_rel_closure")
+    op.drop_table("src_orgs_rel_closure")
@@ -0,0 +1,84 @@
+"""Add effective W-criteria mask to src_controls_ref_control.
+
+ws_yes_mask has one bit per W criterion answered "yes" (L1 criteria in
+bits 0-6, L2 in bits 7-13; Level 2 controls take their L1 bits from the
+parent's enrichment), so the explorer's "selected criteria are all No"
+filter is a single ``ws_yes_mask & :mask = 0`` predicate. Ingestion keeps
+it current; the upgrade backfills it from the current enrichment.
+
+Revision ID: 023
+Revises: 022
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "023"
+down_revision: Union[str, None] = "022"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Bit order matches server/pipelines/controls/ws_mask.py
+_L1_COLS = [
+    "what_yes_no", "where_yes_no", "who_yes_no", "when_yes_no",
+    "why_yes_no", "what_why_yes_no", "risk_theme_yes_no",
+]
+_L2_COLS = [
+    "frequency_yes_no", "preventative_detective_yes_no",
+    "automation_level_yes_no", "followup_yes_no",
+    "escalation_yes_no", "evidence_yes_no", "abbreviations_yes_no",
+]
+
+
+def _bit(expr: str, bit: int) -> str:
+    return f"CASE WHEN lower(btrim({expr}, E' \\t\\r\\n')) = 'yes' THEN {1 << bit} ELSE 0 END"
+
+
+def upgrade() -> None:
+    op.add_column(
+        "src_controls_ref_control",
+        sa.Column("ws_yes_mask", sa.SmallInteger(), nullable=False, server_default=sa.text("0")),
+    )
+    op.create_index(
+        "ix_ref_control_ws_mask", "src_controls_ref_control", ["ws_yes_mask"],
+        postgresql_include=["control_seq", "control_id"],
+    )
+
+    bits = [
+        _bit(f"CASE WHEN v.hierarchy_level = 'Level 2' THEN pe.{col} ELSE e.{col} END", bit)
+        for bit, col in enumerate(_L1_COLS)
+    ] + [_bit(f"e.{col}", bit) for bit, col in enumerate(_L2_COLS, start=len(_L1_COLS))]
+    op.execute(
+        f"""
+        UPDATE src_controls_ref_control AS r
+        SET ws_yes_mask = c.ws_yes_mask
+        FROM (
+            SELECT ref.control_id, {' + '.join(bits)} AS ws_yes_mask
+            FROM src_controls_ref_control ref
+            LEFT JOIN src_controls_ver_control v
+                ON v.ref_control_id = ref.control_id AND v.tx_to IS NULL
+            LEFT JOIN ai_controls_model_enrichment e
+                ON e.ref_control_id = ref.control_id AND e.tx_to IS NULL
+            LEFT JOIN LATERAL (
+                SELECT p.parent_control_id
+                FROM src_controls_rel_parent p
+                WHERE p.child_control_id = ref.control_id AND p.tx_to IS NULL
+                ORDER BY p.tx_from DESC
+                LIMIT 1
+            ) parent ON true
+            LEFT JOIN ai_controls_model_enrichment pe
+                ON pe.ref_control_id = parent.parent_control_id AND pe.tx_to IS NULL
+        ) AS c
+        WHERE r.control_id = c.control_id AND r.ws_yes_mask <> c.ws_yes_mask
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ref_control_ws_mask", table_name="src_controls_ref_control")
+    op.drop_column("src_controls_ref_control", "ws_yes_mask")
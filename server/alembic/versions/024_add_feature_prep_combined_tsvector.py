@@ -0,0 +1,76 @@
+"""Add weighted combined tsvector to ai_controls_model_feature_prep.
+
+ts_combined concatenates every keyword-searchable field with a weight
+(title A, description B, what / why / where C, evidence and local
+functional information D) and gets one partial GIN index, so an
+all-fields keyword search is a single ``@@`` index scan ranked with
+``ts_rank_cd`` instead of seven OR'ed rank sums. The feature_prep trigger
+maintains it; the upgrade backfills current rows.
+
+Revision ID: 024
+Revises: 023
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+# revision identifiers, used by Alembic.
+revision: str = "024"
+down_revision: Union[str, None] = "023"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLE = "ai_controls_model_feature_prep"
+
+_PER_FIELD = """
+    NEW.ts_what := to_tsvector('english', COALESCE(NEW.what, ''));
+    NEW.ts_why := to_tsvector('english', COALESCE(NEW.why, ''));
+    NEW.ts_where := to_tsvector('english', COALESCE(NEW.where, ''));
+    NEW.ts_control_title := to_tsvector('english', COALESCE(NEW.control_title, ''));
+    NEW.ts_control_description := to_tsvector('english', COALESCE(NEW.control_description, ''));
+    NEW.ts_evidence_description := to_tsvector('english', COALESCE(NEW.evidence_description, ''));
+    NEW.ts_local_functional_information := to_tsvector('english', COALESCE(NEW.local_functional_information, ''));"""
+
+_COMBINED = """
+    NEW.ts_combined :=
+        setweight(to_tsvector('english', COALESCE(NEW.control_title, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(NEW.control_description, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(NEW.what, '')), 'C') ||
+        setweight(to_tsvector('english', COALESCE(NEW.why, '')), 'C') ||
+        setweight(to_tsvector('english', COALESCE(NEW.where, '')), 'C') ||
+        setweight(to_tsvector('english', COALESCE(NEW.evidence_description, '')), 'D') ||
+        setweight(to_tsvector('english', COALESCE(NEW.local_functional_information, '')), 'D');"""
+
+
+def _trigger_function(body: str) -> str:
+    return f"""
+CREATE OR REPLACE FUNCTION update_feature_prep_tsvectors() RETURNS trigger AS $$
+BEGIN{body}
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.add_column(_TABLE, sa.Column("ts_combined", TSVECTOR(), nullable=True))
+    op.execute(_trigger_function(_PER_FIELD + _COMBINED))
+
+    # The BEFORE UPDATE trigger recomputes every tsvector of the touched rows
+    op.execute(f"UPDATE {_TABLE} SET ts_combined = NULL WHERE tx_to IS NULL")
+
+    op.create_index(
+        "idx_fts_combined", _TABLE, ["ts_combined"],
+        postgresql_using="gin", postgresql_where=sa.text("tx_to IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_fts_combined", table_name=_TABLE)
+    op.execute(_trigger_function(_PER_FIELD))
+    op.drop_column(_TABLE, "ts_combined")
@@ -0,0 +1,45 @@
+"""Add pg_trgm indexes on current control IDs and titles.
+
+Partial (``tx_to IS NULL``) GIN trigram indexes on
+src_controls_ver_control.ref_control_id and control_title back the
+control ID typeahead and the ID search fallback: prefix and substring
+``ILIKE`` on IDs, ``%`` similarity for mistyped IDs and ``<%`` word
+similarity on titles.
+
+Revision ID: 025
+Revises: 024
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "025"
+down_revision: Union[str, None] = "024"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLE = "src_controls_ver_control"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "idx_ver_control_id_trgm", _TABLE, ["ref_control_id"],
+        postgresql_using="gin", postgresql_ops={"ref_control_id": "gin_trgm_ops"},
+        postgresql_where=sa.text("tx_to IS NULL"),
+    )
+    op.create_index(
+        "idx_ver_control_title_trgm", _TABLE, ["control_title"],
+        postgresql_using="gin", postgresql_ops={"control_title": "gin_trgm_ops"},
+        postgresql_where=sa.text("tx_to IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_ver_control_title_trgm", table_name=_TABLE)
+    op.drop_index("idx_ver_control_id_trgm", table_name=_TABLE)
@@ -0,0 +1,91 @@
+"""Add src_controls_ver_control_diff (per-version changed fields).
+
+One row per src_controls_ver_control version: the material fields and
+parent control that changed against the version it replaced, with old and
+new values; a control's first version lists every field. The explorer's
+version history and diff endpoints read it instead of reconstructing
+versions and as-of parents per request; ingestion keeps it current. The
+upgrade backfills it from the existing versions.
+
+Revision ID: 026
+Revises: 025
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "026"
+down_revision: Union[str, None] = "025"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Matches MATERIAL_FIELDS in server/pipelines/controls/version_diff.py
+_MATERIAL_FIELDS = [
+    "control_status", "key_control",
+    "control_title", "control_description",
+    "evidence_description", "local_functional_information",
+    "execution_frequency", "preventative_detective",
+    "manual_automated", "control_administrator",
+    "control_owner", "control_owner_gpn",
+    "last_modified_on",
+]
+
+
+def _material(alias: str) -> str:
+    fields = ", ".join(f"'{col}', {alias}.{col}" for col in _MATERIAL_FIELDS)
+    parent = (
+        f"(SELECT p.parent_control_id FROM src_controls_rel_parent p "
+        f"WHERE p.child_control_id = {alias}.ref_control_id AND p.tx_from <= {alias}.tx_from "
+        f"AND (p.tx_to IS NULL OR p.tx_to > {alias}.tx_from) ORDER BY p.tx_from DESC LIMIT 1)"
+    )
+    return f"jsonb_build_object({fields}, 'parent_control_id', {parent})"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "src_controls_ver_control_diff",
+        sa.Column("ref_control_id", sa.Text(), sa.ForeignKey("src_controls_ref_control.control_id"), nullable=False),
+        sa.Column("tx_from", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("tx_to", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("prev_tx_from", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("changed_fields", postgresql.ARRAY(sa.Text()), nullable=False, server_default=sa.text("'{}'::text[]")),
+        sa.Column("old_values", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("new_values", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.PrimaryKeyConstraint("ref_control_id", "tx_from", name="pk_ver_control_diff"),
+    )
+
+    op.execute(
+        f"""
+        INSERT INTO src_controls_ver_control_diff
+            (ref_control_id, tx_from, tx_to, prev_tx_from, changed_fields, old_values, new_values)
+        SELECT pair.ref_control_id, pair.tx_from, pair.tx_to, pair.prev_tx_from,
+               delta.changed_fields, delta.old_values, delta.new_values
+        FROM (
+            SELECT cur.ref_control_id, cur.tx_from, cur.tx_to, prev.tx_from AS prev_tx_from,
+                   {_material("cur")} AS new_doc,
+                   CASE WHEN prev.ver_id IS NOT NULL THEN {_material("prev")} END AS old_doc
+            FROM src_controls_ver_control cur
+            LEFT JOIN src_controls_ver_control prev
+                ON prev.ref_control_id = cur.ref_control_id AND prev.tx_to = cur.tx_from
+        ) pair
+        CROSS JOIN LATERAL (
+            SELECT coalesce(array_agg(field.key ORDER BY field.key), '{{}}'::text[]) AS changed_fields,
+                   CASE WHEN pair.old_doc IS NULL THEN '{{}}'::jsonb
+                        ELSE coalesce(jsonb_object_agg(field.key, pair.old_doc -> field.key), '{{}}'::jsonb)
+                   END AS old_values,
+                   coalesce(jsonb_object_agg(field.key, field.value), '{{}}'::jsonb) AS new_values
+            FROM jsonb_each(pair.new_doc) AS field(key, value)
+            WHERE field.value IS DISTINCT FROM (pair.old_doc -> field.key)
+        ) delta
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("src_controls_ver_control_diff")
@@ -27,6 +27,44 @@ class QdrantStatus(BaseModel):
     collection: str
 
 
+class EmbeddingCacheStatus(BaseModel):
+    backend: str
+    model: str
+    lookups: int
+    lru_hits: int
+    redis_hits: int
+    shared_inflight: int
+    misses: int
+    hit_rate: float | None
+    lru_size: int
+    upstream_calls: int
+    upstream_texts: int
+    upstream_errors: int
+    upstream_avg_ms: float | None
+    upstream_last_ms: float
+
+
+class FacetIndexStatus(BaseModel):
+    loaded: bool
+    reloading: bool
+    generation: int | None = None
+    controls: int | None = None
+    current_controls: int | None = None
+    array_bytes: int | None = None
+    build_ms: float | None = None
+    built_at: str | None = None
+
+
+class OrgTreeStatus(BaseModel):
+    loaded: bool
+    reloading: bool
+    generation: int | None = None
+    nodes: dict[str, int] | None = None
+    array_bytes: int | None = None
+    build_ms: float | None = None
+    built_at: str | None = None
+
+
 class HealthResponse(BaseModel):
     status: str  # "healthy" or "unhealthy"
     database: DatabaseStatus
@@ -77,3 +115,24 @@ async def health_check(db: AsyncSession = Depends(get_jobs_db)):
         database=db_status,
         qdrant=qdrant_status,
     )
+
+
+@router.get("/embeddings", response_model=EmbeddingCacheStatus)
+async def embedding_cache_status():
+    """Query embedding cache hit rate and OpenAI latency for this worker."""
+    from server.explorer.shared.embeddings import get_embedding_cache_stats
+    return EmbeddingCacheStatus(**get_embedding_cache_stats())
+
+
+@router.get("/facet-index", response_model=FacetIndexStatus)
+async def facet_index_status():
+    """In-memory explorer facet index of this worker (generation, size, build time)."""
+    from server.explorer.controls.facet_index import get_facet_index_status
+    return FacetIndexStatus(**get_facet_index_status())
+
+
+@router.get("/org-trees", response_model=OrgTreeStatus)
+async def org_tree_status():
+    """In-memory org tree snapshot of this worker (generation, node counts, build time)."""
+    from server.explorer.filters.org_tree import get_org_tree_status
+    return OrgTreeStatus(**get_org_tree_status())
@@ -39,7 +39,10 @@ async def _ensure_controls_collection(collection_prefix: str) -> None:
         collection_prefix: Prefix for collection names
     """
     # Import here to avoid circular dependency
-    from server.pipelines.controls.qdrant_service import get_controls_collection_config
+    from server.pipelines.controls.qdrant_service import (
+        ensure_payload_indexes,
+        get_controls_collection_config,
+    )
 
     collection_name = f"{collection_prefix}_controls"
 
@@ -57,6 +60,8 @@ async def _ensure_controls_collection(collection_prefix: str) -> None:
     else:
         logger.info("Qdrant collection '{}' already exists", collection_name)
 
+    await ensure_payload_indexes(_client, collection_name)
+
 
 def get_qdrant_client() -> AsyncQdrantClient:
     """Get the global Qdrant client. Raises if not initialized."""
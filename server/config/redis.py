@@ -74,6 +74,29 @@ def get_redis_coordination() -> Redis:
     return _coord_client
 
 
+def get_redis_sync_cache_client() -> redis.Redis:
+    """Get a sync Redis cache client (DB 0) for CLI scripts and Celery code."""
+    global _sync_cache_client
+
+    if _sync_cache_client is None:
+        from server.settings import get_settings
+        settings = get_settings()
+
+        # Parse base URL
+        base_url = settings.redis_url.rstrip('/')
+        if '/' in base_url.split('://')[-1]:
+            base_url = '/'.join(base_url.split('/')[:-1])
+
+        _sync_cache_client = redis.Redis.from_url(
+            f"{base_url}/0",
+            decode_responses=True,
+        )
+        _sync_cache_client.ping()
+        logger.info("Redis sync cache client initialized (DB 0)")
+
+    return _sync_cache_client
+
+
 def get_redis_sync_client() -> redis.Redis:
     """Get a sync Redis client for Celery tasks (DB 3).
 
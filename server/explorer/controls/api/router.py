@@ -1,6 +1,10 @@
 """API endpoints for Explorer controls search and detail."""
 
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 from server.auth.dependencies import get_token_from_header
 from server.auth.service import get_access_control
@@ -10,16 +14,23 @@ from server.explorer.shared.models import (
     ControlDetailResponse,
     ControlDiffRequest,
     ControlDiffResponse,
+    ControlFacetCountsRequest,
+    ControlFacetCountsResponse,
     ControlsSearchParams,
     ControlsSearchResponse,
+    ControlTypeaheadResponse,
     ControlVersionListResponse,
 )
+from server.explorer.controls.export_stream import EXPORT_MEDIA_TYPES
 from server.explorer.controls.service import (
+    export_search_results,
     get_control_descriptions,
     get_control_detail,
     get_control_diff,
+    get_facet_counts,
     get_control_versions,
     search_controls,
+    typeahead_controls,
 )
 from server.logging_config import get_logger
 
@@ -45,6 +56,41 @@ async def controls_search(
     return await search_controls(params, graph_token=token)
 
 
+@router.post("/export")
+async def controls_export(
+    params: ControlsSearchParams,
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="ndjson (one ControlWithDetailsResponse per line) or csv"),
+    token: str = Depends(_require_explorer_access),
+):
+    """Stream every control matching a search, in rank order, as NDJSON or CSV."""
+    chunks = await export_search_results(params, format, graph_token=token)
+    filename = f"controls_search_{date.today():%Y%m%d}.{format}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/facets", response_model=ControlFacetCountsResponse)
+async def controls_facet_counts(
+    params: ControlFacetCountsRequest,
+    token: str = Depends(_require_explorer_access),
+):
+    """Match counts per sidebar facet (org subtree, risk theme, status, level, key flag) for a search state."""
+    return await get_facet_counts(params, graph_token=token)
+
+
+@router.get("/typeahead", response_model=ControlTypeaheadResponse)
+async def controls_typeahead(
+    q: str = Query(..., min_length=1, max_length=100, description="Partial or mistyped control ID, or title words"),
+    limit: int = Query(10, ge=1, le=50),
+    _token: str = Depends(_require_explorer_access),
+):
+    """Suggest controls for a partial control ID (prefix, substring and fuzzy matches)."""
+    return await typeahead_controls(q, limit)
+
+
 @router.get("/{control_id}/detail", response_model=ControlDetailResponse)
 async def control_detail(
     control_id: str,
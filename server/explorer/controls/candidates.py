@@ -0,0 +1,118 @@
+"""Compact candidate sets for explorer sidebar filters.
+
+Each sidebar dimension (functions, locations, AUs, CEs, risk themes)
+resolves to a bitset over ``src_controls_ref_control.control_seq``, the
+dense integer surrogate assigned at ingestion. AND / OR across dimensions
+is a bitwise ``&`` / ``|`` over packed numpy words (one bit per control
+instead of a Python string per control), and the result reaches
+PostgreSQL as a single ``int4[]`` parameter (``control_seq = ANY(:seqs)``)
+rather than an ``IN`` list of control_id strings. Qdrant gets the same
+set as ``control_seq`` payload ranges (see ``seq_ranges``).
+
+Usage:
+    cands = await load_candidate_set(conn, select(ref_control.c.control_seq).join_from(...))
+    cands &= other
+    q = q.where(control_id_filter(ver_control.c.ref_control_id, cands))
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import Integer, Text, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from server.pipelines.controls.schema import src_controls_ref_control as ref_control
+
+
+class CandidateSet:
+    """Set of controls stored as a little-endian packed bitset over control_seq."""
+
+    __slots__ = ("_bits",)
+
+    def __init__(self, bits: np.ndarray | None = None) -> None:
+        self._bits = bits if bits is not None else np.zeros(0, dtype=np.uint8)
+
+    @classmethod
+    def from_seqs(cls, seqs: Iterable[int]) -> "CandidateSet":
+        arr = np.fromiter(seqs, dtype=np.int64)
+        if arr.size == 0:
+            return cls()
+        mask = np.zeros(int(arr.max()) + 1, dtype=bool)
+        mask[arr] = True
+        return cls(np.packbits(mask, bitorder="little"))
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "CandidateSet":
+        """Set of the positions where a boolean array (indexed by control_seq) is True."""
+        return cls(np.packbits(mask, bitorder="little"))
+
+    def to_mask(self, size: int) -> np.ndarray:
+        """Boolean array of length ``size`` indexed by control_seq."""
+        mask = np.unpackbits(self._bits, count=min(size, self._bits.size * 8), bitorder="little").astype(bool)
+        return np.pad(mask, (0, size - mask.size)) if mask.size < size else mask
+
+    def _aligned(self, other: "CandidateSet") -> tuple[np.ndarray, np.ndarray]:
+        a, b = self._bits, other._bits
+        if a.size < b.size:
+            a = np.pad(a, (0, b.size - a.size))
+        elif b.size < a.size:
+            b = np.pad(b, (0, a.size - b.size))
+        return a, b
+
+    def __and__(self, other: "CandidateSet") -> "CandidateSet":
+        n = min(self._bits.size, other._bits.size)
+        return CandidateSet(self._bits[:n] & other._bits[:n])
+
+    def __or__(self, other: "CandidateSet") -> "CandidateSet":
+        a, b = self._aligned(other)
+        return CandidateSet(a | b)
+
+    def __len__(self) -> int:
+        return int(np.bitwise_count(self._bits).sum())
+
+    def __contains__(self, seq: int) -> bool:
+        byte = seq >> 3
+        return 0 <= byte < self._bits.size and bool(self._bits[byte] & (1 << (seq & 7)))
+
+    @property
+    def nbytes(self) -> int:
+        return self._bits.nbytes
+
+    def seqs(self) -> list[int]:
+        """Member control_seq values in ascending order."""
+        return np.flatnonzero(np.unpackbits(self._bits, bitorder="little")).tolist()
+
+
+def text_array(name: str, values: Iterable[str]):
+    """Bind ``values`` as one ``text[]`` parameter (for ``col == any_(...)``)."""
+    return bindparam(name, value=list(values), type_=ARRAY(Text), unique=True)
+
+
+def _seq_array(cands: CandidateSet):
+    return bindparam("candidate_seqs", value=cands.seqs(), type_=ARRAY(Integer), unique=True)
+
+
+def control_id_filter(control_id_col, cands: CandidateSet):
+    """``control_id_col IN (control_ids whose control_seq is in cands)`` with one array parameter."""
+    return control_id_col.in_(
+        select(ref_control.c.control_id).where(ref_control.c.control_seq == any_(_seq_array(cands)))
+    )
+
+
+async def load_candidate_set(conn, seq_query) -> CandidateSet:
+    """Execute a query selecting control_seq values and pack the result."""
+    result = await conn.execute(seq_query)
+    return CandidateSet.from_seqs(row[0] for row in result)
+
+
+def seq_ranges(cands: CandidateSet) -> list[tuple[int, int]]:
+    """Members as inclusive ``(first, last)`` runs of consecutive control_seq values."""
+    seqs = np.asarray(cands.seqs(), dtype=np.int64)
+    if seqs.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(seqs) != 1)
+    starts = np.concatenate(([seqs[0]], seqs[breaks + 1]))
+    ends = np.concatenate((seqs[breaks], [seqs[-1]]))
+    return list(zip(starts.tolist(), ends.tolist()))
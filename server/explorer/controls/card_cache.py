@@ -0,0 +1,231 @@
+"""Per-control cache of hydrated search result cards.
+
+Popular controls appear on page after page, so each hydrated
+``ControlWithDetailsResponse`` (without the page-specific search score)
+is cached in Redis under ``cache:cards:{control_id}``. A page is read with
+one ``MGET`` that also returns the card epoch; only the misses are
+hydrated from PostgreSQL and written back in one pipeline.
+
+Invalidation is per control rather than a namespace wipe: after a
+controls ingestion commits, ``invalidate_changed_cards`` finds every
+control whose card inputs gained or closed a version since the run's
+tx_from (plus the children of those controls, whose inherited L1 score
+reads the parent's enrichment), bumps the epoch and overwrites their
+keys with a tombstone ``~<epoch>``. The epoch is the cache's data
+version: a reader only fills a key if it is empty or holds a tombstone no
+newer than the epoch the reader saw before querying PostgreSQL (checked
+atomically by a small Lua script), so a slow reader that loaded
+pre-ingestion rows cannot write a stale card back over an invalidation.
+
+Org node names are joined into cards as well; context-provider ingestion
+renames nodes across the whole tree and drops the ``cards`` namespace
+(``drop_card_cache_sync``). That bumps the epoch and raises the epoch
+floor to it in one step before deleting the keys: the fill script refuses
+every reader whose epoch is below the floor, so a reader that loaded
+pre-rename rows cannot refill a key the drop just emptied.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import or_, select, union
+
+from server.explorer.shared.models import ControlWithDetailsResponse
+from server.logging_config import get_logger
+from server.pipelines.controls.schema import (
+    ai_controls_model_enrichment as ai_enrichment,
+    ai_controls_model_taxonomy as ai_taxonomy,
+    ai_controls_similar_controls as similar_controls,
+    src_controls_rel_owns_function as rel_owns_func,
+    src_controls_rel_owns_location as rel_owns_loc,
+    src_controls_rel_parent as rel_parent,
+    src_controls_rel_related_function as rel_related_func,
+    src_controls_rel_related_location as rel_related_loc,
+    src_controls_rel_risk_theme as rel_risk_theme,
+    src_controls_ver_control as ver_control,
+)
+from server.settings import get_settings
+
+logger = get_logger(name=__name__)
+
+CARD_NAMESPACE = "cards"
+_KEY_PREFIX = f"cache:{CARD_NAMESPACE}"
+# Outside the cache: prefix so namespace wipes never move the epoch backwards
+_EPOCH_KEY = "explorer:cards:epoch"
+# Lowest reader epoch allowed to fill any key (raised by full drops)
+_FLOOR_KEY = "explorer:cards:floor"
+_TOMBSTONE = "~"
+_TOMBSTONE_TTL = 3600
+
+# KEYS[1] epoch, KEYS[2] epoch floor. Bump the epoch and raise the floor to it.
+_BUMP_FLOOR_SCRIPT = """
+local epoch = redis.call('INCR', KEYS[1])
+redis.call('SET', KEYS[2], epoch)
+return epoch
+"""
+_WRITE_CHUNK = 1_000  # keys per pipeline
+
+# KEYS[1] card key, KEYS[2] epoch floor; ARGV: card JSON, reader epoch, TTL.
+# Fill only an empty key or a tombstone the reader's epoch has already seen,
+# and only if no full drop happened after the reader read its epoch.
+_FILL_SCRIPT = """
+local floor = redis.call('GET', KEYS[2])
+if floor and tonumber(floor) > tonumber(ARGV[2]) then
+    return 0
+end
+local cur = redis.call('GET', KEYS[1])
+if cur then
+    if string.sub(cur, 1, 1) ~= '~' or tonumber(string.sub(cur, 2)) > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', tonumber(ARGV[3]))
+return 1
+"""
+
+
+def _key(control_id: str) -> str:
+    return f"{_KEY_PREFIX}:{control_id}"
+
+
+def _redis():
+    from server.config.redis import get_redis
+
+    if not get_settings().card_cache_enabled:
+        return None
+    try:
+        return get_redis()
+    except RuntimeError:
+        return None
+
+
+async def get_cards(control_ids: list[str]) -> tuple[dict[str, ControlWithDetailsResponse], int | None]:
+    """Cached cards for ``control_ids`` and the epoch to pass to ``put_cards``.
+
+    The epoch is None when the cache is unavailable (nothing should be written).
+    """
+    redis = _redis()
+    if redis is None or not control_ids:
+        return {}, None
+    try:
+        raw = await redis.mget([_EPOCH_KEY, *(_key(cid) for cid in control_ids)])
+    except Exception as e:
+        logger.warning("Card cache read failed: {}", e)
+        return {}, None
+
+    cards: dict[str, ControlWithDetailsResponse] = {}
+    for cid, value in zip(control_ids, raw[1:]):
+        if value is None or value.startswith(_TOMBSTONE):
+            continue
+        try:
+            cards[cid] = ControlWithDetailsResponse.model_validate_json(value)
+        except ValueError:
+            logger.debug("Discarding undecodable card for {}", cid)
+    return cards, int(raw[0] or 0)
+
+
+async def put_cards(cards: list[ControlWithDetailsResponse], epoch: int | None) -> None:
+    """Write freshly hydrated cards, unless an invalidation newer than ``epoch`` holds the key."""
+    redis = _redis()
+    if redis is None or epoch is None or not cards:
+        return
+    ttl = get_settings().card_cache_ttl
+    try:
+        fill = redis.register_script(_FILL_SCRIPT)
+        for i in range(0, len(cards), _WRITE_CHUNK):
+            async with redis.pipeline(transaction=False) as pipe:
+                for card in cards[i:i + _WRITE_CHUNK]:
+                    await fill(
+                        keys=[_key(card.control.control_id), _FLOOR_KEY],
+                        args=[card.model_dump_json(exclude={"search_score"}), epoch, ttl],
+                        client=pipe,
+                    )
+                await pipe.execute()
+    except Exception as e:
+        logger.warning("Card cache write failed: {}", e)
+
+
+def _changed_since(since: datetime):
+    """control_ids whose card inputs opened or closed a version at/after ``since``."""
+    def touched(tbl, *id_cols):
+        changed = or_(tbl.c.tx_from >= since, tbl.c.tx_to >= since)
+        return [select(col.label("control_id")).where(changed) for col in id_cols]
+
+    return union(
+        *touched(ver_control, ver_control.c.ref_control_id),
+        *touched(rel_parent, rel_parent.c.child_control_id, rel_parent.c.parent_control_id),
+        *touched(rel_owns_func, rel_owns_func.c.control_id),
+        *touched(rel_owns_loc, rel_owns_loc.c.control_id),
+        *touched(rel_related_func, rel_related_func.c.control_id),
+        *touched(rel_related_loc, rel_related_loc.c.control_id),
+        *touched(rel_risk_theme, rel_risk_theme.c.control_id),
+        *touched(ai_enrichment, ai_enrichment.c.ref_control_id),
+        *touched(ai_taxonomy, ai_taxonomy.c.ref_control_id),
+        *touched(similar_controls, similar_controls.c.ref_control_id),
+    ).cte("cards_changed")
+
+
+async def changed_card_ids(conn, since: datetime) -> list[str]:
+    """Controls whose cards are stale after writes at/after ``since``, incl. L2 children of changed parents."""
+    changed = _changed_since(since)
+    children = (
+        select(rel_parent.c.child_control_id)
+        .where(rel_parent.c.tx_to.is_(None), rel_parent.c.parent_control_id.in_(select(changed.c.control_id)))
+    )
+    result = await conn.execute(union(select(changed.c.control_id), children))
+    return [row[0] for row in result]
+
+
+async def invalidate_cards(control_ids: list[str]) -> int:
+    """Tombstone the cards of ``control_ids`` under a new epoch; returns the epoch (0 if skipped)."""
+    redis = _redis()
+    if redis is None or not control_ids:
+        return 0
+    epoch = int(await redis.incr(_EPOCH_KEY))
+    tombstone = f"{_TOMBSTONE}{epoch}"
+    for i in range(0, len(control_ids), _WRITE_CHUNK):
+        async with redis.pipeline(transaction=False) as pipe:
+            for cid in control_ids[i:i + _WRITE_CHUNK]:
+                pipe.set(_key(cid), tombstone, ex=_TOMBSTONE_TTL)
+            await pipe.execute()
+    return epoch
+
+
+async def invalidate_changed_cards(since: datetime) -> int:
+    """Invalidate the cards of every control written at/after ``since`` (after a controls ingestion)."""
+    from server.config.postgres import get_engine
+
+    async with get_engine().connect() as conn:
+        control_ids = await changed_card_ids(conn, since)
+    epoch = await invalidate_cards(control_ids)
+    logger.info("Invalidated {} control cards (epoch {})", len(control_ids), epoch)
+    return len(control_ids)
+
+
+def drop_card_cache_sync() -> int:
+    """Delete every cached card (after org node renames); returns the number of keys removed.
+
+    Readers that read the epoch before the drop can no longer fill any key.
+    """
+    from server.cache.keys import namespace_pattern
+    from server.config.redis import get_redis_sync_cache_client
+
+    redis = get_redis_sync_cache_client()
+    epoch = redis.eval(_BUMP_FLOOR_SCRIPT, 2, _EPOCH_KEY, _FLOOR_KEY)
+    logger.info("Card cache epoch floor raised to {}", epoch)
+    deleted = 0
+    for batch in _chunks(redis.scan_iter(match=namespace_pattern(CARD_NAMESPACE), count=_WRITE_CHUNK)):
+        deleted += redis.delete(*batch)
+    return deleted
+
+
+def _chunks(keys):
+    batch = []
+    for key in keys:
+        batch.append(key)
+        if len(batch) == _WRITE_CHUNK:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
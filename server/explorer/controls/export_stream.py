@@ -0,0 +1,104 @@
+"""Streaming export of a ranked controls search as NDJSON or CSV.
+
+The ranked list is resolved once by the caller; this module hydrates it
+with the single-statement hydration query (``build_hydration_query``)
+over a server-side cursor, fetching ``chunk_size`` rows at a time, and
+encodes each chunk to bytes as it arrives. At most one chunk of rows is
+held in the worker whatever the result size, and since
+``StreamingResponse`` awaits every send before pulling the next chunk, a
+slow client pauses the cursor instead of buffering rows in memory.
+
+Rows are hydrated straight from PostgreSQL (no card cache): an export
+reads every matched control once, which would only churn the cache.
+
+Usage:
+    chunks = stream_export(ranked, "csv", chunk_size=500)
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES["csv"])
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from typing import AsyncIterator, Iterable
+
+from server.config.postgres import get_engine
+from server.explorer.controls.hydration import CONTROL_COLS, build_hydration_query
+from server.explorer.shared.models import AIEnrichmentResponse, ControlWithDetailsResponse
+from server.logging_config import get_logger
+
+logger = get_logger(name=__name__)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+_RELATION_COLS = [
+    "children", "owns_functions", "owns_locations",
+    "related_functions", "related_locations", "risk_themes",
+]
+_AI_COLS = list(AIEnrichmentResponse.model_fields)
+CSV_COLUMNS = (
+    ["control_id", "search_score"]
+    + CONTROL_COLS
+    + ["parent_control_id"]
+    + _RELATION_COLS
+    + _AI_COLS
+    + ["parent_l1_yes_count", "similar_controls"]
+)
+# Multi-valued cells: "id (name); id (name)"
+_LIST_SEP = "; "
+
+
+def _named(items) -> str:
+    return _LIST_SEP.join(f"{item.id} ({item.name})" if item.name else item.id for item in items)
+
+
+def _csv_row(item: ControlWithDetailsResponse) -> list:
+    control, rels = item.control, item.relationships
+    return (
+        [control.control_id, item.search_score]
+        + [getattr(control, col) for col in CONTROL_COLS]
+        + [rels.parent.id if rels.parent else None]
+        + [_named(getattr(rels, col)) for col in _RELATION_COLS]
+        + [getattr(item.ai, col) if item.ai else None for col in _AI_COLS]
+        + [
+            item.parent_l1_score.yes_count if item.parent_l1_score else None,
+            _LIST_SEP.join(s.control_id for s in item.similar_controls),
+        ]
+    )
+
+
+def encode_chunk(items: Iterable[ControlWithDetailsResponse], fmt: str, header: bool = False) -> bytes:
+    """Encode hydrated rows as NDJSON lines or CSV records (with the header row if asked)."""
+    if fmt == "ndjson":
+        return b"".join(item.model_dump_json().encode() + b"\n" for item in items)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    writer.writerows(_csv_row(item) for item in items)
+    return buf.getvalue().encode()
+
+
+async def stream_export(
+    ranked: list[tuple[str, float]],
+    fmt: str,
+    chunk_size: int,
+) -> AsyncIterator[bytes]:
+    """Yield the hydrated ``ranked`` controls, in rank order, one encoded chunk at a time."""
+    if fmt == "csv":
+        yield encode_chunk([], fmt, header=True)
+    if not ranked:
+        return
+
+    q = build_hydration_query([cid for cid, _ in ranked], [score for _, score in ranked])
+    rows = 0
+    async with get_engine().connect() as conn:
+        result = await conn.stream(q.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            items = [ControlWithDetailsResponse.model_validate_json(row.doc) for row in partition]
+            rows += len(items)
+            yield encode_chunk(items, fmt)
+    logger.info("Exported {} of {} ranked controls as {}", rows, len(ranked), fmt)
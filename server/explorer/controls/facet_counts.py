@@ -0,0 +1,127 @@
+"""Sidebar facet counts for the current explorer search state.
+
+For the controls a search returns (sidebar filters, query and toolbar
+applied), counts how many fall under each status, level, key flag and
+risk theme, and under the subtree of each requested function / location
+node. The sidebar sends the org nodes it is showing; a node counts the
+distinct controls linked to it or any descendant, per relationship scope.
+
+With the worker's facet index loaded this is one pass of numpy
+reductions over the matched mask (``FacetIndex.facet_counts``). Otherwise
+PostgreSQL answers with three statements: status / level / key flag in a
+single ``GROUPING SETS`` aggregate, risk themes grouped by theme, and all
+requested nodes of one org type grouped by subtree root over the
+descendant closure.
+
+Usage:
+    counts = await count_facets(conn, control_ids, ["N1", "N2"], [], scope="both")
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import Text, any_, bindparam, func, select, tuple_, union, union_all
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from server.explorer.controls.candidates import text_array
+from server.explorer.controls.facet_index import get_facet_index
+from server.pipelines.controls.schema import (
+    src_controls_rel_owns_function as rel_owns_func,
+    src_controls_rel_owns_location as rel_owns_loc,
+    src_controls_rel_related_function as rel_related_func,
+    src_controls_rel_related_location as rel_related_loc,
+    src_controls_rel_risk_theme as rel_risk_theme,
+    src_controls_ver_control as ver_control,
+)
+from server.pipelines.orgs.schema import src_orgs_rel_closure as rel_closure
+
+# (org_type, scope) → relation table
+_ORG_RELATIONS = {
+    ("function", "owns"): rel_owns_func,
+    ("function", "related"): rel_related_func,
+    ("location", "owns"): rel_owns_loc,
+    ("location", "related"): rel_related_loc,
+}
+_LEVELS = ("Level 1", "Level 2")
+
+# GROUPING(status, level, key_control) of each grouping set: a bit is set
+# for every column aggregated away
+_BY_STATUS, _BY_LEVEL, _BY_KEY, _TOTAL = 0b011, 0b101, 0b110, 0b111
+
+
+async def _sql_toolbar_counts(conn, ids) -> dict:
+    vc = ver_control.c
+    grouping = func.grouping(vc.control_status, vc.hierarchy_level, vc.key_control)
+    result = await conn.execute(
+        select(vc.control_status, vc.hierarchy_level, vc.key_control, grouping, func.count())
+        .where(vc.tx_to.is_(None), vc.ref_control_id == any_(ids))
+        .group_by(func.grouping_sets(
+            tuple_(vc.control_status), tuple_(vc.hierarchy_level), tuple_(vc.key_control), tuple_(),
+        ))
+    )
+    counts: dict = {"total": 0, "status": {}, "level": {}, "key_control": {"true": 0, "false": 0}}
+    for status, level, key_control, group, n in result:
+        if group == _TOTAL:
+            counts["total"] = n
+        elif group == _BY_STATUS and status is not None:
+            counts["status"][status] = n
+        elif group == _BY_LEVEL and level in _LEVELS:
+            counts["level"][level] = n
+        elif group == _BY_KEY and key_control is not None:
+            counts["key_control"]["true" if key_control else "false"] = n
+    return counts
+
+
+async def _sql_risk_theme_counts(conn, ids) -> dict[str, int]:
+    rt = rel_risk_theme.c
+    result = await conn.execute(
+        select(rt.theme_id, func.count(rt.control_id.distinct()))
+        .where(rt.tx_to.is_(None), rt.control_id == any_(ids))
+        .group_by(rt.theme_id)
+    )
+    return dict(result.all())
+
+
+async def _sql_org_counts(conn, ids, node_ids: list[str], org_type: str, scope: str) -> dict[str, int]:
+    if not node_ids:
+        return {}
+    roots = bindparam("facet_nodes", value=sorted(set(node_ids)), type_=ARRAY(Text), unique=True)
+    root = func.unnest(roots).table_valued("node_id").render_derived("root")
+    # (root, node) for every requested node and each of its descendants
+    subtree = union_all(
+        select(root.c.node_id.label("root_id"), root.c.node_id.label("node_id")),
+        select(rel_closure.c.ancestor_node_id, rel_closure.c.descendant_node_id)
+        .where(rel_closure.c.ancestor_node_id == any_(roots)),
+    ).subquery("subtree")
+    links = union(*(
+        select(table.c.node_id, table.c.control_id)
+        .where(table.c.tx_to.is_(None), table.c.control_id == any_(ids))
+        for rel_scope in ("owns", "related") if scope in (rel_scope, "both")
+        for table in (_ORG_RELATIONS[(org_type, rel_scope)],)
+    )).subquery("links")
+    result = await conn.execute(
+        select(subtree.c.root_id, func.count(links.c.control_id.distinct()))
+        .join_from(subtree, links, links.c.node_id == subtree.c.node_id)
+        .group_by(subtree.c.root_id)
+    )
+    return dict(result.all())
+
+
+async def count_facets(
+    conn,
+    control_ids: list[str],
+    function_nodes: list[str],
+    location_nodes: list[str],
+    scope: str,
+) -> dict:
+    """Facet counts over ``control_ids`` (see the module docstring for the keys)."""
+    index = await get_facet_index()
+    if index is not None:
+        mask = index.mask_of(control_ids) & index.columns["current"]
+        return index.facet_counts(mask, function_nodes, location_nodes, scope)
+
+    ids = text_array("facet_ids", control_ids)
+    counts = await _sql_toolbar_counts(conn, ids)
+    counts["risk_themes"] = await _sql_risk_theme_counts(conn, ids)
+    counts["functions"] = await _sql_org_counts(conn, ids, function_nodes, "function", scope)
+    counts["locations"] = await _sql_org_counts(conn, ids, location_nodes, "location", scope)
+    return counts
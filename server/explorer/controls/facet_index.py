@@ -0,0 +1,511 @@
+"""In-process facet index for explorer sidebar and toolbar filters.
+
+Each API worker keeps a read-only snapshot of the filter-relevant control
+data, keyed by ``control_seq``:
+
+- membership: org node → controls (owns / related, function / location),
+  risk theme → controls, the org descendant closure, AU → function /
+  location nodes and CE → cross-linked nodes;
+- toolbar columns as numpy arrays: current, status (active flag and a
+  status code), key control, level,
+  created / last-modified dates, has-similar and the effective W-criteria
+  mask (``ws_yes_mask``);
+- a sorted array of upper-cased control_ids for control ID prefix lookups.
+
+Sidebar candidate sets (``_controls_by_*`` in the controls service, also
+used by the dashboard), toolbar filters and the sidebar facet counts are
+then answered in memory instead of by PostgreSQL.
+
+The index is built at worker startup. A successful ingestion bumps a
+generation counter in the Redis coordination DB (``signal_facet_index_reload``);
+workers compare it with the generation they loaded at most every
+``facet_index_check_interval`` seconds, and while a newer index is being
+built callers get None and use the SQL path, so results are never served
+from a stale snapshot for longer than that interval.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import select
+
+from server.explorer.controls.candidates import CandidateSet
+from server.logging_config import get_logger
+from server.pipelines.assessment_units.schema import src_au_ver_unit as ver_au
+from server.pipelines.controls.schema import (
+    ai_controls_similar_controls as similar_controls,
+    src_controls_ref_control as ref_control,
+    src_controls_rel_owns_function as rel_owns_func,
+    src_controls_rel_owns_location as rel_owns_loc,
+    src_controls_rel_related_function as rel_related_func,
+    src_controls_rel_related_location as rel_related_loc,
+    src_controls_rel_risk_theme as rel_risk_theme,
+    src_controls_ver_control as ver_control,
+)
+from server.pipelines.controls.ws_mask import ws_criteria_mask
+from server.pipelines.orgs.schema import (
+    src_orgs_rel_closure as rel_closure,
+    src_orgs_rel_cross_link as rel_cross_link,
+)
+from server.settings import get_settings
+
+logger = get_logger(name=__name__)
+
+_GENERATION_KEY = "explorer:facet_index:generation"
+
+# (org_type, scope) → relation table
+_ORG_RELATIONS = {
+    ("function", "owns"): rel_owns_func,
+    ("function", "related"): rel_related_func,
+    ("location", "owns"): rel_owns_loc,
+    ("location", "related"): rel_related_loc,
+}
+
+_LEVELS = {"Level 1": 1, "Level 2": 2}
+_LEVEL_NAMES = {code: name for name, code in _LEVELS.items()}
+
+
+def _epoch_us(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1_000_000)
+
+
+class FacetIndex:
+    """Immutable snapshot of control facet membership and toolbar columns."""
+
+    def __init__(
+        self,
+        generation: int,
+        control_ids: list[str | None],
+        columns: dict[str, np.ndarray],
+        relations: dict[tuple[str, str], dict[str, np.ndarray]],
+        risk_themes: dict[str, np.ndarray],
+        descendants: dict[str, list[str]],
+        au_nodes: dict[str, tuple[str | None, str | None]],
+        ce_links: dict[str, list[str]],
+        build_seconds: float,
+        statuses: list[str] | None = None,
+    ) -> None:
+        self.generation = generation
+        self.control_ids = control_ids
+        self.seq_of = {cid: seq for seq, cid in enumerate(control_ids) if cid is not None}
+        self.size = len(control_ids)
+        self.columns = columns
+        self.relations = relations
+        self.risk_themes = risk_themes
+        self.descendants = descendants
+        self.au_nodes = au_nodes
+        self.ce_links = ce_links
+        self.statuses = statuses or []  # control_status by code (columns["status"])
+        self.build_seconds = build_seconds
+        self.built_at = datetime.now(timezone.utc)
+        # Rank of each control_seq in control_id order (browse ordering)
+        order = sorted(self.seq_of.items())
+        self.id_rank = np.full(self.size, self.size, dtype=np.int32)
+        self.id_rank[[seq for _, seq in order]] = np.arange(len(order), dtype=np.int32)
+        # Upper-cased control_ids in sorted order and their control_seq (prefix lookups)
+        by_key = sorted((cid.upper(), seq) for cid, seq in self.seq_of.items())
+        self.id_keys = [key for key, _ in by_key]
+        self.id_key_seqs = np.fromiter((seq for _, seq in by_key), dtype=np.int32, count=len(by_key))
+
+    # ── Sidebar ─────────────────────────────────────────────────────
+
+    def _members(self, groups: dict[str, np.ndarray], keys: Iterable[str]) -> CandidateSet:
+        arrays = [groups[k] for k in set(keys) if k in groups]
+        if not arrays:
+            return CandidateSet()
+        return CandidateSet.from_seqs(np.concatenate(arrays))
+
+    def controls_by_org_nodes(self, node_ids: list[str], org_type: str, scope: str) -> CandidateSet:
+        """Controls linked to the nodes or any of their descendants (see ``_controls_by_org_nodes``)."""
+        subtree = set(node_ids)
+        for nid in node_ids:
+            subtree.update(self.descendants.get(nid, ()))
+        result = CandidateSet()
+        for rel_scope in ("owns", "related"):
+            if scope in (rel_scope, "both"):
+                result |= self._members(self.relations[(org_type, rel_scope)], subtree)
+        return result
+
+    def controls_by_aus(self, unit_ids: list[str], scope: str) -> CandidateSet:
+        func_ids = {self.au_nodes[u][0] for u in unit_ids if u in self.au_nodes} - {None}
+        loc_ids = {self.au_nodes[u][1] for u in unit_ids if u in self.au_nodes} - {None}
+        result = CandidateSet()
+        if func_ids:
+            result |= self.controls_by_org_nodes(list(func_ids), "function", scope)
+        if loc_ids:
+            result |= self.controls_by_org_nodes(list(loc_ids), "location", scope)
+        return result
+
+    def controls_by_ces(self, ce_node_ids: list[str], scope: str) -> CandidateSet:
+        linked = [nid for ce in ce_node_ids for nid in self.ce_links.get(ce, ())]
+        if not linked:
+            return CandidateSet()
+        return (
+            self.controls_by_org_nodes(linked, "function", scope)
+            | self.controls_by_org_nodes(linked, "location", scope)
+        )
+
+    def controls_by_risk_themes(self, theme_ids: list[str]) -> CandidateSet:
+        return self._members(self.risk_themes, theme_ids)
+
+    # ── Toolbar ─────────────────────────────────────────────────────
+
+    def toolbar_mask(self, toolbar) -> np.ndarray:
+        """Current controls passing the toolbar filters, by control_seq."""
+        c = self.columns
+        mask = c["current"].copy()
+        if toolbar is None:
+            return mask
+        if toolbar.active_only:
+            mask &= c["active"]
+        if toolbar.key_control is not None:
+            mask &= c["key_control"] == (1 if toolbar.key_control else 0)
+        if toolbar.level1 and not toolbar.level2:
+            mask &= c["level"] == 1
+        elif toolbar.level2 and not toolbar.level1:
+            mask &= c["level"] == 2
+        elif toolbar.level1 and toolbar.level2:
+            mask &= c["level"] > 0
+        if toolbar.date_from is not None or toolbar.date_to is not None:
+            name = "created_on" if toolbar.date_field == "created_on" else "last_modified_on"
+            mask &= c[f"{name}_valid"]
+            if toolbar.date_from is not None:
+                mask &= c[name] >= _epoch_us(toolbar.date_from)
+            if toolbar.date_to is not None:
+                mask &= c[name] <= _epoch_us(toolbar.date_to)
+        if toolbar.has_similar:
+            mask &= c["has_similar"]
+        ws_mask = ws_criteria_mask(toolbar.ws_filter_no or [])
+        if ws_mask:
+            mask &= (c["ws_yes"] & ws_mask) == 0
+        return mask
+
+    def browse(self, candidates: CandidateSet | None, toolbar) -> list[str]:
+        """control_ids passing the candidates and toolbar filters, in control_id order."""
+        mask = self.toolbar_mask(toolbar)
+        if candidates is not None:
+            mask &= candidates.to_mask(self.size)
+        seqs = np.flatnonzero(mask)
+        seqs = seqs[np.argsort(self.id_rank[seqs], kind="stable")]
+        return [self.control_ids[s] for s in seqs]
+
+    def filter_ranked(self, ranked: list[tuple[str, float]], toolbar) -> list[tuple[str, float]]:
+        """Keep the ranked controls that pass the toolbar filters (order preserved)."""
+        mask = self.toolbar_mask(toolbar)
+        seq_of = self.seq_of
+        return [(cid, score) for cid, score in ranked if cid in seq_of and mask[seq_of[cid]]]
+
+    # ── Facet counts ────────────────────────────────────────────────
+
+    def _subtree_members(self, node_id: str, org_type: str, scope: str) -> np.ndarray:
+        subtree = [node_id, *self.descendants.get(node_id, ())]
+        arrays = [
+            groups[nid]
+            for rel_scope in ("owns", "related") if scope in (rel_scope, "both")
+            for groups in (self.relations[(org_type, rel_scope)],)
+            for nid in subtree if nid in groups
+        ]
+        return np.unique(np.concatenate(arrays)) if arrays else np.zeros(0, dtype=np.int32)
+
+    def facet_counts(
+        self, mask: np.ndarray, function_nodes: list[str], location_nodes: list[str], scope: str,
+    ) -> dict:
+        """Controls in ``mask`` per status, level, key flag, risk theme and org node subtree."""
+        c = self.columns
+        statuses = np.bincount(c["status"][mask] + 1, minlength=len(self.statuses) + 1)
+        levels = np.bincount(c["level"][mask], minlength=len(_LEVELS) + 1)
+        key_flags = np.bincount(c["key_control"][mask] + 1, minlength=3)
+
+        def per_group(groups: dict[str, np.ndarray]) -> dict[str, int]:
+            counts = {key: int(np.count_nonzero(mask[seqs])) for key, seqs in groups.items()}
+            return {key: n for key, n in counts.items() if n}
+
+        return {
+            "total": int(np.count_nonzero(mask)),
+            "status": {name: int(n) for name, n in zip(self.statuses, statuses[1:]) if n},
+            "level": {_LEVEL_NAMES[code]: int(levels[code]) for code in _LEVEL_NAMES if levels[code]},
+            "key_control": {"true": int(key_flags[2]), "false": int(key_flags[1])},
+            "risk_themes": per_group(self.risk_themes),
+            "functions": per_group({n: self._subtree_members(n, "function", scope) for n in function_nodes}),
+            "locations": per_group({n: self._subtree_members(n, "location", scope) for n in location_nodes}),
+        }
+
+    def mask_of(self, control_ids: Iterable[str]) -> np.ndarray:
+        """Boolean array over control_seq marking ``control_ids``."""
+        mask = np.zeros(self.size, dtype=bool)
+        seq_of = self.seq_of
+        mask[[seq_of[cid] for cid in control_ids if cid in seq_of]] = True
+        return mask
+
+    # ── Control ID lookup ───────────────────────────────────────────
+
+    def id_prefix(
+        self, prefix: str, candidates: CandidateSet | None = None, limit: int | None = None,
+    ) -> list[str]:
+        """Current control_ids starting with ``prefix`` (case-insensitive), in ID order."""
+        key = prefix.upper()
+        lo = bisect_left(self.id_keys, key)
+        hi = bisect_left(self.id_keys, key + "\U0010ffff", lo)
+        seqs = self.id_key_seqs[lo:hi]
+        keep = self.columns["current"][seqs]
+        if candidates is not None:
+            keep &= candidates.to_mask(self.size)[seqs]
+        seqs = seqs[keep][:limit]
+        return [self.control_ids[s] for s in seqs]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = list(self.columns.values()) + [self.id_rank, self.id_key_seqs]
+        for groups in [*self.relations.values(), self.risk_themes]:
+            arrays.extend(groups.values())
+        return sum(a.nbytes for a in arrays)
+
+    def status(self) -> dict:
+        return {
+            "generation": self.generation,
+            "controls": len(self.seq_of),
+            "current_controls": int(self.columns["current"].sum()),
+            "array_bytes": self.nbytes,
+            "build_ms": round(self.build_seconds * 1000, 1),
+            "built_at": self.built_at.isoformat(),
+        }
+
+
+# ── Build ─────────────────────────────────────────────────────────────
+
+def _group(rows) -> dict[str, np.ndarray]:
+    groups: dict[str, list[int]] = defaultdict(list)
+    for key, seq in rows:
+        groups[key].append(seq)
+    return {key: np.unique(np.asarray(seqs, dtype=np.int32)) for key, seqs in groups.items()}
+
+
+async def _relation_groups(conn, table, key_col) -> dict[str, np.ndarray]:
+    result = await conn.execute(
+        select(key_col, ref_control.c.control_seq)
+        .join_from(table, ref_control, table.c.control_id == ref_control.c.control_id)
+        .where(table.c.tx_to.is_(None))
+    )
+    return _group(result)
+
+
+async def build_facet_index(conn, generation: int) -> FacetIndex:
+    """Load every facet and toolbar column from PostgreSQL."""
+    started = time.perf_counter()
+
+    refs = (await conn.execute(
+        select(ref_control.c.control_seq, ref_control.c.control_id, ref_control.c.ws_yes_mask)
+    )).all()
+    size = max((seq for seq, _, _ in refs), default=-1) + 1
+    control_ids: list[str | None] = [None] * size
+    for seq, cid, _ in refs:
+        control_ids[seq] = cid
+    seq_of = {cid: seq for seq, cid, _ in refs}
+
+    columns = {
+        "current": np.zeros(size, dtype=bool),
+        "active": np.zeros(size, dtype=bool),
+        "key_control": np.full(size, -1, dtype=np.int8),
+        "level": np.zeros(size, dtype=np.int8),
+        "created_on": np.zeros(size, dtype=np.int64),
+        "created_on_valid": np.zeros(size, dtype=bool),
+        "last_modified_on": np.zeros(size, dtype=np.int64),
+        "last_modified_on_valid": np.zeros(size, dtype=bool),
+        "status": np.full(size, -1, dtype=np.int16),
+        "has_similar": np.zeros(size, dtype=bool),
+        "ws_yes": np.zeros(size, dtype=np.uint16),
+    }
+    statuses: dict[str, int] = {}
+    for seq, _, ws_yes_mask in refs:
+        columns["ws_yes"][seq] = ws_yes_mask
+    result = await conn.execute(
+        select(
+            ver_control.c.ref_control_id,
+            ver_control.c.control_status,
+            ver_control.c.key_control,
+            ver_control.c.hierarchy_level,
+            ver_control.c.control_created_on,
+            ver_control.c.last_modified_on,
+        ).where(ver_control.c.tx_to.is_(None))
+    )
+    for cid, status, key_control, level, created_on, modified_on in result:
+        seq = seq_of.get(cid)
+        if seq is None:
+            continue
+        columns["current"][seq] = True
+        columns["active"][seq] = status == "Active"
+        if status is not None:
+            columns["status"][seq] = statuses.setdefault(status, len(statuses))
+        if key_control is not None:
+            columns["key_control"][seq] = 1 if key_control else 0
+        columns["level"][seq] = _LEVELS.get(level, 0)
+        if created_on is not None:
+            columns["created_on"][seq] = _epoch_us(created_on)
+            columns["created_on_valid"][seq] = True
+        if modified_on is not None:
+            columns["last_modified_on"][seq] = _epoch_us(modified_on)
+            columns["last_modified_on_valid"][seq] = True
+
+    result = await conn.execute(
+        select(ref_control.c.control_seq)
+        .join_from(similar_controls, ref_control, similar_controls.c.ref_control_id == ref_control.c.control_id)
+        .where(similar_controls.c.tx_to.is_(None))
+        .distinct()
+    )
+    columns["has_similar"][[row[0] for row in result]] = True
+
+    relations = {
+        key: await _relation_groups(conn, table, table.c.node_id)
+        for key, table in _ORG_RELATIONS.items()
+    }
+    risk_themes = await _relation_groups(conn, rel_risk_theme, rel_risk_theme.c.theme_id)
+
+    descendants: dict[str, list[str]] = defaultdict(list)
+    for ancestor, descendant in await conn.execute(
+        select(rel_closure.c.ancestor_node_id, rel_closure.c.descendant_node_id)
+    ):
+        descendants[ancestor].append(descendant)
+
+    au_nodes = {
+        unit_id: (func_id, loc_id)
+        for unit_id, func_id, loc_id in await conn.execute(
+            select(ver_au.c.ref_unit_id, ver_au.c.function_node_id, ver_au.c.location_node_id)
+            .where(ver_au.c.tx_to.is_(None))
+        )
+    }
+
+    ce_links: dict[str, list[str]] = defaultdict(list)
+    for in_id, out_id in await conn.execute(
+        select(rel_cross_link.c.in_node_id, rel_cross_link.c.out_node_id)
+        .where(rel_cross_link.c.tx_to.is_(None))
+    ):
+        ce_links[in_id].append(out_id)
+
+    return FacetIndex(
+        generation=generation,
+        control_ids=control_ids,
+        columns=columns,
+        relations=relations,
+        risk_themes=risk_themes,
+        descendants=dict(descendants),
+        au_nodes=au_nodes,
+        ce_links=dict(ce_links),
+        build_seconds=time.perf_counter() - started,
+        statuses=list(statuses),
+    )
+
+
+# ── Worker state + reload signal ──────────────────────────────────────
+
+_index: FacetIndex | None = None
+_last_check = 0.0
+_reload_task: asyncio.Task | None = None
+
+
+def _coordination_redis():
+    from server.config.redis import get_redis_coordination
+
+    try:
+        return get_redis_coordination()
+    except RuntimeError:
+        return None
+
+
+async def _read_generation() -> int | None:
+    redis = _coordination_redis()
+    if redis is None:
+        return None
+    try:
+        return int(await redis.get(_GENERATION_KEY) or 0)
+    except Exception as e:
+        logger.warning("Facet index generation read failed: {}", e)
+        return None
+
+
+async def load_facet_index() -> FacetIndex | None:
+    """Build this worker's index from PostgreSQL (startup and after a reload signal)."""
+    global _index, _last_check
+    if not get_settings().facet_index_enabled:
+        return None
+    from server.config.postgres import get_engine
+
+    _last_check = time.monotonic()
+    # Read the generation first: a signal during the build triggers another reload
+    generation = await _read_generation() or 0
+    async with get_engine().connect() as conn:
+        index = await build_facet_index(conn, generation)
+    _index, _last_check = index, time.monotonic()
+    logger.info(
+        "Facet index loaded: generation {}, {} controls, {:.1f} MiB, {:.0f} ms",
+        generation, index.size, index.nbytes / 2**20, index.build_seconds * 1000,
+    )
+    return index
+
+
+def _start_reload() -> None:
+    global _reload_task
+    if _reload_task is not None and not _reload_task.done():
+        return
+
+    async def _reload() -> None:
+        try:
+            await load_facet_index()
+        except Exception as e:
+            logger.error("Facet index reload failed, using SQL filters: {}", e)
+
+    _reload_task = asyncio.ensure_future(_reload())
+
+
+async def get_facet_index() -> FacetIndex | None:
+    """This worker's index, or None when disabled, not loaded or superseded by an ingestion."""
+    global _index, _last_check
+    settings = get_settings()
+    if not settings.facet_index_enabled:
+        return None
+    now = time.monotonic()
+    due = now - _last_check >= settings.facet_index_check_interval
+    if _index is None:
+        # Not loaded yet or the last build failed: retry at most once per interval
+        if _last_check and due:
+            _last_check = now
+            _start_reload()
+        return None
+    if due:
+        _last_check = now
+        generation = await _read_generation()
+        if generation is not None and generation != _index.generation:
+            logger.info("Facet index generation {} → {}: reloading", _index.generation, generation)
+            _index = None
+            _start_reload()
+    return _index
+
+
+async def signal_facet_index_reload() -> int:
+    """Tell every API worker to rebuild its index (call after a successful ingestion)."""
+    from server.config.redis import get_redis_coordination
+
+    return int(await get_redis_coordination().incr(_GENERATION_KEY))
+
+
+def signal_facet_index_reload_sync() -> int:
+    """Synchronous ``signal_facet_index_reload`` for CLI scripts and Celery code."""
+    from server.config.redis import get_redis_sync_client
+
+    return int(get_redis_sync_client().incr(_GENERATION_KEY))
+
+
+def get_facet_index_status() -> dict:
+    """Index size and generation of this worker (health endpoint)."""
+    if _index is None:
+        reloading = _reload_task is not None and not _reload_task.done()
+        return {"loaded": False, "reloading": reloading}
+    return {"loaded": True, "reloading": False, **_index.status()}
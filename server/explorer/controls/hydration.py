@@ -0,0 +1,210 @@
+"""Single-statement hydration of a controls search page.
+
+A page of ranked control_ids is hydrated with one SQL statement: the ids
+and their search scores are unnested ``WITH ORDINALITY`` (so PostgreSQL
+returns rows in rank order), each per-control collection — parent,
+children, owned / related functions and locations with their names, risk
+themes, similar controls — is a ``LEFT JOIN LATERAL`` with ``json_agg``,
+AI enrichment and taxonomy are plain left joins, and an L2 control's
+inherited L1 score is computed from its parent's enrichment in the same
+statement. Every row is one JSON document shaped like
+``ControlWithDetailsResponse`` and validated straight into it, so a page
+costs one round trip instead of a dozen.
+
+Usage:
+    items = await hydrate_page(conn, control_ids, score_map)
+"""
+
+from __future__ import annotations
+
+import operator
+from functools import reduce
+
+from sqlalchemy import Float, Integer, Text, and_, bindparam, case, cast, false, func, literal_column, or_, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+
+from server.explorer.shared.models import ControlResponse, ControlWithDetailsResponse
+from server.pipelines.controls.schema import (
+    ai_controls_model_enrichment as ai_enrichment,
+    ai_controls_model_taxonomy as ai_taxonomy,
+    ai_controls_similar_controls as similar_controls,
+    src_controls_rel_owns_function as rel_owns_func,
+    src_controls_rel_owns_location as rel_owns_loc,
+    src_controls_rel_parent as rel_parent,
+    src_controls_rel_related_function as rel_related_func,
+    src_controls_rel_related_location as rel_related_loc,
+    src_controls_rel_risk_theme as rel_risk_theme,
+    src_controls_ver_control as ver_control,
+)
+from server.pipelines.controls.ws_mask import L1_CRITERIA_COLS, L2_CRITERIA_COLS
+from server.pipelines.orgs.schema import (
+    src_orgs_ver_function as ver_function,
+    src_orgs_ver_location as ver_location,
+)
+
+# ControlResponse fields, all plain ver_control columns
+CONTROL_COLS = [name for name in ControlResponse.model_fields if name != "control_id"]
+
+_EMPTY_JSON_ARRAY = literal_column("'[]'::json")
+
+
+def _json_object(pairs: dict):
+    args = []
+    for key, value in pairs.items():
+        args.extend((literal_column(f"'{key}'"), value))
+    return func.json_build_object(*args)
+
+
+def _json_list(agg):
+    return func.coalesce(agg, _EMPTY_JSON_ARRAY)
+
+
+def _is_yes(col):
+    """SQL twin of ``(value or "").strip().lower() == "yes"``."""
+    return func.coalesce(func.lower(func.btrim(col, " \t\r\n")) == "yes", false())
+
+
+def _named_items(name: str, rel, owner, id_col, name_expr, name_join=None):
+    """LATERAL ``json_agg`` of ``{id, name}`` over the control's current ``rel`` rows."""
+    item = _json_object({"id": id_col, "name": name_expr})
+    q = select(func.json_agg(aggregate_order_by(item, id_col)).label("agg"))
+    q = q.select_from(rel.outerjoin(*name_join) if name_join else rel)
+    return q.where(rel.c.control_id == owner, rel.c.tx_to.is_(None)).lateral(name)
+
+
+def build_hydration_query(control_ids: list[str], scores: list[float | None]):
+    """One statement returning a ``ControlWithDetailsResponse`` JSON document per control, in order."""
+    vc = ver_control
+    page = (
+        func.unnest(
+            bindparam("page_ids", value=control_ids, type_=ARRAY(Text)),
+            bindparam("page_scores", value=scores, type_=ARRAY(Float)),
+        )
+        .table_valued("control_id", "search_score", with_ordinality="ord")
+        .render_derived(name="page")
+    )
+
+    parent = (
+        select(rel_parent.c.parent_control_id)
+        .where(rel_parent.c.child_control_id == vc.c.ref_control_id, rel_parent.c.tx_to.is_(None))
+        .order_by(rel_parent.c.tx_from.desc())
+        .limit(1)
+        .lateral("parent")
+    )
+    children = (
+        select(func.json_agg(aggregate_order_by(
+            _json_object({"id": rel_parent.c.child_control_id}), rel_parent.c.child_control_id,
+        )).label("agg"))
+        .where(rel_parent.c.parent_control_id == vc.c.ref_control_id, rel_parent.c.tx_to.is_(None))
+        .lateral("children")
+    )
+
+    def _org_items(name, rel, ver, name_expr):
+        name_join = (ver, and_(ver.c.ref_node_id == rel.c.node_id, ver.c.tx_to.is_(None)))
+        return _named_items(name, rel, vc.c.ref_control_id, rel.c.node_id, name_expr, name_join)
+
+    owns_functions = _org_items("owns_functions", rel_owns_func, ver_function, ver_function.c.name)
+    owns_locations = _org_items("owns_locations", rel_owns_loc, ver_location, ver_location.c.names[1])
+    related_functions = _org_items("related_functions", rel_related_func, ver_function, ver_function.c.name)
+    related_locations = _org_items("related_locations", rel_related_loc, ver_location, ver_location.c.names[1])
+    risk_themes = _named_items(
+        "risk_themes", rel_risk_theme, vc.c.ref_control_id,
+        rel_risk_theme.c.theme_id, rel_risk_theme.c.risk_theme_label,
+    )
+    similar = (
+        select(func.json_agg(aggregate_order_by(
+            _json_object({
+                "control_id": similar_controls.c.similar_control_id,
+                "score": similar_controls.c.score,
+                "rank": similar_controls.c.rank,
+                "category": similar_controls.c.category,
+            }),
+            similar_controls.c.rank,
+        )).label("agg"))
+        .where(similar_controls.c.ref_control_id == vc.c.ref_control_id, similar_controls.c.tx_to.is_(None))
+        .lateral("similar")
+    )
+
+    enr = ai_enrichment.alias("enr")
+    tax = ai_taxonomy.alias("tax")
+    parent_enr = ai_enrichment.alias("parent_enr")
+
+    ai = case(
+        (
+            or_(enr.c.ref_control_id.is_not(None), tax.c.ref_control_id.is_not(None)),
+            _json_object({
+                **{col: enr.c[col] for col in L1_CRITERIA_COLS + L2_CRITERIA_COLS},
+                "summary": enr.c.summary,
+                "primary_risk_theme_id": tax.c.primary_risk_theme_id,
+                "secondary_risk_theme_id": tax.c.secondary_risk_theme_id,
+            }),
+        ),
+    )
+    parent_criteria = [
+        _json_object({"key": literal_column(f"'{col.replace('_yes_no', '')}'"), "yes_no": _is_yes(parent_enr.c[col])})
+        for col in L1_CRITERIA_COLS
+    ]
+    parent_l1_score = case(
+        (
+            and_(vc.c.hierarchy_level == "Level 2", parent_enr.c.ref_control_id.is_not(None)),
+            _json_object({
+                "control_id": parent.c.parent_control_id,
+                "criteria": func.json_build_array(*parent_criteria),
+                "yes_count": reduce(operator.add, (cast(_is_yes(parent_enr.c[col]), Integer) for col in L1_CRITERIA_COLS)),
+                "total": literal_column(str(len(L1_CRITERIA_COLS))),
+            }),
+        ),
+    )
+
+    document = _json_object({
+        "control": _json_object({
+            "control_id": vc.c.ref_control_id,
+            **{col: vc.c[col] for col in CONTROL_COLS},
+        }),
+        "relationships": _json_object({
+            "parent": case(
+                (parent.c.parent_control_id.is_not(None), _json_object({"id": parent.c.parent_control_id})),
+            ),
+            "children": _json_list(children.c.agg),
+            "owns_functions": _json_list(owns_functions.c.agg),
+            "owns_locations": _json_list(owns_locations.c.agg),
+            "related_functions": _json_list(related_functions.c.agg),
+            "related_locations": _json_list(related_locations.c.agg),
+            "risk_themes": _json_list(risk_themes.c.agg),
+        }),
+        "ai": ai,
+        "parent_l1_score": parent_l1_score,
+        "similar_controls": _json_list(similar.c.agg),
+        "search_score": page.c.search_score,
+    })
+
+    joined = (
+        page.join(vc, and_(vc.c.ref_control_id == page.c.control_id, vc.c.tx_to.is_(None)))
+        .outerjoin(parent, true())
+        .outerjoin(children, true())
+        .outerjoin(owns_functions, true())
+        .outerjoin(owns_locations, true())
+        .outerjoin(related_functions, true())
+        .outerjoin(related_locations, true())
+        .outerjoin(risk_themes, true())
+        .outerjoin(similar, true())
+        .outerjoin(enr, and_(enr.c.ref_control_id == vc.c.ref_control_id, enr.c.tx_to.is_(None)))
+        .outerjoin(tax, and_(tax.c.ref_control_id == vc.c.ref_control_id, tax.c.tx_to.is_(None)))
+        .outerjoin(parent_enr, and_(
+            parent_enr.c.ref_control_id == parent.c.parent_control_id, parent_enr.c.tx_to.is_(None),
+        ))
+    )
+    return select(cast(document, Text).label("doc")).select_from(joined).order_by(page.c.ord)
+
+
+async def hydrate_page(
+    conn,
+    control_ids: list[str],
+    score_map: dict[str, float],
+) -> list[ControlWithDetailsResponse]:
+    """Load full details for a page of control_ids (preserving order) in one statement."""
+    if not control_ids:
+        return []
+    q = build_hydration_query(control_ids, [score_map.get(cid) for cid in control_ids])
+    result = await conn.execute(q)
+    return [ControlWithDetailsResponse.model_validate_json(doc) for doc in result.scalars()]
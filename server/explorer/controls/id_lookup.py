@@ -0,0 +1,124 @@
+"""Control ID lookup: prefix, substring and fuzzy (trigram) matching.
+
+Backs the explorer's ID search mode and the control ID typeahead. Queries
+are normalized first: a (mistyped) prefix becomes "CTRL-" and its number
+is zero-padded to the 10 digits of real IDs ("ctl 12345", "CTRL12345" and
+"ctrl_12345" all become "CTRL-0000012345"), unless it already starts with
+a zero, i.e. is typed left to right ("CTRL-00001" stays a prefix); a bare
+number stays a number.
+
+- Prefixes are answered from the facet index's sorted ID array when the
+  worker has it loaded, otherwise by ``ILIKE 'prefix%'``.
+- Bare numbers (the part users usually copy) match as substrings, and
+  mistyped IDs by trigram similarity (``%``); the typeahead also matches
+  titles by word similarity (``<%``). These run in PostgreSQL on the
+  pg_trgm GIN indexes over current rows (``idx_ver_control_id_trgm``,
+  ``idx_ver_control_title_trgm``).
+
+Usage:
+    ids = await prefix_ids(conn, normalize_control_id("ctrl 123"), candidates, limit=500)
+    hits = await fuzzy_matches(conn, "CTRL-000001234", candidates, limit=10)
+"""
+
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import Float, all_, any_, cast, func, literal, or_, select
+
+from server.explorer.controls.candidates import CandidateSet, control_id_filter, text_array
+from server.explorer.controls.facet_index import get_facet_index
+from server.pipelines.controls.schema import src_controls_ver_control as ver_control
+
+# Optional ID prefix (incl. common typos) followed by the numeric part
+_ID_LIKE = re.compile(r"(CTRL|CTL|CRTL|CTR|CRL)?[-_ ]*(\d+)")
+_CANONICAL_PREFIX = "CTRL-"
+# Real IDs are CTRL- followed by exactly this many digits
+_ID_DIGITS = 10
+# pg_trgm needs three characters to use the trigram indexes
+MIN_FUZZY_CHARS = 3
+
+
+def normalize_control_id(query: str) -> str:
+    """Canonical form of an ID-like query; other queries are only trimmed and upper-cased."""
+    q = query.strip().upper()
+    m = _ID_LIKE.fullmatch(q)
+    if m is None:
+        return q
+    prefix, digits = m.groups()
+    if not prefix:
+        return digits
+    if not digits.startswith("0"):
+        digits = digits.zfill(_ID_DIGITS)
+    return f"{_CANONICAL_PREFIX}{digits}"
+
+
+def looks_like_control_id(query: str) -> bool:
+    """Heuristic for auto mode: a (possibly mistyped) ID prefix, or a full 10-digit number."""
+    q = query.strip().upper()
+    if q.startswith(_CANONICAL_PREFIX.rstrip("-")):
+        return True
+    m = _ID_LIKE.fullmatch(q)
+    return m is not None and (m.group(1) is not None or len(m.group(2)) == _ID_DIGITS)
+
+
+async def prefix_ids(conn, prefix: str, candidates: CandidateSet | None, limit: int) -> list[str]:
+    """Current control_ids starting with ``prefix`` (case-insensitive), in ID order."""
+    index = await get_facet_index()
+    if index is not None:
+        return index.id_prefix(prefix, candidates, limit)
+
+    q = (
+        select(ver_control.c.ref_control_id)
+        .where(ver_control.c.tx_to.is_(None), ver_control.c.ref_control_id.istartswith(prefix, autoescape=True))
+        .order_by(ver_control.c.ref_control_id)
+        .limit(limit)
+    )
+    if candidates is not None:
+        q = q.where(control_id_filter(ver_control.c.ref_control_id, candidates))
+    return [row[0] for row in await conn.execute(q)]
+
+
+async def fuzzy_matches(
+    conn,
+    id_query: str,
+    candidates: CandidateSet | None,
+    limit: int,
+    title_query: str | None = None,
+    exclude: list[str] | None = None,
+) -> list[tuple[str, str | None, float]]:
+    """(control_id, control_title, score) of current controls matching by trigram, best first.
+
+    IDs containing ``id_query`` rank first, then by the best of the ID
+    similarity and (when ``title_query`` is given) the title word similarity.
+    """
+    cid, title = ver_control.c.ref_control_id, ver_control.c.control_title
+    contains = cid.icontains(id_query, autoescape=True)
+    matches = [contains, cid.op("%")(id_query)]
+    score = func.similarity(cid, id_query)
+    if title_query:
+        matches.append(literal(title_query).op("<%")(title))
+        score = func.greatest(score, func.word_similarity(title_query, title))
+
+    q = (
+        select(cid, title, cast(score, Float).label("score"))
+        .where(ver_control.c.tx_to.is_(None), or_(*matches))
+        .order_by(contains.desc(), score.desc(), cid)
+        .limit(limit)
+    )
+    if candidates is not None:
+        q = q.where(control_id_filter(cid, candidates))
+    if exclude:
+        q = q.where(cid != all_(text_array("exclude_ids", exclude)))
+    return [(row[0], row[1], float(row[2])) for row in await conn.execute(q)]
+
+
+async def control_titles(conn, control_ids: list[str]) -> dict[str, str | None]:
+    """Current titles of ``control_ids``."""
+    if not control_ids:
+        return {}
+    result = await conn.execute(
+        select(ver_control.c.ref_control_id, ver_control.c.control_title)
+        .where(ver_control.c.tx_to.is_(None), ver_control.c.ref_control_id == any_(text_array("ids", control_ids)))
+    )
+    return dict(result.all())
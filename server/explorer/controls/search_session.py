@@ -0,0 +1,147 @@
+"""Server-side search sessions for controls search pagination.
+
+The ranked ``(control_id, score)`` list a search produces is stored once
+per search fingerprint (sidebar filters, query, mode, fields, toolbar) as
+a Redis list of packed ``"<control_id>\\t<score>"`` entries with a short,
+sliding TTL; the keys live in the ``explorer`` cache namespace, so they
+are dropped with it after an ingestion. The cursor returned to the client
+names the session, the next offset and the last control_id served, so
+pages 2..N are one ``LRANGE`` plus hydration of the page instead of
+re-running the whole search pipeline.
+
+If a session has expired (or Redis is unavailable) the search is
+recomputed and resumed after the cursor's last control_id — keyset
+semantics, so a re-ranked list does not repeat or skip rows — falling
+back to the offset when that control is no longer in the results.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+from dataclasses import dataclass
+
+import orjson
+
+from server.logging_config import get_logger
+from server.settings import get_settings
+
+logger = get_logger(name=__name__)
+
+_KEY_PREFIX = "cache:explorer:search_session"
+_PUSH_CHUNK = 5_000  # entries per RPUSH
+
+
+@dataclass
+class SearchCursor:
+    """Decoded pagination cursor."""
+    session: str | None
+    offset: int
+    last_id: str | None = None
+
+
+def search_fingerprint(params) -> str:
+    """Stable ID of everything that determines the ranked list (not the page)."""
+    data = params.model_dump(mode="json", exclude={"cursor", "page_size"})
+    data["search_query"] = (data.get("search_query") or "").strip()
+    digest = hashlib.sha256(orjson.dumps(data, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return digest[:32]
+
+
+def encode_cursor(session: str, offset: int, last_id: str | None) -> str:
+    payload = orjson.dumps({"s": session, "o": offset, "k": last_id})
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor: str | None) -> SearchCursor:
+    """Decode a session cursor; legacy plain-offset cursors decode without a session."""
+    if not cursor:
+        return SearchCursor(session=None, offset=0)
+    try:
+        raw = base64.urlsafe_b64decode(cursor)
+    except Exception:
+        return SearchCursor(session=None, offset=0)
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        data = None
+    if isinstance(data, dict):
+        offset = data.get("o")
+        return SearchCursor(
+            session=data.get("s") if isinstance(data.get("s"), str) else None,
+            offset=offset if isinstance(offset, int) and offset >= 0 else 0,
+            last_id=data.get("k") if isinstance(data.get("k"), str) else None,
+        )
+    try:
+        return SearchCursor(session=None, offset=max(int(raw.decode()), 0))
+    except ValueError:
+        return SearchCursor(session=None, offset=0)
+
+
+def _key(session: str) -> str:
+    return f"{_KEY_PREFIX}:{session}"
+
+
+def _redis():
+    from server.config.redis import get_redis
+
+    try:
+        return get_redis()
+    except RuntimeError:
+        return None
+
+
+def _unpack(entries: list[str]) -> list[tuple[str, float]]:
+    page: list[tuple[str, float]] = []
+    for entry in entries:
+        cid, _, score = entry.rpartition("\t")
+        page.append((cid, float(score)))
+    return page
+
+
+async def load_page(session: str, offset: int, size: int) -> tuple[list[tuple[str, float]], int] | None:
+    """Return ``(page, total)`` from a live session, or None if it is gone."""
+    redis = _redis()
+    if redis is None:
+        return None
+    key = _key(session)
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.lrange(key, offset, offset + size - 1)
+            pipe.llen(key)
+            pipe.expire(key, get_settings().search_session_ttl)
+            entries, total, _ = await pipe.execute()
+    except Exception as e:
+        logger.warning("Search session read failed for {}: {}", session, e)
+        return None
+    if not total:
+        return None
+    return _unpack(entries), int(total)
+
+
+async def store_session(session: str, ranked: list[tuple[str, float]]) -> bool:
+    """Store a ranked list under ``session`` (replacing any previous one)."""
+    redis = _redis()
+    if redis is None or not ranked:
+        return False
+    key = _key(session)
+    try:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            for i in range(0, len(ranked), _PUSH_CHUNK):
+                pipe.rpush(key, *(f"{cid}\t{score:.6g}" for cid, score in ranked[i:i + _PUSH_CHUNK]))
+            pipe.expire(key, get_settings().search_session_ttl)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning("Search session write failed for {}: {}", session, e)
+        return False
+    return True
+
+
+def resume_offset(ranked: list[tuple[str, float]], cursor: SearchCursor) -> int:
+    """Position after the cursor's last control_id in a recomputed list."""
+    if cursor.last_id is not None:
+        for idx, (cid, _) in enumerate(ranked):
+            if cid == cursor.last_id:
+                return idx + 1
+    return cursor.offset
@@ -3,22 +3,54 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 from collections import defaultdict
+from datetime import timezone
+from typing import AsyncIterator
 
-from sqlalchemy import select, func, and_, or_, literal_column, union_all, intersect_all, text
+from sqlalchemy import select, func, and_, or_, any_, literal_column, union_all, intersect_all, text
 
+from server.cache import cached
 from server.config.postgres import get_engine
 from server.config.qdrant import get_qdrant_client
+from server.explorer.controls.candidates import (
+    CandidateSet,
+    control_id_filter,
+    load_candidate_set,
+    seq_ranges,
+    text_array,
+)
+from server.explorer.controls.card_cache import get_cards, put_cards
+from server.explorer.controls.export_stream import stream_export
+from server.explorer.controls.facet_counts import count_facets
+from server.explorer.controls.facet_index import get_facet_index
+from server.explorer.controls.hydration import hydrate_page
+from server.explorer.controls.id_lookup import (
+    MIN_FUZZY_CHARS,
+    control_titles,
+    fuzzy_matches,
+    looks_like_control_id,
+    normalize_control_id,
+    prefix_ids,
+)
+from server.explorer.controls.search_session import (
+    decode_cursor,
+    encode_cursor,
+    load_page,
+    resume_offset,
+    search_fingerprint,
+    store_session,
+)
+from server.explorer.shared.embedding_providers import semantic_search_available
 from server.explorer.shared.embeddings import embed_query
 from server.explorer.shared.models import (
     SEARCH_FIELD_NAMES,
     AIEnrichmentDetailResponse,
-    AIEnrichmentResponse,
     ControlBriefResponse,
     ControlDescriptionsResponse,
     ControlDetailResponse,
     ControlDiffResponse,
+    ControlFacetCountsRequest,
+    ControlFacetCountsResponse,
     ControlRelationshipsResponse,
     ControlResponse,
     ControlVersionListResponse,
@@ -27,6 +59,8 @@ from server.explorer.shared.models import (
     ControlWithDetailsResponse,
     ControlsSearchParams,
     ControlsSearchResponse,
+    ControlTypeaheadItem,
+    ControlTypeaheadResponse,
     NamedItem,
     ParentL1ScoreResponse,
     SimilarControlResponse,
@@ -36,7 +70,9 @@ from server.settings import get_settings
 
 # Schema imports
 from server.pipelines.controls.schema import (
+    src_controls_ref_control as ref_control,
     src_controls_ver_control as ver_control,
+    src_controls_ver_control_diff as ver_control_diff,
     src_controls_rel_parent as rel_parent,
     src_controls_rel_owns_function as rel_owns_func,
     src_controls_rel_owns_location as rel_owns_loc,
@@ -52,17 +88,21 @@ from server.pipelines.orgs.schema import (
     src_orgs_ver_function as ver_function,
     src_orgs_ver_location as ver_location,
     src_orgs_rel_cross_link as rel_cross_link,
-    src_orgs_rel_child as rel_child,
 )
+from server.pipelines.orgs.closure import subtree_node_ids
 from server.pipelines.assessment_units.schema import src_au_ver_unit as ver_au
-from server.pipelines.controls.qdrant_service import control_id_to_uuid, NAMED_VECTORS
+from server.pipelines.controls.qdrant_service import CONTROL_SEQ_FIELD, NAMED_VECTORS
+from server.pipelines.controls.version_diff import version_snapshots
+from server.pipelines.controls.ws_mask import L1_CRITERIA_COLS, L2_CRITERIA_COLS, ws_criteria_mask, ws_filter
 
 from qdrant_client.models import (
     FieldCondition,
     Filter,
+    Fusion,
+    FusionQuery,
     MatchAny,
-    NamedVector,
-    SearchRequest,
+    Prefetch,
+    Range,
 )
 
 logger = get_logger(name=__name__)
@@ -73,6 +113,12 @@ _RRF_K = 60
 # Batch size for IN clauses — asyncpg limit is 32767 parameters per statement
 _BATCH_SIZE = 30_000
 
+# Most controls returned by the ID search mode
+_ID_SEARCH_LIMIT = 500
+
+# Hits prefetched per named vector before server-side RRF fusion
+_SEMANTIC_PREFETCH_LIMIT = 200
+
 # Map feature_prep field names → tsvector column names
 _TS_COLUMN_MAP = {
     "what": "ts_what",
@@ -84,22 +130,6 @@ _TS_COLUMN_MAP = {
     "local_functional_information": "ts_local_functional_information",
 }
 
-# L1 W-criteria yes/no columns
-_L1_YES_NO_COLS = [
-    "what_yes_no", "where_yes_no", "who_yes_no", "when_yes_no",
-    "why_yes_no", "what_why_yes_no", "risk_theme_yes_no",
-]
-# L2 operational criteria yes/no columns
-_L2_YES_NO_COLS = [
-    "frequency_yes_no", "preventative_detective_yes_no",
-    "automation_level_yes_no", "followup_yes_no",
-    "escalation_yes_no", "evidence_yes_no", "abbreviations_yes_no",
-]
-# Mapping: WS criterion key -> DB column name
-_WS_KEY_TO_COL = {col.replace("_yes_no", ""): col for col in _L1_YES_NO_COLS + _L2_YES_NO_COLS}
-_L1_KEYS = {col.replace("_yes_no", "") for col in _L1_YES_NO_COLS}
-_L2_KEYS = {col.replace("_yes_no", "") for col in _L2_YES_NO_COLS}
-
 # _details narrative columns on enrichment (for detail overlay)
 _DETAILS_COL_NAMES = [
     "what_details", "where_details", "who_details", "when_details",
@@ -129,19 +159,6 @@ def _is_current(col):
     return col.is_(None)
 
 
-def _encode_cursor(offset: int) -> str:
-    return base64.urlsafe_b64encode(str(offset).encode()).decode()
-
-
-def _decode_cursor(cursor: str | None) -> int:
-    if not cursor:
-        return 0
-    try:
-        return int(base64.urlsafe_b64decode(cursor).decode())
-    except Exception:
-        return 0
-
-
 # ──────────────────────────────────────────────────────────────────────
 # Main entry point
 # ──────────────────────────────────────────────────────────────────────
@@ -150,49 +167,43 @@ async def search_controls(
     params: ControlsSearchParams,
     graph_token: str | None = None,
 ) -> ControlsSearchResponse:
-    """Orchestrate controls search: sidebar filter → search → toolbar filter → paginate → hydrate."""
+    """Orchestrate controls search: sidebar filter → search → toolbar filter → paginate → hydrate.
+
+    The ranked list is kept in a search session (search_session.py) and
+    the cursor points into it, so later pages only hydrate their rows.
+    """
     engine = get_engine()
+    session = search_fingerprint(params)
+    cursor = decode_cursor(params.cursor)
 
     async with engine.connect() as conn:
-        # 1. Sidebar filter → candidate control_ids (or None = all)
-        candidates = await _resolve_sidebar_candidates(conn, params)
-
-        # 2. Determine search mode
-        query = (params.search_query or "").strip()
-        mode = params.search_mode
-
-        if query and not mode:
-            # Auto-detect: if looks like a control ID, use ID mode
-            mode = "id" if _looks_like_control_id(query) else "hybrid"
-
-        # 3. Search → ranked list of (control_id, score)
-        has_search = bool(query)
-        if query and mode == "id":
-            ranked = await _search_by_id(conn, query, candidates)
-        elif query and mode == "keyword":
-            ranked = await _search_by_keyword(conn, query, params.search_fields, candidates)
-        elif query and mode == "semantic":
-            ranked = await _search_by_semantic(query, params.search_fields, candidates, graph_token)
-        elif query and mode == "hybrid":
-            ranked = await _search_hybrid(conn, query, params.search_fields, candidates, graph_token)
+        cached = None
+        if cursor.session == session:
+            cached = await load_page(session, cursor.offset, params.page_size)
+
+        if cached is not None:
+            page, total_estimate = cached
+            offset = cursor.offset
         else:
-            # No search query: push toolbar filters directly into the browse
-            # query to avoid a separate IN-clause that could exceed asyncpg's
-            # 32 767 parameter limit with large control sets.
-            ranked = await _browse_all(conn, candidates, toolbar=params.toolbar)
-            has_search = False
-
-        # 4. Toolbar filters — only needed when a search was performed
-        #    (browse_all already applied them inline)
-        if has_search and _has_toolbar_filters(params.toolbar):
-            ranked = await _apply_toolbar_filters(conn, ranked, params.toolbar)
-
-        # 5. Paginate
-        total_estimate = len(ranked)
-        offset = _decode_cursor(params.cursor)
-        page = ranked[offset: offset + params.page_size]
+            ranked = await _rank_controls(conn, params, graph_token)
+
+            # 5. Paginate (a foreign session's cursor starts a new search)
+            total_estimate = len(ranked)
+            if cursor.session is None:
+                offset = cursor.offset
+            elif cursor.session == session:
+                offset = resume_offset(ranked, cursor)
+            else:
+                offset = 0
+            page = ranked[offset: offset + params.page_size]
+            if offset + params.page_size < total_estimate:
+                await store_session(session, ranked)
+
         has_more = (offset + params.page_size) < total_estimate
-        next_cursor = _encode_cursor(offset + params.page_size) if has_more else None
+        next_cursor = (
+            encode_cursor(session, offset + params.page_size, page[-1][0])
+            if has_more and page else None
+        )
 
         if not page:
             return ControlsSearchResponse(
@@ -209,6 +220,66 @@ async def search_controls(
         )
 
 
+async def export_search_results(
+    params: ControlsSearchParams,
+    fmt: str,
+    graph_token: str | None = None,
+) -> AsyncIterator[bytes]:
+    """Rank the whole search once and return an iterator streaming it as NDJSON / CSV.
+
+    Ranking runs before the first byte is sent, so its errors still surface
+    as a normal error response; hydration then streams (export_stream.py).
+    Pagination fields of ``params`` are ignored.
+    """
+    async with get_engine().connect() as conn:
+        ranked = await _rank_controls(conn, params, graph_token)
+    return stream_export(ranked, fmt, get_settings().export_stream_chunk_size)
+
+
+async def _rank_controls(
+    conn,
+    params: ControlsSearchParams,
+    graph_token: str | None,
+) -> list[tuple[str, float]]:
+    """Run the search pipeline (steps 1-4) and return the full ranked list."""
+    # 1. Sidebar filter → candidate bitset (or None = all)
+    candidates = await _resolve_sidebar_candidates(conn, params)
+    if candidates is not None and not len(candidates):
+        return []
+
+    # 2. Determine search mode
+    query = (params.search_query or "").strip()
+    mode = params.search_mode
+
+    if query and not mode:
+        # Auto-detect: if looks like a control ID, use ID mode
+        mode = "id" if looks_like_control_id(query) else "hybrid"
+
+    # 3. Search → ranked list of (control_id, score)
+    has_search = bool(query)
+    if query and mode == "id":
+        ranked = await _search_by_id(conn, query, candidates)
+    elif query and mode == "keyword":
+        ranked = await _search_by_keyword(conn, query, params.search_fields, candidates)
+    elif query and mode == "semantic":
+        ranked = await _search_by_semantic(query, params.search_fields, candidates, graph_token)
+    elif query and mode == "hybrid":
+        ranked = await _search_hybrid(conn, query, params.search_fields, candidates, graph_token)
+    else:
+        # No search query: push toolbar filters directly into the browse
+        # query to avoid a separate IN-clause that could exceed asyncpg's
+        # 32 767 parameter limit with large control sets.
+        ranked = await _browse_all(conn, candidates, toolbar=params.toolbar)
+        has_search = False
+
+    # 4. Toolbar filters — only needed when a search was performed
+    #    (browse_all already applied them inline)
+    if has_search and _has_toolbar_filters(params.toolbar):
+        ranked = await _apply_toolbar_filters(conn, ranked, params.toolbar)
+
+    return ranked
+
+
 # ──────────────────────────────────────────────────────────────────────
 # Sidebar filter resolution
 # ──────────────────────────────────────────────────────────────────────
@@ -216,14 +287,14 @@ async def search_controls(
 async def _resolve_sidebar_candidates(
     conn,
     params: ControlsSearchParams,
-) -> set[str] | None:
-    """Resolve sidebar filter selections to a set of control_ids, or None if no filters."""
+) -> CandidateSet | None:
+    """Resolve sidebar filter selections to a control_seq bitset, or None if no filters."""
     sidebar = params.sidebar
     if not sidebar.has_any:
         return None
 
     scope = params.relationship_scope
-    category_sets: list[set[str]] = []
+    category_sets: list[CandidateSet] = []
 
     # Functions
     if sidebar.functions:
@@ -259,50 +330,25 @@ async def _resolve_sidebar_candidates(
         for s in category_sets[1:]:
             result = result & s
     else:
-        result = set()
+        result = CandidateSet()
         for s in category_sets:
             result = result | s
 
+    logger.debug("Sidebar candidates: {} controls in {} bytes", len(result), result.nbytes)
     return result
 
 
-async def _expand_to_descendants(
-    conn, node_ids: list[str],
-) -> list[str]:
-    """Expand node_ids to include all descendant nodes via rel_child.
-
-    Iterative level-by-level traversal (max 10 levels) to avoid runaway recursion.
-    """
-    all_ids = set(node_ids)
-    current_level = set(node_ids)
-
-    for _ in range(10):
-        if not current_level:
-            break
-        q = (
-            select(rel_child.c.out_node_id)
-            .where(rel_child.c.in_node_id.in_(list(current_level)))
-            .where(_is_current(rel_child.c.tx_to))
-        )
-        rows = (await conn.execute(q)).fetchall()
-        children = {r[0] for r in rows} - all_ids
-        if not children:
-            break
-        all_ids.update(children)
-        current_level = children
-
-    return list(all_ids)
-
-
 async def _controls_by_org_nodes(
     conn, node_ids: list[str], org_type: str, scope: str,
-) -> set[str]:
-    """Find control_ids linked to given org node_ids via owns/related tables.
+) -> CandidateSet:
+    """Find controls linked to given org node_ids via owns/related tables.
 
-    Automatically expands node_ids to include all descendants (cascading).
+    Automatically expands node_ids to include all descendants (cascading),
+    via the materialized org closure inside the same query.
     """
-    # Expand selected nodes to include all children/grandchildren
-    expanded_ids = await _expand_to_descendants(conn, node_ids)
+    index = await get_facet_index()
+    if index is not None:
+        return index.controls_by_org_nodes(node_ids, org_type, scope)
 
     queries = []
 
@@ -311,32 +357,33 @@ async def _controls_by_org_nodes(
     else:
         owns_tbl, related_tbl = rel_owns_loc, rel_related_loc
 
+    tables = []
     if scope in ("owns", "both"):
-        q = (
-            select(owns_tbl.c.control_id)
-            .where(owns_tbl.c.node_id.in_(expanded_ids))
-            .where(_is_current(owns_tbl.c.tx_to))
-        )
-        queries.append(q)
-
+        tables.append(owns_tbl)
     if scope in ("related", "both"):
+        tables.append(related_tbl)
+
+    for tbl in tables:
         q = (
-            select(related_tbl.c.control_id)
-            .where(related_tbl.c.node_id.in_(expanded_ids))
-            .where(_is_current(related_tbl.c.tx_to))
+            select(ref_control.c.control_seq)
+            .join_from(tbl, ref_control, tbl.c.control_id == ref_control.c.control_id)
+            .where(tbl.c.node_id.in_(subtree_node_ids(node_ids)))
+            .where(_is_current(tbl.c.tx_to))
         )
         queries.append(q)
 
     if not queries:
-        return set()
+        return CandidateSet()
 
-    combined = union_all(*queries)
-    rows = (await conn.execute(combined)).fetchall()
-    return {r[0] for r in rows}
+    return await load_candidate_set(conn, union_all(*queries))
 
 
-async def _controls_by_aus(conn, unit_ids: list[str], scope: str) -> set[str]:
+async def _controls_by_aus(conn, unit_ids: list[str], scope: str) -> CandidateSet:
     """Resolve AU → function/location node_ids → controls."""
+    index = await get_facet_index()
+    if index is not None:
+        return index.controls_by_aus(unit_ids, scope)
+
     q = (
         select(ver_au.c.function_node_id, ver_au.c.location_node_id)
         .where(ver_au.c.ref_unit_id.in_(unit_ids))
@@ -347,7 +394,7 @@ async def _controls_by_aus(conn, unit_ids: list[str], scope: str) -> set[str]:
     func_ids = list({r[0] for r in rows if r[0]})
     loc_ids = list({r[1] for r in rows if r[1]})
 
-    results: set[str] = set()
+    results = CandidateSet()
     if func_ids:
         results |= await _controls_by_org_nodes(conn, func_ids, "function", scope)
     if loc_ids:
@@ -355,8 +402,12 @@ async def _controls_by_aus(conn, unit_ids: list[str], scope: str) -> set[str]:
     return results
 
 
-async def _controls_by_ces(conn, ce_node_ids: list[str], scope: str) -> set[str]:
+async def _controls_by_ces(conn, ce_node_ids: list[str], scope: str) -> CandidateSet:
     """Resolve CE → cross_link → function/location node_ids → controls."""
+    index = await get_facet_index()
+    if index is not None:
+        return index.controls_by_ces(ce_node_ids, scope)
+
     q = (
         select(rel_cross_link.c.out_node_id)
         .where(rel_cross_link.c.in_node_id.in_(ce_node_ids))
@@ -366,156 +417,150 @@ async def _controls_by_ces(conn, ce_node_ids: list[str], scope: str) -> set[str]
     linked_node_ids = [r[0] for r in rows]
 
     if not linked_node_ids:
-        return set()
+        return CandidateSet()
 
     # Try both function and location paths
-    results: set[str] = set()
+    results = CandidateSet()
     results |= await _controls_by_org_nodes(conn, linked_node_ids, "function", scope)
     results |= await _controls_by_org_nodes(conn, linked_node_ids, "location", scope)
     return results
 
 
-async def _controls_by_risk_themes(conn, theme_ids: list[str]) -> set[str]:
-    """Find control_ids linked to given risk theme_ids."""
+async def _controls_by_risk_themes(conn, theme_ids: list[str]) -> CandidateSet:
+    """Find controls linked to given risk theme_ids."""
+    index = await get_facet_index()
+    if index is not None:
+        return index.controls_by_risk_themes(theme_ids)
+
     q = (
-        select(rel_risk_theme.c.control_id)
-        .where(rel_risk_theme.c.theme_id.in_(theme_ids))
+        select(ref_control.c.control_seq)
+        .join_from(rel_risk_theme, ref_control, rel_risk_theme.c.control_id == ref_control.c.control_id)
+        .where(rel_risk_theme.c.theme_id == any_(text_array("theme_ids", theme_ids)))
         .where(_is_current(rel_risk_theme.c.tx_to))
     )
-    rows = (await conn.execute(q)).fetchall()
-    return {r[0] for r in rows}
+    return await load_candidate_set(conn, q)
 
 
 # ──────────────────────────────────────────────────────────────────────
 # Search modes
 # ──────────────────────────────────────────────────────────────────────
 
-def _looks_like_control_id(q: str) -> bool:
-    """Heuristic: if query starts with CTL- or is purely alphanumeric+dashes, treat as ID."""
-    q = q.strip().upper()
-    return q.startswith("CTL-") or q.startswith("CTL_")
-
-
 async def _search_by_id(
-    conn, query: str, candidates: set[str] | None,
+    conn, query: str, candidates: CandidateSet | None,
 ) -> list[tuple[str, float]]:
-    """Exact or prefix match on control_id."""
-    pattern = query.strip() + "%"
-    q = (
-        select(ver_control.c.ref_control_id)
-        .where(_is_current(ver_control.c.tx_to))
-        .where(ver_control.c.ref_control_id.ilike(pattern))
-        .order_by(ver_control.c.ref_control_id)
-        .limit(500)
-    )
-    if candidates is not None:
-        q = q.where(ver_control.c.ref_control_id.in_(candidates))
-
-    rows = (await conn.execute(q)).fetchall()
-    return [(r[0], 1.0) for r in rows]
+    """Prefix match on control_id; substring / trigram matches when nothing has the prefix."""
+    key = normalize_control_id(query)
+    ids = await prefix_ids(conn, key, candidates, _ID_SEARCH_LIMIT)
+    if ids or len(key) < MIN_FUZZY_CHARS:
+        return [(cid, 1.0) for cid in ids]
+    return [(cid, score) for cid, _, score in await fuzzy_matches(conn, key, candidates, _ID_SEARCH_LIMIT)]
 
 
 async def _search_by_keyword(
     conn,
     query: str,
     search_fields: list[str],
-    candidates: set[str] | None,
+    candidates: CandidateSet | None,
 ) -> list[tuple[str, float]]:
-    """Full-text search via tsvector columns in ai_controls_model_feature_prep."""
-    ts_query = func.plainto_tsquery("english", query)
+    """Full-text search via tsvector columns in ai_controls_model_feature_prep.
 
-    # Build rank expression: sum of ts_rank across selected fields
-    rank_parts = []
-    for field in search_fields:
-        ts_col_name = _TS_COLUMN_MAP.get(field)
-        if ts_col_name:
-            ts_col = getattr(ai_feature_prep.c, ts_col_name)
-            rank_parts.append(func.coalesce(func.ts_rank(ts_col, ts_query), 0))
+    Searching every keyword field uses the weighted ``ts_combined`` vector:
+    one GIN index scan, ranked with ``ts_rank_cd`` (title > description >
+    3W texts > evidence). A narrower field selection ORs the per-field
+    ``@@`` matches (a BitmapOr over their GIN indexes) and sums ``ts_rank``.
+    """
+    ts_query = func.plainto_tsquery("english", query)
+    fp = ai_feature_prep.c
 
-    if not rank_parts:
+    ts_cols = [getattr(fp, _TS_COLUMN_MAP[f]) for f in dict.fromkeys(search_fields) if f in _TS_COLUMN_MAP]
+    if not ts_cols:
         return []
 
-    total_rank = rank_parts[0]
-    for part in rank_parts[1:]:
-        total_rank = total_rank + part
+    if len(ts_cols) == len(_TS_COLUMN_MAP):
+        rank = func.ts_rank_cd(fp.ts_combined, ts_query)
+        match = fp.ts_combined.op("@@")(ts_query)
+    else:
+        rank = func.coalesce(func.ts_rank(ts_cols[0], ts_query), 0)
+        for ts_col in ts_cols[1:]:
+            rank = rank + func.coalesce(func.ts_rank(ts_col, ts_query), 0)
+        match = or_(*(ts_col.op("@@")(ts_query) for ts_col in ts_cols))
 
     q = (
-        select(
-            ai_feature_prep.c.ref_control_id,
-            total_rank.label("rank"),
-        )
-        .where(_is_current(ai_feature_prep.c.tx_to))
-        .where(total_rank > 0)
-        .order_by(total_rank.desc())
+        select(fp.ref_control_id, rank.label("rank"))
+        .where(_is_current(fp.tx_to), match)
+        .order_by(rank.desc())
         .limit(2000)
     )
 
     if candidates is not None:
-        q = q.where(ai_feature_prep.c.ref_control_id.in_(candidates))
+        q = q.where(control_id_filter(fp.ref_control_id, candidates))
 
     rows = (await conn.execute(q)).fetchall()
     return [(r[0], float(r[1])) for r in rows]
 
 
+def _qdrant_seq_filter(candidates: CandidateSet) -> Filter:
+    """Qdrant filter matching the candidates' ``control_seq`` payload.
+
+    Runs of consecutive seqs (typical for org subtrees, which were ingested
+    together) become range conditions and the remaining singletons one
+    ``MatchAny``, so even a large sidebar filter stays a compact request
+    evaluated against the integer payload index.
+    """
+    conditions = []
+    singles: list[int] = []
+    for lo, hi in seq_ranges(candidates):
+        if lo == hi:
+            singles.append(lo)
+        else:
+            conditions.append(FieldCondition(key=CONTROL_SEQ_FIELD, range=Range(gte=lo, lte=hi)))
+    if singles:
+        conditions.append(FieldCondition(key=CONTROL_SEQ_FIELD, match=MatchAny(any=singles)))
+    return Filter(should=conditions)
+
+
 async def _search_by_semantic(
     query: str,
     search_fields: list[str],
-    candidates: set[str] | None,
+    candidates: CandidateSet | None,
     graph_token: str | None,
 ) -> list[tuple[str, float]]:
-    """Semantic search via Qdrant named vectors, merged with RRF."""
-    embedding = await embed_query(query, graph_token=graph_token)
-    settings = get_settings()
-    qdrant = get_qdrant_client()
-    collection = settings.qdrant_collection
-
-    # Build Qdrant filter if we have candidates
-    qdrant_filter = None
-    if candidates is not None and len(candidates) <= 5000:
-        point_ids = [control_id_to_uuid(cid) for cid in candidates]
-        qdrant_filter = Filter(must=[
-            FieldCondition(key="control_id", match=MatchAny(any=list(candidates)))
-        ])
-
-    # Search each named vector in parallel
+    """Semantic search via Qdrant named vectors, fused server-side with RRF.
+
+    One Query API request prefetches the top hits of each selected named
+    vector (what / why / where) under the sidebar filter and fuses them by
+    reciprocal rank inside Qdrant.
+    """
     valid_fields = [f for f in search_fields if f in NAMED_VECTORS]
-    if not valid_fields:
+    if not valid_fields or (candidates is not None and not len(candidates)):
         return []
 
-    search_requests = [
-        SearchRequest(
-            vector=NamedVector(name=field, vector=embedding),
-            filter=qdrant_filter,
-            limit=200,
-            with_payload=["control_id"],
-        )
-        for field in valid_fields
-    ]
-
-    results = await qdrant.search_batch(
-        collection_name=collection,
-        requests=search_requests,
+    embedding = await embed_query(query, graph_token=graph_token)
+    qdrant_filter = _qdrant_seq_filter(candidates) if candidates is not None else None
+
+    response = await get_qdrant_client().query_points(
+        collection_name=get_settings().qdrant_collection,
+        prefetch=[
+            Prefetch(query=embedding, using=field, filter=qdrant_filter, limit=_SEMANTIC_PREFETCH_LIMIT)
+            for field in valid_fields
+        ],
+        query=FusionQuery(fusion=Fusion.RRF),
+        limit=_SEMANTIC_PREFETCH_LIMIT * len(valid_fields),
+        with_payload=["control_id"],
     )
-
-    # Merge via RRF across fields
-    return _rrf_merge([
-        [(hit.payload["control_id"], hit.score) for hit in field_results]
-        for field_results in results
-    ])
+    return [(point.payload["control_id"], point.score) for point in response.points]
 
 
 async def _search_hybrid(
     conn,
     query: str,
     search_fields: list[str],
-    candidates: set[str] | None,
+    candidates: CandidateSet | None,
     graph_token: str | None,
 ) -> list[tuple[str, float]]:
     """Hybrid = keyword + semantic, merged with RRF."""
-    # Check if semantic search is available
-    has_openai_key = bool(get_settings().openai_api_key)
-
-    if has_openai_key:
+    # Check if semantic search is available (an OpenAI key or a local backend)
+    if semantic_search_available():
         keyword_task = _search_by_keyword(conn, query, search_fields, candidates)
         semantic_task = _search_by_semantic(query, search_fields, candidates, graph_token)
         keyword_results, semantic_results = await asyncio.gather(keyword_task, semantic_task)
@@ -526,18 +571,28 @@ async def _search_hybrid(
 
 
 async def _browse_all(
-    conn, candidates: set[str] | None, toolbar=None,
+    conn, candidates: CandidateSet | None, toolbar=None,
 ) -> list[tuple[str, float]]:
     """No search query: return all controls (ordered by control_id).
 
     Toolbar filters are pushed directly into the SQL to avoid a separate
     IN-clause round-trip that would exceed asyncpg's 32 767 parameter limit
-    when the full control set is large.
+    when the full control set is large. With the facet index loaded, all of
+    it is answered in memory.
     """
+    index = await get_facet_index()
+    if index is not None:
+        return [(cid, 0.0) for cid in index.browse(candidates, toolbar)]
+    return await _browse_all_sql(conn, candidates, toolbar)
+
+
+async def _browse_all_sql(
+    conn, candidates: CandidateSet | None, toolbar=None,
+) -> list[tuple[str, float]]:
     conditions = [_is_current(ver_control.c.tx_to)]
 
     if candidates is not None:
-        conditions.append(ver_control.c.ref_control_id.in_(candidates))
+        conditions.append(control_id_filter(ver_control.c.ref_control_id, candidates))
 
     # Inline toolbar filters
     if toolbar:
@@ -552,6 +607,7 @@ async def _browse_all(
         elif toolbar.level1 and toolbar.level2:
             conditions.append(ver_control.c.hierarchy_level.in_(["Level 1", "Level 2"]))
         conditions.extend(_build_date_conditions(toolbar))
+        conditions.extend(_build_ws_conditions(toolbar))
         if toolbar.has_similar:
             has_sim_subq = (
                 select(similar_controls.c.ref_control_id)
@@ -567,15 +623,7 @@ async def _browse_all(
         .order_by(ver_control.c.ref_control_id)
     )
     rows = (await conn.execute(q)).fetchall()
-    ranked = [(r[0], 0.0) for r in rows]
-
-    # WS criteria filter requires enrichment data — handle in Python with batching
-    if toolbar and toolbar.ws_filter_no:
-        control_ids = {cid for cid, _ in ranked}
-        passing = await _filter_by_ws_criteria(conn, control_ids, toolbar.ws_filter_no)
-        ranked = [(cid, s) for cid, s in ranked if cid in passing]
-
-    return ranked
+    return [(r[0], 0.0) for r in rows]
 
 
 # ──────────────────────────────────────────────────────────────────────
@@ -630,6 +678,20 @@ def _build_date_conditions(toolbar) -> list:
     return conditions
 
 
+def _build_ws_conditions(toolbar) -> list:
+    """Condition for the WS criteria filter: all selected criteria are effectively 'No'.
+
+    Uses the ingestion-maintained ``ws_yes_mask`` (L1 bits inherited from
+    the parent for Level 2 controls), so it is one bitwise predicate.
+    """
+    mask = ws_criteria_mask(toolbar.ws_filter_no or [])
+    if not mask:
+        return []
+    return [ver_control.c.ref_control_id.in_(
+        select(ref_control.c.control_id).where(ws_filter(ref_control.c.ws_yes_mask, mask))
+    )]
+
+
 async def _apply_toolbar_filters(
     conn,
     ranked: list[tuple[str, float]],
@@ -642,6 +704,10 @@ async def _apply_toolbar_filters(
     if not ranked:
         return ranked
 
+    index = await get_facet_index()
+    if index is not None:
+        return index.filter_ranked(ranked, toolbar)
+
     control_ids = [cid for cid, _ in ranked]
 
     # Build shared filter conditions (everything except the IN clause)
@@ -657,6 +723,7 @@ async def _apply_toolbar_filters(
     elif toolbar.level1 and toolbar.level2:
         extra_conditions.append(ver_control.c.hierarchy_level.in_(["Level 1", "Level 2"]))
     extra_conditions.extend(_build_date_conditions(toolbar))
+    extra_conditions.extend(_build_ws_conditions(toolbar))
 
     # Batch IN clause to avoid exceeding asyncpg parameter limit
     matching_ids: set[str] = set()
@@ -671,10 +738,6 @@ async def _apply_toolbar_filters(
         rows = (await conn.execute(q)).fetchall()
         matching_ids.update(r[0] for r in rows)
 
-    # WS criteria filter (if specified)
-    if toolbar.ws_filter_no:
-        matching_ids = await _filter_by_ws_criteria(conn, matching_ids, toolbar.ws_filter_no)
-
     # Has similar filter
     if toolbar.has_similar:
         q_sim = (
@@ -690,134 +753,6 @@ async def _apply_toolbar_filters(
     return [(cid, score) for cid, score in ranked if cid in matching_ids]
 
 
-async def _filter_by_ws_criteria(
-    conn, control_ids: set[str], ws_keys: list[str],
-) -> set[str]:
-    """Filter controls where ALL specified WS criteria have 'No' value.
-
-    For L1 controls: checks L1 criteria from the control's own enrichment.
-    For L2 controls: L1 criteria are checked against the parent's enrichment,
-                     L2 criteria are checked against the control's own enrichment.
-
-    Uses batched IN clauses to stay within asyncpg's 32 767 parameter limit.
-    """
-    if not control_ids or not ws_keys:
-        return control_ids
-
-    # Validate keys and split into L1/L2 sets
-    requested_l1 = [k for k in ws_keys if k in _L1_KEYS]
-    requested_l2 = [k for k in ws_keys if k in _L2_KEYS]
-    if not requested_l1 and not requested_l2:
-        return control_ids
-
-    id_list = list(control_ids)
-
-    # Fetch enrichment data in batches
-    cols_to_select = [ai_enrichment.c.ref_control_id]
-    for col_name in _L1_YES_NO_COLS + _L2_YES_NO_COLS:
-        cols_to_select.append(getattr(ai_enrichment.c, col_name))
-
-    all_enrichment_rows = []
-    for i in range(0, len(id_list), _BATCH_SIZE):
-        batch = id_list[i : i + _BATCH_SIZE]
-        q = (
-            select(*cols_to_select)
-            .where(_is_current(ai_enrichment.c.tx_to))
-            .where(ai_enrichment.c.ref_control_id.in_(batch))
-        )
-        rows = (await conn.execute(q)).mappings().all()
-        all_enrichment_rows.extend(rows)
-
-    # Build raw enrichment map: cid -> {col_name: "yes"/"no"/...}
-    enrichment_raw: dict[str, dict[str, str]] = {}
-    for r in all_enrichment_rows:
-        cid = r["ref_control_id"]
-        enrichment_raw[cid] = {
-            col: (r.get(col) or "").strip().lower()
-            for col in _L1_YES_NO_COLS + _L2_YES_NO_COLS
-        }
-
-    # Fetch hierarchy_level in batches
-    level_map: dict[str, str] = {}
-    for i in range(0, len(id_list), _BATCH_SIZE):
-        batch = id_list[i : i + _BATCH_SIZE]
-        vc_q = (
-            select(ver_control.c.ref_control_id, ver_control.c.hierarchy_level)
-            .where(_is_current(ver_control.c.tx_to))
-            .where(ver_control.c.ref_control_id.in_(batch))
-        )
-        vc_rows = (await conn.execute(vc_q)).mappings().all()
-        level_map.update({r["ref_control_id"]: r["hierarchy_level"] for r in vc_rows})
-
-    # Get parent enrichment for L2 controls that need L1 criteria checked
-    parent_enrichment: dict[str, dict[str, str]] = {}  # child_id -> parent enrichment
-    if requested_l1:
-        l2_ids = [cid for cid in control_ids if level_map.get(cid) == "Level 2"]
-        if l2_ids:
-            parent_map: dict[str, str] = {}
-            for i in range(0, len(l2_ids), _BATCH_SIZE):
-                batch = l2_ids[i : i + _BATCH_SIZE]
-                parent_q = (
-                    select(rel_parent.c.child_control_id, rel_parent.c.parent_control_id)
-                    .where(_is_current(rel_parent.c.tx_to))
-                    .where(rel_parent.c.child_control_id.in_(batch))
-                )
-                parent_rows = (await conn.execute(parent_q)).fetchall()
-                for child_id, pid in parent_rows:
-                    parent_map[child_id] = pid
-            # Fetch parent enrichment for any parents not already loaded
-            missing_parents = set(parent_map.values()) - set(enrichment_raw.keys())
-            if missing_parents:
-                mp_list = list(missing_parents)
-                for i in range(0, len(mp_list), _BATCH_SIZE):
-                    batch = mp_list[i : i + _BATCH_SIZE]
-                    pq = (
-                        select(*cols_to_select)
-                        .where(_is_current(ai_enrichment.c.tx_to))
-                        .where(ai_enrichment.c.ref_control_id.in_(batch))
-                    )
-                    p_rows = (await conn.execute(pq)).mappings().all()
-                    for r in p_rows:
-                        enrichment_raw[r["ref_control_id"]] = {
-                            col: (r.get(col) or "").strip().lower()
-                            for col in _L1_YES_NO_COLS + _L2_YES_NO_COLS
-                        }
-            for child_id, pid in parent_map.items():
-                if pid in enrichment_raw:
-                    parent_enrichment[child_id] = enrichment_raw[pid]
-
-    # Filter: a control passes only if ALL requested criteria are "no"
-    result = set()
-    for cid in control_ids:
-        level = level_map.get(cid)
-        own = enrichment_raw.get(cid, {})
-        passes = True
-
-        for key in requested_l1:
-            col = _WS_KEY_TO_COL[key]
-            if level == "Level 2":
-                # L1 criteria come from parent for L2 controls
-                val = parent_enrichment.get(cid, {}).get(col, "")
-            else:
-                val = own.get(col, "")
-            if val == "yes":
-                passes = False
-                break
-
-        if passes:
-            for key in requested_l2:
-                col = _WS_KEY_TO_COL[key]
-                val = own.get(col, "")
-                if val == "yes":
-                    passes = False
-                    break
-
-        if passes:
-            result.add(cid)
-
-    return result
-
-
 # ──────────────────────────────────────────────────────────────────────
 # Hydration — load full details for a page of control_ids
 # ──────────────────────────────────────────────────────────────────────
@@ -826,7 +761,7 @@ async def _filter_by_ws_criteria(
 def _build_parent_l1_score(parent_id: str, enrichment_data: dict) -> ParentL1ScoreResponse:
     """Build ParentL1ScoreResponse from a parent control's enrichment data."""
     criteria = []
-    for col_name in _L1_YES_NO_COLS:
+    for col_name in L1_CRITERIA_COLS:
         key = col_name.replace("_yes_no", "")
         raw = (enrichment_data.get(col_name) or "").strip().lower()
         criteria.append({"key": key, "yes_no": raw == "yes"})
@@ -845,128 +780,24 @@ async def _hydrate_controls(
     control_ids: list[str],
     score_map: dict[str, float],
 ) -> list[ControlWithDetailsResponse]:
-    """Load full details for a list of control_ids (preserving order)."""
+    """Load full details for a list of control_ids (preserving order).
+
+    Cards come from the per-control card cache; only misses are hydrated
+    (one statement) and written back.
+    """
     if not control_ids:
         return []
-
-    # Run 5 queries in parallel
-    controls_task = _load_controls(conn, control_ids)
-    rels_task = _load_relationships(conn, control_ids)
-    enrichment_task = _load_enrichment(conn, control_ids)
-    taxonomy_task = _load_taxonomy(conn, control_ids)
-    similar_task = _load_similar_controls(conn, control_ids)
-
-    controls_map, rels_map, enrichment_map, taxonomy_map, similar_map = await asyncio.gather(
-        controls_task, rels_task, enrichment_task, taxonomy_task, similar_task,
-    )
-
-    # For L2 controls, load their parent's L1 enrichment so we can include
-    # the inherited 7W score regardless of whether the parent is on the page.
-    parent_l1_map: dict[str, ParentL1ScoreResponse] = {}
-    parent_ids_needed: dict[str, str] = {}  # child_cid → parent_cid
-    for cid in control_ids:
-        control = controls_map.get(cid)
-        if not control or control.hierarchy_level != "Level 2":
-            continue
-        rels = rels_map.get(cid)
-        if rels and rels.parent:
-            parent_id = rels.parent.id
-            # Check if parent enrichment is already loaded (parent on same page)
-            if parent_id in enrichment_map:
-                parent_l1_map[cid] = _build_parent_l1_score(parent_id, enrichment_map[parent_id])
-            else:
-                parent_ids_needed[cid] = parent_id
-
-    # Batch-load any missing parent enrichments
-    if parent_ids_needed:
-        unique_parent_ids = list(set(parent_ids_needed.values()))
-        parent_enrichments = await _load_enrichment(conn, unique_parent_ids)
-        for child_cid, parent_id in parent_ids_needed.items():
-            p_data = parent_enrichments.get(parent_id)
-            if p_data:
-                parent_l1_map[child_cid] = _build_parent_l1_score(parent_id, p_data)
-
-    # Assemble in original ranked order
-    items = []
-    for cid in control_ids:
-        control = controls_map.get(cid)
-        if not control:
-            continue
-
-        ai_data = enrichment_map.get(cid)
-        tax_data = taxonomy_map.get(cid)
-
-        ai_response = None
-        if ai_data or tax_data:
-            ai_response = AIEnrichmentResponse(
-                **(ai_data or {}),
-                **({"primary_risk_theme_id": tax_data.get("primary_risk_theme_id"),
-                    "secondary_risk_theme_id": tax_data.get("secondary_risk_theme_id")}
-                   if tax_data else {}),
-            )
-
-        items.append(ControlWithDetailsResponse(
-            control=control,
-            relationships=rels_map.get(cid, ControlRelationshipsResponse()),
-            ai=ai_response,
-            parent_l1_score=parent_l1_map.get(cid),
-            similar_controls=similar_map.get(cid, []),
-            search_score=score_map.get(cid),
-        ))
-
-    return items
-
-
-async def _load_controls(conn, control_ids: list[str]) -> dict[str, ControlResponse]:
-    """Load core control fields from ver_control."""
-    q = (
-        select(
-            ver_control.c.ref_control_id,
-            ver_control.c.control_title,
-            ver_control.c.control_description,
-            ver_control.c.key_control,
-            ver_control.c.hierarchy_level,
-            ver_control.c.preventative_detective,
-            ver_control.c.manual_automated,
-            ver_control.c.execution_frequency,
-            ver_control.c.four_eyes_check,
-            ver_control.c.control_status,
-            ver_control.c.evidence_description,
-            ver_control.c.local_functional_information,
-            ver_control.c.last_modified_on,
-            ver_control.c.control_created_on,
-            ver_control.c.control_owner,
-            ver_control.c.control_owner_gpn,
-            ver_control.c.sox_relevant,
-        )
-        .where(_is_current(ver_control.c.tx_to))
-        .where(ver_control.c.ref_control_id.in_(control_ids))
-    )
-    rows = (await conn.execute(q)).mappings().all()
-
-    result = {}
-    for r in rows:
-        cid = r["ref_control_id"]
-        result[cid] = ControlResponse(
-            control_id=cid,
-            control_title=r["control_title"],
-            control_description=r["control_description"],
-            key_control=r["key_control"],
-            hierarchy_level=r["hierarchy_level"],
-            preventative_detective=r["preventative_detective"],
-            manual_automated=r["manual_automated"],
-            execution_frequency=r["execution_frequency"],
-            four_eyes_check=r["four_eyes_check"],
-            control_status=r["control_status"],
-            evidence_description=r["evidence_description"],
-            local_functional_information=r["local_functional_information"],
-            last_modified_on=r["last_modified_on"],
-            control_created_on=r["control_created_on"],
-            control_owner=r["control_owner"],
-            control_owner_gpn=r["control_owner_gpn"],
-            sox_relevant=r["sox_relevant"],
-        )
-    return result
+    cards, epoch = await get_cards(control_ids)
+    missing = [cid for cid in control_ids if cid not in cards]
+    if missing:
+        fresh = await hydrate_page(conn, missing, {})
+        cards.update((item.control.control_id, item) for item in fresh)
+        await put_cards(fresh, epoch)
+    return [
+        cards[cid].model_copy(update={"search_score": score_map.get(cid)})
+        for cid in control_ids
+        if cid in cards
+    ]
 
 
 async def _load_relationships(
@@ -1117,7 +948,7 @@ async def _load_enrichment(conn, control_ids: list[str]) -> dict[str, dict]:
         ai_enrichment.c.summary,
         # Removed in migration 014: control_as_event, control_as_issues
     ]
-    for col_name in _L1_YES_NO_COLS + _L2_YES_NO_COLS:
+    for col_name in L1_CRITERIA_COLS + L2_CRITERIA_COLS:
         cols.append(getattr(ai_enrichment.c, col_name))
 
     q = (
@@ -1131,7 +962,7 @@ async def _load_enrichment(conn, control_ids: list[str]) -> dict[str, dict]:
     for r in rows:
         cid = r["ref_control_id"]
         data = {}
-        for col_name in _L1_YES_NO_COLS + _L2_YES_NO_COLS:
+        for col_name in L1_CRITERIA_COLS + L2_CRITERIA_COLS:
             data[col_name] = r[col_name]
         data["summary"] = r["summary"]
         # Removed in migration 014: control_as_event, control_as_issues
@@ -1309,7 +1140,7 @@ async def _load_enrichment_with_details(conn, control_id: str) -> dict | None:
         ai_enrichment.c.summary,
         # Removed in migration 014: control_as_event, control_as_issues
     ]
-    for col_name in _L1_YES_NO_COLS + _L2_YES_NO_COLS + _DETAILS_COL_NAMES + _NARRATIVE_COLS:
+    for col_name in L1_CRITERIA_COLS + L2_CRITERIA_COLS + _DETAILS_COL_NAMES + _NARRATIVE_COLS:
         cols.append(getattr(ai_enrichment.c, col_name))
 
     q = (
@@ -1322,7 +1153,7 @@ async def _load_enrichment_with_details(conn, control_id: str) -> dict | None:
         return None
 
     data = {}
-    for col_name in _L1_YES_NO_COLS + _L2_YES_NO_COLS + _DETAILS_COL_NAMES + _NARRATIVE_COLS:
+    for col_name in L1_CRITERIA_COLS + L2_CRITERIA_COLS + _DETAILS_COL_NAMES + _NARRATIVE_COLS:
         data[col_name] = row[col_name]
     data["summary"] = row["summary"]
     data["control_as_event"] = row["control_as_event"]
@@ -1333,18 +1164,18 @@ async def _load_enrichment_with_details(conn, control_id: str) -> dict | None:
 async def get_control_versions(control_id: str) -> ControlVersionListResponse:
     """Return all version timestamps for a control, ordered past → future."""
     engine = get_engine()
-    vc = ver_control
+    vd = ver_control_diff
 
     async with engine.connect() as conn:
         q = (
-            select(vc.c.tx_from, vc.c.tx_to)
-            .where(vc.c.ref_control_id == control_id)
-            .order_by(vc.c.tx_from.asc())
+            select(vd.c.tx_from, vd.c.tx_to, vd.c.changed_fields)
+            .where(vd.c.ref_control_id == control_id)
+            .order_by(vd.c.tx_from.asc())
         )
         rows = (await conn.execute(q)).mappings().all()
 
         versions = [
-            ControlVersionSummary(tx_from=r["tx_from"], tx_to=r["tx_to"])
+            ControlVersionSummary(tx_from=r["tx_from"], tx_to=r["tx_to"], changed_fields=r["changed_fields"])
             for r in rows
         ]
 
@@ -1354,88 +1185,24 @@ async def get_control_versions(control_id: str) -> ControlVersionListResponse:
 async def get_control_diff(
     control_id: str, from_tx, to_tx,
 ) -> ControlDiffResponse:
-    """Load two version snapshots of a control for diff comparison."""
-    engine = get_engine()
-    vc = ver_control
+    """Material snapshots of two versions of a control for diff comparison.
 
-    material_cols = [
-        vc.c.tx_from,
-        vc.c.control_status, vc.c.key_control,
-        vc.c.control_title, vc.c.control_description,
-        vc.c.evidence_description, vc.c.local_functional_information,
-        vc.c.execution_frequency, vc.c.preventative_detective,
-        vc.c.manual_automated, vc.c.control_administrator,
-        vc.c.control_owner, vc.c.control_owner_gpn,
-        vc.c.last_modified_on,
-    ]
+    Both come from the control's precomputed per-version diffs
+    (pipelines/controls/version_diff.py) in one indexed read.
+    """
+    engine = get_engine()
+    from_tx, to_tx = (tx if tx.tzinfo else tx.replace(tzinfo=timezone.utc) for tx in (from_tx, to_tx))
 
     async with engine.connect() as conn:
-        # Load both versions in parallel
-        from_q = (
-            select(*material_cols)
-            .where(vc.c.ref_control_id == control_id)
-            .where(vc.c.tx_from == from_tx)
-        )
-        to_q = (
-            select(*material_cols)
-            .where(vc.c.ref_control_id == control_id)
-            .where(vc.c.tx_from == to_tx)
-        )
+        snapshots = await version_snapshots(conn, control_id, until=max(from_tx, to_tx))
 
-        from_row, to_row = await asyncio.gather(
-            conn.execute(from_q),
-            conn.execute(to_q),
-        )
-        from_row = from_row.mappings().first()
-        to_row = to_row.mappings().first()
-
-        if not from_row or not to_row:
-            raise ValueError("One or both version timestamps not found")
-
-        # Resolve parent control at each version timestamp
-        from_parent_q = (
-            select(rel_parent.c.parent_control_id)
-            .where(rel_parent.c.child_control_id == control_id)
-            .where(rel_parent.c.tx_from <= from_tx)
-            .where(or_(rel_parent.c.tx_to.is_(None), rel_parent.c.tx_to > from_tx))
-        )
-        to_parent_q = (
-            select(rel_parent.c.parent_control_id)
-            .where(rel_parent.c.child_control_id == control_id)
-            .where(rel_parent.c.tx_from <= to_tx)
-            .where(or_(rel_parent.c.tx_to.is_(None), rel_parent.c.tx_to > to_tx))
-        )
+    if from_tx not in snapshots or to_tx not in snapshots:
+        raise ValueError("One or both version timestamps not found")
 
-        from_parent_res, to_parent_res = await asyncio.gather(
-            conn.execute(from_parent_q),
-            conn.execute(to_parent_q),
-        )
-        from_parent = from_parent_res.scalar()
-        to_parent = to_parent_res.scalar()
-
-        def _snapshot(row, parent_id):
-            return ControlVersionSnapshot(
-                tx_from=row["tx_from"],
-                parent_control_id=parent_id,
-                control_status=row["control_status"],
-                key_control=row["key_control"],
-                control_title=row["control_title"],
-                control_description=row["control_description"],
-                evidence_description=row["evidence_description"],
-                local_functional_information=row["local_functional_information"],
-                execution_frequency=row["execution_frequency"],
-                preventative_detective=row["preventative_detective"],
-                manual_automated=row["manual_automated"],
-                control_administrator=row["control_administrator"] or [],
-                control_owner=row["control_owner"],
-                control_owner_gpn=row["control_owner_gpn"],
-                last_modified_on=row["last_modified_on"],
-            )
-
-        return ControlDiffResponse(
-            from_version=_snapshot(from_row, from_parent),
-            to_version=_snapshot(to_row, to_parent),
-        )
+    return ControlDiffResponse(
+        from_version=ControlVersionSnapshot(tx_from=from_tx, **snapshots[from_tx]),
+        to_version=ControlVersionSnapshot(tx_from=to_tx, **snapshots[to_tx]),
+    )
 
 
 async def get_control_descriptions(control_ids: list[str]) -> ControlDescriptionsResponse:
@@ -1469,3 +1236,49 @@ async def get_control_descriptions(control_ids: list[str]) -> ControlDescription
         ]
 
         return ControlDescriptionsResponse(controls=controls)
+
+
+def _facet_counts_key(func, args, kwargs) -> str:
+    params = args[0] if args else kwargs["params"]
+    return f"cache:explorer:facet_counts:{search_fingerprint(params)}"
+
+
+@cached(namespace="explorer", key_builder=_facet_counts_key)
+async def get_facet_counts(
+    params: ControlFacetCountsRequest,
+    graph_token: str | None = None,
+) -> ControlFacetCountsResponse:
+    """Sidebar facet counts over the controls matching the search state, cached per fingerprint."""
+    async with get_engine().connect() as conn:
+        ranked = await _rank_controls(conn, params, graph_token)
+        counts = await count_facets(
+            conn,
+            [cid for cid, _ in ranked],
+            params.function_node_ids,
+            params.location_node_ids,
+            params.relationship_scope,
+        )
+    return ControlFacetCountsResponse(**counts)
+
+
+async def typeahead_controls(query: str, limit: int = 10) -> ControlTypeaheadResponse:
+    """Control ID suggestions: ID prefix matches first, then substring / fuzzy ID and title matches."""
+    q = query.strip()
+    if not q:
+        return ControlTypeaheadResponse(items=[])
+    key = normalize_control_id(q)
+
+    async with get_engine().connect() as conn:
+        ids = await prefix_ids(conn, key, None, limit)
+        titles = await control_titles(conn, ids)
+        items = [
+            ControlTypeaheadItem(control_id=cid, control_title=titles.get(cid), match="prefix", score=1.0)
+            for cid in ids
+        ]
+        if len(items) < limit and len(q) >= MIN_FUZZY_CHARS:
+            fuzzy = await fuzzy_matches(conn, key, None, limit - len(items), title_query=q, exclude=ids)
+            items.extend(
+                ControlTypeaheadItem(control_id=cid, control_title=title, match="fuzzy", score=score)
+                for cid, title, score in fuzzy
+            )
+    return ControlTypeaheadResponse(items=items)
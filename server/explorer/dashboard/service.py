@@ -38,6 +38,7 @@ from server.explorer.dashboard.models import (
     SnapshotTrendPoint,
     TrendResponse,
 )
+from server.explorer.controls.candidates import CandidateSet, control_id_filter
 from server.explorer.dashboard.schema import dashboard_snapshots
 from server.logging_config import get_logger
 from server.pipelines.controls.schema import (
@@ -48,6 +49,7 @@ from server.pipelines.controls.schema import (
     src_controls_rel_risk_theme as rel_risk_theme,
     src_controls_ver_control as vc,
 )
+from server.pipelines.controls.ws_mask import L1_CRITERIA_COLS, L2_CRITERIA_COLS
 from server.pipelines.orgs.schema import src_orgs_ver_function as ver_func
 from server.pipelines.risks.schema import (
     src_risks_ref_theme as ref_theme,
@@ -58,18 +60,7 @@ logger = get_logger(name=__name__)
 
 # ── Constants ─────────────────────────────────────────────────────────────
 
-_L1_YES_NO_COLS = [
-    "what_yes_no", "where_yes_no", "who_yes_no", "when_yes_no",
-    "why_yes_no", "what_why_yes_no", "risk_theme_yes_no",
-]
-
-_L2_YES_NO_COLS = [
-    "frequency_yes_no", "preventative_detective_yes_no",
-    "automation_level_yes_no", "followup_yes_no",
-    "escalation_yes_no", "evidence_yes_no", "abbreviations_yes_no",
-]
-
-_ALL_YES_NO_COLS = _L1_YES_NO_COLS + _L2_YES_NO_COLS
+_ALL_YES_NO_COLS = L1_CRITERIA_COLS + L2_CRITERIA_COLS
 
 _CRITERION_LABELS = {
     "what_yes_no": "What",
@@ -88,8 +79,6 @@ _CRITERION_LABELS = {
     "abbreviations_yes_no": "Abbreviations",
 }
 
-_BATCH_SIZE = 30_000
-
 
 def _is_current(col):
     return col.is_(None)
@@ -118,8 +107,8 @@ def _score_expr(columns: list[str], table=enr):
 
 async def _resolve_candidates(
     conn, filters: DashboardFilters,
-) -> set[str] | None:
-    """Resolve DashboardFilters into a set of control_ids, or None if no filters."""
+) -> CandidateSet | None:
+    """Resolve DashboardFilters into a control_seq bitset, or None if no filters."""
     if not filters.has_any:
         return None
 
@@ -132,7 +121,7 @@ async def _resolve_candidates(
     )
 
     scope = filters.relationship_scope
-    category_sets: list[set[str]] = []
+    category_sets: list[CandidateSet] = []
 
     if filters.functions:
         ids = await _controls_by_org_nodes(conn, filters.functions, "function", scope)
@@ -162,29 +151,26 @@ async def _resolve_candidates(
         for s in category_sets[1:]:
             result = result & s
     else:
-        result: set[str] = set()
+        result = CandidateSet()
         for s in category_sets:
             result = result | s
 
     return result
 
 
-def _apply_candidate_filter(query, col, candidates: set[str] | None):
-    """Add WHERE col IN (candidates) if candidates is not None."""
+def _apply_candidate_filter(query, col, candidates: CandidateSet | None):
+    """Restrict col to the candidate controls if candidates is not None."""
     if candidates is None:
         return query
-    id_list = list(candidates)
-    if len(id_list) <= _BATCH_SIZE:
-        return query.where(col.in_(id_list))
-    # For very large sets, use ANY(array) which avoids parameter limit
-    return query.where(col.in_(id_list))
+    # One int4[] parameter however large the set (no asyncpg parameter limit)
+    return query.where(control_id_filter(col, candidates))
 
 
 # ── Core Query Functions ──────────────────────────────────────────────────
 
 
 async def _compute_portfolio_summary(
-    conn, candidates: set[str] | None = None,
+    conn, candidates: CandidateSet | None = None,
 ) -> PortfolioSummary:
     q = select(
         func.count().label("total_controls"),
@@ -206,11 +192,11 @@ async def _compute_portfolio_summary(
 
 
 async def _compute_l1_score_distribution(
-    conn, candidates: set[str] | None = None,
+    conn, candidates: CandidateSet | None = None,
 ) -> ScoreDistribution:
     """Score histogram for Level 1 controls (7 L1 criteria)."""
     score_cols = []
-    for col_name in _L1_YES_NO_COLS:
+    for col_name in L1_CRITERIA_COLS:
         score_cols.append(
             case((func.lower(getattr(enr.c, col_name)) == "yes", 1), else_=0)
         )
@@ -236,12 +222,12 @@ async def _compute_l1_score_distribution(
 
 
 async def _compute_l2_score_distribution(
-    conn, candidates: set[str] | None = None,
+    conn, candidates: CandidateSet | None = None,
 ) -> ScoreDistribution:
     """Score histogram for Level 2 controls (own 7 + inherited parent 7 = 14)."""
     # L2 own score
     l2_score_cols = []
-    for col_name in _L2_YES_NO_COLS:
+    for col_name in L2_CRITERIA_COLS:
         l2_score_cols.append(
             case((func.lower(getattr(enr.c, col_name)) == "yes", 1), else_=0)
         )
@@ -264,7 +250,7 @@ async def _compute_l2_score_distribution(
     # Parent L1 scores
     parent_enr = enr.alias("parent_enr")
     l1_score_cols = []
-    for col_name in _L1_YES_NO_COLS:
+    for col_name in L1_CRITERIA_COLS:
         l1_score_cols.append(
             case((func.lower(getattr(parent_enr.c, col_name)) == "yes", 1), else_=0)
         )
@@ -320,7 +306,7 @@ def _build_score_distribution(scores: list[int], max_score: int) -> ScoreDistrib
 
 
 async def _compute_criterion_pass_rates(
-    conn, candidates: set[str] | None = None,
+    conn, candidates: CandidateSet | None = None,
 ) -> list[CriterionPassRate]:
     cols_to_select = [enr.c.ref_control_id, vc.c.hierarchy_level]
     for col_name in _ALL_YES_NO_COLS:
@@ -356,7 +342,7 @@ async def _compute_criterion_pass_rates(
     l1_total = len(l1_rows)
     l2_total = len(l2_rows)
 
-    _L1_SET = set(_L1_YES_NO_COLS)
+    _L1_SET = set(L1_CRITERIA_COLS)
 
     results = []
     for col_name in _ALL_YES_NO_COLS:
@@ -377,7 +363,7 @@ async def _compute_criterion_pass_rates(
 
 
 async def _compute_attribute_distributions(
-    conn, candidates: set[str] | None = None,
+    conn, candidates: CandidateSet | None = None,
 ) -> list[AttributeDistribution]:
     results = []
     for field_name in ("preventative_detective", "manual_automated", "execution_frequency"):
@@ -396,7 +382,7 @@ async def _compute_attribute_distributions(
 
 
 async def _compute_function_breakdown(
-    conn, candidates: set[str] | None = None, limit: int = 20,
+    conn, candidates: CandidateSet | None = None, limit: int = 20,
 ) -> list[FunctionBreakdown]:
     q = (
         select(
@@ -422,14 +408,14 @@ async def _compute_function_breakdown(
         .limit(limit)
     )
     if candidates is not None:
-        q = q.where(rel_owns_func.c.control_id.in_(list(candidates)))
+        q = q.where(control_id_filter(rel_owns_func.c.control_id, candidates))
 
     rows = (await conn.execute(q)).mappings().all()
     return [FunctionBreakdown(node_id=r["node_id"], name=r["name"], control_count=r["control_count"]) for r in rows]
 
 
 async def _compute_risk_theme_breakdown(
-    conn, candidates: set[str] | None = None, limit: int = 20,
+    conn, candidates: CandidateSet | None = None, limit: int = 20,
 ) -> list[RiskThemeBreakdown]:
     q = (
         select(
@@ -458,14 +444,14 @@ async def _compute_risk_theme_breakdown(
         .limit(limit)
     )
     if candidates is not None:
-        q = q.where(rel_risk_theme.c.control_id.in_(list(candidates)))
+        q = q.where(control_id_filter(rel_risk_theme.c.control_id, candidates))
 
     rows = (await conn.execute(q)).mappings().all()
     return [RiskThemeBreakdown(theme_id=r["theme_id"], name=r["name"], control_count=r["control_count"]) for r in rows]
 
 
 async def _compute_controls_by_month(
-    conn, date_field: str, candidates: set[str] | None = None,
+    conn, date_field: str, candidates: CandidateSet | None = None,
 ) -> dict[str, int]:
     """Count controls by month based on a date column (control_created_on or last_modified_on)."""
     col = getattr(vc.c, date_field)
@@ -0,0 +1,365 @@
+"""In-process snapshot of the current org trees for the explorer filters.
+
+Each API worker keeps a read-only copy of the current function, location
+and consolidated-entity nodes: per tree, nodes are numbered in label
+order with their parent, depth and children as arrays (CSR layout), plus
+one lower-cased ``label\\tnode_id`` string per node concatenated into a
+single search string. The filter sidebar's requests are then answered
+from memory:
+
+- top of a tree (roots + two levels) and lazy children: array slices;
+- search: ``str.find`` over the concatenated keys (the substring match
+  of the old ``ILIKE '%search%'``), matches and their ancestors nested;
+- consolidated entities: the same search, paginated.
+
+Every node's depth is computed once at load instead of per row and per
+request. The snapshot is built at worker startup and rebuilt when
+context-provider ingestion bumps a generation counter in the Redis
+coordination DB (``signal_org_tree_reload``), with the same check /
+fallback protocol as the facet index (explorer/controls/facet_index.py):
+while a newer snapshot is being built callers get None and use the
+cached SQL queries in the filters service.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import func, select
+
+from server.explorer.shared.models import FlatItemResponse, TreeNodeResponse
+from server.logging_config import get_logger
+from server.pipelines.orgs.schema import (
+    src_orgs_ref_node as ref_node,
+    src_orgs_rel_child as rel_child,
+    src_orgs_ver_consolidated as ver_consolidated,
+    src_orgs_ver_function as ver_function,
+    src_orgs_ver_location as ver_location,
+)
+from server.settings import get_settings
+
+logger = get_logger(name=__name__)
+
+_GENERATION_KEY = "explorer:org_trees:generation"
+
+# Matches returned by a tree search (as the SQL search's LIMIT)
+SEARCH_LIMIT = 50
+# Levels below the roots included in the initial tree
+_PRELOADED_LEVELS = 2
+
+
+class OrgTree:
+    """Immutable snapshot of one current org tree, nodes numbered in label order."""
+
+    def __init__(
+        self,
+        tree: str,
+        nodes: list[tuple[str, str, str | None, str | None]],
+        edges: list[tuple[str, str]],
+    ) -> None:
+        # nodes: (node_id, label, node_type, status); edges: (parent_id, child_id)
+        nodes = sorted(nodes, key=lambda n: (n[1].lower(), n[0]))
+        self.tree = tree
+        self.node_ids = [n[0] for n in nodes]
+        self.labels = [n[1] for n in nodes]
+        self.node_types = [n[2] for n in nodes]
+        self.statuses = [n[3] for n in nodes]
+        self.index_of = {nid: i for i, nid in enumerate(self.node_ids)}
+        size = len(nodes)
+
+        # Parent of each node (-1: none among the current nodes of this tree);
+        # roots are the nodes without any current parent edge
+        self.parent = np.full(size, -1, dtype=np.int32)
+        has_parent_edge = np.zeros(size, dtype=bool)
+        for parent_id, child_id in edges:
+            child = self.index_of.get(child_id)
+            if child is None:
+                continue
+            has_parent_edge[child] = True
+            self.parent[child] = self.index_of.get(parent_id, -1)
+        self.roots = np.flatnonzero(~has_parent_edge).astype(np.int32)
+
+        # Children of node i: child_idx[child_ptr[i]:child_ptr[i + 1]], in label order
+        with_parent = np.flatnonzero(self.parent >= 0)
+        order = np.argsort(self.parent[with_parent], kind="stable")
+        self.child_idx = with_parent[order].astype(np.int32)
+        counts = np.bincount(self.parent[with_parent], minlength=size)
+        self.child_ptr = np.zeros(size + 1, dtype=np.int32)
+        np.cumsum(counts, out=self.child_ptr[1:])
+
+        # Depth from the top of each branch, breadth-first from parentless nodes
+        self.level = np.zeros(size, dtype=np.int16)
+        frontier = np.flatnonzero(self.parent < 0)
+        depth = 0
+        while frontier.size:
+            self.level[frontier] = depth
+            frontier = np.concatenate([self._children(i) for i in frontier])
+            depth += 1
+
+        # Lower-cased search keys, one per node, joined by newlines
+        keys = [f"{label}\t{nid}".lower() for nid, label in zip(self.node_ids, self.labels)]
+        self._key_starts: list[int] = []
+        offset = 0
+        for key in keys:
+            self._key_starts.append(offset)
+            offset += len(key) + 1
+        self._haystack = "\n".join(keys)
+        self._top: list[TreeNodeResponse] | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.parent, self.roots, self.child_idx, self.child_ptr, self.level]
+        return sum(a.nbytes for a in arrays) + len(self._haystack)
+
+    def _children(self, i: int) -> np.ndarray:
+        return self.child_idx[self.child_ptr[i]:self.child_ptr[i + 1]]
+
+    def _has_children(self, i: int) -> bool:
+        return bool(self.child_ptr[i + 1] > self.child_ptr[i])
+
+    def _node(self, i: int, children: list[TreeNodeResponse], has_children: bool) -> TreeNodeResponse:
+        return TreeNodeResponse(
+            id=self.node_ids[i],
+            label=self.labels[i],
+            level=int(self.level[i]),
+            has_children=has_children,
+            children=children,
+            node_type=self.node_types[i],
+            status=self.statuses[i],
+        )
+
+    def _subtree(self, i: int, depth: int) -> TreeNodeResponse:
+        children = [self._subtree(int(c), depth - 1) for c in self._children(i)] if depth else []
+        return self._node(i, children, self._has_children(i))
+
+    def top(self) -> list[TreeNodeResponse]:
+        """Roots with two levels of descendants (built once per snapshot)."""
+        if self._top is None:
+            self._top = [self._subtree(int(r), _PRELOADED_LEVELS) for r in self.roots]
+        return self._top
+
+    def children(self, parent_id: str) -> list[TreeNodeResponse]:
+        """Direct children of ``parent_id`` (lazy load)."""
+        i = self.index_of.get(parent_id)
+        if i is None:
+            return []
+        return [self._node(int(c), [], self._has_children(int(c))) for c in self._children(i)]
+
+    def matches(self, search: str, limit: int | None = None) -> list[int]:
+        """Nodes whose label or node_id contains ``search`` (case-insensitive), in label order."""
+        needle = search.strip().lower()
+        if not needle:
+            return list(range(self.size))[:limit]
+        if "\n" in needle or "\t" in needle:
+            return []
+        found: list[int] = []
+        pos = self._haystack.find(needle)
+        while pos != -1 and (limit is None or len(found) < limit):
+            i = bisect_right(self._key_starts, pos) - 1
+            found.append(i)
+            if i + 1 == self.size:
+                break
+            pos = self._haystack.find(needle, self._key_starts[i + 1])
+        return found
+
+    def search(self, search: str) -> list[TreeNodeResponse]:
+        """Up to ``SEARCH_LIMIT`` matches nested under their ancestors."""
+        included: set[int] = set()
+        for i in self.matches(search, SEARCH_LIMIT):
+            while i >= 0 and i not in included:
+                included.add(i)
+                i = int(self.parent[i])
+
+        children: dict[int, list[int]] = defaultdict(list)
+        roots: list[int] = []
+        for i in sorted(included):
+            p = int(self.parent[i])
+            (children[p] if p >= 0 else roots).append(i)
+
+        def build(i: int) -> TreeNodeResponse:
+            nested = [build(c) for c in children.get(i, [])]
+            return self._node(i, nested, bool(nested))
+
+        return [build(r) for r in roots]
+
+    def page(self, search: str | None, page: int, page_size: int) -> dict:
+        """Flat, paginated nodes (consolidated entities), optionally filtered by ``search``."""
+        hits = self.matches(search) if search else range(self.size)
+        offset = (page - 1) * page_size
+        items = [
+            FlatItemResponse(id=self.node_ids[i], label=self.labels[i], status=self.statuses[i])
+            for i in hits[offset: offset + page_size]
+        ]
+        return {
+            "items": items,
+            "total": len(hits),
+            "page": page,
+            "page_size": page_size,
+            "has_more": (page * page_size) < len(hits),
+        }
+
+
+class OrgTreeSnapshot:
+    """The function, location and consolidated trees loaded at one generation."""
+
+    def __init__(self, generation: int, trees: dict[str, OrgTree], build_seconds: float) -> None:
+        self.generation = generation
+        self.trees = trees
+        self.build_seconds = build_seconds
+        self.built_at = datetime.now(timezone.utc)
+
+    def __getitem__(self, tree: str) -> OrgTree:
+        return self.trees[tree]
+
+    def status(self) -> dict:
+        return {
+            "generation": self.generation,
+            "nodes": {name: tree.size for name, tree in self.trees.items()},
+            "array_bytes": sum(tree.nbytes for tree in self.trees.values()),
+            "build_ms": round(self.build_seconds * 1000, 1),
+            "built_at": self.built_at.isoformat(),
+        }
+
+
+# ── Build ─────────────────────────────────────────────────────────────
+
+async def _load_nodes(conn, tree: str, ver_table, label_col) -> list[tuple]:
+    result = await conn.execute(
+        select(ref_node.c.node_id, label_col, ref_node.c.node_type, ver_table.c.status)
+        .join(ver_table, ver_table.c.ref_node_id == ref_node.c.node_id)
+        .where(ref_node.c.tree == tree, ver_table.c.tx_to.is_(None))
+    )
+    return [(node_id, label or node_id, node_type, status) for node_id, label, node_type, status in result]
+
+
+async def build_org_trees(conn, generation: int) -> OrgTreeSnapshot:
+    """Load the current nodes and parent edges of every tree from PostgreSQL."""
+    started = time.perf_counter()
+    edges = (await conn.execute(
+        select(rel_child.c.in_node_id, rel_child.c.out_node_id).where(rel_child.c.tx_to.is_(None))
+    )).all()
+    nodes = {
+        "function": await _load_nodes(conn, "function", ver_function, ver_function.c.name),
+        "location": await _load_nodes(conn, "location", ver_location, ver_location.c.names[1]),
+        "consolidated": await _load_nodes(
+            conn, "consolidated", ver_consolidated, func.array_to_string(ver_consolidated.c.names, " / "),
+        ),
+    }
+    trees = {name: OrgTree(name, tree_nodes, edges) for name, tree_nodes in nodes.items()}
+    return OrgTreeSnapshot(generation, trees, time.perf_counter() - started)
+
+
+# ── Worker state + reload signal ──────────────────────────────────────
+
+_snapshot: OrgTreeSnapshot | None = None
+_last_check = 0.0
+_reload_task: asyncio.Task | None = None
+
+
+def _coordination_redis():
+    from server.config.redis import get_redis_coordination
+
+    try:
+        return get_redis_coordination()
+    except RuntimeError:
+        return None
+
+
+async def _read_generation() -> int | None:
+    redis = _coordination_redis()
+    if redis is None:
+        return None
+    try:
+        return int(await redis.get(_GENERATION_KEY) or 0)
+    except Exception as e:
+        logger.warning("Org tree generation read failed: {}", e)
+        return None
+
+
+async def load_org_trees() -> OrgTreeSnapshot | None:
+    """Build this worker's snapshot from PostgreSQL (startup and after a reload signal)."""
+    global _snapshot, _last_check
+    if not get_settings().org_tree_snapshot_enabled:
+        return None
+    from server.config.postgres import get_engine
+
+    _last_check = time.monotonic()
+    # Read the generation first: a signal during the build triggers another reload
+    generation = await _read_generation() or 0
+    async with get_engine().connect() as conn:
+        snapshot = await build_org_trees(conn, generation)
+    _snapshot, _last_check = snapshot, time.monotonic()
+    logger.info(
+        "Org trees loaded: generation {}, {} nodes, {:.0f} ms",
+        generation, snapshot.status()["nodes"], snapshot.build_seconds * 1000,
+    )
+    return snapshot
+
+
+def _start_reload() -> None:
+    global _reload_task
+    if _reload_task is not None and not _reload_task.done():
+        return
+
+    async def _reload() -> None:
+        try:
+            await load_org_trees()
+        except Exception as e:
+            logger.error("Org tree reload failed, using SQL filters: {}", e)
+
+    _reload_task = asyncio.ensure_future(_reload())
+
+
+async def get_org_trees() -> OrgTreeSnapshot | None:
+    """This worker's snapshot, or None when disabled, not loaded or superseded by an ingestion."""
+    global _snapshot, _last_check
+    settings = get_settings()
+    if not settings.org_tree_snapshot_enabled:
+        return None
+    now = time.monotonic()
+    due = now - _last_check >= settings.org_tree_check_interval
+    if _snapshot is None:
+        # Not loaded yet or the last build failed: retry at most once per interval
+        if _last_check and due:
+            _last_check = now
+            _start_reload()
+        return None
+    if due:
+        _last_check = now
+        generation = await _read_generation()
+        if generation is not None and generation != _snapshot.generation:
+            logger.info("Org tree generation {} → {}: reloading", _snapshot.generation, generation)
+            _snapshot = None
+            _start_reload()
+    return _snapshot
+
+
+async def signal_org_tree_reload() -> int:
+    """Tell every API worker to rebuild its org trees (call after context-provider ingestion)."""
+    from server.config.redis import get_redis_coordination
+
+    return int(await get_redis_coordination().incr(_GENERATION_KEY))
+
+
+def signal_org_tree_reload_sync() -> int:
+    """Synchronous ``signal_org_tree_reload`` for CLI scripts."""
+    from server.config.redis import get_redis_sync_client
+
+    return int(get_redis_sync_client().incr(_GENERATION_KEY))
+
+
+def get_org_tree_status() -> dict:
+    """Node counts and generation of this worker's snapshot (health endpoint)."""
+    if _snapshot is None:
+        reloading = _reload_task is not None and not _reload_task.done()
+        return {"loaded": False, "reloading": reloading}
+    return {"loaded": True, "reloading": False, **_snapshot.status()}
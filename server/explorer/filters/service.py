@@ -1,4 +1,9 @@
-"""Filter query service — reads org trees, CEs, AUs, risk themes from Postgres."""
+"""Filter query service — reads org trees, CEs, AUs, risk themes from Postgres.
+
+Function / location trees and consolidated entities are served from the
+worker's in-memory org tree snapshot (org_tree.py) when it is loaded; the
+SQL queries below are the fallback.
+"""
 
 from __future__ import annotations
 
@@ -14,6 +19,7 @@ from server.explorer.shared.models import (
     RiskThemeResponse,
 )
 from server.cache import cached
+from server.explorer.filters.org_tree import get_org_trees
 from server.logging_config import get_logger
 
 from server.pipelines.orgs.schema import (
@@ -92,12 +98,23 @@ def _build_tree(rows: list[dict], max_preloaded_level: int) -> list[TreeNodeResp
 # Functions tree
 # ---------------------------------------------------------------------------
 
-@cached(namespace="explorer", ttl=3600)
 async def get_function_tree(
     parent_id: str | None = None,
     search: str | None = None,
 ) -> list[TreeNodeResponse]:
-    """Return function hierarchy nodes.
+    """Return function hierarchy nodes (see ``_get_function_tree_sql``)."""
+    nodes = await _tree_nodes("function", parent_id, search)
+    if nodes is None:
+        nodes = await _get_function_tree_sql(parent_id, search)
+    return nodes
+
+
+@cached(namespace="explorer", ttl=3600)
+async def _get_function_tree_sql(
+    parent_id: str | None = None,
+    search: str | None = None,
+) -> list[TreeNodeResponse]:
+    """Return function hierarchy nodes from PostgreSQL.
 
     - parent_id=None, search=None: roots + 2 levels via recursive CTE.
     - parent_id set: direct children of that node (lazy load).
@@ -173,12 +190,23 @@ async def get_function_tree(
 # Locations tree
 # ---------------------------------------------------------------------------
 
-@cached(namespace="explorer", ttl=3600)
 async def get_location_tree(
     parent_id: str | None = None,
     search: str | None = None,
 ) -> list[TreeNodeResponse]:
-    """Return location hierarchy nodes. Same approach as functions.
+    """Return location hierarchy nodes (see ``_get_location_tree_sql``)."""
+    nodes = await _tree_nodes("location", parent_id, search)
+    if nodes is None:
+        nodes = await _get_location_tree_sql(parent_id, search)
+    return nodes
+
+
+@cached(namespace="explorer", ttl=3600)
+async def _get_location_tree_sql(
+    parent_id: str | None = None,
+    search: str | None = None,
+) -> list[TreeNodeResponse]:
+    """Return location hierarchy nodes from PostgreSQL. Same approach as functions.
 
     Returns current nodes only (tx_to IS NULL).
     """
@@ -243,6 +271,19 @@ async def get_location_tree(
 # Shared tree helpers
 # ---------------------------------------------------------------------------
 
+async def _tree_nodes(tree_type: str, parent_id: str | None, search: str | None) -> list[TreeNodeResponse] | None:
+    """Tree nodes from the in-memory snapshot, or None when it is not loaded."""
+    trees = await get_org_trees()
+    if trees is None:
+        return None
+    tree = trees[tree_type]
+    if parent_id:
+        return tree.children(parent_id)
+    if search:
+        return tree.search(search)
+    return tree.top()
+
+
 async def _search_nodes(
     conn,
     tree_type: str,
@@ -467,11 +508,23 @@ async def _load_children(
 # Consolidated entities
 # ---------------------------------------------------------------------------
 
-@cached(namespace="explorer", ttl=3600)
 async def get_consolidated_entities(
     search: str | None = None,
     page: int = 1,
     page_size: int = 50,
+) -> dict:
+    """Paginated consolidated entities with optional search (in-memory snapshot, else SQL)."""
+    trees = await get_org_trees()
+    if trees is not None:
+        return trees["consolidated"].page(search, page, page_size)
+    return await _get_consolidated_entities_sql(search, page, page_size)
+
+
+@cached(namespace="explorer", ttl=3600)
+async def _get_consolidated_entities_sql(
+    search: str | None = None,
+    page: int = 1,
+    page_size: int = 50,
 ) -> dict:
     """Paginated consolidated entities with optional ILIKE search."""
     engine = get_engine()
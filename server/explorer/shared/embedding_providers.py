@@ -0,0 +1,290 @@
+"""Query embedding backends and micro-batching for semantic search.
+
+``embed_query`` (embeddings.py) resolves cache misses through the backend
+selected by ``query_embedding_backend``:
+
+- ``openai``: text-embedding-3-large over the pooled HTTP client.
+- ``hash``: the deterministic hash embedder used by ``run_embeddings_mock``.
+  It needs no network and no key, so semantic search works offline
+  against mock-ingested data and latency benchmarks are reproducible.
+- ``sentence-transformers``: a local CPU sentence-embedding model, loaded
+  at startup by ``load_embedding_backend``. The optional
+  ``sentence-transformers`` package must be installed, the model must
+  produce 3072-dim vectors and the collection must have been embedded with
+  it; otherwise semantic search reports itself unavailable.
+
+Concurrent misses are collected for ``query_embedding_batch_window_ms``
+(or until ``query_embedding_max_batch`` texts) and embedded with one
+backend call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from functools import lru_cache
+
+import httpx
+import numpy as np
+
+from server.logging_config import get_logger
+from server.settings import get_settings
+
+logger = get_logger(name=__name__)
+
+EMBEDDING_BACKENDS = ("openai", "hash", "sentence-transformers")
+QUERY_EMBEDDING_DIMENSIONS = 3072  # dimension of the controls collection's named vectors
+
+_OPENAI_MODEL = "text-embedding-3-large"
+_OPENAI_URL = "https://api.openai.com/v1/embeddings"
+
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the worker-wide pooled client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+async def close_embedding_client() -> None:
+    """Close the pooled client (application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# ── Backends ─────────────────────────────────────────────────────────
+
+class EmbeddingBackend:
+    """Embeds a batch of query texts into float32 vectors.
+
+    ``model`` and ``dimensions`` are part of the cache key, so vectors from
+    different backends never mix.
+    """
+
+    name: str = ""
+    model: str = ""
+    dimensions: int = QUERY_EMBEDDING_DIMENSIONS
+
+    @property
+    def unavailable_reason(self) -> str | None:
+        """Why the backend cannot embed right now, or None if it can."""
+        return None
+
+    async def load(self) -> None:
+        """Load whatever the backend needs before it can embed (no-op by default)."""
+        return None
+
+    async def embed_batch(self, texts: list[str]) -> np.ndarray:
+        """Return a ``(len(texts), dimensions)`` float32 array."""
+        raise NotImplementedError
+
+
+class OpenAIBackend(EmbeddingBackend):
+    name = "openai"
+    model = _OPENAI_MODEL
+
+    @property
+    def unavailable_reason(self) -> str | None:
+        if not get_settings().openai_api_key:
+            return "OPENAI_API_KEY is not set in .env — semantic search is unavailable"
+        return None
+
+    async def embed_batch(self, texts: list[str]) -> np.ndarray:
+        resp = await _get_client().post(
+            _OPENAI_URL,
+            headers={
+                "Authorization": f"Bearer {get_settings().openai_api_key}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": self.model,
+                "input": texts,
+                "dimensions": self.dimensions,
+            },
+        )
+        resp.raise_for_status()
+        # Results carry their input index; order is not guaranteed
+        data = sorted(resp.json()["data"], key=lambda d: d["index"])
+        return np.asarray([d["embedding"] for d in data], dtype=np.float32)
+
+
+class HashBackend(EmbeddingBackend):
+    """Deterministic sparse vectors from the text hash (no network, no model)."""
+    name = "hash"
+    model = "sha256-sparse"
+
+    async def embed_batch(self, texts: list[str]) -> np.ndarray:
+        from server.pipelines.controls.model_runners.run_embeddings_mock import text_to_embedding
+
+        return np.stack([text_to_embedding(t, self.dimensions) for t in texts]).astype(np.float32)
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Local CPU sentence-embedding model (optional dependency).
+
+    The model is loaded by ``load_embedding_backend`` at startup, in a
+    worker thread; until then, and if its output dimension differs from
+    the collection's named vectors, the backend reports itself unavailable.
+    """
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str | None) -> None:
+        self.model = model_name
+        self._encoder = None
+        self._load_error: str | None = None
+
+    def _load(self) -> None:
+        if self._encoder is not None or self._load_error:
+            return
+        if not self.model:
+            self._load_error = "query_embedding_backend=sentence-transformers requires query_embedding_local_model"
+            return
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            self._load_error = (
+                "query_embedding_backend=sentence-transformers requires the "
+                "'sentence-transformers' package"
+            )
+            return
+        try:
+            encoder = SentenceTransformer(self.model, device="cpu")
+            dimensions = int(encoder.get_sentence_embedding_dimension())
+        except Exception as e:
+            # Unknown model, missing weights offline, corrupt cache: degrade, don't fail startup
+            self._load_error = f"Local embedding model {self.model} failed to load: {e}"
+            return
+        if dimensions != QUERY_EMBEDDING_DIMENSIONS:
+            self._load_error = (
+                f"Local embedding model {self.model} produces {dimensions}-dim vectors; "
+                f"the controls collection needs {QUERY_EMBEDDING_DIMENSIONS} — semantic search is unavailable"
+            )
+            return
+        self._encoder = encoder
+
+    async def load(self) -> None:
+        # Model loading reads weights from disk and blocks for seconds
+        await asyncio.to_thread(self._load)
+
+    @property
+    def unavailable_reason(self) -> str | None:
+        if self._load_error:
+            return self._load_error
+        if self._encoder is None:
+            return f"Local embedding model {self.model} is not loaded"
+        return None
+
+    async def embed_batch(self, texts: list[str]) -> np.ndarray:
+        # CPU-bound; keep the event loop free while the model runs
+        loop = asyncio.get_running_loop()
+        vectors = await loop.run_in_executor(
+            None,
+            lambda: self._encoder.encode(texts, batch_size=len(texts), normalize_embeddings=True),
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+@lru_cache()
+def get_embedding_backend() -> EmbeddingBackend:
+    """Backend selected by ``query_embedding_backend`` (one per worker)."""
+    settings = get_settings()
+    backend = settings.query_embedding_backend
+    if backend == "hash":
+        selected: EmbeddingBackend = HashBackend()
+    elif backend == "sentence-transformers":
+        selected = SentenceTransformerBackend(settings.query_embedding_local_model)
+    else:
+        selected = OpenAIBackend()
+    return selected
+
+
+async def load_embedding_backend() -> EmbeddingBackend:
+    """Load the configured backend's model, if it has one (application startup)."""
+    backend = get_embedding_backend()
+    await backend.load()
+    unavailable = backend.unavailable_reason
+    if unavailable:
+        logger.warning("Query embedding backend {} unavailable: {}", backend.name, unavailable)
+    else:
+        logger.info("Query embedding backend: {} ({}, {} dims)", backend.name, backend.model, backend.dimensions)
+    return backend
+
+
+def semantic_search_available() -> bool:
+    """Whether semantic (and hence hybrid) search can embed queries."""
+    return get_embedding_backend().unavailable_reason is None
+
+
+# ── Micro-batching ───────────────────────────────────────────────────
+
+class MicroBatcher:
+    """Coalesces concurrent query embeddings into one backend call per window."""
+
+    def __init__(self) -> None:
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.texts = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.last_seconds = 0.0
+
+    async def submit(self, text: str) -> np.ndarray:
+        """Embed ``text`` together with whatever else arrives in the window."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # A new event loop (worker restart, tests): drop state from the old one
+            self._loop, self._pending, self._timer = loop, [], None
+
+        settings = get_settings()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= settings.query_embedding_max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(settings.query_embedding_batch_window_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        backend = get_embedding_backend()
+        started = time.perf_counter()
+        try:
+            vectors = await backend.embed_batch([text for text, _ in batch])
+        except Exception as e:
+            self.errors += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.last_seconds = time.perf_counter() - started
+            self.seconds += self.last_seconds
+            self.batches += 1
+            self.texts += len(batch)
+
+        logger.debug(
+            "Embedded {} queries with {} in {:.0f} ms", len(batch), backend.name, self.last_seconds * 1000,
+        )
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
@@ -1,55 +1,199 @@
-"""OpenAI embedding utility for semantic search queries."""
+"""Query embedding for semantic search.
+
+Query vectors are cached at two levels so paging, re-sorting or tweaking
+filters on the same query does not embed it again:
+
+1. An in-process LRU (per worker, no I/O).
+2. Redis (shared across workers), under ``cache:embeddings:...`` so the
+   usual cache invalidation covers it.
+
+Both levels are keyed by the normalized query text, the backend's model
+and its dimensions, and store the vector as little-endian float32 bytes
+(12 KiB for 3072 dims instead of ~60 KiB of JSON floats). Concurrent
+misses for the same key share one request, and misses for different keys
+are micro-batched into one backend call (see embedding_providers.py for
+the OpenAI, hash and local-model backends).
+"""
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
 import logging
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
 
-import httpx
+import numpy as np
 
+from server.explorer.shared.embedding_providers import (
+    EmbeddingBackend,
+    MicroBatcher,
+    get_embedding_backend,
+)
 from server.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
-_EMBED_MODEL = "text-embedding-3-large"
-_EMBED_DIMENSIONS = 3072
-_EMBED_URL = "https://api.openai.com/v1/embeddings"
+_CACHE_NAMESPACE = "embeddings"
+
+_batcher = MicroBatcher()
+_lru: OrderedDict[str, bytes] = OrderedDict()
+_inflight: dict[str, asyncio.Future] = {}
+
+
+# ── Metrics ──────────────────────────────────────────────────────────
+
+@dataclass
+class EmbeddingCacheStats:
+    """Per-worker counters for the query embedding cache."""
+    lru_hits: int = 0
+    redis_hits: int = 0
+    shared_inflight: int = 0
+    misses: int = 0
+
+    def to_dict(self) -> dict:
+        lookups = self.lru_hits + self.redis_hits + self.shared_inflight + self.misses
+        hits = lookups - self.misses
+        backend = get_embedding_backend()
+        return {
+            "backend": backend.name,
+            "model": backend.model,
+            "lookups": lookups,
+            "lru_hits": self.lru_hits,
+            "redis_hits": self.redis_hits,
+            "shared_inflight": self.shared_inflight,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "lru_size": len(_lru),
+            "upstream_calls": _batcher.batches,
+            "upstream_texts": _batcher.texts,
+            "upstream_errors": _batcher.errors,
+            "upstream_avg_ms": round(_batcher.seconds / _batcher.batches * 1000, 1) if _batcher.batches else None,
+            "upstream_last_ms": round(_batcher.last_seconds * 1000, 1),
+        }
+
+
+_stats = EmbeddingCacheStats()
+
+
+def get_embedding_cache_stats() -> dict:
+    """Hit rate and upstream latency of this worker's query embedding cache."""
+    return _stats.to_dict()
+
+
+# ── Client + cache helpers ───────────────────────────────────────────
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query for cache keys (NFKC, collapsed whitespace)."""
+    return " ".join(unicodedata.normalize("NFKC", query).split())
+
+
+def _cache_key(backend: EmbeddingBackend, text: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+    return f"cache:{_CACHE_NAMESPACE}:{backend.model}:{backend.dimensions}:{digest}"
+
 
+def _to_bytes(embedding) -> bytes:
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def _from_bytes(raw: bytes) -> list[float]:
+    return np.frombuffer(raw, dtype="<f4").tolist()
+
+
+def _lru_put(key: str, raw: bytes) -> None:
+    _lru[key] = raw
+    _lru.move_to_end(key)
+    while len(_lru) > get_settings().query_embedding_lru_size:
+        _lru.popitem(last=False)
+
+
+async def _redis_get(key: str, dimensions: int) -> bytes | None:
+    from server.config.redis import get_redis
+
+    try:
+        value = await get_redis().get(key)
+    except Exception as e:  # Redis down or not initialized: treat as a miss
+        logger.debug("embed_query: Redis GET failed for %s: %s", key, e)
+        return None
+    if not value:
+        return None
+    raw = base64.b64decode(value)
+    return raw if len(raw) == dimensions * 4 else None
+
+
+async def _redis_set(key: str, raw: bytes) -> None:
+    from server.config.redis import get_redis
+
+    try:
+        # The cache client decodes responses, so the bytes travel as base64
+        await get_redis().set(
+            key, base64.b64encode(raw).decode("ascii"), ex=get_settings().query_embedding_cache_ttl,
+        )
+    except Exception as e:
+        logger.debug("embed_query: Redis SET failed for %s: %s", key, e)
+
+
+# ── Public API ───────────────────────────────────────────────────────
 
 async def embed_query(
     query: str,
     *,
     graph_token: str | None = None,
 ) -> list[float]:
-    """Embed a single query string using OpenAI text-embedding-3-large.
+    """Embed a single query string with the configured backend.
 
-    Returns a 3072-dimensional float vector.
+    Returns the backend's vector (3072 dims for OpenAI text-embedding-3-large
+    and the hash embedder) at float32 precision, from the cache when the
+    normalized query has been embedded before.
 
-    Raises RuntimeError if OPENAI_API_KEY is not configured.
+    Raises RuntimeError if the backend is unavailable (e.g. OPENAI_API_KEY
+    is not configured for the OpenAI backend).
     """
-    api_key = get_settings().openai_api_key
-    if not api_key:
-        raise RuntimeError(
-            "OPENAI_API_KEY is not set in .env — semantic search is unavailable"
-        )
+    backend = get_embedding_backend()
+    unavailable = backend.unavailable_reason
+    if unavailable:
+        raise RuntimeError(unavailable)
 
-    logger.debug("embed_query: model=%s len=%d graph_token=%s", _EMBED_MODEL, len(query), bool(graph_token))
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(
-            _EMBED_URL,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": _EMBED_MODEL,
-                "input": query,
-                "dimensions": _EMBED_DIMENSIONS,
-            },
-        )
-        resp.raise_for_status()
-        data = resp.json()
+    text = normalize_query(query)
+    key = _cache_key(backend, text)
+
+    raw = _lru.get(key)
+    if raw is not None:
+        _lru.move_to_end(key)
+        _stats.lru_hits += 1
+        return _from_bytes(raw)
+
+    # Another request is already fetching this query: wait for its result
+    pending = _inflight.get(key)
+    if pending is not None:
+        _stats.shared_inflight += 1
+        return _from_bytes(await asyncio.shield(pending))
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        raw = await _redis_get(key, backend.dimensions)
+        if raw is not None:
+            _stats.redis_hits += 1
+        else:
+            _stats.misses += 1
+            logger.debug("embed_query: backend=%s len=%d graph_token=%s", backend.name, len(text), bool(graph_token))
+            raw = _to_bytes(await _batcher.submit(text))
+            await _redis_set(key, raw)
+        _lru_put(key, raw)
+        future.set_result(raw)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Waiters re-raise it; retrieve here so an unshared failure is not reported as unhandled
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
 
-    embedding: list[float] = data["data"][0]["embedding"]
-    logger.debug("embed_query: received %d-dim vector", len(embedding))
-    return embedding
+    return _from_bytes(raw)
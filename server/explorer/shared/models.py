@@ -305,6 +305,7 @@ class ControlVersionSummary(BaseModel):
 
     tx_from: datetime
     tx_to: datetime | None = None
+    changed_fields: list[str] = Field(default_factory=list, description="Material fields changed against the previous version")
 
 
 class ControlVersionListResponse(BaseModel):
@@ -368,3 +369,35 @@ class ControlDescriptionsResponse(BaseModel):
     """Batch response for brief control descriptions."""
 
     controls: list[ControlBriefResponse]
+
+
+class ControlFacetCountsRequest(ControlsSearchParams):
+    """POST body for /v2/explorer/controls/facets: the search state plus the org nodes to count."""
+    function_node_ids: list[str] = Field(default_factory=list, max_length=500, description="Function nodes shown in the sidebar")
+    location_node_ids: list[str] = Field(default_factory=list, max_length=500, description="Location nodes shown in the sidebar")
+
+
+class ControlFacetCountsResponse(BaseModel):
+    """Matching controls per sidebar facet value (zero counts omitted)."""
+    total: int
+    status: dict[str, int]
+    level: dict[str, int]
+    key_control: dict[str, int]
+    risk_themes: dict[str, int]
+    functions: dict[str, int] = Field(description="Per requested node, counting its whole subtree")
+    locations: dict[str, int] = Field(description="Per requested node, counting its whole subtree")
+
+
+class ControlTypeaheadItem(BaseModel):
+    """One control ID suggestion."""
+
+    control_id: str
+    control_title: str | None = None
+    match: Literal["prefix", "fuzzy"]
+    score: float
+
+
+class ControlTypeaheadResponse(BaseModel):
+    """Control ID typeahead suggestions, best first."""
+
+    items: list[ControlTypeaheadItem]
@@ -8,6 +8,7 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from sqlalchemy import DateTime, String, Text, BigInteger, CheckConstraint, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
 
 from server.pipelines.schema.base import metadata
@@ -29,6 +30,7 @@ class TusUpload(Base):
     filename: Mapped[str] = mapped_column(String(255), nullable=False)
     file_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
     offset: Mapped[int] = mapped_column(BigInteger, default=0)
+    checksum_crc32: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")  # running CRC-32 of bytes [0, offset)
     is_complete: Mapped[bool] = mapped_column(default=False)
     uploaded_by: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
     temp_path: Mapped[str] = mapped_column(Text, nullable=False)
@@ -61,6 +63,7 @@ class UploadBatch(Base):
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     error_code: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     error_details: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    ingestion_profile: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)  # per-stage timings of the last ingestion run
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     __table_args__ = (
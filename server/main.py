@@ -106,6 +106,27 @@ async def lifespan(app: FastAPI):
         logger.error(f"{worker_id}: Qdrant initialization failed: {e}")
         raise
 
+    # Load the query embedding model, if the backend has one (off the event loop)
+    try:
+        from server.explorer.shared.embedding_providers import load_embedding_backend
+        await load_embedding_backend()
+    except Exception as e:
+        logger.warning(f"{worker_id}: Query embedding backend load failed, semantic search unavailable: {e}")
+
+    # Load the in-memory facet index (each worker; SQL filters if it fails)
+    try:
+        from server.explorer.controls.facet_index import load_facet_index
+        await load_facet_index()
+    except Exception as e:
+        logger.warning(f"{worker_id}: Facet index load failed, using SQL filters: {e}")
+
+    # Load the in-memory org tree snapshot (each worker; SQL filter trees if it fails)
+    try:
+        from server.explorer.filters.org_tree import load_org_trees
+        await load_org_trees()
+    except Exception as e:
+        logger.warning(f"{worker_id}: Org tree load failed, using SQL filter trees: {e}")
+
     # ═══════════════════════════════════════════════════════════════════
     # Phase 4: Optional optimizations (only leader does these)
     # ═══════════════════════════════════════════════════════════════════
@@ -151,6 +172,14 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"{worker_id}: Error shutting down token manager executor: {e}")
 
+    # Close pooled OpenAI embedding client
+    try:
+        from server.explorer.shared.embedding_providers import close_embedding_client
+        await close_embedding_client()
+        logger.info(f"{worker_id}: Embedding HTTP client closed")
+    except Exception as e:
+        logger.warning(f"{worker_id}: Error closing embedding HTTP client: {e}")
+
     # Close Redis clients
     try:
         from server.config.redis import close_redis
@@ -222,7 +251,13 @@ async def _init_qdrant_safe(url: str, prefix: str, sync_manager):
 async def _create_qdrant_collections(prefix: str):
     """Create Qdrant collections (only once)."""
     from server.config.qdrant import _ensure_controls_collection
+    from server.pipelines.controls.qdrant_service import backfill_control_seq_payloads
+
     await _ensure_controls_collection(prefix)
+    try:
+        await backfill_control_seq_payloads(f"{prefix}_controls")
+    except Exception as e:
+        logger.warning(f"control_seq payload backfill failed: {e}")
 
 
 async def _warm_up_caches():
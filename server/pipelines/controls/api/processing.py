@@ -9,10 +9,10 @@ ensuring non-blocking operation across multiple workers.
 
 import uuid
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from celery.result import AsyncResult
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -81,18 +81,42 @@ class JobStatusResponse(BaseModel):
     completed_at: Optional[str]
     error_message: Optional[str]
     duration_seconds: float = 0.0
+    profile: Optional[Dict[str, Any]] = None
+
+
+class IngestionProfileSummary(BaseModel):
+    batch_id: int
+    upload_id: str
+    status: str
+    total_records: Optional[int]
+    total_seconds: Optional[float]
+    max_rss_mb_approx: Optional[float]
+    db_round_trips: Optional[int]
+    qdrant_bytes_approx: Optional[int]
+    stage_seconds: Dict[str, Optional[float]] = {}
+
+
+class IngestionProfilesListResponse(BaseModel):
+    profiles: List[IngestionProfileSummary]
+    total: int
+
+
+class IngestionProfileResponse(IngestionProfileSummary):
+    profile: Optional[Dict[str, Any]] = None
 
 
 class StartInsertRequest(BaseModel):
     batch_id: int
+    plan_only: bool = False  # dry run: report what ingestion would do, write nothing
 
 
 class StartInsertResponse(BaseModel):
     success: bool
     message: str
-    job_id: str
+    job_id: Optional[str] = None
     batch_id: int
     upload_id: str
+    plan: Optional[Dict[str, Any]] = None
 
 
 # ============== Endpoints ==============
@@ -127,6 +151,10 @@ async def start_ingestion(
     Submits ingestion task to Celery queue for background processing.
     Only one ingestion can run at a time (enforced by Celery task).
 
+    With ``plan_only`` nothing is queued or written: the response carries
+    the per-table delta, Qdrant work, expected similar-controls mode and
+    a duration estimate from previous runs' profiles.
+
     Requires pipelines-admin access.
     """
     access = await get_access_control(token)
@@ -180,6 +208,23 @@ async def start_ingestion(
             detail=readiness.message or "Model outputs are not ready for ingestion"
         )
 
+    if request.plan_only:
+        from ..ingest.planner import plan_controls_ingestion
+
+        history = await processing_service.get_successful_ingestion_profiles(db)
+        try:
+            plan = await plan_controls_ingestion(batch.upload_id, history=history)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return StartInsertResponse(
+            success=True,
+            message="Ingestion plan computed (nothing written)",
+            batch_id=request.batch_id,
+            upload_id=batch.upload_id,
+            plan=plan.to_dict(),
+        )
+
     # Check if an ingestion is already running (via Celery)
     from server.config.redis import get_redis_sync_client
     redis_client = get_redis_sync_client()
@@ -355,6 +400,7 @@ async def get_job_status(
                 started_at=None,
                 completed_at=info.get('failed_at', datetime.now(timezone.utc).isoformat()),
                 error_message=info.get('message', 'Unknown error'),
+                profile=info.get('profile'),
             )
 
         # Task actually succeeded
@@ -386,6 +432,7 @@ async def get_job_status(
             completed_at=info.get('completed_at'),
             error_message=None,  # No error on success
             duration_seconds=duration,
+            profile=info.get('profile'),
         )
 
     elif task_state == 'FAILURE':
@@ -443,6 +490,45 @@ async def get_job_status(
         )
 
 
+@router.get("/profiles", response_model=IngestionProfilesListResponse)
+async def get_ingestion_profiles(
+    limit: int = Query(20, ge=1, le=200),
+    token: str = Depends(get_token_from_header),
+    db: AsyncSession = Depends(get_jobs_db),
+):
+    """Get per-stage timing summaries of recent ingestion runs for comparison."""
+    access = await get_access_control(token)
+
+    if not access.hasPipelinesIngestionAccess:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    profiles = await processing_service.get_ingestion_profiles(db, limit=limit)
+
+    return IngestionProfilesListResponse(
+        profiles=[IngestionProfileSummary(**p) for p in profiles],
+        total=len(profiles),
+    )
+
+
+@router.get("/batches/{batch_id}/profile", response_model=IngestionProfileResponse)
+async def get_ingestion_profile(
+    batch_id: int,
+    token: str = Depends(get_token_from_header),
+    db: AsyncSession = Depends(get_jobs_db),
+):
+    """Get the full stored ingestion profile (all stages) for a batch."""
+    access = await get_access_control(token)
+
+    if not access.hasPipelinesIngestionAccess:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    profile = await processing_service.get_ingestion_profile(db, batch_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+
+    return IngestionProfileResponse(**profile)
+
+
 @router.post("/batches/{batch_id}/discard")
 async def discard_batch(
     batch_id: int,
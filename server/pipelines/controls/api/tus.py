@@ -7,6 +7,13 @@ Supported extensions:
 - creation: POST to create new uploads
 - expiration: Upload expiration timestamps
 - termination: DELETE to abort uploads
+- checksum: per-PATCH Upload-Checksum verification (md5, sha1, sha256)
+
+PATCH bodies are streamed to disk in buffered blocks written from a worker
+thread, so a chunk is never held in memory whole and file I/O never blocks
+the event loop. A running CRC-32 of the received bytes is kept on the
+TusUpload row; if the client sends a ``checksum_crc32`` metadata value the
+completed file is verified against it without being re-read.
 
 Endpoints:
 - OPTIONS /tus - Return TUS capabilities
@@ -15,16 +22,21 @@ Endpoints:
 - PATCH /tus/{upload_id} - Upload chunk
 - DELETE /tus/{upload_id} - Abort upload (termination extension)
 """
+import asyncio
 import base64
+import hashlib
 import json
+import os
 import uuid
+import zlib
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional, Tuple
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect
 
 from server.auth.dependencies import get_token_from_header
 from server.auth.service import get_access_control
@@ -38,9 +50,16 @@ logger = get_logger(name=__name__)
 
 # TUS Protocol constants
 TUS_VERSION = "1.0.0"
-TUS_EXTENSIONS = "creation,expiration,termination"
+TUS_EXTENSIONS = "creation,expiration,termination,checksum"
 TUS_MAX_SIZE = 10 * 1024 * 1024 * 1024  # 10GB max upload size
 TUS_UPLOAD_EXPIRATION_HOURS = 24  # Uploads expire after 24 hours
+TUS_CHECKSUM_ALGORITHMS = {
+    "md5": hashlib.md5,
+    "sha1": hashlib.sha1,
+    "sha256": hashlib.sha256,
+}
+TUS_CHECKSUM_MISMATCH = 460  # TUS checksum extension status code
+TUS_WRITE_BUFFER_BYTES = 4 * 1024 * 1024  # Flush streamed body to disk in 4MB blocks
 
 def get_tus_upload_file_path(tus_id: str) -> Path:
     """Get the path for a specific TUS upload file."""
@@ -85,7 +104,8 @@ def add_tus_headers(response: Response) -> None:
     response.headers["Tus-Resumable"] = TUS_VERSION
     response.headers["Access-Control-Expose-Headers"] = (
         "Location, Upload-Offset, Upload-Length, Tus-Version, "
-        "Tus-Resumable, Tus-Max-Size, Tus-Extension, Upload-Expires"
+        "Tus-Resumable, Tus-Max-Size, Tus-Extension, Upload-Expires, "
+        "Tus-Checksum-Algorithm"
     )
 
 
@@ -109,6 +129,112 @@ def create_tus_response(
     return response
 
 
+def parse_upload_checksum(checksum_header: Optional[str]) -> Optional[Tuple[str, Any, bytes]]:
+    """Parse a TUS Upload-Checksum header.
+
+    Format: <algorithm> <base64 digest>
+
+    Returns:
+        (algorithm, fresh hash object, expected digest), or None if absent.
+    """
+    if not checksum_header:
+        return None
+
+    parts = checksum_header.strip().split(" ", 1)
+    if len(parts) != 2:
+        raise HTTPException(status_code=400, detail="Malformed Upload-Checksum header")
+
+    algorithm = parts[0].strip().lower()
+    factory = TUS_CHECKSUM_ALGORITHMS.get(algorithm)
+    if factory is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported checksum algorithm: {algorithm}")
+
+    try:
+        expected = base64.b64decode(parts[1].strip(), validate=True)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Upload-Checksum digest is not valid Base64")
+
+    return algorithm, factory(), expected
+
+
+def _write_block(f, block: bytes, crc: int, digest) -> int:
+    """Write one buffered block and fold it into the checksums (runs in a thread)."""
+    f.write(block)
+    if digest is not None:
+        digest.update(block)
+    return zlib.crc32(block, crc)
+
+
+async def _stream_body_to_file(
+    request: Request,
+    file_path: Path,
+    offset: int,
+    max_bytes: int,
+    crc: int,
+    digest=None,
+) -> Tuple[int, int, bool]:
+    """Stream the request body into ``file_path`` at ``offset``.
+
+    Body pieces are collected into blocks of TUS_WRITE_BUFFER_BYTES that are
+    written (and hashed) in a worker thread.
+
+    Returns:
+        (bytes_written, updated_crc, client_disconnected)
+    """
+    f = await asyncio.to_thread(open, file_path, "r+b")
+    written = 0
+    disconnected = False
+    buf = bytearray()
+    try:
+        await asyncio.to_thread(f.seek, offset)
+        try:
+            async for piece in request.stream():
+                if not piece:
+                    continue
+                written += len(piece)
+                if written > max_bytes:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Chunk would exceed declared file size. Current: {offset}, "
+                               f"Max: {offset + max_bytes}",
+                    )
+                buf += piece
+                if len(buf) >= TUS_WRITE_BUFFER_BYTES:
+                    block = bytes(buf)
+                    buf.clear()
+                    crc = await asyncio.to_thread(_write_block, f, block, crc, digest)
+        except ClientDisconnect:
+            disconnected = True
+
+        if buf:
+            crc = await asyncio.to_thread(_write_block, f, bytes(buf), crc, digest)
+        await asyncio.to_thread(f.flush)
+    finally:
+        await asyncio.to_thread(f.close)
+
+    return written, crc, disconnected
+
+
+async def _truncate_upload_file(file_path: Path, offset: int) -> None:
+    """Discard bytes written past ``offset`` by a rejected PATCH."""
+    try:
+        await asyncio.to_thread(os.truncate, file_path, offset)
+    except Exception:
+        logger.exception("Failed to truncate upload file {} to {}", file_path, offset)
+
+
+def _expected_file_crc32(tus_upload: TusUpload) -> Optional[int]:
+    """Whole-file CRC-32 declared by the client in Upload-Metadata, if any."""
+    if not tus_upload.metadata_json:
+        return None
+    try:
+        raw = json.loads(tus_upload.metadata_json).get("checksum_crc32")
+        return int(str(raw), 16) if raw else None
+    except (ValueError, TypeError):
+        logger.warning("Ignoring malformed checksum_crc32 metadata for upload {}", tus_upload.id)
+        return None
+
+
 router = APIRouter(prefix="/v2/pipelines/tus", tags=["TUS Resumable Upload"])
 
 
@@ -120,6 +246,7 @@ async def tus_options() -> Response:
     response.headers["Tus-Version"] = TUS_VERSION
     response.headers["Tus-Extension"] = TUS_EXTENSIONS
     response.headers["Tus-Max-Size"] = str(TUS_MAX_SIZE)
+    response.headers["Tus-Checksum-Algorithm"] = ",".join(TUS_CHECKSUM_ALGORITHMS)
     return response
 
 
@@ -318,10 +445,16 @@ async def tus_patch(
     upload_offset: int = Header(..., alias="Upload-Offset"),
     content_type: str = Header(..., alias="Content-Type"),
     tus_resumable: str = Header(..., alias="Tus-Resumable"),
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum"),
     token: str = Depends(get_token_from_header),
     db: AsyncSession = Depends(get_jobs_db),
 ) -> Response:
-    """Upload a chunk of data to a TUS upload."""
+    """Upload a chunk of data to a TUS upload.
+
+    The body is streamed to disk; with an Upload-Checksum header the chunk
+    is verified and discarded on mismatch (460). Without one, bytes received
+    before a client disconnect are kept so the client can resume from them.
+    """
     if tus_resumable != TUS_VERSION:
         raise HTTPException(status_code=412, detail=f"Unsupported TUS version: {tus_resumable}")
 
@@ -352,18 +485,15 @@ async def tus_patch(
             detail=f"Upload-Offset mismatch. Expected {tus_upload.offset}, got {upload_offset}",
         )
 
-    chunk_data = await request.body()
-    chunk_size = len(chunk_data)
+    checksum = parse_upload_checksum(upload_checksum)
+    remaining = tus_upload.file_size - tus_upload.offset
 
-    if chunk_size == 0:
-        raise HTTPException(status_code=400, detail="Empty chunk")
-
-    new_offset = tus_upload.offset + chunk_size
-    if new_offset > tus_upload.file_size:
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > remaining:
         raise HTTPException(
             status_code=400,
             detail=f"Chunk would exceed declared file size. Current: {tus_upload.offset}, "
-                   f"Chunk: {chunk_size}, Max: {tus_upload.file_size}",
+                   f"Chunk: {content_length}, Max: {tus_upload.file_size}",
         )
 
     upload_file_path = Path(tus_upload.temp_path)
@@ -389,23 +519,55 @@ async def tus_patch(
             detail=f"Upload file offset mismatch. Expected {tus_upload.offset}, got {on_disk_size}",
         )
 
+    digest = checksum[1] if checksum else None
     try:
-        with open(upload_file_path, "r+b") as f:
-            f.seek(upload_offset)
-            f.write(chunk_data)
+        chunk_size, new_crc, disconnected = await _stream_body_to_file(
+            request, upload_file_path, upload_offset, remaining,
+            tus_upload.checksum_crc32 or 0, digest,
+        )
+    except HTTPException:
+        await _truncate_upload_file(upload_file_path, upload_offset)
+        raise
     except Exception:
         logger.exception("Failed to write chunk for upload {}", upload_id)
+        await _truncate_upload_file(upload_file_path, upload_offset)
         raise HTTPException(status_code=500, detail="Failed to write chunk data")
 
+    if chunk_size == 0:
+        raise HTTPException(status_code=400, detail="Empty chunk")
+
+    if checksum is not None:
+        algorithm, _, expected_digest = checksum
+        if disconnected or digest.digest() != expected_digest:
+            await _truncate_upload_file(upload_file_path, upload_offset)
+            logger.warning(
+                "TUS checksum mismatch: id={}, algorithm={}, offset={}, size={}, disconnected={}",
+                upload_id, algorithm, upload_offset, chunk_size, disconnected,
+            )
+            raise HTTPException(status_code=TUS_CHECKSUM_MISMATCH, detail="Checksum mismatch")
+
+    new_offset = tus_upload.offset + chunk_size
     tus_upload.offset = new_offset
+    tus_upload.checksum_crc32 = new_crc
     await db.commit()
 
     logger.info(
-        "TUS chunk uploaded: id=%s, offset=%d->%d, size=%d",
-        upload_id, upload_offset, new_offset, chunk_size,
+        "TUS chunk uploaded: id={}, offset={}->{}, size={}, crc32={:08x}{}",
+        upload_id, upload_offset, new_offset, chunk_size, new_crc,
+        " (client disconnected)" if disconnected else "",
     )
 
     if new_offset == tus_upload.file_size:
+        expected_crc = _expected_file_crc32(tus_upload)
+        if expected_crc is not None and expected_crc != new_crc:
+            logger.warning(
+                "TUS file checksum mismatch: id={}, expected={:08x}, got={:08x}",
+                upload_id, expected_crc, new_crc,
+            )
+            raise HTTPException(
+                status_code=TUS_CHECKSUM_MISMATCH,
+                detail="File checksum mismatch; delete the upload and start again",
+            )
         await _complete_upload(tus_upload, db)
 
     response = create_tus_response(
@@ -549,8 +711,9 @@ async def _complete_upload(tus_upload: TusUpload, db: AsyncSession) -> None:
         upload_id, batch.id, expected_count,
     )
 
+    queue_validation = False
     if tus_upload.data_type == "controls":
-        await _process_controls_upload(db, batch, upload_id)
+        queue_validation = await _process_controls_upload(db, batch, upload_id)
     else:
         logger.error(
             "Data type %s is not supported - Issues and Actions are disabled (In Development)",
@@ -564,9 +727,20 @@ async def _complete_upload(tus_upload: TusUpload, db: AsyncSession) -> None:
 
     await db.commit()
 
+    # Dispatch only after commit so the worker sees the 'validating' batch
+    if queue_validation:
+        await _queue_controls_validation(db, batch, upload_id)
+
+
+async def _process_controls_upload(db: AsyncSession, batch: UploadBatch, upload_id: str) -> bool:
+    """Process controls upload: generate mock JSONL and mark it for validation.
 
-async def _process_controls_upload(db: AsyncSession, batch: UploadBatch, upload_id: str) -> None:
-    """Process controls upload: generate mock JSONL and validate."""
+    Schema validation runs in the background (see workers/tasks/validation.py);
+    the batch stays in 'validating' until the task records the outcome.
+
+    Returns:
+        True if a validation task should be queued once the batch is committed.
+    """
     from ..upload.mock_generator import generate_mock_jsonl
 
     try:
@@ -588,29 +762,8 @@ async def _process_controls_upload(db: AsyncSession, batch: UploadBatch, upload_
                 qdrant_dataset_path=_settings.mock_qdrant_dataset_path,
             )
 
-        # Count actual JSONL lines (source of truth for record count)
-        total_records = sum(1 for line in jsonl_path.open("rb") if line.strip())
-
-        logger.info("Validating JSONL schema for upload {}", upload_id)
-        _validate_controls_jsonl(jsonl_path)
-
-        batch.status = "validated"
-        batch.total_records = total_records
-        batch.completed_at = datetime.now(timezone.utc)
-        await db.flush()
-
-        logger.info(
-            "Controls upload processing complete: upload_id={}, records={}",
-            upload_id, total_records,
-        )
-
-    except ValueError as e:
-        logger.warning("Schema validation failed for {}: {}", upload_id, e)
-        batch.status = "failed"
-        batch.error_code = "schema_validation_error"
-        batch.error_details = str(e)
-        batch.completed_at = datetime.now(timezone.utc)
-        await db.flush()
+        logger.info("Queued JSONL schema validation for upload {}", upload_id)
+        return True
 
     except Exception as e:
         logger.exception("Failed to process controls upload: {}", e)
@@ -619,55 +772,26 @@ async def _process_controls_upload(db: AsyncSession, batch: UploadBatch, upload_
         batch.error_details = str(e)
         batch.completed_at = datetime.now(timezone.utc)
         await db.flush()
+        return False
 
 
-def _validate_controls_jsonl(jsonl_path: Path) -> None:
-    """Validate a controls JSONL file against the Pydantic schema.
+async def _queue_controls_validation(db: AsyncSession, batch: UploadBatch, upload_id: str) -> None:
+    """Dispatch the background validation task for a committed batch."""
+    from server.workers.tasks.validation import validate_controls_upload_task
 
-    Reads the file line by line and validates each record.
-    Checks for duplicate control_ids and missing parent references.
-
-    Raises:
-        ValueError: If validation fails.
-    """
-    import orjson
-    from pydantic import TypeAdapter, ValidationError as PydanticValidationError
-    from server.pipelines.controls.schema_validation import ControlRecord
-
-    adapter = TypeAdapter(ControlRecord)
-    seen: set = set()
-    parents: set = set()
-    n = 0
-
-    with jsonl_path.open("rb") as f:
-        for line_num, line in enumerate(f, start=1):
-            line = line.strip()
-            if not line:
-                continue
-            n += 1
-
-            try:
-                obj = orjson.loads(line)
-            except Exception as e:
-                raise ValueError(f"Invalid JSON at line {line_num}: {e}") from e
-
-            try:
-                rec = adapter.validate_python(obj)
-            except PydanticValidationError as e:
-                raise ValueError(f"Schema validation failed at line {line_num}: {e}") from e
-
-            if rec.control_id in seen:
-                raise ValueError(f"Duplicate control_id {rec.control_id!r} at line {line_num}")
-            seen.add(rec.control_id)
-
-            if rec.parent_control_id is not None:
-                parents.add(rec.parent_control_id)
-
-    missing_parents = sorted(parents - seen)
-    if missing_parents:
-        raise ValueError(f"Parent references missing controls (sample): {missing_parents[:20]}")
-
-    logger.info("JSONL validation passed: {} records, {} unique control_ids", n, len(seen))
+    try:
+        task = validate_controls_upload_task.apply_async(args=[batch.id, upload_id])
+        logger.info(
+            "Validation task queued: upload_id={}, batch_id={}, task_id={}",
+            upload_id, batch.id, task.id,
+        )
+    except Exception as e:
+        logger.exception("Failed to queue validation for {}: {}", upload_id, e)
+        batch.status = "failed"
+        batch.error_code = "unexpected_error"
+        batch.error_details = f"Could not queue validation: {e}"
+        batch.completed_at = datetime.now(timezone.utc)
+        await db.commit()
 
 
 # ============== TUS Status Endpoint ==============
@@ -704,6 +828,7 @@ async def tus_status(
         "data_type": tus_upload.data_type,
         "file_size": tus_upload.file_size,
         "offset": tus_upload.offset,
+        "checksum_crc32": f"{tus_upload.checksum_crc32 or 0:08x}",
         "progress": round(progress, 2),
         "is_complete": tus_upload.is_complete,
         "uploaded_by": tus_upload.uploaded_by,
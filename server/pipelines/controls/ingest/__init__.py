@@ -11,6 +11,7 @@ Usage:
     )
 """
 
+from .profiler import IngestionProfiler
 from .service import (
     run_controls_ingestion,
     IngestionResult,
@@ -21,4 +22,5 @@ __all__ = [
     "run_controls_ingestion",
     "IngestionResult",
     "IngestionCounts",
+    "IngestionProfiler",
 ]
@@ -0,0 +1,405 @@
+"""Checkpoints and run-scoped staging for resumable controls ingestion.
+
+A resumable run writes each batch into its own staging tables (schema
+``ingest_staging``, one table per live table, named ``run_<run_id>_<table>``)
+and advances a row in controls_ingest_checkpoint in the same transaction.
+Nothing is visible to readers until ``StagingArea.publish`` closes the
+superseded versions and copies the staged rows into the live tables in a
+single transaction.
+
+If a run dies part-way, the next run for the same upload finds the
+``staging`` checkpoint and continues from its offset, provided the input
+files are unchanged and no other ingestion has published in the meantime.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, MetaData, Table, exists, func, insert, select, union_all, update
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from server.logging_config import get_logger
+from server.pipelines import storage
+from server.pipelines.controls.schema import (
+    ai_controls_model_enrichment,
+    ai_controls_model_feature_prep,
+    ai_controls_model_taxonomy,
+    controls_ingest_checkpoint,
+    src_controls_ref_control,
+    src_controls_rel_owns_function,
+    src_controls_rel_owns_location,
+    src_controls_rel_parent,
+    src_controls_rel_related_function,
+    src_controls_rel_related_location,
+    src_controls_rel_risk_theme,
+    src_controls_ver_control,
+)
+
+logger = get_logger(name=__name__)
+
+STAGING_SCHEMA = "ingest_staging"
+
+# Live tables that are staged, in publish order
+STAGED_TABLES: List[Table] = [
+    src_controls_ref_control,
+    src_controls_ver_control,
+    src_controls_rel_parent,
+    src_controls_rel_owns_function,
+    src_controls_rel_owns_location,
+    src_controls_rel_related_function,
+    src_controls_rel_related_location,
+    src_controls_rel_risk_theme,
+    ai_controls_model_taxonomy,
+    ai_controls_model_enrichment,
+    ai_controls_model_feature_prep,
+]
+
+# Relation tables closed/replaced by control_id (parent edges handled separately)
+_CONTROL_REL_TABLES: List[Table] = [
+    src_controls_rel_owns_function,
+    src_controls_rel_owns_location,
+    src_controls_rel_related_function,
+    src_controls_rel_related_location,
+    src_controls_rel_risk_theme,
+]
+
+_AI_TABLES: List[Table] = [
+    ai_controls_model_taxonomy,
+    ai_controls_model_enrichment,
+    ai_controls_model_feature_prep,
+]
+
+# Input files that determine what a run stages (embeddings only affect Qdrant)
+_FINGERPRINT_MODELS = ("taxonomy", "enrichment", "feature_prep")
+
+COUNT_FIELDS = ("new", "changed", "unchanged", "failed", "processed")
+
+
+@dataclass
+class IngestCheckpoint:
+    """In-memory view of a controls_ingest_checkpoint row."""
+    run_id: int
+    upload_id: str
+    batch_id: int
+    tx_from: datetime
+    source_fingerprint: str
+    next_offset: int = 0
+    total: int = 0
+    counts: Dict[str, int] = field(default_factory=dict)
+    resumed: bool = False
+
+    def capture_counts(self, counts) -> None:
+        """Copy IngestionCounts fields into the checkpoint."""
+        self.counts = {name: int(getattr(counts, name)) for name in COUNT_FIELDS}
+
+    def restore_counts(self, counts) -> None:
+        """Copy checkpointed counts back onto an IngestionCounts."""
+        for name in COUNT_FIELDS:
+            setattr(counts, name, int(self.counts.get(name, 0)))
+
+
+def compute_input_fingerprint(upload_id: str) -> str:
+    """Fingerprint the upload's source JSONL and model outputs (size + mtime).
+
+    A checkpoint is only resumed if the files it was staged from are unchanged.
+    """
+    paths = [storage.get_control_jsonl_path(upload_id)]
+    paths.extend(storage.get_model_output_path(m, upload_id) for m in _FINGERPRINT_MODELS)
+
+    digest = hashlib.sha256()
+    for path in paths:
+        if path.exists():
+            st = path.stat()
+            digest.update(f"{path.name}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+        else:
+            digest.update(f"{path.name}:missing\n".encode())
+    return digest.hexdigest()
+
+
+def _staging_table_name(run_id: int, live: Table) -> str:
+    short = live.name.removeprefix("src_controls_").removeprefix("ai_controls_model_")
+    return f"run_{run_id}_{short}"
+
+
+class StagingArea:
+    """Run-scoped staging tables mirroring the live controls tables.
+
+    Staging tables carry the live columns minus surrogate keys and identity
+    columns (assigned on publish), tsvector columns (filled by the
+    feature_prep trigger) and derived columns (recomputed on publish), and
+    no constraints, so batches can be appended without touching live data.
+    """
+
+    def __init__(self, run_id: int) -> None:
+        self.run_id = run_id
+        self._metadata = MetaData(schema=STAGING_SCHEMA)
+        self._tables: Dict[str, Table] = {}
+        for live in STAGED_TABLES:
+            columns = [
+                Column(c.name, c.type)
+                for c in live.columns
+                if not (c.primary_key and c.autoincrement is True)
+                and c.identity is None
+                and not c.info.get("derived")
+                and not isinstance(c.type, TSVECTOR)
+            ]
+            self._tables[live.name] = Table(
+                _staging_table_name(run_id, live), self._metadata, *columns,
+            )
+
+    def table(self, live: Table) -> Table:
+        return self._tables[live.name]
+
+    async def create(self, conn) -> None:
+        await conn.run_sync(lambda sync_conn: self._metadata.create_all(sync_conn, checkfirst=True))
+
+    async def drop(self, conn) -> None:
+        await conn.run_sync(lambda sync_conn: self._metadata.drop_all(sync_conn, checkfirst=True))
+
+    async def stage_rows(self, conn, live: Table, rows: List[dict]) -> int:
+        """Append rows destined for ``live`` to its staging table."""
+        if not rows:
+            return 0
+        await conn.execute(insert(self.table(live)), rows)
+        return len(rows)
+
+    async def staged_count(self, conn, live: Table) -> int:
+        result = await conn.execute(select(func.count()).select_from(self.table(live)))
+        return int(result.scalar() or 0)
+
+    async def publish(self, conn, tx_from: datetime) -> Dict[str, int]:
+        """Make staged versions current, in the same order as ``_flush_batch``.
+
+        Must run inside a single transaction. Controls with a staged version
+        row get their current version and relation edges closed; AI rows are
+        closed per table for the controls staged in that table. Parent edges
+        are published last, dropping those whose parent control does not exist.
+
+        Returns:
+            Dict mapping live table name to the number of rows inserted.
+        """
+        close_values = {"tx_to": tx_from}
+        published: Dict[str, int] = {}
+
+        async def _insert_from_stage(live: Table, where=None) -> int:
+            stage = self.table(live)
+            names = [c.name for c in stage.columns]
+            query = select(*stage.columns)
+            if where is not None:
+                query = query.where(where)
+            if live is src_controls_ref_control:
+                stmt = pg_insert(live).from_select(names, query).on_conflict_do_nothing(
+                    index_elements=["control_id"]
+                )
+            else:
+                stmt = insert(live).from_select(names, query)
+            result = await conn.execute(stmt)
+            published[live.name] = max(result.rowcount or 0, 0)
+            return published[live.name]
+
+        # 1. Ref rows
+        await _insert_from_stage(src_controls_ref_control)
+
+        # 2-3. Close versions + relation edges of controls with a staged version
+        ver_stage = self.table(src_controls_ver_control)
+        staged_cids = select(ver_stage.c.ref_control_id)
+
+        await conn.execute(
+            update(src_controls_ver_control).where(
+                src_controls_ver_control.c.tx_to.is_(None),
+                src_controls_ver_control.c.ref_control_id.in_(staged_cids),
+            ).values(**close_values)
+        )
+        await conn.execute(
+            update(src_controls_rel_parent).where(
+                src_controls_rel_parent.c.tx_to.is_(None),
+                src_controls_rel_parent.c.parent_control_id.in_(staged_cids)
+                | src_controls_rel_parent.c.child_control_id.in_(staged_cids),
+            ).values(**close_values)
+        )
+        for rel_table in _CONTROL_REL_TABLES:
+            await conn.execute(
+                update(rel_table).where(
+                    rel_table.c.tx_to.is_(None),
+                    rel_table.c.control_id.in_(staged_cids),
+                ).values(**close_values)
+            )
+
+        # 4-5. New versions + relation edges
+        await _insert_from_stage(src_controls_ver_control)
+        for rel_table in _CONTROL_REL_TABLES:
+            await _insert_from_stage(rel_table)
+
+        # 6-7. AI model rows: close current, insert staged
+        for ai_table in _AI_TABLES:
+            ai_stage = self.table(ai_table)
+            await conn.execute(
+                update(ai_table).where(
+                    ai_table.c.tx_to.is_(None),
+                    ai_table.c.ref_control_id.in_(select(ai_stage.c.ref_control_id)),
+                ).values(**close_values)
+            )
+            await _insert_from_stage(ai_table)
+
+        # Deferred parent edges — every staged ref row now exists
+        parent_stage = self.table(src_controls_rel_parent)
+        parent_exists = exists().where(
+            src_controls_ref_control.c.control_id == parent_stage.c.parent_control_id
+        )
+        staged_parents = await self.staged_count(conn, src_controls_rel_parent)
+        inserted_parents = await _insert_from_stage(src_controls_rel_parent, where=parent_exists)
+        if staged_parents > inserted_parents:
+            logger.warning(
+                "rel_parent: skipped {} edges whose parent_control_id "
+                "does not exist in src_controls_ref_control",
+                staged_parents - inserted_parents,
+            )
+
+        logger.info("Published staging run {}: {}", self.run_id, published)
+        return published
+
+
+# ── Checkpoint persistence ───────────────────────────────────────────
+
+def _row_to_checkpoint(row, resumed: bool) -> IngestCheckpoint:
+    return IngestCheckpoint(
+        run_id=row.run_id,
+        upload_id=row.upload_id,
+        batch_id=row.batch_id,
+        tx_from=row.tx_from,
+        source_fingerprint=row.source_fingerprint,
+        next_offset=int(row.next_offset),
+        total=int(row.total),
+        counts=dict(row.counts or {}),
+        resumed=resumed,
+    )
+
+
+async def _latest_published_tx_from(conn) -> Optional[datetime]:
+    """Newest tx_from across the tables a controls ingestion writes."""
+    parts = [
+        select(func.max(t.c.tx_from).label("tx_from"))
+        for t in (src_controls_ver_control, *_AI_TABLES)
+    ]
+    sub = union_all(*parts).subquery()
+    result = await conn.execute(select(func.max(sub.c.tx_from)))
+    return result.scalar()
+
+
+async def _abandon(conn, row, reason: str) -> None:
+    logger.warning(
+        "Abandoning ingestion checkpoint run={} for {} at offset {}: {}",
+        row.run_id, row.upload_id, row.next_offset, reason,
+    )
+    await StagingArea(row.run_id).drop(conn)
+    await conn.execute(
+        update(controls_ingest_checkpoint)
+        .where(controls_ingest_checkpoint.c.run_id == row.run_id)
+        .values(status="abandoned", updated_at=func.now())
+    )
+
+
+async def open_checkpoint(
+    conn,
+    upload_id: str,
+    batch_id: int,
+    tx_from: datetime,
+    source_fingerprint: str,
+    total: int,
+) -> Tuple[IngestCheckpoint, StagingArea]:
+    """Resume the in-flight checkpoint for ``upload_id`` or start a new one.
+
+    An existing checkpoint is resumed only if it was staged from the same
+    input files and nothing newer than its tx_from has been published since
+    (publishing it would otherwise close newer versions with an older tx_to).
+    Otherwise its staging tables are dropped and a fresh run is started.
+    """
+    result = await conn.execute(
+        select(controls_ingest_checkpoint)
+        .where(
+            controls_ingest_checkpoint.c.upload_id == upload_id,
+            controls_ingest_checkpoint.c.status == "staging",
+        )
+        .with_for_update()
+    )
+    row = result.first()
+
+    if row is not None:
+        latest = await _latest_published_tx_from(conn)
+        if row.source_fingerprint != source_fingerprint:
+            await _abandon(conn, row, "input files changed")
+        elif int(row.total) != total:
+            await _abandon(conn, row, f"control count changed ({row.total} -> {total})")
+        elif latest is not None and latest >= row.tx_from:
+            await _abandon(conn, row, f"newer data published at {latest.isoformat()}")
+        else:
+            checkpoint = _row_to_checkpoint(row, resumed=True)
+            if checkpoint.batch_id != batch_id:
+                checkpoint.batch_id = batch_id
+                await save_checkpoint(conn, checkpoint)
+            staging = StagingArea(checkpoint.run_id)
+            # Recreate any staging table dropped out-of-band (no-op normally)
+            await staging.create(conn)
+            return checkpoint, staging
+
+    result = await conn.execute(
+        insert(controls_ingest_checkpoint)
+        .values(
+            upload_id=upload_id,
+            batch_id=batch_id,
+            status="staging",
+            tx_from=tx_from,
+            source_fingerprint=source_fingerprint,
+            next_offset=0,
+            total=total,
+            counts={},
+        )
+        .returning(controls_ingest_checkpoint.c.run_id)
+    )
+    run_id = int(result.scalar_one())
+    staging = StagingArea(run_id)
+    await staging.create(conn)
+    logger.info("Started ingestion checkpoint run={} for {}", run_id, upload_id)
+    return (
+        IngestCheckpoint(
+            run_id=run_id,
+            upload_id=upload_id,
+            batch_id=batch_id,
+            tx_from=tx_from,
+            source_fingerprint=source_fingerprint,
+            total=total,
+        ),
+        staging,
+    )
+
+
+async def save_checkpoint(conn, checkpoint: IngestCheckpoint) -> None:
+    """Persist offset + counts; call in the transaction that staged the batch."""
+    await conn.execute(
+        update(controls_ingest_checkpoint)
+        .where(controls_ingest_checkpoint.c.run_id == checkpoint.run_id)
+        .values(
+            batch_id=checkpoint.batch_id,
+            next_offset=checkpoint.next_offset,
+            counts=checkpoint.counts,
+            updated_at=func.now(),
+        )
+    )
+
+
+async def mark_published(conn, checkpoint: IngestCheckpoint) -> None:
+    """Close the checkpoint; call in the publish transaction."""
+    await conn.execute(
+        update(controls_ingest_checkpoint)
+        .where(controls_ingest_checkpoint.c.run_id == checkpoint.run_id)
+        .values(
+            status="published",
+            next_offset=checkpoint.next_offset,
+            counts=checkpoint.counts,
+            updated_at=func.now(),
+            published_at=datetime.now(timezone.utc),
+        )
+    )
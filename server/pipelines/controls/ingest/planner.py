@@ -0,0 +1,395 @@
+"""Dry-run planner for controls ingestion.
+
+Answers "what would this upload do?" without writing anything: loads the
+upload's files and the current PostgreSQL / Qdrant state, classifies each
+control with the same delta rules as ``run_controls_ingestion``, predicts
+the similar-controls mode, and estimates stage durations from the
+throughput recorded in previous runs' ingestion profiles.
+
+Usage:
+    from server.pipelines.controls.ingest.planner import plan_controls_ingestion
+
+    plan = await plan_controls_ingestion(upload_id, history=profiles)
+    plan.to_dict()
+"""
+
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from server.config.postgres import get_engine
+from server.logging_config import get_logger
+from server.pipelines import storage
+from server.pipelines.controls import qdrant_service
+from server.pipelines.controls.ingest.service import (
+    CHANGED,
+    NEW,
+    UNCHANGED,
+    _build_relation_rows,
+    _feature_prep_change,
+    _feature_prep_hashes,
+    _get_existing_control_ids,
+    _get_existing_feature_prep_hashes,
+    _get_existing_model_hashes,
+    _incoming_embedding_hashes,
+    _load_theme_lookup,
+    _model_hash,
+    _model_hash_change,
+    _now_iso,
+    _source_change,
+    load_controls_jsonl,
+    load_model_index,
+    load_model_jsonl_by_id,
+)
+from server.pipelines.controls.model_runners.common import FEATURE_NAMES
+from server.pipelines.controls.schema import (
+    ai_controls_model_enrichment,
+    ai_controls_model_taxonomy,
+)
+from server.pipelines.controls.similarity import _load_l1_active_key_ids, plan_similarity_mode
+from server.settings import get_settings
+
+logger = get_logger(name=__name__)
+
+# Relation tables written for every new/changed source control
+_RELATION_TABLES = {
+    "parent": "src_controls_rel_parent",
+    "owns_function": "src_controls_rel_owns_function",
+    "owns_location": "src_controls_rel_owns_location",
+    "related_function": "src_controls_rel_related_function",
+    "related_location": "src_controls_rel_related_location",
+    "risk_theme": "src_controls_rel_risk_theme",
+}
+
+
+# ── Data structures ──────────────────────────────────────────────────
+
+@dataclass
+class TableDelta:
+    """New / changed / unchanged counts for one versioned table."""
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+
+    def add(self, change: str) -> None:
+        setattr(self, change, getattr(self, change) + 1)
+
+    def to_dict(self) -> dict:
+        return {"new": self.new, "changed": self.changed, "unchanged": self.unchanged}
+
+
+@dataclass
+class StageEstimate:
+    """Expected work and duration of one ingestion stage."""
+    name: str
+    work_units: int
+    seconds: Optional[float] = None
+    throughput: Optional[float] = None  # median work units / second in history
+    samples: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "work_units": self.work_units,
+            "estimated_seconds": round(self.seconds, 2) if self.seconds is not None else None,
+            "units_per_second": round(self.throughput, 1) if self.throughput is not None else None,
+            "history_samples": self.samples,
+        }
+
+
+@dataclass
+class IngestionPlan:
+    """Result of a plan-only ingestion run."""
+    upload_id: str
+    total_controls: int = 0
+    existing_controls: int = 0
+    tables: Dict[str, TableDelta] = field(default_factory=dict)
+    relation_rows: Dict[str, int] = field(default_factory=dict)
+    rows_to_write: int = 0
+    rows_to_close: int = 0
+    qdrant: Dict[str, Any] = field(default_factory=dict)
+    similarity: Dict[str, Any] = field(default_factory=dict)
+    stages: List[StageEstimate] = field(default_factory=list)
+    estimated_seconds: Optional[float] = None
+    estimate_complete: bool = False
+    warnings: List[str] = field(default_factory=list)
+    planning_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "upload_id": self.upload_id,
+            "total_controls": self.total_controls,
+            "existing_controls": self.existing_controls,
+            "tables": {name: delta.to_dict() for name, delta in self.tables.items()},
+            "relation_rows": self.relation_rows,
+            "rows_to_write": self.rows_to_write,
+            "rows_to_close": self.rows_to_close,
+            "qdrant": self.qdrant,
+            "similarity": self.similarity,
+            "estimate": {
+                "total_seconds": round(self.estimated_seconds, 1) if self.estimated_seconds is not None else None,
+                "complete": self.estimate_complete,
+                "stages": [st.to_dict() for st in self.stages],
+            },
+            "warnings": self.warnings,
+            "planning_seconds": round(self.planning_seconds, 3),
+        }
+
+
+# ── Duration estimates ───────────────────────────────────────────────
+
+def _similarity_work(mode: Optional[str], n: int, delta: int) -> int:
+    """Pair comparisons for a similarity run: n² for a rebuild, Δ×n incremental."""
+    if mode == "full rebuild":
+        return n * n
+    if mode == "incremental":
+        return delta * n
+    return 0
+
+
+def _historical_throughput(history: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """Work units per second by stage (``similarity_compute:<mode>``) over stored profiles."""
+    rates: Dict[str, List[float]] = {}
+    for profile in history:
+        for st in profile.get("stages", []):
+            if not isinstance(st, dict):
+                continue
+            name = st.get("name")
+            seconds = st.get("wall_seconds") or 0
+            if not name or seconds <= 0:
+                continue
+            units = st.get("rows") or 0
+            if name == "similarity_compute":
+                extra = st.get("extra") or {}
+                mode = extra.get("mode")
+                units = _similarity_work(mode, units, int(extra.get("delta") or 0))
+                name = f"{name}:{mode}"
+            if units > 0:
+                rates.setdefault(name, []).append(units / seconds)
+    return rates
+
+
+def _estimate_stages(plan: IngestionPlan, history: List[Dict[str, Any]], resumable: bool) -> None:
+    """Fill ``plan.stages`` and the total from the median historical throughput.
+
+    The PostgreSQL stage (plus publish) and the Qdrant upsert run
+    concurrently, so the total counts the slower of the two. Stages with
+    work but no history leave the estimate incomplete.
+    """
+    rates = _historical_throughput(history)
+    sim = plan.similarity
+    work = {
+        "load_files": plan.total_controls,
+        "load_existing": plan.existing_controls,
+        "postgres": plan.rows_to_write,
+        "publish": plan.rows_to_write if resumable else 0,
+        "qdrant_upsert": plan.qdrant.get("points_new", 0) + plan.qdrant.get("points_updated", 0),
+        "similarity_load": sim.get("n", 0) if sim.get("mode") != "skipped" else 0,
+        "similarity_compute": _similarity_work(sim.get("mode"), sim.get("n", 0), sim.get("delta", 0)),
+    }
+
+    complete = True
+    seconds: Dict[str, float] = {}
+    for name, units in work.items():
+        key = f"{name}:{sim.get('mode')}" if name == "similarity_compute" else name
+        samples = rates.get(key, [])
+        estimate = StageEstimate(name=name, work_units=units, samples=len(samples))
+        if units == 0:
+            estimate.seconds = 0.0
+        elif samples:
+            estimate.throughput = statistics.median(samples)
+            estimate.seconds = units / estimate.throughput
+        else:
+            complete = False
+        seconds[name] = estimate.seconds or 0.0
+        plan.stages.append(estimate)
+
+    plan.estimated_seconds = (
+        seconds["load_files"] + seconds["load_existing"]
+        + max(seconds["postgres"] + seconds["publish"], seconds["qdrant_upsert"])
+        + seconds["similarity_load"] + seconds["similarity_compute"]
+    )
+    plan.estimate_complete = complete
+    if not complete:
+        plan.warnings.append("No throughput history for some stages; the estimate is a lower bound")
+
+
+# ── Planner ──────────────────────────────────────────────────────────
+
+async def plan_controls_ingestion(
+    upload_id: str,
+    history: Optional[List[Dict[str, Any]]] = None,
+    resumable: Optional[bool] = None,
+) -> IngestionPlan:
+    """Plan an ingestion of ``upload_id`` without writing to PostgreSQL or Qdrant.
+
+    Args:
+        upload_id: Upload ID (e.g. UPL-2026-0001)
+        history: Stored ingestion profiles of previous successful runs,
+            used for throughput-based duration estimates.
+        resumable: Whether the run would publish from staging. Defaults to
+            the ``ingestion_resumable`` setting.
+
+    Returns:
+        IngestionPlan with per-table deltas, Qdrant work, the expected
+        similarity mode and estimated durations.
+    """
+    started = time.perf_counter()
+    if resumable is None:
+        resumable = get_settings().ingestion_resumable
+    plan = IngestionPlan(upload_id=upload_id)
+
+    source_path = storage.get_control_jsonl_path(upload_id)
+    if not source_path.exists():
+        raise FileNotFoundError(f"Source JSONL not found: {source_path}")
+
+    # ── Load files (the NPZ itself is not needed; only its index) ────
+    def _load_files():
+        return (
+            load_controls_jsonl(source_path),
+            load_model_jsonl_by_id("taxonomy", upload_id),
+            load_model_jsonl_by_id("enrichment", upload_id),
+            load_model_jsonl_by_id("feature_prep", upload_id),
+            load_model_index("embeddings", upload_id, ".npz"),
+        )
+
+    loop = asyncio.get_running_loop()
+    controls, taxonomy_rows, enrichment_rows, feature_prep_rows, embeddings_index = (
+        await loop.run_in_executor(None, _load_files)
+    )
+    embeddings_by_cid = embeddings_index.get("by_control_id", {})
+    npz_present = storage.get_model_output_path("embeddings", upload_id, ".npz").exists()
+    qdrant_enabled = npz_present and bool(embeddings_by_cid)
+    plan.total_controls = len(controls)
+
+    # ── Current state (read-only) ────────────────────────────────────
+    engine = get_engine()
+
+    async def _pq(query_fn, *args):
+        async with engine.connect() as c:
+            return await query_fn(c, *args)
+
+    (
+        existing,
+        existing_taxonomy_hashes,
+        existing_enrichment_hashes,
+        existing_feature_prep_hashes,
+        theme_lookup_result,
+        l1_active_key_ids,
+        current_qdrant_hashes,
+    ) = await asyncio.gather(
+        _pq(_get_existing_control_ids),
+        _pq(_get_existing_model_hashes, ai_controls_model_taxonomy),
+        _pq(_get_existing_model_hashes, ai_controls_model_enrichment),
+        _pq(_get_existing_feature_prep_hashes),
+        _pq(_load_theme_lookup),
+        _load_l1_active_key_ids(),
+        qdrant_service.read_current_hashes() if qdrant_enabled else asyncio.sleep(0, result={}),
+    )
+    _, theme_lookup = theme_lookup_result
+    plan.existing_controls = len(existing)
+
+    # ── Classify every control as the ingestion loop would ───────────
+    tables = {name: TableDelta() for name in ("ver_control", "taxonomy", "enrichment", "feature_prep")}
+    relation_rows = dict.fromkeys(_RELATION_TABLES.values(), 0)
+    ref_new = 0
+    rows_to_close = 0
+    invalid_ids = 0
+    tx_from = _now_iso()
+
+    for control in controls:
+        cid_raw = control.get("control_id")
+        if not isinstance(cid_raw, str) or not cid_raw.strip():
+            invalid_ids += 1
+            continue
+        cid = cid_raw.strip()
+
+        change = _source_change(cid, control, existing)
+        tables["ver_control"].add(change)
+        if change != UNCHANGED:
+            ref_new += change == NEW
+            rows_to_close += change == CHANGED
+            rels = _build_relation_rows(control, cid, tx_from, theme_lookup=theme_lookup)
+            for key, table_name in _RELATION_TABLES.items():
+                relation_rows[table_name] += len(rels[key])
+            # The new version decides similarity eligibility after the run
+            l1_active_key_ids.discard(cid)
+            if (
+                control.get("hierarchy_level") == "Level 1"
+                and control.get("control_status") == "Active"
+                and control.get("key_control") is True
+            ):
+                l1_active_key_ids.add(cid)
+
+        for name, model_rows, existing_hashes in (
+            ("taxonomy", taxonomy_rows, existing_taxonomy_hashes),
+            ("enrichment", enrichment_rows, existing_enrichment_hashes),
+        ):
+            model_row = model_rows.get(cid)
+            if model_row:
+                model_change = _model_hash_change(_model_hash(model_row), existing_hashes.get(cid))
+                tables[name].add(model_change)
+                rows_to_close += model_change == CHANGED
+
+        clean_row = feature_prep_rows.get(cid)
+        if clean_row:
+            fp_change = _feature_prep_change(
+                _feature_prep_hashes(clean_row), existing_feature_prep_hashes.get(cid, {}),
+            )
+            tables["feature_prep"].add(fp_change)
+            rows_to_close += fp_change == CHANGED
+
+    plan.tables = tables
+    plan.relation_rows = relation_rows
+    plan.rows_to_write = (
+        ref_new
+        + sum(relation_rows.values())
+        + sum(d.new + d.changed for d in tables.values())
+    )
+    plan.rows_to_close = rows_to_close
+    if invalid_ids:
+        plan.warnings.append(f"{invalid_ids} rows have an invalid control_id; the run would fail")
+
+    # ── Qdrant work ──────────────────────────────────────────────────
+    new_cids: Set[str] = set()
+    changed_features: Dict[str, List[str]] = {}
+    unchanged_cids: Set[str] = set()
+    if qdrant_enabled:
+        new_cids, changed_features, unchanged_cids = qdrant_service.compute_embedding_delta(
+            _incoming_embedding_hashes(embeddings_by_cid), current_qdrant_hashes,
+        )
+    elif not npz_present:
+        plan.warnings.append("No embeddings NPZ; Qdrant and similar controls would be skipped")
+    points = len(new_cids) + len(changed_features)
+    plan.qdrant = {
+        "enabled": qdrant_enabled,
+        "points_new": len(new_cids),
+        "points_updated": len(changed_features),
+        "points_unchanged": len(unchanged_cids),
+        "vectors": len(new_cids) * len(FEATURE_NAMES) + sum(len(f) for f in changed_features.values()),
+        "estimated_bytes": qdrant_service.estimate_upload_bytes(points),
+        "hnsw_toggle": len(new_cids) > qdrant_service.HNSW_TOGGLE_THRESHOLD,
+    }
+
+    # ── Similar controls ─────────────────────────────────────────────
+    if qdrant_enabled:
+        plan.similarity = await plan_similarity_mode(
+            embeddings_index,
+            changed_control_ids=set(changed_features),
+            new_control_ids=new_cids,
+            l1_active_key_ids=l1_active_key_ids,
+        )
+    else:
+        plan.similarity = {"mode": "skipped", "reason": "Qdrant stage skipped", "n": 0, "delta": 0, "affected": 0}
+
+    _estimate_stages(plan, history or [], resumable)
+    plan.planning_seconds = time.perf_counter() - started
+
+    logger.info(
+        "Ingestion plan for {}: {} controls, {} rows to write, {} Qdrant points, similarity={}, ~{}s",
+        upload_id, plan.total_controls, plan.rows_to_write, points,
+        plan.similarity.get("mode"), round(plan.estimated_seconds or 0),
+    )
+    return plan
@@ -0,0 +1,169 @@
+"""Per-stage profiler for controls ingestion runs.
+
+Records wall time, row counts, DB round-trips, bytes sent to Qdrant and
+resident memory for each named stage of an ingestion, so slow runs can be
+compared against previous ones. The serialized profile is stored on the
+UploadBatch row and returned by the ingestion API.
+
+Two figures are approximate and carry an ``_approx`` suffix in the
+profile. Qdrant bytes are estimated from the point count and vector size,
+not measured on the wire. RSS is the worker's current RSS sampled at the
+start and end of each stage; its change over the stage is reported, not
+the peak within it. The worker process is shared by every task it runs
+and by the stages that overlap.
+
+Usage:
+    profiler = IngestionProfiler()
+    with profiler.stage("postgres") as st:
+        async with engine.begin() as conn, profiler.track_connection(conn, st):
+            st.rows += len(rows)
+    profile = profiler.to_dict()
+"""
+
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+
+from server.logging_config import get_logger
+
+logger = get_logger(name=__name__)
+
+PROFILE_VERSION = 2
+
+
+def _current_rss_mb() -> float:
+    """Current resident set size of the process in MiB.
+
+    Read from /proc/self/statm; where that does not exist (macOS) falls back
+    to ru_maxrss, which is the process-lifetime peak (KiB on Linux, bytes
+    on macOS).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * resource.getpagesize() / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            return round(peak / (1024 * 1024), 1)
+        return round(peak / 1024, 1)
+
+
+@dataclass
+class StageTiming:
+    """Measurements for one ingestion stage."""
+    name: str
+    started_at: float = 0.0
+    wall_seconds: float = 0.0
+    rows: int = 0
+    db_round_trips: int = 0
+    qdrant_bytes: int = 0  # estimate (see qdrant_service.estimate_upload_bytes)
+    rss_start_mb: float = 0.0
+    rss_end_mb: float = 0.0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "rows": self.rows,
+            "rows_per_second": round(self.rows / self.wall_seconds, 1) if self.wall_seconds > 0 else None,
+            "db_round_trips": self.db_round_trips,
+            "qdrant_bytes_approx": self.qdrant_bytes,
+            "rss_mb_approx": self.rss_end_mb,
+            "rss_delta_mb_approx": round(self.rss_end_mb - self.rss_start_mb, 1),
+            **({"extra": self.extra} if self.extra else {}),
+        }
+
+
+class _ConnectionTracker:
+    """Attaches a before_cursor_execute listener for the duration of a block."""
+
+    def __init__(self, conn, timing: StageTiming) -> None:
+        self._sync_conn = getattr(conn, "sync_connection", conn)
+        self._timing = timing
+
+    def _on_execute(self, *_args, **_kwargs) -> None:
+        self._timing.db_round_trips += 1
+
+    def __enter__(self) -> "_ConnectionTracker":
+        event.listen(self._sync_conn, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self._sync_conn, "before_cursor_execute", self._on_execute)
+
+    async def __aenter__(self) -> "_ConnectionTracker":
+        return self.__enter__()
+
+    async def __aexit__(self, *exc) -> None:
+        self.__exit__(*exc)
+
+
+class IngestionProfiler:
+    """Collects StageTiming records for a single ingestion run.
+
+    Stages may overlap (e.g. the concurrent PostgreSQL and Qdrant stages);
+    each ``stage()`` call yields its own record.
+    """
+
+    def __init__(self) -> None:
+        self.stages: List[StageTiming] = []
+        self._run_started = time.perf_counter()
+        self._started_at = datetime.now(timezone.utc)
+        self._rss_start_mb = _current_rss_mb()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageTiming]:
+        """Time a stage; the yielded record can be updated with counters."""
+        timing = StageTiming(
+            name=name, started_at=time.perf_counter() - self._run_started, rss_start_mb=_current_rss_mb(),
+        )
+        self.stages.append(timing)
+        t0 = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing.wall_seconds = time.perf_counter() - t0
+            timing.rss_end_mb = _current_rss_mb()
+            logger.debug(
+                "Stage '{}': {:.2f}s, rows={}, round_trips={}",
+                name, timing.wall_seconds, timing.rows, timing.db_round_trips,
+            )
+
+    def track_connection(self, conn, timing: StageTiming) -> "_ConnectionTracker":
+        """Count statements executed on ``conn`` as DB round-trips of ``timing``.
+
+        Returns a context manager usable with both ``with`` and ``async with``,
+        so it can sit next to ``engine.begin()`` in one statement. Accepts an
+        AsyncConnection or a sync Connection.
+        """
+        return _ConnectionTracker(conn, timing)
+
+    def get(self, name: str) -> Optional[StageTiming]:
+        """Return the first stage record with the given name, if any."""
+        return next((s for s in self.stages if s.name == name), None)
+
+    def to_dict(self) -> dict:
+        total = time.perf_counter() - self._run_started
+        return {
+            "version": PROFILE_VERSION,
+            "started_at": self._started_at.isoformat(),
+            "total_seconds": round(total, 3),
+            "rss_start_mb_approx": self._rss_start_mb,
+            "max_rss_mb_approx": max(
+                [self._rss_start_mb, _current_rss_mb()] + [s.rss_end_mb for s in self.stages]
+            ),
+            "db_round_trips": sum(s.db_round_trips for s in self.stages),
+            "qdrant_bytes_approx": sum(s.qdrant_bytes for s in self.stages),
+            "stages": [
+                {**s.to_dict(), "offset_seconds": round(s.started_at, 3)}
+                for s in self.stages
+            ],
+        }
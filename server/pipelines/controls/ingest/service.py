@@ -8,9 +8,19 @@ Supports initial load and delta detection:
 - Source data delta: based on last_modified_on
 - AI data delta: based on hash from model index
 - Embedding delta: hash comparison → Qdrant upsert for changed controls
+
+The PostgreSQL and Qdrant stages overlap; a failure on either side rolls
+back the PostgreSQL transaction, compensates the Qdrant writes and leaves
+a rollback record in the state directory.
+
+In resumable mode (``ingestion_resumable``) each batch is committed into
+run-scoped staging tables together with a checkpoint, and a final publish
+transaction makes the new versions current; a retried run for the same
+upload continues from the last checkpoint (see checkpoint.py).
 """
 
 import asyncio
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
@@ -18,12 +28,21 @@ from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import numpy as np
 import orjson
-from sqlalchemy import insert, select, update, and_
+from sqlalchemy import insert, select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from server.config.postgres import get_engine
 from server.logging_config import get_logger
 from server.pipelines import storage
+from server.pipelines.controls.ingest.checkpoint import (
+    IngestCheckpoint,
+    StagingArea,
+    compute_input_fingerprint,
+    mark_published,
+    open_checkpoint,
+    save_checkpoint,
+)
+from server.pipelines.controls.ingest.profiler import IngestionProfiler, StageTiming
 from server.pipelines.controls.schema import (
     src_controls_ref_control,
     src_controls_ver_control,
@@ -39,7 +58,10 @@ from server.pipelines.controls.schema import (
 )
 from server.pipelines.orgs.schema import src_orgs_ref_node
 from server.pipelines.risks.schema import src_risks_ref_theme, src_risks_ver_theme
+from server.pipelines.schema.temporal import close_current
 from server.pipelines.controls import qdrant_service
+from server.pipelines.controls.version_diff import refresh_version_diffs
+from server.pipelines.controls.ws_mask import refresh_ws_masks
 from server.pipelines.controls.model_runners.common import (
     FEATURE_NAMES,
     HASH_COLUMN_NAMES,
@@ -58,6 +80,8 @@ EMBEDDING_FEATURES: List[tuple[str, str]] = [
 
 # Qdrant named vector keys (feature names without _embedding suffix)
 QDRANT_VECTOR_NAMES = FEATURE_NAMES
+# Post-commit control_seq payload backfill (backoff 2s, 4s between attempts)
+CONTROL_SEQ_BACKFILL_ATTEMPTS = 3
 
 
 @dataclass
@@ -78,6 +102,9 @@ class IngestionResult:
     success: bool
     message: str
     counts: IngestionCounts
+    profile: Optional[Dict[str, Any]] = None
+    # Version timestamp of the rows this run wrote (card cache invalidation)
+    tx_from: Optional[datetime] = None
 
     def to_dict(self) -> dict:
         return {
@@ -90,9 +117,67 @@ class IngestionResult:
             "failed": self.counts.failed,
             "processed": self.counts.processed,
             "errors": self.counts.errors[:10],
+            "profile": self.profile,
         }
 
 
+@dataclass
+class _QdrantStageState:
+    """Shared state of the Qdrant stage within one ingestion run.
+
+    The compensation plan (``planned_new`` / ``previous_hashes`` /
+    ``previous_vectors``) is filled before the first point is written so a
+    failed run can be undone even if the upload stopped part-way.
+    """
+    new_cids: Set[str] = field(default_factory=set)
+    changed_features: Dict[str, List[str]] = field(default_factory=dict)
+    points_new: int = 0
+    points_updated: int = 0
+    upserts_started: bool = False
+    planned_new: List[str] = field(default_factory=list)
+    previous_hashes: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    previous_vectors: Dict[str, Dict[str, np.ndarray]] = field(default_factory=dict)
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class _PendingRows:
+    """Rows and close-lists accumulated between batch flushes."""
+    ref: List[dict] = field(default_factory=list)
+    ver: List[dict] = field(default_factory=list)
+    rel_parent: List[dict] = field(default_factory=list)
+    rel_owns_func: List[dict] = field(default_factory=list)
+    rel_owns_loc: List[dict] = field(default_factory=list)
+    rel_related_func: List[dict] = field(default_factory=list)
+    rel_related_loc: List[dict] = field(default_factory=list)
+    rel_risk_theme: List[dict] = field(default_factory=list)
+    ai_taxonomy: List[dict] = field(default_factory=list)
+    ai_enrichment: List[dict] = field(default_factory=list)
+    ai_feature_prep: List[dict] = field(default_factory=list)
+    # Control IDs that need version/relation closing
+    close_ver: List[str] = field(default_factory=list)
+    close_rel: List[str] = field(default_factory=list)
+    # AI model control IDs that need closing
+    close_taxonomy: List[str] = field(default_factory=list)
+    close_enrichment: List[str] = field(default_factory=list)
+    close_feature_prep: List[str] = field(default_factory=list)
+
+    def total(self) -> int:
+        """Total pending rows, for batch flushing."""
+        return (
+            len(self.ref) + len(self.ver) +
+            len(self.rel_parent) + len(self.rel_owns_func) + len(self.rel_owns_loc) +
+            len(self.rel_related_func) + len(self.rel_related_loc) + len(self.rel_risk_theme) +
+            len(self.ai_taxonomy) + len(self.ai_enrichment) + len(self.ai_feature_prep)
+        )
+
+    def clear(self, keep_parent_edges: bool = False) -> None:
+        for name, value in vars(self).items():
+            if name == "rel_parent" and keep_parent_edges:
+                continue
+            value.clear()
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
@@ -162,6 +247,64 @@ def _coerce_list_str(value: Any) -> List[str]:
     return [str(v) for v in value if v is not None]
 
 
+# ── Delta classification ─────────────────────────────────────────────
+# Shared by the ingestion loop and the dry-run planner (planner.py) so a
+# plan reports exactly the rows a run would write.
+
+NEW, CHANGED, UNCHANGED = "new", "changed", "unchanged"
+
+
+def _source_change(cid: str, control: Dict[str, Any], existing: Dict[str, Any]) -> str:
+    """Classify a source control against the current last_modified_on values."""
+    if cid not in existing:
+        return NEW
+    # Normalize both sides to ISO string for comparison
+    # (old_lmo is datetime from DB, new_lmo is string from JSONL)
+    old_lmo = _coerce_utc_iso(existing.get(cid))
+    new_lmo = _coerce_utc_iso(control.get("last_modified_on"))
+    return CHANGED if old_lmo != new_lmo else UNCHANGED
+
+
+def _model_hash(model_row: Dict[str, Any]) -> Optional[str]:
+    """Incoming hash of an AI model row (non-string hashes count as None)."""
+    incoming_hash = model_row.get("hash")
+    return incoming_hash if isinstance(incoming_hash, str) else None
+
+
+def _model_hash_change(incoming_hash: Optional[str], existing_hash: Optional[str]) -> str:
+    """Classify an AI model row; only CHANGED rows close a current version."""
+    if existing_hash == incoming_hash:
+        return UNCHANGED
+    return NEW if existing_hash is None else CHANGED
+
+
+def _feature_prep_hashes(clean_row: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    return {h: clean_row.get(h) for h in HASH_COLUMN_NAMES}
+
+
+def _feature_prep_change(
+    incoming_hashes: Dict[str, Optional[str]],
+    existing_hashes: Dict[str, Optional[str]],
+) -> str:
+    """Classify a feature_prep row on its per-feature hashes."""
+    if all(incoming_hashes.get(h) == existing_hashes.get(h) for h in HASH_COLUMN_NAMES):
+        return UNCHANGED
+    return CHANGED if existing_hashes else NEW
+
+
+def _incoming_embedding_hashes(embeddings_by_cid: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Per-feature hashes + masks from the embeddings index, as compared against Qdrant."""
+    incoming: Dict[str, Dict[str, Any]] = {}
+    for cid_str, meta in embeddings_by_cid.items():
+        if not isinstance(meta, dict):
+            continue
+        hashes: Dict[str, Any] = {h: meta.get(h) for h in HASH_COLUMN_NAMES}
+        for m in MASK_COLUMN_NAMES:
+            hashes[m] = meta.get(m, True)
+        incoming[cid_str] = hashes
+    return incoming
+
+
 # ── File loading ─────────────────────────────────────────────────────
 
 def load_controls_jsonl(jsonl_path: Path) -> List[Dict[str, Any]]:
@@ -227,6 +370,14 @@ async def _get_existing_control_ids(conn) -> Dict[str, str]:
     return {row.ref_control_id: row.last_modified_on for row in result}
 
 
+async def _get_control_seqs(conn) -> Dict[str, int]:
+    """control_seq of every known control (for the Qdrant point payloads)."""
+    result = await conn.execute(
+        select(src_controls_ref_control.c.control_id, src_controls_ref_control.c.control_seq)
+    )
+    return {row.control_id: row.control_seq for row in result}
+
+
 async def _get_existing_model_hashes(conn, table) -> Dict[str, Optional[str]]:
     """Get current hash by control_id for an AI model table (enrichment, taxonomy)."""
     result = await conn.execute(
@@ -304,16 +455,12 @@ async def _execute_inserts(conn, table, rows: List[dict], label: str) -> None:
     logger.debug("Inserted {} rows into {} ({})", len(rows), table.name, label)
 
 
-async def _execute_updates(conn, table, column, values, set_values: dict, label: str) -> None:
-    """Execute an UPDATE for matching column values."""
+async def _close_current(conn, table, columns, values, tx_to: datetime, label: str) -> None:
+    """Close current rows whose key is in ``values`` (one array-parameter UPDATE)."""
     if not values:
         return
-    await conn.execute(
-        update(table).where(
-            and_(column.in_(values), table.c.tx_to.is_(None))
-        ).values(**set_values)
-    )
-    logger.debug("Closed {} current rows in {} ({})", len(values), table.name, label)
+    closed = await close_current(conn, table, columns, values, tx_to)
+    logger.debug("Closed {} current rows in {} ({})", closed, table.name, label)
 
 
 # ── Record builders (return dicts for SQLAlchemy Core inserts) ────────
@@ -552,26 +699,255 @@ def _build_relation_rows(
     return rows
 
 
+# ── Qdrant stage + compensation ─────────────────────────────────────
+
+async def _apply_qdrant_delta(
+    state: _QdrantStageState,
+    embeddings_by_cid: Dict[str, Any],
+    embedding_arrays: Dict[str, Any],
+    current_qdrant_hashes: Dict[str, Dict[str, Optional[str]]],
+    abort_event: asyncio.Event,
+    progress_callback: Optional[Callable] = None,
+    counts: Optional[IngestionCounts] = None,
+    stage: Optional[StageTiming] = None,
+    control_seqs: Optional[Dict[str, int]] = None,
+) -> None:
+    """Compute the embedding delta and upsert it to Qdrant.
+
+    Runs concurrently with the PostgreSQL stage. Skips the upserts if the
+    PostgreSQL stage has already failed (``abort_event`` set).
+    """
+    processed = counts.processed if counts else 0
+    total_controls = counts.total if counts else 0
+
+    if progress_callback:
+        await progress_callback("Computing embedding delta...", processed, total_controls, 10)
+
+    # Build incoming hashes + masks from embeddings index (per-feature)
+    incoming_emb_hashes = _incoming_embedding_hashes(embeddings_by_cid)
+
+    # Per-feature delta detection against Qdrant
+    new_cids, changed_features, unchanged_cids = qdrant_service.compute_embedding_delta(
+        incoming_emb_hashes, current_qdrant_hashes,
+    )
+    state.new_cids = new_cids
+    state.changed_features = changed_features
+
+    # Build embedding_data for controls that need Qdrant updates
+    all_upsert_cids = new_cids | set(changed_features.keys())
+    embedding_data: Dict[str, Dict[str, Any]] = {}
+
+    for cid_str in all_upsert_cids:
+        emb_meta = embeddings_by_cid.get(cid_str)
+        row_idx: Optional[int] = None
+        row_idx_raw = emb_meta.get("row") if isinstance(emb_meta, dict) else None
+        if row_idx_raw is not None:
+            try:
+                row_idx = int(row_idx_raw)
+            except Exception:
+                row_idx = None
+        if row_idx is not None and row_idx < 0:
+            row_idx = None
+
+        cid_vectors: Dict[str, Any] = {}
+        for feature_name, npz_field in EMBEDDING_FEATURES:
+            vec_arr = embedding_arrays.get(npz_field)
+            raw_vec = None
+            if vec_arr is not None and row_idx is not None:
+                try:
+                    if row_idx < vec_arr.shape[0]:
+                        raw_vec = vec_arr[row_idx]
+                except Exception:
+                    raw_vec = None
+            cid_vectors[feature_name] = raw_vec
+        embedding_data[cid_str] = cid_vectors
+
+    # Let the event loop run PostgreSQL work queued while building vectors
+    await asyncio.sleep(0)
+
+    if abort_event.is_set():
+        logger.warning("PostgreSQL stage failed; skipping Qdrant upserts")
+        return
+
+    # Compensation plan must be in place before the first write
+    state.planned_new = sorted(new_cids)
+    state.previous_hashes = {
+        cid: dict(current_qdrant_hashes.get(cid) or {}) for cid in changed_features
+    }
+    state.previous_vectors = await qdrant_service.read_point_vectors(changed_features)
+    state.upserts_started = True
+
+    # Progress adapter
+    async def _qdrant_progress(step: str, uploaded: int, total: int):
+        if progress_callback:
+            await progress_callback(
+                step,
+                counts.processed if counts else uploaded,
+                counts.total if counts else total,
+                93,
+            )
+
+    # Upsert new controls (full points)
+    state.points_new = await qdrant_service.upsert_new_controls(
+        state.planned_new, embedding_data, incoming_emb_hashes,
+        progress_callback=_qdrant_progress,
+        control_seqs=control_seqs,
+    )
+
+    # Update changed features on existing controls
+    state.points_updated = await qdrant_service.update_changed_features(
+        changed_features, embedding_data, incoming_emb_hashes,
+        progress_callback=_qdrant_progress,
+        control_seqs=control_seqs,
+    )
+
+    logger.info(
+        "Qdrant delta complete: {} new, {} updated, {} unchanged",
+        state.points_new, state.points_updated, len(unchanged_cids),
+    )
+
+    if stage is not None:
+        stage.rows = state.points_new + state.points_updated
+        stage.qdrant_bytes = qdrant_service.estimate_upload_bytes(stage.rows)
+        stage.extra.update({
+            "new": len(new_cids),
+            "changed": len(changed_features),
+            "unchanged": len(unchanged_cids),
+        })
+
+
+async def _complete_control_seq_payloads(new_cids: List[str]) -> int:
+    """Backfill ``control_seq`` on the new points, retrying; returns how many still lack it.
+
+    Filtered semantic search matches points by their control_seq payload, so
+    a point left without it drops out of every filtered search until the
+    startup backfill (or a later run's) completes it. Runs after both stages
+    have committed, so it never fails the run.
+    """
+    missing = len(new_cids)
+    for attempt in range(1, CONTROL_SEQ_BACKFILL_ATTEMPTS + 1):
+        try:
+            await qdrant_service.backfill_control_seq_payloads()
+            missing = await qdrant_service.count_missing_control_seq(new_cids)
+            if not missing:
+                return 0
+            error: Exception = RuntimeError(f"{missing} of {len(new_cids)} new points still lack control_seq")
+        except Exception as e:
+            error = e
+        if attempt < CONTROL_SEQ_BACKFILL_ATTEMPTS:
+            logger.warning(
+                "control_seq payload backfill attempt {}/{} failed, retrying: {}",
+                attempt, CONTROL_SEQ_BACKFILL_ATTEMPTS, error,
+            )
+            await asyncio.sleep(2 ** attempt)
+    logger.warning(
+        "control_seq payload backfill incomplete after {} attempts; the startup backfill will finish it: {}",
+        CONTROL_SEQ_BACKFILL_ATTEMPTS, error,
+    )
+    return missing
+
+
+async def _compensate_failed_stages(
+    batch_id: int,
+    upload_id: str,
+    tx_from_iso: str,
+    state: _QdrantStageState,
+    pg_error: Optional[BaseException],
+    qdrant_error: Optional[BaseException],
+    checkpoint: Optional[IngestCheckpoint] = None,
+) -> None:
+    """Undo Qdrant writes of a failed two-phase run and persist a rollback record.
+
+    PostgreSQL never needs compensation: its transaction (or, in resumable
+    mode, the publish transaction) only commits once Qdrant has succeeded.
+    Batches already committed to a resumable run's staging tables are kept
+    so the next run can continue from ``checkpoint``.
+    """
+    record: Dict[str, Any] = {
+        "batch_id": batch_id,
+        "upload_id": upload_id,
+        "tx_from": tx_from_iso,
+        "created_at": _now_iso(),
+        "postgres": "staged" if checkpoint is not None else "rolled_back",
+        "postgres_error": str(pg_error) if pg_error is not None else None,
+        "checkpoint": {
+            "run_id": checkpoint.run_id,
+            "next_offset": checkpoint.next_offset,
+            "total": checkpoint.total,
+        } if checkpoint is not None else None,
+        "qdrant": "failed" if qdrant_error is not None else (
+            "written" if state.upserts_started else "skipped"
+        ),
+        "qdrant_error": str(qdrant_error) if qdrant_error is not None else None,
+        "qdrant_new_control_ids": state.planned_new,
+        "qdrant_previous_hashes": state.previous_hashes,
+        "compensated": False,
+        "compensation_error": None,
+    }
+    record_path = storage.get_ingestion_rollback_path(upload_id)
+
+    def _write_record() -> None:
+        record_path.parent.mkdir(parents=True, exist_ok=True)
+        record_path.write_bytes(orjson.dumps(record, option=orjson.OPT_INDENT_2))
+
+    # Persist the plan first so it survives a crash during compensation
+    _write_record()
+
+    if state.upserts_started:
+        try:
+            await qdrant_service.compensate_upserts(
+                state.planned_new, state.previous_hashes, state.previous_vectors,
+            )
+            record["compensated"] = True
+        except Exception as e:
+            logger.exception("Qdrant compensation failed: {}", e)
+            record["compensation_error"] = str(e)
+    else:
+        record["compensated"] = True
+
+    _write_record()
+    logger.warning(
+        "Ingestion stages failed for {} (postgres_error={}, qdrant_error={}); "
+        "rollback record written to {}",
+        upload_id, pg_error, qdrant_error, record_path,
+    )
+
+
 # ── Main ingestion orchestrator ──────────────────────────────────────
 
 async def run_controls_ingestion(
     batch_id: int,
     upload_id: str,
     progress_callback: Optional[Callable] = None,
+    profiler: Optional[IngestionProfiler] = None,
+    resumable: Optional[bool] = None,
 ) -> IngestionResult:
     """Run controls ingestion into PostgreSQL + Qdrant.
 
     Reads source JSONL + all AI model outputs and inserts/updates records.
+    The PostgreSQL writes and the Qdrant delta run concurrently with a
+    two-phase completion: PostgreSQL commits only after the Qdrant upserts
+    succeed, and similar controls are computed only once both are done.
+
+    In resumable mode batches are committed to staging with a checkpoint
+    and published at the end, so a failed run can be retried from where it
+    stopped instead of from zero.
 
     Args:
         batch_id: UploadBatch ID
         upload_id: Upload ID (e.g. UPL-2026-0001)
         progress_callback: Optional async callback(step, processed, total, percent)
+        profiler: Optional stage profiler; a new one is created if omitted.
+        resumable: Commit per batch into staging with checkpoints. Defaults
+            to the ``ingestion_resumable`` setting.
 
     Returns:
-        IngestionResult with counts.
+        IngestionResult with counts and the per-stage profile.
     """
     counts = IngestionCounts()
+    profiler = profiler or IngestionProfiler()
+    if resumable is None:
+        resumable = _SETTINGS.ingestion_resumable
     tx_from_iso = _now_iso()
     tx_from = datetime.fromisoformat(tx_from_iso)
     embeddings_npz: Optional[Any] = None
@@ -584,81 +960,88 @@ async def run_controls_ingestion(
                 success=False,
                 message=f"Source JSONL not found: {source_path}",
                 counts=counts,
+                profile=profiler.to_dict(),
             )
 
-        logger.info("Loading source controls from {}", source_path)
-        controls = load_controls_jsonl(source_path)
-        counts.total = len(controls)
+        with profiler.stage("load_files") as load_stage:
+            logger.info("Loading source controls from {}", source_path)
+            controls = load_controls_jsonl(source_path)
+            counts.total = len(controls)
+            load_stage.rows = len(controls)
+
+            logger.info("Loading AI model outputs for {}", upload_id)
+            taxonomy_rows = load_model_jsonl_by_id("taxonomy", upload_id)
+            enrichment_rows = load_model_jsonl_by_id("enrichment", upload_id)
+            feature_prep_rows = load_model_jsonl_by_id("feature_prep", upload_id)
+
+            # Load embeddings
+            embeddings_npz = load_embeddings_npz(upload_id)
+            embeddings_index = load_model_index("embeddings", upload_id, ".npz")
+            embeddings_by_cid = embeddings_index.get("by_control_id", {})
+            embedding_dim = int(embeddings_index.get("embedding_dim") or DEFAULT_EMBEDDING_DIM)
+
+            embedding_arrays: Dict[str, Any] = {}
+            if embeddings_npz is not None:
+                npz_keys = set(getattr(embeddings_npz, "files", []))
+                for _, npz_field in EMBEDDING_FEATURES:
+                    if npz_field in npz_keys:
+                        vec_arr = embeddings_npz[npz_field]
+                        embedding_arrays[npz_field] = vec_arr
+                        if hasattr(vec_arr, "shape") and len(vec_arr.shape) == 2 and vec_arr.shape[1] > 0:
+                            embedding_dim = int(vec_arr.shape[1])
+                    else:
+                        logger.warning(
+                            "Embedding feature array '{}' is missing in NPZ; using zero vectors",
+                            npz_field,
+                        )
 
-        logger.info("Loading AI model outputs for {}", upload_id)
-        taxonomy_rows = load_model_jsonl_by_id("taxonomy", upload_id)
-        enrichment_rows = load_model_jsonl_by_id("enrichment", upload_id)
-        feature_prep_rows = load_model_jsonl_by_id("feature_prep", upload_id)
-
-        # Load embeddings
-        embeddings_npz = load_embeddings_npz(upload_id)
-        embeddings_index = load_model_index("embeddings", upload_id, ".npz")
-        embeddings_by_cid = embeddings_index.get("by_control_id", {})
-        embedding_dim = int(embeddings_index.get("embedding_dim") or DEFAULT_EMBEDDING_DIM)
-
-        embedding_arrays: Dict[str, Any] = {}
-        if embeddings_npz is not None:
-            npz_keys = set(getattr(embeddings_npz, "files", []))
-            for _, npz_field in EMBEDDING_FEATURES:
-                if npz_field in npz_keys:
-                    vec_arr = embeddings_npz[npz_field]
-                    embedding_arrays[npz_field] = vec_arr
-                    if hasattr(vec_arr, "shape") and len(vec_arr.shape) == 2 and vec_arr.shape[1] > 0:
-                        embedding_dim = int(vec_arr.shape[1])
-                else:
-                    logger.warning(
-                        "Embedding feature array '{}' is missing in NPZ; using zero vectors",
-                        npz_field,
-                    )
-
-        logger.info(
-            "Loaded: {} controls, {} taxonomy, {} enrichment, {} feature_prep, {} embeddings",
-            len(controls),
-            len(taxonomy_rows),
-            len(enrichment_rows),
-            len(feature_prep_rows),
-            len(embeddings_by_cid),
-        )
+            logger.info(
+                "Loaded: {} controls, {} taxonomy, {} enrichment, {} feature_prep, {} embeddings",
+                len(controls),
+                len(taxonomy_rows),
+                len(enrichment_rows),
+                len(feature_prep_rows),
+                len(embeddings_by_cid),
+            )
         logger.info("PostgreSQL writer config: batch_size={}", BATCH_SIZE)
 
         # ── Connect and ingest ───────────────────────────────────
         engine = get_engine()
 
         # Parallelize all startup queries using separate connections
-        logger.info("Loading existing data in parallel (6 queries)...")
+        logger.info("Loading existing data in parallel (7 queries)...")
 
         async def _pq(query_fn, *args):
             """Run a query on its own connection from the pool."""
-            async with engine.connect() as c:
+            async with engine.connect() as c, profiler.track_connection(c, existing_stage):
                 return await query_fn(c, *args)
 
         # Read current Qdrant hashes in parallel with PG queries
         qdrant_hashes_task = qdrant_service.read_current_hashes()
 
-        (
-            existing,
-            existing_taxonomy_hashes,
-            existing_enrichment_hashes,
-            existing_feature_prep_hashes,
-            valid_node_ids,
-            theme_lookup_result,
-            current_qdrant_hashes,
-        ) = await asyncio.gather(
-            _pq(_get_existing_control_ids),
-            _pq(_get_existing_model_hashes, ai_controls_model_taxonomy),
-            _pq(_get_existing_model_hashes, ai_controls_model_enrichment),
-            _pq(_get_existing_feature_prep_hashes),
-            _pq(_load_valid_org_node_ids),
-            _pq(_load_theme_lookup),
-            qdrant_hashes_task,
-        )
+        with profiler.stage("load_existing") as existing_stage:
+            (
+                existing,
+                existing_taxonomy_hashes,
+                existing_enrichment_hashes,
+                existing_feature_prep_hashes,
+                valid_node_ids,
+                theme_lookup_result,
+                control_seqs,
+                current_qdrant_hashes,
+            ) = await asyncio.gather(
+                _pq(_get_existing_control_ids),
+                _pq(_get_existing_model_hashes, ai_controls_model_taxonomy),
+                _pq(_get_existing_model_hashes, ai_controls_model_enrichment),
+                _pq(_get_existing_feature_prep_hashes),
+                _pq(_load_valid_org_node_ids),
+                _pq(_load_theme_lookup),
+                _pq(_get_control_seqs),
+                qdrant_hashes_task,
+            )
         valid_theme_ids, theme_lookup = theme_lookup_result
         existing_ids = set(existing.keys())
+        existing_stage.rows = len(existing_ids)
         logger.info(
             "Parallel load complete: {} existing controls, {} org nodes, {} risk themes",
             len(existing_ids), len(valid_node_ids), len(valid_theme_ids),
@@ -667,349 +1050,388 @@ async def run_controls_ingestion(
         if progress_callback:
             await progress_callback("Loading existing data", 0, counts.total, 5)
 
-        async with engine.begin() as conn:
-            logger.info("Connected to PostgreSQL, starting ingestion")
-
-            # Accumulators for batch inserts
-            ref_rows: List[dict] = []
-            ver_rows: List[dict] = []
-            ingested_control_ids: Set[str] = set()  # tracks all ref_control IDs across batches
-            rel_parent_rows: List[dict] = []
-            rel_owns_func_rows: List[dict] = []
-            rel_owns_loc_rows: List[dict] = []
-            rel_related_func_rows: List[dict] = []
-            rel_related_loc_rows: List[dict] = []
-            rel_risk_theme_rows: List[dict] = []
-            ai_taxonomy_rows: List[dict] = []
-            ai_enrichment_rows: List[dict] = []
-            ai_feature_prep_rows: List[dict] = []
-
-            # Control IDs that need version/relation closing
-            cids_to_close_ver: List[str] = []
-            cids_to_close_rel: List[str] = []
-            # AI model control IDs that need closing
-            cids_to_close_taxonomy: List[str] = []
-            cids_to_close_enrichment: List[str] = []
-            cids_to_close_feature_prep: List[str] = []
-
-            total_pending = 0
-
-            for idx, control in enumerate(controls):
-                cid_raw = control.get("control_id")
-                if not isinstance(cid_raw, str) or not cid_raw.strip():
-                    raise RuntimeError(f"Invalid control_id at row {idx}: {cid_raw!r}")
-                cid = cid_raw.strip()
-
-                is_new = cid not in existing_ids
-                # Normalize both sides to ISO string for comparison
-                # (old_lmo is datetime from DB, new_lmo is string from JSONL)
-                old_lmo = _coerce_utc_iso(existing.get(cid))
-                new_lmo = _coerce_utc_iso(control.get("last_modified_on"))
-                source_changed = is_new or old_lmo != new_lmo
+        qdrant_enabled = embeddings_npz is not None and bool(embeddings_by_cid)
+        if embeddings_npz is not None and not embeddings_by_cid:
+            logger.info("No embeddings index found, skipping Qdrant")
 
+        # ── Resumable mode: open or resume the run checkpoint ────────
+        checkpoint: Optional[IngestCheckpoint] = None
+        staging: Optional[StagingArea] = None
+        if resumable:
+            async with engine.begin() as conn:
+                checkpoint, staging = await open_checkpoint(
+                    conn, upload_id, batch_id, tx_from,
+                    compute_input_fingerprint(upload_id), total=counts.total,
+                )
+            if checkpoint.resumed:
+                # Staged rows already carry the original run's tx_from
+                tx_from = checkpoint.tx_from
+                tx_from_iso = tx_from.isoformat()
+                checkpoint.restore_counts(counts)
+                logger.info(
+                    "Resuming ingestion of {} from checkpoint run={}: offset {}/{}",
+                    upload_id, checkpoint.run_id, checkpoint.next_offset, counts.total,
+                )
+
+        # ── Two-phase PostgreSQL + Qdrant stages ─────────────────────
+        # The Qdrant delta depends only on the NPZ/index files, so it runs
+        # concurrently with the PostgreSQL writes. PostgreSQL keeps its
+        # transaction (or, in resumable mode, the publish transaction) open
+        # until the Qdrant upserts have landed and commits only if they
+        # succeeded; if PostgreSQL fails instead, the Qdrant writes are
+        # compensated (see _compensate_failed_stages).
+        qdrant_state = _QdrantStageState()
+        qdrant_upserted = asyncio.Event()
+        postgres_failed = asyncio.Event()
+
+        pending = _PendingRows()
+        ingested_control_ids: Set[str] = set()  # tracks all ref_control IDs across batches
+
+        def _accumulate_control(idx: int, control: Dict[str, Any]) -> None:
+            """Diff one control against the existing data and queue its rows."""
+            cid_raw = control.get("control_id")
+            if not isinstance(cid_raw, str) or not cid_raw.strip():
+                raise RuntimeError(f"Invalid control_id at row {idx}: {cid_raw!r}")
+            cid = cid_raw.strip()
+
+            change = _source_change(cid, control, existing)
+            is_new = change == NEW
+            source_changed = change != UNCHANGED
+
+            if is_new:
+                counts.new += 1
+            elif source_changed:
+                counts.changed += 1
+            else:
+                counts.unchanged += 1
+
+            if source_changed:
+                # Ref row (INSERT ... ON CONFLICT DO NOTHING for idempotency)
                 if is_new:
-                    counts.new += 1
-                elif source_changed:
-                    counts.changed += 1
-                else:
-                    counts.unchanged += 1
-
-                if source_changed:
-                    # Ref row (INSERT ... ON CONFLICT DO NOTHING for idempotency)
-                    if is_new:
-                        ref_rows.append({
-                            "control_id": cid,
-                            "created_at": tx_from,
-                        })
-                        ingested_control_ids.add(cid)
-
-                    # Close old version + relations if updating
-                    if not is_new:
-                        cids_to_close_ver.append(cid)
-                        cids_to_close_rel.append(cid)
-
-                    # New version row
-                    ver_rows.append(_build_ver_control_row(control, tx_from))
-
-                    # New relation rows
-                    rels = _build_relation_rows(control, cid, tx_from, theme_lookup=theme_lookup)
-                    rel_parent_rows.extend(rels["parent"])
-                    rel_owns_func_rows.extend(rels["owns_function"])
-                    rel_owns_loc_rows.extend(rels["owns_location"])
-                    rel_related_func_rows.extend(rels["related_function"])
-                    rel_related_loc_rows.extend(rels["related_location"])
-                    rel_risk_theme_rows.extend(rels["risk_theme"])
-
-                # AI Taxonomy
-                tax_row = taxonomy_rows.get(cid)
-                if tax_row:
-                    incoming_hash = tax_row.get("hash")
-                    if not isinstance(incoming_hash, str):
-                        incoming_hash = None
-                    existing_hash = existing_taxonomy_hashes.get(cid)
-                    if existing_hash != incoming_hash:
-                        if existing_hash is not None:
-                            cids_to_close_taxonomy.append(cid)
-                        model_run_ts = _parse_timestamp(tax_row.get("model_run_timestamp"), tx_from_iso)
-                        primary_reasoning = tax_row.get("primary_risk_theme_reasoning")
-                        secondary_reasoning = tax_row.get("secondary_risk_theme_reasoning")
-                        ai_taxonomy_rows.append({
-                            "ref_control_id": cid,
-                            "hash": incoming_hash,
-                            "model_run_timestamp": model_run_ts,
-                            "parent_primary_risk_theme_id": str(tax_row["parent_primary_risk_theme_id"]) if tax_row.get("parent_primary_risk_theme_id") is not None else None,
-                            "primary_risk_theme_id": str(tax_row["primary_risk_theme_id"]) if tax_row.get("primary_risk_theme_id") is not None else None,
-                            "primary_risk_theme_reasoning": _coerce_list_str(primary_reasoning) if primary_reasoning else None,
-                            "parent_secondary_risk_theme_id": str(tax_row["parent_secondary_risk_theme_id"]) if tax_row.get("parent_secondary_risk_theme_id") is not None else None,
-                            "secondary_risk_theme_id": str(tax_row["secondary_risk_theme_id"]) if tax_row.get("secondary_risk_theme_id") is not None else None,
-                            "secondary_risk_theme_reasoning": _coerce_list_str(secondary_reasoning) if secondary_reasoning else None,
-                            "tx_from": tx_from,
-                            "tx_to": None,
-                        })
-                        existing_taxonomy_hashes[cid] = incoming_hash
-
-                # AI Enrichment
-                enrich_row = enrichment_rows.get(cid)
-                if enrich_row:
-                    incoming_hash = enrich_row.get("hash")
-                    if not isinstance(incoming_hash, str):
-                        incoming_hash = None
-                    existing_hash = existing_enrichment_hashes.get(cid)
-                    if existing_hash != incoming_hash:
-                        if existing_hash is not None:
-                            cids_to_close_enrichment.append(cid)
-                        model_run_ts = _parse_timestamp(enrich_row.get("model_run_timestamp"), tx_from_iso)
-                        row_dict = {
-                            "ref_control_id": cid,
-                            "hash": incoming_hash,
-                            "model_run_timestamp": model_run_ts,
-                            "tx_from": tx_from,
-                            "tx_to": None,
-                        }
-                        for key in ENRICHMENT_KEYS:
-                            row_dict[key] = enrich_row.get(key)
-                        ai_enrichment_rows.append(row_dict)
-                        existing_enrichment_hashes[cid] = incoming_hash
-
-                # AI Clean Text (3 per-feature hashes: what, why, where)
-                clean_row = feature_prep_rows.get(cid)
-                if clean_row:
-                    incoming_ct_hashes = {
-                        h: clean_row.get(h) for h in HASH_COLUMN_NAMES
+                    pending.ref.append({
+                        "control_id": cid,
+                        "created_at": tx_from,
+                    })
+                    ingested_control_ids.add(cid)
+
+                # Close old version + relations if updating
+                if not is_new:
+                    pending.close_ver.append(cid)
+                    pending.close_rel.append(cid)
+
+                # New version row
+                pending.ver.append(_build_ver_control_row(control, tx_from))
+
+                # New relation rows
+                rels = _build_relation_rows(control, cid, tx_from, theme_lookup=theme_lookup)
+                pending.rel_parent.extend(rels["parent"])
+                pending.rel_owns_func.extend(rels["owns_function"])
+                pending.rel_owns_loc.extend(rels["owns_location"])
+                pending.rel_related_func.extend(rels["related_function"])
+                pending.rel_related_loc.extend(rels["related_location"])
+                pending.rel_risk_theme.extend(rels["risk_theme"])
+
+            # AI Taxonomy
+            tax_row = taxonomy_rows.get(cid)
+            if tax_row:
+                incoming_hash = _model_hash(tax_row)
+                change = _model_hash_change(incoming_hash, existing_taxonomy_hashes.get(cid))
+                if change != UNCHANGED:
+                    if change == CHANGED:
+                        pending.close_taxonomy.append(cid)
+                    model_run_ts = _parse_timestamp(tax_row.get("model_run_timestamp"), tx_from_iso)
+                    primary_reasoning = tax_row.get("primary_risk_theme_reasoning")
+                    secondary_reasoning = tax_row.get("secondary_risk_theme_reasoning")
+                    pending.ai_taxonomy.append({
+                        "ref_control_id": cid,
+                        "hash": incoming_hash,
+                        "model_run_timestamp": model_run_ts,
+                        "parent_primary_risk_theme_id": str(tax_row["parent_primary_risk_theme_id"]) if tax_row.get("parent_primary_risk_theme_id") is not None else None,
+                        "primary_risk_theme_id": str(tax_row["primary_risk_theme_id"]) if tax_row.get("primary_risk_theme_id") is not None else None,
+                        "primary_risk_theme_reasoning": _coerce_list_str(primary_reasoning) if primary_reasoning else None,
+                        "parent_secondary_risk_theme_id": str(tax_row["parent_secondary_risk_theme_id"]) if tax_row.get("parent_secondary_risk_theme_id") is not None else None,
+                        "secondary_risk_theme_id": str(tax_row["secondary_risk_theme_id"]) if tax_row.get("secondary_risk_theme_id") is not None else None,
+                        "secondary_risk_theme_reasoning": _coerce_list_str(secondary_reasoning) if secondary_reasoning else None,
+                        "tx_from": tx_from,
+                        "tx_to": None,
+                    })
+                    existing_taxonomy_hashes[cid] = incoming_hash
+
+            # AI Enrichment
+            enrich_row = enrichment_rows.get(cid)
+            if enrich_row:
+                incoming_hash = _model_hash(enrich_row)
+                change = _model_hash_change(incoming_hash, existing_enrichment_hashes.get(cid))
+                if change != UNCHANGED:
+                    if change == CHANGED:
+                        pending.close_enrichment.append(cid)
+                    model_run_ts = _parse_timestamp(enrich_row.get("model_run_timestamp"), tx_from_iso)
+                    row_dict = {
+                        "ref_control_id": cid,
+                        "hash": incoming_hash,
+                        "model_run_timestamp": model_run_ts,
+                        "tx_from": tx_from,
+                        "tx_to": None,
                     }
-                    existing_ct_hashes = existing_feature_prep_hashes.get(cid, {})
-                    ct_changed = any(
-                        incoming_ct_hashes.get(h) != existing_ct_hashes.get(h)
-                        for h in HASH_COLUMN_NAMES
-                    )
-                    if ct_changed:
-                        if existing_ct_hashes:
-                            cids_to_close_feature_prep.append(cid)
-                        model_run_ts = _parse_timestamp(clean_row.get("model_run_timestamp"), tx_from_iso)
-                        row_dict = {
-                            "ref_control_id": cid,
-                            "model_run_timestamp": model_run_ts,
-                            # Semantic feature texts (from enrichment)
-                            "what": clean_row.get("what"),
-                            "why": clean_row.get("why"),
-                            "where": clean_row.get("where"),
-                            # Keyword FTS fields (pass-through)
-                            "control_title": clean_row.get("control_title"),
-                            "control_description": clean_row.get("control_description"),
-                            "evidence_description": clean_row.get("evidence_description"),
-                            "local_functional_information": clean_row.get("local_functional_information"),
-                            "tx_from": tx_from,
-                            "tx_to": None,
-                        }
-                        for h in HASH_COLUMN_NAMES:
-                            row_dict[h] = incoming_ct_hashes.get(h)
-                        ai_feature_prep_rows.append(row_dict)
-                        existing_feature_prep_hashes[cid] = incoming_ct_hashes
-
-                # Embedding delta detection is done after the loop via Qdrant hashes
-                # (no per-control work needed here)
-
-                counts.processed += 1
-
-                # Track total pending rows for batch flushing
-                total_pending = (
-                    len(ref_rows) + len(ver_rows) +
-                    len(rel_parent_rows) + len(rel_owns_func_rows) + len(rel_owns_loc_rows) +
-                    len(rel_related_func_rows) + len(rel_related_loc_rows) + len(rel_risk_theme_rows) +
-                    len(ai_taxonomy_rows) + len(ai_enrichment_rows) + len(ai_feature_prep_rows)
+                    for key in ENRICHMENT_KEYS:
+                        row_dict[key] = enrich_row.get(key)
+                    pending.ai_enrichment.append(row_dict)
+                    existing_enrichment_hashes[cid] = incoming_hash
+
+            # AI Clean Text (3 per-feature hashes: what, why, where)
+            clean_row = feature_prep_rows.get(cid)
+            if clean_row:
+                incoming_ct_hashes = _feature_prep_hashes(clean_row)
+                change = _feature_prep_change(incoming_ct_hashes, existing_feature_prep_hashes.get(cid, {}))
+                if change != UNCHANGED:
+                    if change == CHANGED:
+                        pending.close_feature_prep.append(cid)
+                    model_run_ts = _parse_timestamp(clean_row.get("model_run_timestamp"), tx_from_iso)
+                    row_dict = {
+                        "ref_control_id": cid,
+                        "model_run_timestamp": model_run_ts,
+                        # Semantic feature texts (from enrichment)
+                        "what": clean_row.get("what"),
+                        "why": clean_row.get("why"),
+                        "where": clean_row.get("where"),
+                        # Keyword FTS fields (pass-through)
+                        "control_title": clean_row.get("control_title"),
+                        "control_description": clean_row.get("control_description"),
+                        "evidence_description": clean_row.get("evidence_description"),
+                        "local_functional_information": clean_row.get("local_functional_information"),
+                        "tx_from": tx_from,
+                        "tx_to": None,
+                    }
+                    for h in HASH_COLUMN_NAMES:
+                        row_dict[h] = incoming_ct_hashes.get(h)
+                    pending.ai_feature_prep.append(row_dict)
+                    existing_feature_prep_hashes[cid] = incoming_ct_hashes
+
+            # Embedding delta detection is done after the loop via Qdrant hashes
+            # (no per-control work needed here)
+
+            counts.processed += 1
+
+        async def _report_progress(idx: int) -> None:
+            if progress_callback and (idx + 1) % max(1, BATCH_SIZE) == 0:
+                total = max(counts.total, 1)
+                pct = 10 + int((counts.processed / total) * 80)
+                await progress_callback(
+                    "Ingesting controls",
+                    counts.processed,
+                    counts.total,
+                    min(pct, 90),
                 )
 
-                if total_pending >= BATCH_SIZE:
-                    await _flush_batch(
-                        conn, tx_from,
-                        ref_rows, ver_rows,
-                        cids_to_close_ver, cids_to_close_rel,
-                        rel_parent_rows, rel_owns_func_rows, rel_owns_loc_rows,
-                        rel_related_func_rows, rel_related_loc_rows, rel_risk_theme_rows,
-                        cids_to_close_taxonomy, cids_to_close_enrichment, cids_to_close_feature_prep,
-                        ai_taxonomy_rows, ai_enrichment_rows, ai_feature_prep_rows,
-                        f"batch-{idx}",
-                        valid_node_ids=valid_node_ids,
-                        valid_theme_ids=valid_theme_ids,
-                    )
-                    # Clear accumulators (parent edges kept for deferred insert)
-                    ref_rows.clear()
-                    ver_rows.clear()
-                    cids_to_close_ver.clear()
-                    cids_to_close_rel.clear()
-                    rel_owns_func_rows.clear()
-                    rel_owns_loc_rows.clear()
-                    rel_related_func_rows.clear()
-                    rel_related_loc_rows.clear()
-                    rel_risk_theme_rows.clear()
-                    cids_to_close_taxonomy.clear()
-                    cids_to_close_enrichment.clear()
-                    cids_to_close_feature_prep.clear()
-                    ai_taxonomy_rows.clear()
-                    ai_enrichment_rows.clear()
-                    ai_feature_prep_rows.clear()
-
-                # Progress callback
-                if progress_callback and (idx + 1) % max(1, BATCH_SIZE) == 0:
-                    total = max(counts.total, 1)
-                    pct = 10 + int((counts.processed / total) * 80)
-                    await progress_callback(
-                        "Ingesting controls",
-                        counts.processed,
-                        counts.total,
-                        min(pct, 90),
-                    )
+        def _raise_if_qdrant_failed() -> None:
+            if qdrant_state.error is not None:
+                raise RuntimeError(
+                    f"Qdrant stage failed, rolling back PostgreSQL: {qdrant_state.error}"
+                )
 
-            # Flush remaining
-            await _flush_batch(
-                conn, tx_from,
-                ref_rows, ver_rows,
-                cids_to_close_ver, cids_to_close_rel,
-                rel_parent_rows, rel_owns_func_rows, rel_owns_loc_rows,
-                rel_related_func_rows, rel_related_loc_rows, rel_risk_theme_rows,
-                cids_to_close_taxonomy, cids_to_close_enrichment, cids_to_close_feature_prep,
-                ai_taxonomy_rows, ai_enrichment_rows, ai_feature_prep_rows,
-                "final",
-                valid_node_ids=valid_node_ids,
-                valid_theme_ids=valid_theme_ids,
-            )
+        async def _await_qdrant_upserts(pg_stage: StageTiming) -> None:
+            """Phase 1 done — hold the open transaction until Qdrant reports."""
+            if not qdrant_enabled:
+                return
+            if progress_callback:
+                await progress_callback(
+                    "Waiting for Qdrant upserts...", counts.processed, counts.total, 90,
+                )
+            wait_started = time.perf_counter()
+            await qdrant_upserted.wait()
+            pg_stage.extra["qdrant_wait_seconds"] = round(time.perf_counter() - wait_started, 3)
+            _raise_if_qdrant_failed()
+
+        async def _postgres_stage() -> None:
+            with profiler.stage("postgres") as pg_stage:
+                if checkpoint is not None:
+                    await _postgres_resumable(pg_stage)
+                else:
+                    await _postgres_transaction(pg_stage)
+
+        async def _postgres_transaction(pg_stage: StageTiming) -> None:
+            async with engine.begin() as conn, profiler.track_connection(conn, pg_stage):
+                logger.info("Connected to PostgreSQL, starting ingestion")
+
+                for idx, control in enumerate(controls):
+                    _accumulate_control(idx, control)
+
+                    if pending.total() >= BATCH_SIZE:
+                        await _flush_pending(
+                            conn, tx_from, pending, f"batch-{idx}",
+                            valid_node_ids=valid_node_ids,
+                            valid_theme_ids=valid_theme_ids,
+                            stage=pg_stage,
+                        )
+                        # Stop early if the Qdrant side already failed
+                        _raise_if_qdrant_failed()
+                        # Parent edges kept for deferred insert
+                        pending.clear(keep_parent_edges=True)
+
+                    await _report_progress(idx)
+
+                # Flush remaining
+                await _flush_pending(
+                    conn, tx_from, pending, "final",
+                    valid_node_ids=valid_node_ids,
+                    valid_theme_ids=valid_theme_ids,
+                    stage=pg_stage,
+                )
 
-            # ── Deferred parent-edge insert ─────────────────────────────
-            # All ref_control rows now exist, so parent FK references within
-            # the ingestion set are satisfied regardless of processing order.
-            # Filter out edges whose parent is truly missing (not in DB).
-            if rel_parent_rows:
-                valid_control_ids = existing_ids | ingested_control_ids
-                before = len(rel_parent_rows)
-                rel_parent_rows = [
-                    r for r in rel_parent_rows
-                    if r["parent_control_id"] in valid_control_ids
-                ]
-                skipped = before - len(rel_parent_rows)
-                if skipped:
-                    logger.warning(
-                        "rel_parent: skipped {} edges whose parent_control_id "
-                        "does not exist in src_controls_ref_control",
-                        skipped,
-                    )
+                # ── Deferred parent-edge insert ─────────────────────────────
+                # All ref_control rows now exist, so parent FK references within
+                # the ingestion set are satisfied regardless of processing order.
+                # Filter out edges whose parent is truly missing (not in DB).
+                rel_parent_rows = pending.rel_parent
                 if rel_parent_rows:
-                    await _execute_inserts(
-                        conn, src_controls_rel_parent, rel_parent_rows, "parent-edges",
-                    )
+                    valid_control_ids = existing_ids | ingested_control_ids
+                    before = len(rel_parent_rows)
+                    rel_parent_rows = [
+                        r for r in rel_parent_rows
+                        if r["parent_control_id"] in valid_control_ids
+                    ]
+                    skipped = before - len(rel_parent_rows)
+                    if skipped:
+                        logger.warning(
+                            "rel_parent: skipped {} edges whose parent_control_id "
+                            "does not exist in src_controls_ref_control",
+                            skipped,
+                        )
+                    if rel_parent_rows:
+                        await _execute_inserts(
+                            conn, src_controls_rel_parent, rel_parent_rows, "parent-edges",
+                        )
+                        pg_stage.rows += len(rel_parent_rows)
+
+                await refresh_ws_masks(conn, since=tx_from)
+                await refresh_version_diffs(conn, since=tx_from)
+                await _await_qdrant_upserts(pg_stage)
+
+            # Transaction committed at this point
+
+        async def _commit_staged_batch(pg_stage: StageTiming, next_offset: int, label: str) -> None:
+            """Stage pending rows and advance the checkpoint in one transaction."""
+            async with engine.begin() as conn, profiler.track_connection(conn, pg_stage):
+                await _stage_batch(
+                    conn, staging, pending, label,
+                    valid_node_ids=valid_node_ids,
+                    valid_theme_ids=valid_theme_ids,
+                    stage=pg_stage,
+                )
+                checkpoint.next_offset = next_offset
+                checkpoint.capture_counts(counts)
+                await save_checkpoint(conn, checkpoint)
+            pending.clear()
+
+        async def _postgres_resumable(pg_stage: StageTiming) -> None:
+            start = checkpoint.next_offset
+            pg_stage.extra["resumed_from"] = start
+            pg_stage.extra["checkpoint_run_id"] = checkpoint.run_id
+            logger.info(
+                "Staging controls {}..{} into run {} (resumable)",
+                start, len(controls), checkpoint.run_id,
+            )
 
-        # Transaction committed at this point
+            for idx in range(start, len(controls)):
+                _accumulate_control(idx, controls[idx])
 
-        # ── Qdrant delta upsert (outside Postgres transaction) ──────────
-        if embeddings_npz is not None and embeddings_by_cid:
-            if progress_callback:
-                await progress_callback("Computing embedding delta...", counts.processed, counts.total, 91)
+                if pending.total() >= BATCH_SIZE:
+                    await _commit_staged_batch(pg_stage, idx + 1, f"batch-{idx}")
+                    _raise_if_qdrant_failed()
 
-            # Build incoming hashes + masks from embeddings index (per-feature)
-            incoming_emb_hashes: Dict[str, Dict[str, Optional[str]]] = {}
-            for cid_str, meta in embeddings_by_cid.items():
-                if not isinstance(meta, dict):
-                    continue
-                hashes: Dict[str, Any] = {h: meta.get(h) for h in HASH_COLUMN_NAMES}
-                for m in MASK_COLUMN_NAMES:
-                    hashes[m] = meta.get(m, True)
-                incoming_emb_hashes[cid_str] = hashes
-
-            # Per-feature delta detection against Qdrant
-            new_cids, changed_features, unchanged_cids = qdrant_service.compute_embedding_delta(
-                incoming_emb_hashes, current_qdrant_hashes,
-            )
+                await _report_progress(idx)
 
-            # Build embedding_data for controls that need Qdrant updates
-            all_upsert_cids = new_cids | set(changed_features.keys())
-            embedding_data: Dict[str, Dict[str, Any]] = {}
-
-            for cid_str in all_upsert_cids:
-                emb_meta = embeddings_by_cid.get(cid_str)
-                row_idx: Optional[int] = None
-                row_idx_raw = emb_meta.get("row") if isinstance(emb_meta, dict) else None
-                if row_idx_raw is not None:
-                    try:
-                        row_idx = int(row_idx_raw)
-                    except Exception:
-                        row_idx = None
-                if row_idx is not None and row_idx < 0:
-                    row_idx = None
-
-                cid_vectors: Dict[str, Any] = {}
-                for feature_name, npz_field in EMBEDDING_FEATURES:
-                    vec_arr = embedding_arrays.get(npz_field)
-                    raw_vec = None
-                    if vec_arr is not None and row_idx is not None:
-                        try:
-                            if row_idx < vec_arr.shape[0]:
-                                raw_vec = vec_arr[row_idx]
-                        except Exception:
-                            raw_vec = None
-                    cid_vectors[feature_name] = raw_vec
-                embedding_data[cid_str] = cid_vectors
-
-            # Progress adapter
-            async def _qdrant_progress(step: str, uploaded: int, total: int):
-                if progress_callback:
-                    await progress_callback(step, counts.processed, counts.total, 93)
-
-            # Upsert new controls (full points)
-            points_new = await qdrant_service.upsert_new_controls(
-                sorted(new_cids), embedding_data, incoming_emb_hashes,
-                progress_callback=_qdrant_progress,
-            )
+            await _commit_staged_batch(pg_stage, len(controls), "final")
 
-            # Update changed features on existing controls
-            points_updated = await qdrant_service.update_changed_features(
-                changed_features, embedding_data, incoming_emb_hashes,
-                progress_callback=_qdrant_progress,
-            )
+            # ── Publish: make all staged versions current atomically ──
+            with profiler.stage("publish") as publish_stage:
+                async with engine.begin() as conn, profiler.track_connection(conn, publish_stage):
+                    published = await staging.publish(conn, tx_from)
+                    publish_stage.rows = sum(published.values())
+                    await refresh_ws_masks(conn, since=tx_from)
+                    await refresh_version_diffs(conn, since=tx_from)
+                    await mark_published(conn, checkpoint)
+                    await staging.drop(conn)
+                    await _await_qdrant_upserts(pg_stage)
 
-            total_qdrant = points_new + points_updated
+            # Publish transaction committed at this point
 
-            # Wait for indexing if we did a large batch (HNSW was toggled)
-            if points_new > qdrant_service.HNSW_TOGGLE_THRESHOLD:
-                if progress_callback:
-                    await progress_callback("Waiting for Qdrant indexing...", counts.processed, counts.total, 95)
+        async def _guarded_postgres_stage() -> None:
+            try:
+                await _postgres_stage()
+            except BaseException:
+                postgres_failed.set()
+                raise
 
+        async def _qdrant_stage() -> None:
+            try:
+                with profiler.stage("qdrant_upsert") as qdrant_stage:
+                    await _apply_qdrant_delta(
+                        qdrant_state,
+                        embeddings_by_cid,
+                        embedding_arrays,
+                        current_qdrant_hashes,
+                        abort_event=postgres_failed,
+                        progress_callback=progress_callback,
+                        counts=counts,
+                        stage=qdrant_stage,
+                        control_seqs=control_seqs,
+                    )
+            except BaseException as e:
+                qdrant_state.error = e
+                raise
+            finally:
+                qdrant_upserted.set()
+
+            # Indexing runs server-side; waiting for it is not part of the
+            # two-phase commit, so PostgreSQL has already committed here.
+            if qdrant_state.points_new > qdrant_service.HNSW_TOGGLE_THRESHOLD:
                 async def _indexing_progress(step: str, indexed: int, total: int):
                     if progress_callback:
                         await progress_callback(step, counts.processed, counts.total, 95)
 
-                green_status = await qdrant_service.wait_for_collection_green(
-                    progress_callback=_indexing_progress
-                )
-                if not green_status:
-                    logger.warning("Qdrant indexing timeout")
-
-            logger.info(
-                "Qdrant delta complete: {} new, {} updated, {} unchanged",
-                points_new, points_updated, len(unchanged_cids),
+                try:
+                    with profiler.stage("qdrant_indexing") as indexing_stage:
+                        green_status = await qdrant_service.wait_for_collection_green(
+                            progress_callback=_indexing_progress
+                        )
+                        indexing_stage.extra["green"] = green_status
+                    if not green_status:
+                        logger.warning("Qdrant indexing timeout")
+                except Exception as e:
+                    logger.warning("Waiting for Qdrant indexing failed (non-fatal): {}", e)
+
+        stages = [_guarded_postgres_stage()]
+        if qdrant_enabled:
+            stages.append(_qdrant_stage())
+        stage_results = await asyncio.gather(*stages, return_exceptions=True)
+
+        pg_error = stage_results[0] if isinstance(stage_results[0], BaseException) else None
+        qdrant_error = None
+        if qdrant_enabled and isinstance(stage_results[1], BaseException):
+            qdrant_error = stage_results[1]
+
+        if pg_error is not None or qdrant_error is not None:
+            await _compensate_failed_stages(
+                batch_id, upload_id, tx_from_iso, qdrant_state, pg_error, qdrant_error,
+                checkpoint=checkpoint,
             )
+            raise pg_error if pg_error is not None else qdrant_error
 
+        # Both stages succeeded — similarity reads the committed versions
+        if qdrant_enabled:
+            total_qdrant = qdrant_state.points_new + qdrant_state.points_updated
             if progress_callback:
                 await progress_callback(f"Qdrant complete ({total_qdrant} points)", counts.processed, counts.total, 96)
 
+            # New controls got their control_seq in the committed transaction
+            if qdrant_state.new_cids:
+                with profiler.stage("control_seq_backfill") as seq_stage:
+                    seq_stage.extra["new_points"] = len(qdrant_state.new_cids)
+                    seq_stage.extra["missing_control_seq"] = await _complete_control_seq_payloads(
+                        sorted(qdrant_state.new_cids)
+                    )
+
             # ── Compute similar controls (incremental) ────────────
             if embedding_arrays and len(embedding_arrays) >= len(EMBEDDING_FEATURES):
                 from server.pipelines.controls.similarity import compute_similar_controls
@@ -1017,14 +1439,12 @@ async def run_controls_ingestion(
                 await compute_similar_controls(
                     embedding_arrays=embedding_arrays,
                     embeddings_index=embeddings_index,
-                    changed_control_ids=set(changed_features.keys()),
-                    new_control_ids=new_cids,
+                    changed_control_ids=set(qdrant_state.changed_features.keys()),
+                    new_control_ids=qdrant_state.new_cids,
                     progress_callback=progress_callback,
+                    profiler=profiler,
                 )
 
-        elif embeddings_npz is not None:
-            logger.info("No embeddings index found, skipping Qdrant")
-
         logger.info(
             "Ingestion complete: total={}, new={}, changed={}, unchanged={}, failed={}",
             counts.total,
@@ -1043,6 +1463,8 @@ async def run_controls_ingestion(
                 f"Failed: {counts.failed}"
             ),
             counts=counts,
+            profile=profiler.to_dict(),
+            tx_from=tx_from,
         )
 
     except Exception as e:
@@ -1052,6 +1474,7 @@ async def run_controls_ingestion(
             success=False,
             message=f"Ingestion failed: {e}",
             counts=counts,
+            profile=profiler.to_dict(),
         )
     finally:
         if embeddings_npz is not None:
@@ -1083,8 +1506,12 @@ async def _flush_batch(
     label: str,
     valid_node_ids: Optional[Set[str]] = None,
     valid_theme_ids: Optional[Set[str]] = None,
+    stage: Optional[StageTiming] = None,
 ) -> None:
-    """Flush accumulated rows to PostgreSQL in correct dependency order."""
+    """Flush accumulated rows to PostgreSQL in correct dependency order.
+
+    ``stage`` (optional) accumulates written/closed row counts for the profiler.
+    """
     has_work = (
         ref_rows or ver_rows or cids_to_close_ver or cids_to_close_rel or
         rel_parent_rows or rel_owns_func_rows or rel_owns_loc_rows or
@@ -1095,8 +1522,6 @@ async def _flush_batch(
     if not has_work:
         return
 
-    close_values = {"tx_to": tx_from}
-
     # 1. Insert new ref_control rows (ON CONFLICT DO NOTHING for idempotency)
     if ref_rows:
         stmt = pg_insert(src_controls_ref_control).on_conflict_do_nothing(
@@ -1107,25 +1532,19 @@ async def _flush_batch(
 
     # 2. Close old versions for changed controls
     if cids_to_close_ver:
-        await _execute_updates(
+        await _close_current(
             conn, src_controls_ver_control,
             src_controls_ver_control.c.ref_control_id,
-            cids_to_close_ver, close_values, f"close-ver-{label}",
+            cids_to_close_ver, tx_from, f"close-ver-{label}",
         )
 
     # 3. Close old relation edges for changed controls
     if cids_to_close_rel:
         # Parent edges: close where either parent or child matches
-        await conn.execute(
-            update(src_controls_rel_parent).where(
-                and_(
-                    src_controls_rel_parent.c.tx_to.is_(None),
-                    (
-                        src_controls_rel_parent.c.parent_control_id.in_(cids_to_close_rel)
-                        | src_controls_rel_parent.c.child_control_id.in_(cids_to_close_rel)
-                    ),
-                )
-            ).values(**close_values)
+        await _close_current(
+            conn, src_controls_rel_parent,
+            (src_controls_rel_parent.c.parent_control_id, src_controls_rel_parent.c.child_control_id),
+            cids_to_close_rel, tx_from, f"close-rel-parent-{label}",
         )
 
         # Other relation tables: close by control_id
@@ -1136,10 +1555,10 @@ async def _flush_batch(
             src_controls_rel_related_location,
             src_controls_rel_risk_theme,
         ]:
-            await _execute_updates(
+            await _close_current(
                 conn, rel_table,
                 rel_table.c.control_id,
-                cids_to_close_rel, close_values, f"close-rel-{rel_table.name}-{label}",
+                cids_to_close_rel, tx_from, f"close-rel-{rel_table.name}-{label}",
             )
 
     # 4. Insert new version rows
@@ -1147,33 +1566,11 @@ async def _flush_batch(
         await _execute_inserts(conn, src_controls_ver_control, ver_rows, label)
 
     # 5. Filter relation rows for valid FK targets, then insert
-    if valid_node_ids is not None:
-        for rows_list, fk_col, tbl_name in [
-            (rel_owns_func_rows, "node_id", "rel_owns_function"),
-            (rel_owns_loc_rows, "node_id", "rel_owns_location"),
-            (rel_related_func_rows, "node_id", "rel_related_function"),
-            (rel_related_loc_rows, "node_id", "rel_related_location"),
-        ]:
-            before = len(rows_list)
-            filtered = [r for r in rows_list if r[fk_col] in valid_node_ids]
-            skipped = before - len(filtered)
-            if skipped:
-                logger.warning(
-                    "{}: skipped {} rows with missing org node references ({})",
-                    tbl_name, skipped, label,
-                )
-            rows_list[:] = filtered
-
-    if valid_theme_ids is not None and rel_risk_theme_rows:
-        before = len(rel_risk_theme_rows)
-        filtered = [r for r in rel_risk_theme_rows if r["theme_id"] in valid_theme_ids]
-        skipped = before - len(filtered)
-        if skipped:
-            logger.warning(
-                "rel_risk_theme: skipped {} rows with missing theme references ({})",
-                skipped, label,
-            )
-        rel_risk_theme_rows[:] = filtered
+    _filter_relation_refs(
+        rel_owns_func_rows, rel_owns_loc_rows,
+        rel_related_func_rows, rel_related_loc_rows, rel_risk_theme_rows,
+        label, valid_node_ids=valid_node_ids, valid_theme_ids=valid_theme_ids,
+    )
 
     # Parent edges are deferred — inserted after all batches so that
     # parent ref_control rows from later batches already exist.
@@ -1191,22 +1588,22 @@ async def _flush_batch(
 
     # 6. Close old AI model rows
     if cids_to_close_taxonomy:
-        await _execute_updates(
+        await _close_current(
             conn, ai_controls_model_taxonomy,
             ai_controls_model_taxonomy.c.ref_control_id,
-            cids_to_close_taxonomy, close_values, f"close-taxonomy-{label}",
+            cids_to_close_taxonomy, tx_from, f"close-taxonomy-{label}",
         )
     if cids_to_close_enrichment:
-        await _execute_updates(
+        await _close_current(
             conn, ai_controls_model_enrichment,
             ai_controls_model_enrichment.c.ref_control_id,
-            cids_to_close_enrichment, close_values, f"close-enrichment-{label}",
+            cids_to_close_enrichment, tx_from, f"close-enrichment-{label}",
         )
     if cids_to_close_feature_prep:
-        await _execute_updates(
+        await _close_current(
             conn, ai_controls_model_feature_prep,
             ai_controls_model_feature_prep.c.ref_control_id,
-            cids_to_close_feature_prep, close_values, f"close-feature_prep-{label}",
+            cids_to_close_feature_prep, tx_from, f"close-feature_prep-{label}",
         )
 
     # 7. Insert new AI model rows
@@ -1217,4 +1614,122 @@ async def _flush_batch(
     if ai_feature_prep_rows:
         await _execute_inserts(conn, ai_controls_model_feature_prep, ai_feature_prep_rows, label)
 
+    if stage is not None:
+        stage.rows += (
+            len(ref_rows) + len(ver_rows) +
+            len(rel_owns_func_rows) + len(rel_owns_loc_rows) +
+            len(rel_related_func_rows) + len(rel_related_loc_rows) + len(rel_risk_theme_rows) +
+            len(ai_taxonomy_rows) + len(ai_enrichment_rows) + len(ai_feature_prep_rows)
+        )
+        stage.extra["batches"] = stage.extra.get("batches", 0) + 1
+
     logger.debug("Flushed batch {} to PostgreSQL", label)
+
+
+def _filter_relation_refs(
+    rel_owns_func_rows: List[dict],
+    rel_owns_loc_rows: List[dict],
+    rel_related_func_rows: List[dict],
+    rel_related_loc_rows: List[dict],
+    rel_risk_theme_rows: List[dict],
+    label: str,
+    valid_node_ids: Optional[Set[str]] = None,
+    valid_theme_ids: Optional[Set[str]] = None,
+) -> None:
+    """Drop (in place) relation rows whose org node / theme FK target is missing."""
+    if valid_node_ids is not None:
+        for rows_list, fk_col, tbl_name in [
+            (rel_owns_func_rows, "node_id", "rel_owns_function"),
+            (rel_owns_loc_rows, "node_id", "rel_owns_location"),
+            (rel_related_func_rows, "node_id", "rel_related_function"),
+            (rel_related_loc_rows, "node_id", "rel_related_location"),
+        ]:
+            before = len(rows_list)
+            filtered = [r for r in rows_list if r[fk_col] in valid_node_ids]
+            skipped = before - len(filtered)
+            if skipped:
+                logger.warning(
+                    "{}: skipped {} rows with missing org node references ({})",
+                    tbl_name, skipped, label,
+                )
+            rows_list[:] = filtered
+
+    if valid_theme_ids is not None and rel_risk_theme_rows:
+        before = len(rel_risk_theme_rows)
+        filtered = [r for r in rel_risk_theme_rows if r["theme_id"] in valid_theme_ids]
+        skipped = before - len(filtered)
+        if skipped:
+            logger.warning(
+                "rel_risk_theme: skipped {} rows with missing theme references ({})",
+                skipped, label,
+            )
+        rel_risk_theme_rows[:] = filtered
+
+
+async def _flush_pending(
+    conn,
+    tx_from: datetime,
+    pending: _PendingRows,
+    label: str,
+    valid_node_ids: Optional[Set[str]] = None,
+    valid_theme_ids: Optional[Set[str]] = None,
+    stage: Optional[StageTiming] = None,
+) -> None:
+    """Flush a _PendingRows buffer straight into the live tables."""
+    await _flush_batch(
+        conn, tx_from,
+        pending.ref, pending.ver,
+        pending.close_ver, pending.close_rel,
+        pending.rel_parent, pending.rel_owns_func, pending.rel_owns_loc,
+        pending.rel_related_func, pending.rel_related_loc, pending.rel_risk_theme,
+        pending.close_taxonomy, pending.close_enrichment, pending.close_feature_prep,
+        pending.ai_taxonomy, pending.ai_enrichment, pending.ai_feature_prep,
+        label,
+        valid_node_ids=valid_node_ids,
+        valid_theme_ids=valid_theme_ids,
+        stage=stage,
+    )
+
+
+async def _stage_batch(
+    conn,
+    staging: StagingArea,
+    pending: _PendingRows,
+    label: str,
+    valid_node_ids: Optional[Set[str]] = None,
+    valid_theme_ids: Optional[Set[str]] = None,
+    stage: Optional[StageTiming] = None,
+) -> None:
+    """Append a _PendingRows buffer to the run's staging tables.
+
+    Close-lists are not needed: publish closes the current rows of every
+    control that has a staged row. Parent edges are staged with each batch
+    and filtered for a missing parent at publish time.
+    """
+    _filter_relation_refs(
+        pending.rel_owns_func, pending.rel_owns_loc,
+        pending.rel_related_func, pending.rel_related_loc, pending.rel_risk_theme,
+        label, valid_node_ids=valid_node_ids, valid_theme_ids=valid_theme_ids,
+    )
+
+    staged = 0
+    for live, rows in [
+        (src_controls_ref_control, pending.ref),
+        (src_controls_ver_control, pending.ver),
+        (src_controls_rel_parent, pending.rel_parent),
+        (src_controls_rel_owns_function, pending.rel_owns_func),
+        (src_controls_rel_owns_location, pending.rel_owns_loc),
+        (src_controls_rel_related_function, pending.rel_related_func),
+        (src_controls_rel_related_location, pending.rel_related_loc),
+        (src_controls_rel_risk_theme, pending.rel_risk_theme),
+        (ai_controls_model_taxonomy, pending.ai_taxonomy),
+        (ai_controls_model_enrichment, pending.ai_enrichment),
+        (ai_controls_model_feature_prep, pending.ai_feature_prep),
+    ]:
+        staged += await staging.stage_rows(conn, live, rows)
+
+    if stage is not None:
+        stage.rows += staged
+        stage.extra["batches"] = stage.extra.get("batches", 0) + 1
+
+    logger.debug("Staged batch {} ({} rows) into run {}", label, staged, staging.run_id)
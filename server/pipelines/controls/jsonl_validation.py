@@ -0,0 +1,336 @@
+"""Parallel streaming validation of controls JSONL files.
+
+Splits the file into byte ranges aligned to newline boundaries and
+validates each range against ``ControlRecord`` in a process pool. Per-range
+results (errors, control_id → first line, parent references) are merged in
+file order so duplicate and missing-parent checks see the whole file, and
+every error carries its 1-based line number. The error list is bounded;
+the total error count is always exact.
+
+Small files are validated in-process: the pool start-up would dominate.
+Celery prefork workers are daemonic, and ``multiprocessing`` refuses to
+start children from a daemonic process; there the pool comes from
+billiard (Celery's multiprocessing fork, installed with it), which allows
+it.
+
+Usage:
+    report = validate_controls_jsonl(jsonl_path)
+    if not report.ok:
+        raise ValueError(report.summary())
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+from server.logging_config import get_logger
+
+logger = get_logger(name=__name__)
+
+DEFAULT_MAX_ERRORS = 100
+MIN_CHUNK_BYTES = 8 * 1024 * 1024
+# Below this size a single in-process pass is faster than starting a pool
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+CHUNKS_PER_WORKER = 4
+
+_adapter = None
+
+
+def _get_adapter():
+    """Build the ControlRecord TypeAdapter once per process."""
+    global _adapter
+    if _adapter is None:
+        from pydantic import TypeAdapter
+        from server.pipelines.controls.schema_validation import ControlRecord
+
+        _adapter = TypeAdapter(ControlRecord)
+    return _adapter
+
+
+@dataclass
+class LineError:
+    """A validation error at a 1-based line of the JSONL file."""
+    line: int
+    message: str
+
+    def to_dict(self) -> dict:
+        return {"line": self.line, "message": self.message}
+
+
+@dataclass
+class _ChunkResult:
+    """Validation result for one byte range; line numbers are chunk-local (0-based)."""
+    index: int
+    lines: int = 0
+    records: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    error_count: int = 0
+    ids: Dict[str, int] = field(default_factory=dict)
+    duplicates: List[Tuple[int, str]] = field(default_factory=list)
+    parents: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class ValidationReport:
+    """Merged validation result for a whole file."""
+    path: str
+    records: int = 0
+    unique_control_ids: int = 0
+    errors: List[LineError] = field(default_factory=list)
+    error_count: int = 0
+    chunks: int = 0
+    workers: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error_count == 0
+
+    def summary(self, max_lines: int = 20) -> str:
+        """Human-readable error summary (stored as the batch's error_details)."""
+        if self.ok:
+            return f"{self.records} records valid"
+        lines = [
+            f"{self.error_count} validation error(s) in {self.records} records"
+            + (f" (showing first {min(max_lines, len(self.errors))})" if self.error_count > max_lines else "")
+            + ":"
+        ]
+        lines.extend(f"line {e.line}: {e.message}" for e in self.errors[:max_lines])
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "ok": self.ok,
+            "records": self.records,
+            "unique_control_ids": self.unique_control_ids,
+            "error_count": self.error_count,
+            "errors": [e.to_dict() for e in self.errors],
+            "chunks": self.chunks,
+            "workers": self.workers,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def _format_validation_error(exc: Exception, limit: int = 5) -> str:
+    """Compact one-line rendering of a pydantic ValidationError."""
+    errors = getattr(exc, "errors", None)
+    if not callable(errors):
+        return str(exc)
+    parts = []
+    details = errors()
+    for err in details[:limit]:
+        loc = ".".join(str(p) for p in err.get("loc", ())) or "<record>"
+        parts.append(f"{loc}: {err.get('msg')}")
+    if len(details) > limit:
+        parts.append(f"... {len(details) - limit} more")
+    return "; ".join(parts)
+
+
+def split_byte_ranges(path: Path, num_chunks: int) -> List[Tuple[int, int]]:
+    """Split a file into at most ``num_chunks`` [start, end) ranges ending on newlines."""
+    size = path.stat().st_size
+    if size == 0:
+        return []
+    num_chunks = max(1, num_chunks)
+    target = max(1, size // num_chunks)
+
+    bounds = [0]
+    with path.open("rb") as f:
+        for i in range(1, num_chunks):
+            pos = max(i * target, bounds[-1])
+            if pos >= size:
+                break
+            f.seek(pos)
+            f.readline()  # advance to the start of the next line
+            boundary = f.tell()
+            if boundary >= size:
+                break
+            if boundary > bounds[-1]:
+                bounds.append(boundary)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _validate_range(path: str, start: int, end: int, index: int, max_errors: int) -> _ChunkResult:
+    """Validate the lines in [start, end). Runs in a pool worker."""
+    adapter = _get_adapter()
+    result = _ChunkResult(index=index)
+
+    def _error(local_line: int, message: str) -> None:
+        result.error_count += 1
+        if len(result.errors) < max_errors:
+            result.errors.append((local_line, message))
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        local_line = -1
+        while pos < end:
+            raw = f.readline()
+            if not raw:
+                break
+            pos += len(raw)
+            local_line += 1
+
+            line = raw.strip()
+            if not line:
+                continue
+            result.records += 1
+
+            try:
+                obj = orjson.loads(line)
+            except Exception as e:
+                _error(local_line, f"Invalid JSON: {e}")
+                continue
+
+            try:
+                rec = adapter.validate_python(obj)
+            except Exception as e:
+                _error(local_line, f"Schema validation failed: {_format_validation_error(e)}")
+                continue
+
+            if rec.control_id in result.ids:
+                result.duplicates.append((local_line, rec.control_id))
+            else:
+                result.ids[rec.control_id] = local_line
+
+            if rec.parent_control_id is not None and rec.parent_control_id not in result.parents:
+                result.parents[rec.parent_control_id] = local_line
+
+        result.lines = local_line + 1
+    return result
+
+
+def _merge(path: Path, chunk_results: List[_ChunkResult], max_errors: int) -> ValidationReport:
+    """Merge per-range results in file order into a single report."""
+    report = ValidationReport(path=str(path), chunks=len(chunk_results))
+    errors: List[LineError] = []
+    seen: Dict[str, int] = {}
+    parents: Dict[str, int] = {}
+
+    offset = 0
+    for chunk in sorted(chunk_results, key=lambda c: c.index):
+        report.records += chunk.records
+        report.error_count += chunk.error_count
+        errors.extend(LineError(offset + ln + 1, msg) for ln, msg in chunk.errors)
+
+        for cid, ln in chunk.ids.items():
+            first = seen.get(cid)
+            if first is None:
+                seen[cid] = offset + ln + 1
+            else:
+                report.error_count += 1
+                errors.append(LineError(
+                    offset + ln + 1, f"Duplicate control_id {cid!r} (first seen at line {first})",
+                ))
+        for ln, cid in chunk.duplicates:
+            report.error_count += 1
+            errors.append(LineError(
+                offset + ln + 1, f"Duplicate control_id {cid!r} (first seen at line {seen[cid]})",
+            ))
+
+        for parent_id, ln in chunk.parents.items():
+            parents.setdefault(parent_id, offset + ln + 1)
+
+        offset += chunk.lines
+
+    for parent_id, line in parents.items():
+        if parent_id not in seen:
+            report.error_count += 1
+            errors.append(LineError(
+                line, f"parent_control_id {parent_id!r} does not reference a control in the file",
+            ))
+
+    errors.sort(key=lambda e: e.line)
+    report.errors = errors[:max_errors]
+    report.unique_control_ids = len(seen)
+    return report
+
+
+def _validate_range_task(task: Tuple[str, int, int, int, int]) -> _ChunkResult:
+    return _validate_range(*task)
+
+
+def _validate_pooled(tasks: List[Tuple[str, int, int, int, int]], workers: int) -> Iterator[_ChunkResult]:
+    """Run ``_validate_range`` tasks in a spawn-context process pool, yielding results as they complete."""
+    if multiprocessing.current_process().daemon:
+        import billiard
+
+        logger.info("Running in a daemonic process, validating with a billiard pool of {}", workers)
+        pool = billiard.get_context("spawn").Pool(processes=workers)
+        try:
+            yield from pool.imap_unordered(_validate_range_task, tasks)
+        finally:
+            pool.terminate()
+            pool.join()
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [pool.submit(_validate_range, *task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def validate_controls_jsonl(
+    jsonl_path: Path,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], Any]] = None,
+) -> ValidationReport:
+    """Validate a controls JSONL file against the ControlRecord schema.
+
+    Args:
+        jsonl_path: File to validate.
+        max_errors: Maximum number of errors kept in the report.
+        workers: Pool size; defaults to the CPU count. 1 disables the pool.
+        progress_callback: Optional sync callback(chunks_done, chunks_total).
+
+    Returns:
+        ValidationReport; check ``report.ok``.
+    """
+    started = time.perf_counter()
+    size = jsonl_path.stat().st_size
+    workers = workers or os.cpu_count() or 1
+    if size < PARALLEL_MIN_BYTES:
+        workers = 1
+
+    num_chunks = 1
+    if workers > 1:
+        num_chunks = max(1, min(workers * CHUNKS_PER_WORKER, size // MIN_CHUNK_BYTES))
+    ranges = split_byte_ranges(jsonl_path, num_chunks)
+
+    results: List[_ChunkResult] = []
+    if workers == 1 or len(ranges) <= 1:
+        workers = 1
+        for index, (start, end) in enumerate(ranges):
+            results.append(_validate_range(str(jsonl_path), start, end, index, max_errors))
+            if progress_callback:
+                progress_callback(index + 1, len(ranges))
+    else:
+        workers = min(workers, len(ranges))
+        tasks = [(str(jsonl_path), start, end, index, max_errors) for index, (start, end) in enumerate(ranges)]
+        for done, result in enumerate(_validate_pooled(tasks, workers), start=1):
+            results.append(result)
+            if progress_callback:
+                progress_callback(done, len(tasks))
+
+    report = _merge(jsonl_path, results, max_errors)
+    report.workers = workers
+    report.seconds = time.perf_counter() - started
+
+    logger.info(
+        "JSONL validation {}: {} records, {} unique control_ids, {} errors "
+        "({} chunks, {} workers, {:.1f}s)",
+        "passed" if report.ok else "failed",
+        report.records, report.unique_control_ids, report.error_count,
+        report.chunks, report.workers, report.seconds,
+    )
+    return report
@@ -6,6 +6,13 @@ identified by a UUID5 derived deterministically from the control_id.
 
 Supports per-feature delta detection: only re-uploads vectors whose hash
 changed, using hashes stored in each point's payload.
+
+Each payload also carries the control's integer ``control_seq`` (indexed),
+so explorer sidebar filters are pushed into Qdrant as compact seq ranges.
+New controls only get a control_seq when PostgreSQL commits, so their
+points are completed by ``backfill_control_seq_payloads`` afterwards;
+ingestion records how many it could not complete (``count_missing_control_seq``)
+in its profile, and the startup backfill finishes them.
 """
 
 import asyncio
@@ -36,6 +43,9 @@ CONTROLS_UUID_NAMESPACE = uuid.UUID("a1b2c3d4-e5f6-7890-abcd-ef1234567890")
 # Qdrant default payload limit is 32 MB → 32000/92 ≈ 347 points max.
 QDRANT_BATCH_SIZE = 64
 
+# Approximate JSON bytes per float in an upload request (see above)
+JSON_BYTES_PER_FLOAT = 10
+
 # Number of parallel workers (CPU cores)
 # IMPORTANT: Must be 1 when running in Celery workers (daemon processes can't spawn children)
 import multiprocessing
@@ -51,6 +61,9 @@ else:
 # Threshold: only disable/re-enable HNSW for bulk loads above this size
 HNSW_TOGGLE_THRESHOLD = 500
 
+# Integer payload mirroring src_controls_ref_control.control_seq
+CONTROL_SEQ_FIELD = "control_seq"
+
 
 def get_controls_collection_config() -> Dict[str, Any]:
     """Get the vector configuration for controls collection."""
@@ -68,6 +81,24 @@ def get_controls_collection_config() -> Dict[str, Any]:
     }
 
 
+async def ensure_payload_indexes(client, collection_name: str) -> None:
+    """Create the payload indexes used by explorer filters (idempotent)."""
+    from qdrant_client.models import IntegerIndexParams, IntegerIndexType, PayloadSchemaType
+
+    await client.create_payload_index(
+        collection_name=collection_name,
+        field_name=CONTROL_SEQ_FIELD,
+        field_schema=IntegerIndexParams(type=IntegerIndexType.INTEGER, lookup=True, range=True),
+        wait=True,
+    )
+    await client.create_payload_index(
+        collection_name=collection_name,
+        field_name="control_id",
+        field_schema=PayloadSchemaType.KEYWORD,
+        wait=True,
+    )
+
+
 def control_id_to_uuid(control_id: str) -> str:
     """Convert a control_id to a deterministic UUID5 string."""
     return str(uuid.uuid5(CONTROLS_UUID_NAMESPACE, control_id))
@@ -102,6 +133,11 @@ def coerce_embedding_vector_or_zero(
         return [0.0] * dim
 
 
+def estimate_upload_bytes(num_points: int) -> int:
+    """Approximate request bytes sent to Qdrant for ``num_points`` full points."""
+    return num_points * len(NAMED_VECTORS) * EMBEDDING_DIM * JSON_BYTES_PER_FLOAT
+
+
 # ── Hash-based delta detection ──────────────────────────────────────
 
 
@@ -203,11 +239,26 @@ def compute_embedding_delta(
 # ── Upsert functions ────────────────────────────────────────────────
 
 
+def _point_payload(
+    cid: str, cid_hashes: Dict[str, Any], control_seq: Optional[int],
+) -> Dict[str, Any]:
+    """Payload: control_id + control_seq (when known) + per-feature hashes + feature masks."""
+    payload: Dict[str, Any] = {"control_id": cid}
+    if control_seq is not None:
+        payload[CONTROL_SEQ_FIELD] = control_seq
+    for hash_col in HASH_COLUMN_NAMES:
+        payload[hash_col] = cid_hashes.get(hash_col)
+    for mask_col in MASK_COLUMN_NAMES:
+        payload[mask_col] = cid_hashes.get(mask_col, True)
+    return payload
+
+
 async def upsert_new_controls(
     control_ids: List[str],
     embedding_data: Dict[str, Dict[str, Any]],
     hashes: Dict[str, Dict[str, Optional[str]]],
     progress_callback: Optional[Callable] = None,
+    control_seqs: Optional[Dict[str, int]] = None,
 ) -> int:
     """Upsert full points for new controls (all 3 vectors + payload with hashes).
 
@@ -218,6 +269,7 @@ async def upsert_new_controls(
 
     settings = get_settings()
     collection = settings.qdrant_collection
+    control_seqs = control_seqs or {}
 
     points = []
     for cid in control_ids:
@@ -228,14 +280,7 @@ async def upsert_new_controls(
             raw_vec = cid_data.get(feature_name)
             vectors[feature_name] = coerce_embedding_vector_or_zero(raw_vec)
 
-        # Payload: control_id + per-feature hashes + feature masks
-        payload: Dict[str, Any] = {"control_id": cid}
-        cid_hashes = hashes.get(cid, {})
-        for hash_col in HASH_COLUMN_NAMES:
-            payload[hash_col] = cid_hashes.get(hash_col)
-        for mask_col in MASK_COLUMN_NAMES:
-            payload[mask_col] = cid_hashes.get(mask_col, True)
-
+        payload = _point_payload(cid, hashes.get(cid, {}), control_seqs.get(cid))
         points.append(PointStruct(id=point_id, vector=vectors, payload=payload))
 
     total_points = len(points)
@@ -278,6 +323,7 @@ async def update_changed_features(
     embedding_data: Dict[str, Dict[str, Any]],
     hashes: Dict[str, Dict[str, Optional[str]]],
     progress_callback: Optional[Callable] = None,
+    control_seqs: Optional[Dict[str, int]] = None,
 ) -> int:
     """Update only the changed named vectors + payload hashes for existing controls.
 
@@ -288,6 +334,7 @@ async def update_changed_features(
 
     settings = get_settings()
     collection = settings.qdrant_collection
+    control_seqs = control_seqs or {}
 
     # For controls with changed features, we upsert full points (simpler and
     # Qdrant handles it efficiently — the unchanged vectors remain the same
@@ -301,13 +348,7 @@ async def update_changed_features(
             raw_vec = cid_data.get(feature_name)
             vectors[feature_name] = coerce_embedding_vector_or_zero(raw_vec)
 
-        payload: Dict[str, Any] = {"control_id": cid}
-        cid_hashes = hashes.get(cid, {})
-        for hash_col in HASH_COLUMN_NAMES:
-            payload[hash_col] = cid_hashes.get(hash_col)
-        for mask_col in MASK_COLUMN_NAMES:
-            payload[mask_col] = cid_hashes.get(mask_col, True)
-
+        payload = _point_payload(cid, hashes.get(cid, {}), control_seqs.get(cid))
         points.append(PointStruct(id=point_id, vector=vectors, payload=payload))
 
     total = len(points)
@@ -337,6 +378,128 @@ async def update_changed_features(
     return total
 
 
+async def read_point_vectors(
+    features_by_cid: Dict[str, List[str]],
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """Read the current named vectors listed per control (compensation snapshot).
+
+    Returns:
+        Dict mapping control_id → {feature_name: float32 vector}; points or
+        vectors missing from the collection are left out.
+    """
+    if not features_by_cid:
+        return {}
+
+    settings = get_settings()
+    collection = settings.qdrant_collection
+    control_ids = list(features_by_cid)
+    result: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def _sync_retrieve():
+        sync_client = QdrantClient(url=settings.qdrant_url, timeout=600)
+        try:
+            for start in range(0, len(control_ids), QDRANT_BATCH_SIZE):
+                batch = control_ids[start:start + QDRANT_BATCH_SIZE]
+                names = sorted({f for cid in batch for f in features_by_cid[cid]})
+                records = sync_client.retrieve(
+                    collection_name=collection,
+                    ids=[control_id_to_uuid(c) for c in batch],
+                    with_payload=["control_id"],
+                    with_vectors=names,
+                )
+                for record in records:
+                    cid = (record.payload or {}).get("control_id")
+                    vectors = record.vector if isinstance(record.vector, dict) else {}
+                    if cid not in features_by_cid:
+                        continue
+                    kept = {
+                        f: np.asarray(vectors[f], dtype=np.float32)
+                        for f in features_by_cid[cid] if vectors.get(f) is not None
+                    }
+                    if kept:
+                        result[cid] = kept
+        finally:
+            sync_client.close()
+
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, _sync_retrieve)
+
+    logger.info("Snapshotted previous vectors of {} controls", len(result))
+    return result
+
+
+async def compensate_upserts(
+    new_control_ids: List[str],
+    previous_hashes: Dict[str, Dict[str, Any]],
+    previous_vectors: Optional[Dict[str, Dict[str, np.ndarray]]] = None,
+) -> None:
+    """Undo the Qdrant writes of an ingestion whose PostgreSQL stage failed.
+
+    Points created by the run are deleted. Points that already existed get
+    their previous vectors (``previous_vectors``, from ``read_point_vectors``)
+    and payload hashes back, so search keeps matching the committed
+    PostgreSQL state and the next ingestion's delta detection re-uploads them.
+    """
+    previous_vectors = previous_vectors or {}
+    if not new_control_ids and not previous_hashes:
+        return
+
+    from qdrant_client.models import (
+        PointIdsList,
+        PointVectors,
+        SetPayload,
+        SetPayloadOperation,
+        UpdateVectors,
+        UpdateVectorsOperation,
+    )
+
+    settings = get_settings()
+    collection = settings.qdrant_collection
+
+    def _sync_compensate():
+        sync_client = QdrantClient(url=settings.qdrant_url, timeout=600)
+        try:
+            for start in range(0, len(new_control_ids), 1000):
+                batch = new_control_ids[start:start + 1000]
+                sync_client.delete(
+                    collection_name=collection,
+                    points_selector=PointIdsList(points=[control_id_to_uuid(c) for c in batch]),
+                    wait=True,
+                )
+
+            operations: List[Any] = []
+            for cid, vectors in previous_vectors.items():
+                operations.append(UpdateVectorsOperation(
+                    update_vectors=UpdateVectors(points=[PointVectors(
+                        id=control_id_to_uuid(cid),
+                        vector={f: vec.tolist() for f, vec in vectors.items()},
+                    )]),
+                ))
+            for cid, hashes in previous_hashes.items():
+                payload: Dict[str, Any] = {h: hashes.get(h) for h in HASH_COLUMN_NAMES}
+                for mask_col in MASK_COLUMN_NAMES:
+                    payload[mask_col] = hashes.get(mask_col, True)
+                operations.append(SetPayloadOperation(
+                    set_payload=SetPayload(payload=payload, points=[control_id_to_uuid(cid)]),
+                ))
+            for start in range(0, len(operations), QDRANT_BATCH_SIZE):
+                sync_client.batch_update_points(
+                    collection_name=collection,
+                    update_operations=operations[start:start + QDRANT_BATCH_SIZE],
+                    wait=True,
+                )
+        finally:
+            sync_client.close()
+
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, _sync_compensate)
+
+    logger.info(
+        "Compensated Qdrant writes: deleted {} new points, restored vectors on {} and hashes on {} points",
+        len(new_control_ids), len(previous_vectors), len(previous_hashes),
+    )
+
+
 # ── Collection management ───────────────────────────────────────────
 
 
@@ -497,6 +660,69 @@ async def delete_points(control_ids: List[str]) -> int:
     return len(point_ids)
 
 
+async def backfill_control_seq_payloads(collection_name: str = None) -> int:
+    """Set ``control_seq`` on every point that lacks it; returns the number of points updated.
+
+    Points of controls created by an ingestion are upserted before their
+    ref_control row (and so their control_seq) exists; this runs once the
+    PostgreSQL stage has committed, and at startup for older collections.
+    Points whose control has no ref_control row yet are left for the next run.
+    """
+    from qdrant_client.models import (
+        Filter, IsEmptyCondition, PayloadField, SetPayload, SetPayloadOperation,
+    )
+    from sqlalchemy import any_, bindparam, select
+    from sqlalchemy.dialects.postgresql import ARRAY
+    from sqlalchemy.types import Text
+
+    from server.config.postgres import get_engine
+    from server.pipelines.controls.schema import src_controls_ref_control as ref_control
+
+    client = get_qdrant_client()
+    collection = collection_name or get_settings().qdrant_collection
+    missing_seq = Filter(must=[IsEmptyCondition(is_empty=PayloadField(key=CONTROL_SEQ_FIELD))])
+
+    updated = 0
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=collection,
+            scroll_filter=missing_seq,
+            limit=1000,
+            offset=offset,
+            with_payload=["control_id"],
+            with_vectors=False,
+        )
+        control_ids = [
+            p.payload["control_id"] for p in points
+            if isinstance((p.payload or {}).get("control_id"), str)
+        ]
+        if control_ids:
+            async with get_engine().connect() as conn:
+                result = await conn.execute(
+                    select(ref_control.c.control_id, ref_control.c.control_seq).where(
+                        ref_control.c.control_id == any_(bindparam("ids", control_ids, type_=ARRAY(Text)))
+                    )
+                )
+                operations = [
+                    SetPayloadOperation(set_payload=SetPayload(
+                        payload={CONTROL_SEQ_FIELD: seq}, points=[control_id_to_uuid(cid)],
+                    ))
+                    for cid, seq in result
+                ]
+            if operations:
+                await client.batch_update_points(
+                    collection_name=collection, update_operations=operations, wait=True,
+                )
+                updated += len(operations)
+        if offset is None:
+            break
+
+    if updated:
+        logger.info("Backfilled control_seq payload on {} Qdrant points", updated)
+    return updated
+
+
 async def get_collection_info() -> Optional[Dict[str, Any]]:
     """Get Qdrant collection stats for the DevData UI."""
     try:
@@ -537,3 +763,24 @@ async def get_collection_info() -> Optional[Dict[str, Any]]:
     except Exception as e:
         logger.warning("Failed to get Qdrant collection info: {}", e)
         return None
+
+
+async def count_missing_control_seq(control_ids: List[str], collection_name: str = None) -> int:
+    """Number of the given controls' points that still lack ``control_seq``."""
+    from qdrant_client.models import Filter, HasIdCondition, IsEmptyCondition, PayloadField
+
+    client = get_qdrant_client()
+    collection = collection_name or get_settings().qdrant_collection
+    missing = 0
+    for start in range(0, len(control_ids), 1000):
+        point_ids = [control_id_to_uuid(cid) for cid in control_ids[start:start + 1000]]
+        result = await client.count(
+            collection_name=collection,
+            count_filter=Filter(must=[
+                HasIdCondition(has_id=point_ids),
+                IsEmptyCondition(is_empty=PayloadField(key=CONTROL_SEQ_FIELD)),
+            ]),
+            exact=True,
+        )
+        missing += result.count
+    return missing
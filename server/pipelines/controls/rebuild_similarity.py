@@ -12,7 +12,8 @@ The script:
 1. Loads the full embeddings NPZ + index for the specified upload
 2. Runs full O(n²) similarity recomputation
 3. Atomically replaces all rows in ai_controls_similar_controls
-4. Logs timestamps and counts for audit
+4. Invalidates the cached control cards, which embed the similar controls
+5. Logs timestamps and counts for audit
 """
 
 from __future__ import annotations
@@ -112,6 +113,15 @@ async def run_rebuild(upload_id: str, data_ingested_path: Path = None) -> int:
         progress_callback=_progress,
     )
 
+    # Every similar-controls row was rewritten, so cached cards are stale
+    try:
+        from server.explorer.controls.card_cache import invalidate_changed_cards
+
+        invalidated = await invalidate_changed_cards(started_at)
+        print(f"  Invalidated cached cards: {invalidated}")
+    except Exception as e:
+        print(f"  WARNING: Card cache invalidation failed: {e}")
+
     finished_at = datetime.now(timezone.utc)
     duration = finished_at - started_at
 
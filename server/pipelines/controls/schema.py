@@ -1,11 +1,16 @@
 """PostgreSQL schema for the controls domain.
 
-11 tables across 2 sections:
-- Source controls (8): ref_control, ver_control, 6 relation tables
+12 tables across 2 sections:
+- Source controls (8): ref_control, ver_control, 6 relation tables,
+  plus the derived per-version diff (ver_control_diff)
 - AI model outputs (3): enrichment, taxonomy, feature_prep (with FTS via tsvector)
 
 Embeddings are stored exclusively in Qdrant (no Postgres table).
 FTS is provided via tsvector columns + GIN indexes on feature_prep.
+
+Resumable ingestion bookkeeping lives in controls_ingest_checkpoint; the
+per-run staging tables it points to are created at runtime in the
+``ingest_staging`` schema (see ingest/checkpoint.py).
 """
 
 from sqlalchemy import (
@@ -16,7 +21,10 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Identity,
     Index,
+    Integer,
+    PrimaryKeyConstraint,
     SmallInteger,
     Table,
     Text,
@@ -38,6 +46,8 @@ CONTROLS_TABLES = [
     "src_controls_rel_related_function",
     "src_controls_rel_related_location",
     "src_controls_rel_risk_theme",
+    # Derived (1) — per-version changed fields
+    "src_controls_ver_control_diff",
     # AI (3) — no embedding table, that's in Qdrant
     "ai_controls_model_enrichment",
     "ai_controls_model_taxonomy",
@@ -55,6 +65,13 @@ src_controls_ref_control = Table(
     metadata,
     Column("control_id", Text, primary_key=True),
     Column("created_at", DateTime(timezone=True), nullable=False, server_default=text("now()")),
+    # Dense integer surrogate for bitset candidate sets (explorer sidebar filters)
+    Column("control_seq", Integer, Identity(always=False), nullable=False),
+    # Effective W-criteria answered "yes" (bit per criterion, L1 bits from the
+    # parent for Level 2); maintained by ingestion, see pipelines/controls/ws_mask.py
+    Column("ws_yes_mask", SmallInteger, nullable=False, server_default=text("0"), info={"derived": True}),
+    UniqueConstraint("control_seq", name="uq_ref_control_seq"),
+    Index("ix_ref_control_ws_mask", "ws_yes_mask", postgresql_include=["control_seq", "control_id"]),
 )
 
 src_controls_ver_control = Table(
@@ -144,6 +161,33 @@ src_controls_ver_control = Table(
     Index("idx_ver_control_ref_txto", "ref_control_id", "tx_to"),
     Index("idx_ver_control_status_txto", "control_status", "tx_to"),
     Index("uq_ver_control_current", "ref_control_id", unique=True, postgresql_where=text("tx_to IS NULL")),
+    # Control ID typeahead: trigram (fuzzy, substring, ILIKE prefix) lookups; needs pg_trgm
+    Index(
+        "idx_ver_control_id_trgm", "ref_control_id", postgresql_using="gin",
+        postgresql_ops={"ref_control_id": "gin_trgm_ops"}, postgresql_where=text("tx_to IS NULL"),
+    ),
+    Index(
+        "idx_ver_control_title_trgm", "control_title", postgresql_using="gin",
+        postgresql_ops={"control_title": "gin_trgm_ops"}, postgresql_where=text("tx_to IS NULL"),
+    ),
+)
+
+# One row per ver_control version: the material fields (and parent) that
+# changed against the version it replaced, with old and new values. A
+# control's first version lists every field, so folding new_values in
+# tx_from order rebuilds any version. Written by ingestion
+# (pipelines/controls/version_diff.py); serves the explorer history / diff.
+src_controls_ver_control_diff = Table(
+    "src_controls_ver_control_diff",
+    metadata,
+    Column("ref_control_id", Text, ForeignKey("src_controls_ref_control.control_id"), nullable=False),
+    Column("tx_from", DateTime(timezone=True), nullable=False),
+    Column("tx_to", DateTime(timezone=True), nullable=True),
+    Column("prev_tx_from", DateTime(timezone=True), nullable=True),
+    Column("changed_fields", ARRAY(Text), nullable=False, server_default=text("'{}'::text[]")),
+    Column("old_values", JSONB, nullable=False, server_default=text("'{}'::jsonb")),
+    Column("new_values", JSONB, nullable=False, server_default=text("'{}'::jsonb")),
+    PrimaryKeyConstraint("ref_control_id", "tx_from", name="pk_ver_control_diff"),
 )
 
 # ── Relation tables ─────────────────────────────────────────────────
@@ -346,6 +390,8 @@ ai_controls_model_feature_prep = Table(
     Column("ts_control_description", TSVECTOR, nullable=True),
     Column("ts_evidence_description", TSVECTOR, nullable=True),
     Column("ts_local_functional_information", TSVECTOR, nullable=True),
+    # All keyword fields in one weighted vector (see TS_COMBINED_WEIGHTS)
+    Column("ts_combined", TSVECTOR, nullable=True),
 
     # Transaction-time versioning
     Column("tx_from", DateTime(timezone=True), nullable=False),
@@ -363,10 +409,27 @@ ai_controls_model_feature_prep = Table(
     Index("idx_fts_control_description", "ts_control_description", postgresql_using="gin", postgresql_where=text("tx_to IS NULL")),
     Index("idx_fts_evidence_description", "ts_evidence_description", postgresql_using="gin", postgresql_where=text("tx_to IS NULL")),
     Index("idx_fts_local_functional_information", "ts_local_functional_information", postgresql_using="gin", postgresql_where=text("tx_to IS NULL")),
+    Index("idx_fts_combined", "ts_combined", postgresql_using="gin", postgresql_where=text("tx_to IS NULL")),
+)
+
+# ts_combined weight per source column: title A, description B, the 3W
+# feature texts C, evidence / local functional information D
+TS_COMBINED_WEIGHTS = {
+    "control_title": "A",
+    "control_description": "B",
+    "what": "C",
+    "why": "C",
+    "where": "C",
+    "evidence_description": "D",
+    "local_functional_information": "D",
+}
+TS_COMBINED_SQL = " ||\n        ".join(
+    f"setweight(to_tsvector('english', COALESCE(NEW.{col}, '')), '{weight}')"
+    for col, weight in TS_COMBINED_WEIGHTS.items()
 )
 
 # FTS trigger SQL — to be executed in Alembic migration
-FTS_TRIGGER_SQL = """
+FTS_TRIGGER_SQL = f"""
 CREATE OR REPLACE FUNCTION update_feature_prep_tsvectors() RETURNS trigger AS $$
 BEGIN
     NEW.ts_what := to_tsvector('english', COALESCE(NEW.what, ''));
@@ -376,6 +439,8 @@ BEGIN
     NEW.ts_control_description := to_tsvector('english', COALESCE(NEW.control_description, ''));
     NEW.ts_evidence_description := to_tsvector('english', COALESCE(NEW.evidence_description, ''));
     NEW.ts_local_functional_information := to_tsvector('english', COALESCE(NEW.local_functional_information, ''));
+    NEW.ts_combined :=
+        {TS_COMBINED_SQL};
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
@@ -422,3 +487,37 @@ Index(
     ai_controls_similar_controls.c.similar_control_id,
     postgresql_where=ai_controls_similar_controls.c.tx_to.is_(None),
 )
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Ingestion checkpoints (resumable ingestion bookkeeping)
+# ──────────────────────────────────────────────────────────────────────
+
+controls_ingest_checkpoint = Table(
+    "controls_ingest_checkpoint",
+    metadata,
+    Column("run_id", BigInteger, primary_key=True, autoincrement=True),
+    Column("upload_id", Text, nullable=False),
+    Column("batch_id", BigInteger, nullable=False),
+    Column("status", Text, nullable=False, server_default=text("'staging'")),
+    Column("tx_from", DateTime(timezone=True), nullable=False),
+    Column("source_fingerprint", Text, nullable=False),
+    Column("next_offset", BigInteger, nullable=False, server_default=text("0")),
+    Column("total", BigInteger, nullable=False, server_default=text("0")),
+    Column("counts", JSONB, nullable=False, server_default=text("'{}'::jsonb")),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=text("now()")),
+    Column("updated_at", DateTime(timezone=True), nullable=False, server_default=text("now()")),
+    Column("published_at", DateTime(timezone=True), nullable=True),
+
+    CheckConstraint(
+        "status IN ('staging', 'published', 'abandoned')",
+        name="chk_ingest_checkpoint_status",
+    ),
+    # At most one in-flight (resumable) run per upload
+    Index(
+        "uq_ingest_checkpoint_active",
+        "upload_id",
+        unique=True,
+        postgresql_where=text("status = 'staging'"),
+    ),
+)
@@ -20,14 +20,16 @@ from __future__ import annotations
 
 import asyncio
 from collections import defaultdict
+from contextlib import nullcontext
 from datetime import datetime, timezone
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
 
 import numpy as np
 from scipy.sparse import csr_matrix
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity as sparse_cosine_similarity
-from sqlalchemy import insert, select, update, and_
+from sqlalchemy import any_, bindparam, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 
 from server.config.postgres import get_engine
 from server.logging_config import get_logger
@@ -38,6 +40,10 @@ from server.pipelines.controls.schema import (
     src_controls_rel_parent as rel_parent_tbl,
     src_controls_ver_control as ver_control_tbl,
 )
+from server.pipelines.schema.temporal import close_current
+
+if TYPE_CHECKING:
+    from server.pipelines.controls.ingest.profiler import IngestionProfiler
 
 logger = get_logger(name=__name__)
 
@@ -252,6 +258,11 @@ def _rescan_control_top3(
     return scored[:TOP_SIMILAR]
 
 
+def _profile_stage(profiler: Optional[IngestionProfiler], name: str):
+    """Profiler stage context, or a no-op yielding None without a profiler."""
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
 # ── L1 Active Key filter ────────────────────────────────────────────
 
 async def _load_l1_active_key_ids() -> Set[str]:
@@ -274,6 +285,111 @@ async def _load_l1_active_key_ids() -> Set[str]:
     return ids
 
 
+def _index_eligible_controls(
+    by_cid: Dict[str, Any],
+    l1_active_key_ids: Set[str],
+) -> Tuple[List[str], Dict[int, int], Dict[str, int]]:
+    """Order the L1 Active Key controls that have an embedding row.
+
+    Returns:
+        (control_ids, row_to_idx, cid_to_idx) — NPZ row → matrix index and
+        control_id → matrix index.
+    """
+    control_ids: List[str] = []
+    row_to_idx: Dict[int, int] = {}
+    cid_to_idx: Dict[str, int] = {}
+
+    for cid, meta in sorted(by_cid.items()):
+        if cid not in l1_active_key_ids:
+            continue
+        row = meta.get("row") if isinstance(meta, dict) else None
+        if row is None:
+            continue
+        try:
+            row = int(row)
+        except (ValueError, TypeError):
+            continue
+        idx = len(control_ids)
+        control_ids.append(cid)
+        row_to_idx[row] = idx
+        cid_to_idx[cid] = idx
+    return control_ids, row_to_idx, cid_to_idx
+
+
+async def plan_similarity_mode(
+    embeddings_index: Dict[str, Any],
+    changed_control_ids: Set[str],
+    new_control_ids: Set[str],
+    l1_active_key_ids: Optional[Set[str]] = None,
+) -> Dict[str, Any]:
+    """Predict the mode ``compute_similar_controls`` will run in, without computing.
+
+    Applies the same decisions: skip without an L1 Active Key delta, full
+    rebuild when the delta covers every control, otherwise incremental
+    unless more than HUB_GUARDRAIL_THRESHOLD controls have a changed
+    control in their current top-3 (the hub guardrail).
+
+    Args:
+        embeddings_index: Dict with 'by_control_id' mapping.
+        changed_control_ids: Controls whose embeddings will change.
+        new_control_ids: Controls new to Qdrant.
+        l1_active_key_ids: Eligible controls as they will be after the run;
+            loaded from the current versions if omitted.
+
+    Returns:
+        Dict with mode ('skipped' | 'incremental' | 'full rebuild'), reason,
+        n, delta, affected and guardrail_threshold.
+    """
+    plan: Dict[str, Any] = {
+        "mode": "skipped", "reason": None, "n": 0, "delta": 0, "affected": 0,
+        "guardrail_threshold": HUB_GUARDRAIL_THRESHOLD,
+    }
+    by_cid = embeddings_index.get("by_control_id", {})
+    if not by_cid:
+        plan["reason"] = "no embeddings index"
+        return plan
+
+    if l1_active_key_ids is None:
+        l1_active_key_ids = await _load_l1_active_key_ids()
+    control_ids, _, cid_to_idx = _index_eligible_controls(by_cid, l1_active_key_ids)
+    n = len(control_ids)
+    changed = changed_control_ids & l1_active_key_ids
+    delta = changed | (new_control_ids & l1_active_key_ids)
+    plan.update(n=n, delta=len(delta))
+
+    if n == 0 or not delta:
+        plan["reason"] = "no L1 Active Key embedding delta" if n else "no L1 Active Key controls"
+        return plan
+    if len(delta) >= n:
+        plan.update(mode="full rebuild", reason="delta covers every L1 Active Key control")
+        return plan
+
+    # DELETE-phase fan-out: eligible controls whose current top-3 holds a changed control
+    affected: Set[str] = set()
+    changed_eligible = sorted(c for c in changed if c in cid_to_idx)
+    if changed_eligible:
+        engine = get_engine()
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                select(similar_tbl.c.ref_control_id)
+                .where(
+                    similar_tbl.c.tx_to.is_(None),
+                    similar_tbl.c.similar_control_id == any_(
+                        bindparam("changed_ids", value=changed_eligible, type_=ARRAY(similar_tbl.c.similar_control_id.type))
+                    ),
+                )
+                .distinct()
+            )
+            affected = {row[0] for row in result if row[0] in cid_to_idx}
+    plan["affected"] = len(affected)
+
+    if len(affected) > HUB_GUARDRAIL_THRESHOLD:
+        plan.update(mode="full rebuild", reason="hub guardrail")
+    else:
+        plan.update(mode="incremental", reason="delta below hub guardrail")
+    return plan
+
+
 # ── Main entry point ────────────────────────────────────────────────
 
 async def compute_similar_controls(
@@ -283,6 +399,7 @@ async def compute_similar_controls(
     new_control_ids: Optional[Set[str]] = None,
     progress_callback: Optional[Callable] = None,
     force_full_rebuild: bool = False,
+    profiler: Optional[IngestionProfiler] = None,
 ) -> None:
     """Compute and store similar controls (L1 Active Key only).
 
@@ -293,6 +410,7 @@ async def compute_similar_controls(
         new_control_ids: Newly added controls (for incremental mode).
         progress_callback: Optional async callback(step, processed, total, percent).
         force_full_rebuild: If True, always do full O(n²) recompute.
+        profiler: Optional ingestion profiler; records load/compute stages.
     """
     changed_control_ids = changed_control_ids or set()
     new_control_ids = new_control_ids or set()
@@ -306,24 +424,7 @@ async def compute_similar_controls(
     l1_active_key_ids = await _load_l1_active_key_ids()
 
     # Build ordered control_id list — only L1 Active Key controls
-    control_ids: List[str] = []
-    row_to_idx: Dict[int, int] = {}
-    cid_to_idx: Dict[str, int] = {}
-
-    for cid, meta in sorted(by_cid.items()):
-        if cid not in l1_active_key_ids:
-            continue
-        row = meta.get("row") if isinstance(meta, dict) else None
-        if row is None:
-            continue
-        try:
-            row = int(row)
-        except (ValueError, TypeError):
-            continue
-        idx = len(control_ids)
-        control_ids.append(cid)
-        row_to_idx[row] = idx
-        cid_to_idx[cid] = idx
+    control_ids, row_to_idx, cid_to_idx = _index_eligible_controls(by_cid, l1_active_key_ids)
 
     n = len(control_ids)
     if n == 0:
@@ -364,40 +465,45 @@ async def compute_similar_controls(
     if progress_callback:
         await progress_callback(f"Similar controls ({mode_label}): loading data", 0, n, _P_START)
 
-    # Load and reindex embeddings
-    feature_embeddings: List[np.ndarray] = []
-    feature_valid: List[np.ndarray] = []
-
-    for feat_name, npz_field in zip(FEATURE_NAMES, _NPZ_FIELDS):
-        raw = embedding_arrays.get(npz_field)
-        if raw is None:
-            logger.warning("Missing embedding array '{}', using zeros", npz_field)
-            feature_embeddings.append(np.zeros((n, 3072), dtype=np.float32))
-            feature_valid.append(np.zeros(n, dtype=bool))
-            continue
-
-        dim = raw.shape[1] if len(raw.shape) == 2 else 3072
-        reindexed = np.zeros((n, dim), dtype=np.float32)
-        src_rows = np.array([r for r in row_to_idx.keys() if r < raw.shape[0]], dtype=np.intp)
-        dst_rows = np.array([row_to_idx[r] for r in src_rows], dtype=np.intp)
-        if len(src_rows) > 0:
-            reindexed[dst_rows] = raw[src_rows].astype(np.float32)
-
-        norms = np.linalg.norm(reindexed, axis=1, keepdims=True)
-        valid_mask = (norms.ravel() > ZERO_NORM_THRESHOLD)
-        norms = np.where(norms > ZERO_NORM_THRESHOLD, norms, 1.0)
-        normalized = reindexed / norms
-
-        feature_embeddings.append(normalized)
-        feature_valid.append(valid_mask)
-
-    # Load clean text for TF-IDF and build TF-IDF matrices
-    engine = get_engine()
-    async with engine.connect() as conn:
-        texts_per_feature = await _load_feature_texts(conn, control_ids, cid_to_idx)
-        parent_child_pairs = await _load_parent_child_pairs(conn)
+    with _profile_stage(profiler, "similarity_load") as load_stage:
+        # Load and reindex embeddings
+        feature_embeddings: List[np.ndarray] = []
+        feature_valid: List[np.ndarray] = []
+
+        for feat_name, npz_field in zip(FEATURE_NAMES, _NPZ_FIELDS):
+            raw = embedding_arrays.get(npz_field)
+            if raw is None:
+                logger.warning("Missing embedding array '{}', using zeros", npz_field)
+                feature_embeddings.append(np.zeros((n, 3072), dtype=np.float32))
+                feature_valid.append(np.zeros(n, dtype=bool))
+                continue
 
-    tfidf_matrices = _build_tfidf_matrices(texts_per_feature, n)
+            dim = raw.shape[1] if len(raw.shape) == 2 else 3072
+            reindexed = np.zeros((n, dim), dtype=np.float32)
+            src_rows = np.array([r for r in row_to_idx.keys() if r < raw.shape[0]], dtype=np.intp)
+            dst_rows = np.array([row_to_idx[r] for r in src_rows], dtype=np.intp)
+            if len(src_rows) > 0:
+                reindexed[dst_rows] = raw[src_rows].astype(np.float32)
+
+            norms = np.linalg.norm(reindexed, axis=1, keepdims=True)
+            valid_mask = (norms.ravel() > ZERO_NORM_THRESHOLD)
+            norms = np.where(norms > ZERO_NORM_THRESHOLD, norms, 1.0)
+            normalized = reindexed / norms
+
+            feature_embeddings.append(normalized)
+            feature_valid.append(valid_mask)
+
+        # Load clean text for TF-IDF and build TF-IDF matrices
+        engine = get_engine()
+        async with engine.connect() as conn:
+            tracker = profiler.track_connection(conn, load_stage) if profiler else nullcontext()
+            with tracker:
+                texts_per_feature = await _load_feature_texts(conn, control_ids, cid_to_idx)
+                parent_child_pairs = await _load_parent_child_pairs(conn)
+
+        tfidf_matrices = _build_tfidf_matrices(texts_per_feature, n)
+        if load_stage is not None:
+            load_stage.rows = n
 
     # Log feature stats
     for f_idx, feat_name in enumerate(FEATURE_NAMES):
@@ -414,33 +520,37 @@ async def compute_similar_controls(
 
     # ── Mode dispatch ────────────────────────────────────────────
 
-    if use_incremental:
-        await _compute_incremental(
-            control_ids=control_ids,
-            cid_to_idx=cid_to_idx,
-            n=n,
-            feature_embeddings=feature_embeddings,
-            feature_valid=feature_valid,
-            tfidf_matrices=tfidf_matrices,
-            parent_child_pairs=parent_child_pairs,
-            changed_control_ids=changed_control_ids,
-            new_control_ids=new_control_ids,
-            progress_callback=progress_callback,
-            p_start=_P_LOAD_END,
-            p_end=_P_COMPUTE_END,
-        )
-    else:
-        await _compute_full_rebuild(
-            control_ids=control_ids,
-            n=n,
-            feature_embeddings=feature_embeddings,
-            feature_valid=feature_valid,
-            tfidf_matrices=tfidf_matrices,
-            parent_child_pairs=parent_child_pairs,
-            progress_callback=progress_callback,
-            p_start=_P_LOAD_END,
-            p_end=_P_COMPUTE_END,
-        )
+    with _profile_stage(profiler, "similarity_compute") as compute_stage:
+        if use_incremental:
+            await _compute_incremental(
+                control_ids=control_ids,
+                cid_to_idx=cid_to_idx,
+                n=n,
+                feature_embeddings=feature_embeddings,
+                feature_valid=feature_valid,
+                tfidf_matrices=tfidf_matrices,
+                parent_child_pairs=parent_child_pairs,
+                changed_control_ids=changed_control_ids,
+                new_control_ids=new_control_ids,
+                progress_callback=progress_callback,
+                p_start=_P_LOAD_END,
+                p_end=_P_COMPUTE_END,
+            )
+        else:
+            await _compute_full_rebuild(
+                control_ids=control_ids,
+                n=n,
+                feature_embeddings=feature_embeddings,
+                feature_valid=feature_valid,
+                tfidf_matrices=tfidf_matrices,
+                parent_child_pairs=parent_child_pairs,
+                progress_callback=progress_callback,
+                p_start=_P_LOAD_END,
+                p_end=_P_COMPUTE_END,
+            )
+        if compute_stage is not None:
+            compute_stage.rows = n
+            compute_stage.extra.update({"mode": mode_label, "delta": len(delta_cids)})
 
 
 # ── Full rebuild (O(n²)) ────────────────────────────────────────────
@@ -814,18 +924,7 @@ async def _write_incremental(
             })
 
     async with engine.begin() as conn:
-        for batch_start in range(0, len(modified_cids), 5000):
-            batch_cids = modified_cids[batch_start:batch_start + 5000]
-            await conn.execute(
-                update(similar_tbl)
-                .where(
-                    and_(
-                        similar_tbl.c.ref_control_id.in_(batch_cids),
-                        similar_tbl.c.tx_to.is_(None),
-                    )
-                )
-                .values(tx_to=tx_from)
-            )
+        await close_current(conn, similar_tbl, similar_tbl.c.ref_control_id, modified_cids, tx_from)
 
         for batch_start in range(0, len(new_rows), BATCH_INSERT_SIZE):
             batch = new_rows[batch_start:batch_start + BATCH_INSERT_SIZE]
@@ -2,12 +2,16 @@
 
 Provides:
 - split_controls_csv: Split enterprise CSV into component tables (kept for future use)
+- split_controls_csv_streaming: Batch-wise split that also writes controls JSONL in the same pass
+  (kept for future use)
 - generate_mock_jsonl: Generate mock JSONL data for testing
 """
 from .split_controls import split_controls_csv
+from .stream_split import split_controls_csv_streaming
 from .mock_generator import generate_mock_jsonl
 
 __all__ = [
     "split_controls_csv",
+    "split_controls_csv_streaming",
     "generate_mock_jsonl",
 ]
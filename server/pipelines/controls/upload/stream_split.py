@@ -0,0 +1,401 @@
+"""Streaming split of an enterprise-format controls CSV.
+
+Same output tables as ``split_controls_csv`` but built from Arrow record
+batches instead of one in-memory DataFrame: each batch is appended to the
+component tables (CSV or Parquet) and converted to controls JSONL lines in
+the same pass, so memory stays bounded by the block size rather than the
+extract size.
+
+Like ``split_controls_csv`` it is not called by the upload path yet, which
+still generates mock JSONL (see ``_process_controls_upload``).
+
+Usage:
+    result = split_controls_csv_streaming(csv_path, out_dir, jsonl_path=jsonl_path)
+"""
+
+import csv
+import io
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import orjson
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from server.logging_config import get_logger
+from server.pipelines.controls.upload.split_controls import (
+    CONTROLS_MAIN_COLUMNS,
+    FUNCTION_HIERARCHY_COLUMNS,
+    LOCATION_HIERARCHY_COLUMNS,
+    METADATA_COLUMNS,
+    TABLE_FILE_MAP,
+)
+
+logger = get_logger(name=__name__)
+
+# Blank rows + timestamp row before the header (see read_enterprise_csv)
+ENTERPRISE_PREAMBLE_LINES = 10
+DEFAULT_BLOCK_SIZE = 8 * 1024 * 1024
+OUTPUT_FORMATS = ("csv", "parquet")
+
+# Output columns of every component table, in file order
+TABLE_COLUMNS: Dict[str, List[str]] = {
+    "controls_main": CONTROLS_MAIN_COLUMNS,
+    "controls_function_hierarchy": ["control_id"] + FUNCTION_HIERARCHY_COLUMNS,
+    "controls_location_hierarchy": ["control_id"] + LOCATION_HIERARCHY_COLUMNS,
+    "controls_metadata": ["control_id"] + METADATA_COLUMNS,
+    "controls_category_flags": ["control_id", "category_flag"],
+    "controls_sox_assertions": ["control_id", "sox_assertion"],
+    "controls_risk_themes": ["control_id", "risk_theme", "taxonomy_number", "risk_theme_number"],
+    "controls_related_functions": [
+        "control_id", "related_functions_locations_comments", "related_function_id", "related_function_name",
+    ],
+    "controls_related_locations": [
+        "control_id", "related_functions_locations_comments", "related_location_id", "related_location_name",
+    ],
+}
+
+# Tables that are a plain column projection of the extract
+_PROJECTED_TABLES = (
+    "controls_main", "controls_function_hierarchy", "controls_location_hierarchy", "controls_metadata",
+)
+
+# JSONL scalar fields whose CSV column has a different name
+_JSONL_RENAMES = {
+    "it_application_system_supporting_control_instance": "it_application_system_supporting",
+}
+
+_JSONL_BOOL_FIELDS = (
+    "key_control", "four_eyes_check", "performance_measures_required", "is_assessor_control_owner",
+    "sox_relevant", "ccar_relevant", "bcbs239_relevant", "ey_reliant",
+)
+
+_TRUE_VALUES = frozenset({"true", "yes", "y", "1", "x"})
+_FALSE_VALUES = frozenset({"false", "no", "n", "0"})
+
+# Deepest-first: the owning org is the most specific level that is filled in
+_FUNCTION_ID_LEVELS = (
+    "function_id", "segment_id", "sector_id", "area_id", "unit_id", "division_id", "group_id",
+)
+_LOCATION_ID_LEVELS = (
+    "company_id", "country_id", "sub_region_id", "region_id", "l0_location_id",
+)
+
+
+@dataclass
+class StreamSplitResult:
+    """Counters for one streaming split."""
+    input_path: str
+    output_dir: str
+    output_format: str
+    jsonl_path: Optional[str] = None
+    rows: int = 0
+    batches: int = 0
+    bytes_read: int = 0
+    table_rows: Dict[str, int] = field(default_factory=dict)
+    jsonl_records: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "input_path": self.input_path,
+            "output_dir": self.output_dir,
+            "output_format": self.output_format,
+            "jsonl_path": self.jsonl_path,
+            "rows": self.rows,
+            "batches": self.batches,
+            "bytes_read": self.bytes_read,
+            "table_rows": dict(self.table_rows),
+            "jsonl_records": self.jsonl_records,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows / self.seconds, 1) if self.seconds > 0 else None,
+        }
+
+
+# ── Value helpers ────────────────────────────────────────────────────
+
+
+def _clean(value: Any) -> Optional[str]:
+    """Strip a CSV cell; empty cells become None."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _split(value: Any) -> List[str]:
+    """Split a comma-separated cell, keeping positions (for zipped columns)."""
+    value = _clean(value)
+    if value is None:
+        return []
+    return [part.strip() for part in value.split(",")]
+
+
+def _to_bool(value: Any) -> Optional[bool]:
+    value = _clean(value)
+    if value is None:
+        return None
+    lowered = value.lower()
+    if lowered in _TRUE_VALUES:
+        return True
+    if lowered in _FALSE_VALUES:
+        return False
+    return None
+
+
+def _deepest(row: Dict[str, Any], levels: tuple) -> Optional[str]:
+    for column in levels:
+        value = _clean(row.get(column))
+        if value is not None:
+            return value
+    return None
+
+
+# ── Writers ──────────────────────────────────────────────────────────
+
+
+class _TableWriters:
+    """One incremental CSV or Parquet writer per component table."""
+
+    def __init__(self, output_dir: Path, output_format: str) -> None:
+        self._output_dir = output_dir
+        self._format = output_format
+        self._writers: Dict[str, Any] = {}
+        self.schemas = {
+            name: pa.schema([(col, pa.string()) for col in columns])
+            for name, columns in TABLE_COLUMNS.items()
+        }
+        self.rows: Dict[str, int] = {name: 0 for name in TABLE_COLUMNS}
+
+    def path(self, name: str) -> Path:
+        file_name = TABLE_FILE_MAP[name]
+        if self._format == "parquet":
+            file_name = Path(file_name).with_suffix(".parquet").name
+        return self._output_dir / file_name
+
+    def _writer(self, name: str):
+        writer = self._writers.get(name)
+        if writer is None:
+            if self._format == "parquet":
+                import pyarrow.parquet as pq
+
+                writer = pq.ParquetWriter(str(self.path(name)), self.schemas[name])
+            else:
+                writer = pa_csv.CSVWriter(str(self.path(name)), self.schemas[name])
+            self._writers[name] = writer
+        return writer
+
+    def write(self, name: str, table: pa.Table) -> None:
+        if table.num_rows == 0:
+            return
+        self._writer(name).write_table(table)
+        self.rows[name] += table.num_rows
+
+    def write_rows(self, name: str, rows: Dict[str, List[Optional[str]]]) -> None:
+        if not rows[TABLE_COLUMNS[name][0]]:
+            return
+        self.write(name, pa.Table.from_pydict(rows, schema=self.schemas[name]))
+
+    def close(self) -> None:
+        # Every table gets a file, header-only when it received no rows
+        for name in TABLE_COLUMNS:
+            self._writer(name)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+
+# ── Conversion ───────────────────────────────────────────────────────
+
+
+def _read_enterprise_header(f) -> List[str]:
+    """Consume the preamble and header line; return the header column names."""
+    for _ in range(ENTERPRISE_PREAMBLE_LINES):
+        if not f.readline():
+            raise ValueError("Enterprise CSV ended before the header row")
+    header_line = f.readline()
+    if not header_line:
+        raise ValueError("Enterprise CSV has no header row")
+    header = next(csv.reader(io.StringIO(header_line.decode("utf-8-sig"))))
+    return [name.strip() for name in header]
+
+
+def _empty_rows(name: str) -> Dict[str, List[Optional[str]]]:
+    return {col: [] for col in TABLE_COLUMNS[name]}
+
+
+def _convert_batch(batch: pa.RecordBatch, writers: _TableWriters, jsonl_out) -> int:
+    """Write one record batch to every table and (optionally) the JSONL.
+
+    Returns the number of JSONL lines written.
+    """
+    table = pa.Table.from_batches([batch])
+    for name in _PROJECTED_TABLES:
+        writers.write(name, table.select(TABLE_COLUMNS[name]))
+
+    category = _empty_rows("controls_category_flags")
+    sox = _empty_rows("controls_sox_assertions")
+    risk = _empty_rows("controls_risk_themes")
+    rel_funcs = _empty_rows("controls_related_functions")
+    rel_locs = _empty_rows("controls_related_locations")
+
+    written = 0
+    for row in batch.to_pylist():
+        cid = row.get("control_id")
+
+        flags = [v for v in _split(row.get("category_flags")) if v]
+        assertions = [v for v in _split(row.get("sox_assertions")) if v]
+        for flag in flags:
+            category["control_id"].append(cid)
+            category["category_flag"].append(flag)
+        for assertion in assertions:
+            sox["control_id"].append(cid)
+            sox["sox_assertion"].append(assertion)
+
+        themes = []
+        names = _split(row.get("risk_themes"))
+        if names:
+            tax_list = _split(row.get("risk_theme_taxonomy_numbers")) or [""] * len(names)
+            num_list = _split(row.get("risk_theme_numbers")) or [""] * len(names)
+            for n, t, num in zip(names, tax_list, num_list):
+                if not n:
+                    continue
+                risk["control_id"].append(cid)
+                risk["risk_theme"].append(n)
+                risk["taxonomy_number"].append(t)
+                risk["risk_theme_number"].append(num)
+                themes.append({"risk_theme": n, "taxonomy_number": t or None, "risk_theme_number": num or None})
+
+        related = {}
+        for kind, out in (("function", rel_funcs), ("location", rel_locs)):
+            ids = _split(row.get(f"related_{kind}_ids"))
+            comment = _clean(row.get(f"related_{kind}s_comments"))
+            name_list = _split(row.get(f"related_{kind}_names")) or [""] * len(ids)
+            entries = []
+            for rid, rname in zip(ids, name_list):
+                if not (rid or rname):
+                    continue
+                out["control_id"].append(cid)
+                out["related_functions_locations_comments"].append(comment)
+                out[f"related_{kind}_id"].append(rid)
+                out[f"related_{kind}_name"].append(rname)
+                if rid or comment:
+                    entries.append({
+                        f"related_{kind}_id": rid or None,
+                        "related_functions_locations_comments": comment,
+                    })
+            related[kind] = entries
+
+        if jsonl_out is None:
+            continue
+
+        record: Dict[str, Any] = {col: _clean(row.get(col)) for col in CONTROLS_MAIN_COLUMNS}
+        record.update({col: _clean(row.get(col)) for col in METADATA_COLUMNS})
+        for jsonl_name, csv_name in _JSONL_RENAMES.items():
+            record[jsonl_name] = record.pop(csv_name, None)
+        for bool_field in _JSONL_BOOL_FIELDS:
+            record[bool_field] = _to_bool(row.get(bool_field))
+        record["owning_organization_function_id"] = _deepest(row, _FUNCTION_ID_LEVELS)
+        record["owning_organization_location_id"] = _deepest(row, _LOCATION_ID_LEVELS)
+        record["control_administrator"] = [v for v in _split(row.get("control_administrator")) if v]
+        record["control_administrator_gpn"] = [v for v in _split(row.get("control_administrator_gpn")) if v]
+        record["related_functions"] = related["function"]
+        record["related_locations"] = related["location"]
+        record["risk_theme"] = themes
+        record["category_flags"] = flags
+        record["sox_assertions"] = assertions
+
+        jsonl_out.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+        written += 1
+
+    writers.write_rows("controls_category_flags", category)
+    writers.write_rows("controls_sox_assertions", sox)
+    writers.write_rows("controls_risk_themes", risk)
+    writers.write_rows("controls_related_functions", rel_funcs)
+    writers.write_rows("controls_related_locations", rel_locs)
+    return written
+
+
+def split_controls_csv_streaming(
+    input_path: Path,
+    output_dir: Path,
+    jsonl_path: Optional[Path] = None,
+    output_format: str = "csv",
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> StreamSplitResult:
+    """Split an enterprise-format controls CSV batch by batch.
+
+    Produces the same 9 component tables as ``split_controls_csv`` and, when
+    ``jsonl_path`` is given, the controls JSONL in the same pass. All cells
+    are read as strings so a column never changes type between batches.
+
+    Args:
+        input_path: Path to enterprise-format CSV file
+        output_dir: Directory to write the component tables to
+        jsonl_path: Optional controls JSONL output path
+        output_format: "csv" or "parquet"
+        block_size: Bytes of CSV parsed per record batch
+
+    Returns:
+        StreamSplitResult with row counts and timing
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}, got {output_format!r}")
+
+    started = time.perf_counter()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    result = StreamSplitResult(
+        input_path=str(input_path),
+        output_dir=str(output_dir),
+        output_format=output_format,
+        jsonl_path=str(jsonl_path) if jsonl_path else None,
+    )
+    logger.info("Starting streaming split for {}", input_path)
+
+    writers = _TableWriters(output_dir, output_format)
+    jsonl_out = None
+    try:
+        if jsonl_path is not None:
+            jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+            jsonl_out = jsonl_path.open("wb")
+
+        with input_path.open("rb") as f:
+            header = _read_enterprise_header(f)
+            columns = header[1:]  # drop blank column A
+            present = set(columns)
+            missing = sorted({c for name in _PROJECTED_TABLES for c in TABLE_COLUMNS[name] if c not in present})
+            if missing:
+                raise ValueError(f"Enterprise CSV is missing columns: {', '.join(missing)}")
+
+            reader = pa_csv.open_csv(
+                f,
+                read_options=pa_csv.ReadOptions(
+                    column_names=header, block_size=block_size, use_threads=True,
+                ),
+                # Free-text cells ((WHEN)/(WHO)/... sections) span lines inside quotes
+                parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types={name: pa.string() for name in header},
+                    include_columns=columns,
+                    strings_can_be_null=True,
+                ),
+            )
+            for batch in reader:
+                result.batches += 1
+                result.rows += batch.num_rows
+                result.jsonl_records += _convert_batch(batch, writers, jsonl_out)
+    finally:
+        writers.close()
+        if jsonl_out is not None:
+            jsonl_out.close()
+
+    result.bytes_read = input_path.stat().st_size
+    result.table_rows = dict(writers.rows)
+    result.seconds = time.perf_counter() - started
+    logger.info(
+        "Streaming split complete: {} rows in {} batches, {} JSONL records, {:.1f}s -> {}",
+        result.rows, result.batches, result.jsonl_records, result.seconds, output_dir,
+    )
+    return result
@@ -0,0 +1,172 @@
+"""Per-version changed-fields records for control history.
+
+``src_controls_ver_control_diff`` has one row per ``src_controls_ver_control``
+version: the material fields (the ones the explorer's history tab
+compares, plus the parent control as of the version's start) that differ
+from the version it replaced, as ``changed_fields`` with ``old_values`` /
+``new_values`` JSON objects. A control's first version has no predecessor
+and lists every material field, so folding ``new_values`` in ``tx_from``
+order rebuilds the material snapshot of any version from one indexed
+range read (``version_snapshots``).
+
+Ingestion refreshes the table inside its publish transaction, after the
+parent edges are written: rows for the versions it created, and ``tx_to``
+for the versions it closed.
+
+Usage:
+    await refresh_version_diffs(conn, since=tx_from)
+    snapshots = await version_snapshots(conn, "CTRL-0000000001", until=to_tx)
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from itertools import chain
+from typing import Optional
+
+from sqlalchemy import Text, and_, case, func, literal_column, or_, select, true, update
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by, insert as pg_insert
+from sqlalchemy.sql import column
+
+from server.logging_config import get_logger
+from server.pipelines.controls.schema import (
+    src_controls_rel_parent as rel_parent,
+    src_controls_ver_control as ver_control,
+    src_controls_ver_control_diff as ver_diff,
+)
+
+logger = get_logger(name=__name__)
+
+# Material ver_control columns (ControlVersionSnapshot), in display order
+MATERIAL_FIELDS = [
+    "control_status", "key_control",
+    "control_title", "control_description",
+    "evidence_description", "local_functional_information",
+    "execution_frequency", "preventative_detective",
+    "manual_automated", "control_administrator",
+    "control_owner", "control_owner_gpn",
+    "last_modified_on",
+]
+PARENT_FIELD = "parent_control_id"
+
+
+def _parent_as_of(control_id, at):
+    return (
+        select(rel_parent.c.parent_control_id)
+        .where(
+            rel_parent.c.child_control_id == control_id,
+            rel_parent.c.tx_from <= at,
+            or_(rel_parent.c.tx_to.is_(None), rel_parent.c.tx_to > at),
+        )
+        .order_by(rel_parent.c.tx_from.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _material(ver):
+    """JSON object of a version's material fields and its parent at ``tx_from``."""
+    pairs = [(literal_column(f"'{col}'"), ver.c[col]) for col in MATERIAL_FIELDS]
+    pairs.append((literal_column(f"'{PARENT_FIELD}'"), _parent_as_of(ver.c.ref_control_id, ver.c.tx_from)))
+    return func.jsonb_build_object(*chain.from_iterable(pairs), type_=JSONB)
+
+
+def _diff_rows(since: Optional[datetime]):
+    """(ref_control_id, tx_from, tx_to, prev_tx_from, changed_fields, old_values, new_values)."""
+    cur = ver_control.alias("cur")
+    prev = ver_control.alias("prev")
+    pair = (
+        select(
+            cur.c.ref_control_id,
+            cur.c.tx_from,
+            cur.c.tx_to,
+            prev.c.tx_from.label("prev_tx_from"),
+            _material(cur).label("new_doc"),
+            case((prev.c.ver_id.is_not(None), _material(prev)), else_=None).label("old_doc"),
+        )
+        # Closing a version sets its tx_to to its successor's tx_from
+        .select_from(cur.outerjoin(prev, and_(
+            prev.c.ref_control_id == cur.c.ref_control_id, prev.c.tx_to == cur.c.tx_from,
+        )))
+    )
+    if since is not None:
+        pair = pair.where(cur.c.tx_from >= since)
+    pair = pair.subquery("pair")
+
+    field = func.jsonb_each(pair.c.new_doc).table_valued(
+        column("key", Text), column("value", JSONB),
+    ).render_derived("field")
+    old_value = pair.c.old_doc.op("->", return_type=JSONB)(field.c.key)
+    delta = (
+        select(
+            func.coalesce(
+                func.array_agg(aggregate_order_by(field.c.key, field.c.key)),
+                literal_column("'{}'::text[]"),
+            ).label("changed_fields"),
+            case(
+                (pair.c.old_doc.is_(None), literal_column("'{}'::jsonb")),
+                else_=func.coalesce(func.jsonb_object_agg(field.c.key, old_value), literal_column("'{}'::jsonb")),
+            ).label("old_values"),
+            func.coalesce(
+                func.jsonb_object_agg(field.c.key, field.c.value), literal_column("'{}'::jsonb"),
+            ).label("new_values"),
+        )
+        .select_from(field)
+        .where(field.c.value.is_distinct_from(old_value))
+        .lateral("delta")
+    )
+    return (
+        select(
+            pair.c.ref_control_id, pair.c.tx_from, pair.c.tx_to, pair.c.prev_tx_from,
+            delta.c.changed_fields, delta.c.old_values, delta.c.new_values,
+        )
+        .select_from(pair.join(delta, true()))
+    )
+
+
+async def refresh_version_diffs(conn, since: Optional[datetime] = None) -> int:
+    """Record the versions created at/after ``since`` (all when None) and close the ones it replaced.
+
+    Returns the number of diff rows inserted.
+    """
+    close = (
+        update(ver_diff)
+        .where(
+            ver_diff.c.ref_control_id == ver_control.c.ref_control_id,
+            ver_diff.c.tx_from == ver_control.c.tx_from,
+            ver_diff.c.tx_to.is_distinct_from(ver_control.c.tx_to),
+        )
+        .values(tx_to=ver_control.c.tx_to)
+    )
+    if since is not None:
+        close = close.where(ver_control.c.tx_to >= since)
+    closed = await conn.execute(close)
+    cols = ["ref_control_id", "tx_from", "tx_to", "prev_tx_from", "changed_fields", "old_values", "new_values"]
+    result = await conn.execute(
+        pg_insert(ver_diff)
+        .from_select(cols, _diff_rows(since))
+        .on_conflict_do_nothing(index_elements=["ref_control_id", "tx_from"])
+    )
+    inserted = max(result.rowcount or 0, 0)
+    logger.info(
+        "Version diffs refreshed: {} recorded, {} closed ({})",
+        inserted, max(closed.rowcount or 0, 0), "full" if since is None else "delta",
+    )
+    return inserted
+
+
+async def version_snapshots(conn, control_id: str, until: Optional[datetime] = None) -> dict[datetime, dict]:
+    """Material snapshot of each version of ``control_id`` (up to ``until``), keyed by tx_from."""
+    q = (
+        select(ver_diff.c.tx_from, ver_diff.c.new_values)
+        .where(ver_diff.c.ref_control_id == control_id)
+        .order_by(ver_diff.c.tx_from)
+    )
+    if until is not None:
+        q = q.where(ver_diff.c.tx_from <= until)
+    snapshots: dict[datetime, dict] = {}
+    state: dict = {}
+    for tx_from, new_values in await conn.execute(q):
+        state = {**state, **new_values}
+        snapshots[tx_from] = state
+    return snapshots
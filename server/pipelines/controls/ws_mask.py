@@ -0,0 +1,140 @@
+"""Effective W-criteria mask per control.
+
+``src_controls_ref_control.ws_yes_mask`` holds one bit per W criterion
+(the 7 L1 criteria in bits 0-6, the 7 L2 criteria in bits 7-13), set when
+the control's effective answer is "yes". A Level 2 control inherits its
+L1 answers from its parent's enrichment and takes its L2 answers from its
+own; every other control uses its own enrichment for all 14.
+
+The explorer's "all selected criteria are No" filter then becomes the
+single predicate ``ws_yes_mask & :mask = 0`` (covered by
+``ix_ref_control_ws_mask``) or the same test over the facet index column.
+
+Ingestion refreshes the mask inside its publish transaction for every
+control whose level, parent edge or enrichment changed, plus the current
+children of those controls.
+
+Usage:
+    mask = ws_criteria_mask(["what", "frequency"])
+    q = select(ref_control.c.control_id).where(ws_filter(ref_control.c.ws_yes_mask, mask))
+"""
+
+from __future__ import annotations
+
+import operator
+from datetime import datetime
+from functools import reduce
+from typing import Iterable, Optional
+
+from sqlalchemy import case, func, literal_column, or_, select, union, update
+
+from server.logging_config import get_logger
+from server.pipelines.controls.schema import (
+    ai_controls_model_enrichment as ai_enrichment,
+    src_controls_ref_control as ref_control,
+    src_controls_rel_parent as rel_parent,
+    src_controls_ver_control as ver_control,
+)
+
+logger = get_logger(name=__name__)
+
+L1_CRITERIA_COLS = [
+    "what_yes_no", "where_yes_no", "who_yes_no", "when_yes_no",
+    "why_yes_no", "what_why_yes_no", "risk_theme_yes_no",
+]
+L2_CRITERIA_COLS = [
+    "frequency_yes_no", "preventative_detective_yes_no",
+    "automation_level_yes_no", "followup_yes_no",
+    "escalation_yes_no", "evidence_yes_no", "abbreviations_yes_no",
+]
+# Bit position of each criterion key ("what", ..., "abbreviations")
+WS_CRITERIA_BITS = {
+    col.replace("_yes_no", ""): bit for bit, col in enumerate(L1_CRITERIA_COLS + L2_CRITERIA_COLS)
+}
+
+
+def ws_criteria_mask(ws_keys: Iterable[str]) -> int:
+    """Bitmask of the known criterion keys (unknown keys are ignored)."""
+    return reduce(operator.or_, (1 << WS_CRITERIA_BITS[k] for k in ws_keys if k in WS_CRITERIA_BITS), 0)
+
+
+def ws_filter(mask_col, mask: int):
+    """Predicate: none of the criteria in ``mask`` is effectively "yes"."""
+    return mask_col.op("&")(literal_column(str(int(mask)))) == 0
+
+
+def _is_yes(col):
+    return func.lower(func.btrim(col, " \t\r\n")) == "yes"
+
+
+def _effective_mask():
+    """(control_id, ws_yes_mask) for every control, computed from current rows."""
+    ref = ref_control.alias("ref")
+    own = ai_enrichment.alias("own_enr")
+    parent_enr = ai_enrichment.alias("parent_enr")
+    parent = (
+        select(rel_parent.c.parent_control_id)
+        .where(rel_parent.c.child_control_id == ref.c.control_id, rel_parent.c.tx_to.is_(None))
+        .order_by(rel_parent.c.tx_from.desc())
+        .limit(1)
+        .lateral("parent")
+    )
+    is_l2 = ver_control.c.hierarchy_level == "Level 2"
+    bits = [
+        case((_is_yes(case((is_l2, parent_enr.c[col]), else_=own.c[col])), 1 << bit), else_=0)
+        for bit, col in enumerate(L1_CRITERIA_COLS)
+    ] + [
+        case((_is_yes(own.c[col]), 1 << bit), else_=0)
+        for bit, col in enumerate(L2_CRITERIA_COLS, start=len(L1_CRITERIA_COLS))
+    ]
+    return (
+        select(ref.c.control_id, reduce(operator.add, bits).label("ws_yes_mask"))
+        .select_from(
+            ref
+            .outerjoin(ver_control, (ver_control.c.ref_control_id == ref.c.control_id)
+                       & ver_control.c.tx_to.is_(None))
+            .outerjoin(own, (own.c.ref_control_id == ref.c.control_id) & own.c.tx_to.is_(None))
+            .outerjoin(parent, literal_column("true"))
+            .outerjoin(parent_enr, (parent_enr.c.ref_control_id == parent.c.parent_control_id)
+                       & parent_enr.c.tx_to.is_(None))
+        )
+    )
+
+
+def _changed_since(since: datetime):
+    """Controls whose own inputs changed at/after ``since``, plus their current children."""
+    def touched(tbl, id_col):
+        return select(id_col.label("control_id")).where(or_(tbl.c.tx_from >= since, tbl.c.tx_to >= since))
+
+    changed = union(
+        touched(ver_control, ver_control.c.ref_control_id),
+        touched(rel_parent, rel_parent.c.child_control_id),
+        touched(ai_enrichment, ai_enrichment.c.ref_control_id),
+    ).cte("ws_changed")
+    return union(
+        select(changed.c.control_id),
+        select(rel_parent.c.child_control_id)
+        .where(rel_parent.c.tx_to.is_(None), rel_parent.c.parent_control_id.in_(select(changed.c.control_id))),
+    )
+
+
+async def refresh_ws_masks(conn, since: Optional[datetime] = None) -> int:
+    """Recompute ``ws_yes_mask`` for controls changed at/after ``since`` (all when None).
+
+    Only rows whose mask actually changes are written. Returns the number updated.
+    """
+    computed = _effective_mask()
+    if since is not None:
+        computed = computed.where(computed.selected_columns.control_id.in_(_changed_since(since)))
+    computed = computed.subquery("ws_computed")
+    result = await conn.execute(
+        update(ref_control)
+        .where(
+            ref_control.c.control_id == computed.c.control_id,
+            ref_control.c.ws_yes_mask != computed.c.ws_yes_mask,
+        )
+        .values(ws_yes_mask=computed.c.ws_yes_mask)
+    )
+    updated = max(result.rowcount or 0, 0)
+    logger.info("W-criteria masks refreshed: {} controls updated ({})", updated, "full" if since is None else "delta")
+    return updated
@@ -0,0 +1,155 @@
+"""Materialized descendant closure of the current org hierarchy.
+
+``src_orgs_rel_closure`` holds one row per (ancestor, descendant) pair
+reachable over current ``src_orgs_rel_child`` edges, at the shortest depth.
+Explorer filters expand selected org nodes to their subtrees with one
+indexed lookup (``subtree_node_ids``) instead of walking rel_child one
+level per query.
+
+Context-provider ingestion calls ``refresh_org_closure`` after writing a
+tree's edges. Only the rows of nodes whose reachable set can have changed
+— the ancestors (before and after the write) of every node whose child
+edges were touched — are recomputed, and they are written as a diff, so
+an ingestion that leaves the hierarchy alone writes nothing.
+
+Usage:
+    from server.pipelines.orgs.closure import subtree_node_ids
+
+    q = select(rel_owns_func.c.control_id).where(rel_owns_func.c.node_id.in_(subtree_node_ids(node_ids)))
+"""
+
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import Text, and_, any_, bindparam, delete, exists, func, literal, select, union
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+
+from server.logging_config import get_logger
+from server.pipelines.orgs.schema import src_orgs_ref_node, src_orgs_rel_child, src_orgs_rel_closure
+
+logger = get_logger(name=__name__)
+
+# Same bound as the former level-by-level expansion; also stops walks
+# around a cycle in malformed source data
+CLOSURE_MAX_DEPTH = 10
+
+
+def _node_array(name: str, node_ids: Iterable[str]):
+    return bindparam(name, value=sorted(set(node_ids)), type_=ARRAY(Text), unique=True)
+
+
+def subtree_node_ids(node_ids: Iterable[str]):
+    """``node_ids`` plus all their current descendants, as a subquery."""
+    ids = _node_array("subtree_roots", node_ids)
+    closure = src_orgs_rel_closure
+    return union(
+        select(func.unnest(ids).label("node_id")),
+        select(closure.c.descendant_node_id).where(closure.c.ancestor_node_id == any_(ids)),
+    )
+
+
+def _reachable(ancestor_filter):
+    """Recursive CTE of (ancestor, descendant, depth) for ancestors matching the filter."""
+    edge = src_orgs_rel_child
+    walk = (
+        select(
+            edge.c.in_node_id.label("ancestor_node_id"),
+            edge.c.out_node_id.label("descendant_node_id"),
+            literal(1).label("depth"),
+        )
+        .where(edge.c.tx_to.is_(None), ancestor_filter(edge.c.in_node_id))
+        .cte("closure_walk", recursive=True)
+    )
+    walk = walk.union_all(
+        select(walk.c.ancestor_node_id, edge.c.out_node_id, walk.c.depth + 1)
+        .join_from(walk, edge, edge.c.in_node_id == walk.c.descendant_node_id)
+        .where(edge.c.tx_to.is_(None), walk.c.depth < CLOSURE_MAX_DEPTH)
+    )
+    return (
+        select(walk.c.ancestor_node_id, walk.c.descendant_node_id, func.min(walk.c.depth).label("depth"))
+        .where(walk.c.ancestor_node_id != walk.c.descendant_node_id)
+        .group_by(walk.c.ancestor_node_id, walk.c.descendant_node_id)
+        .cte("closure_fresh")
+    )
+
+
+async def _affected_ancestors(conn, node_ids: list[str]) -> list[str]:
+    """The nodes plus their ancestors in the stored closure and over current edges."""
+    closure, edge = src_orgs_rel_closure, src_orgs_rel_child
+    ids = _node_array("touched_nodes", node_ids)
+    up = (
+        select(edge.c.in_node_id.label("node_id"), literal(1).label("depth"))
+        .where(edge.c.tx_to.is_(None), edge.c.out_node_id == any_(ids))
+        .cte("closure_up", recursive=True)
+    )
+    up = up.union_all(
+        select(edge.c.in_node_id, up.c.depth + 1)
+        .join_from(up, edge, edge.c.out_node_id == up.c.node_id)
+        .where(edge.c.tx_to.is_(None), up.c.depth < CLOSURE_MAX_DEPTH)
+    )
+    result = await conn.execute(
+        union(
+            select(closure.c.ancestor_node_id).where(closure.c.descendant_node_id == any_(ids)),
+            select(up.c.node_id),
+        )
+    )
+    return sorted(set(node_ids) | {row[0] for row in result})
+
+
+async def refresh_org_closure(
+    conn,
+    tree: str,
+    touched_node_ids: Optional[Iterable[str]] = None,
+) -> Tuple[int, int]:
+    """Bring the closure rows of ``tree`` in line with the current rel_child edges.
+
+    Args:
+        conn: Connection inside the caller's transaction (after the edge writes).
+        tree: Org tree (function / location / consolidated).
+        touched_node_ids: Nodes whose child edges were opened or closed (new,
+            disappeared and re-parented nodes). None rebuilds the whole tree.
+
+    Returns:
+        ``(inserted, deleted)`` closure row counts.
+    """
+    closure = src_orgs_rel_closure
+    if touched_node_ids is None:
+        tree_nodes = select(src_orgs_ref_node.c.node_id).where(src_orgs_ref_node.c.tree == tree)
+
+        def in_scope(col):
+            return col.in_(tree_nodes)
+    else:
+        touched = sorted(set(touched_node_ids))
+        if not touched:
+            return 0, 0
+        scope = await _affected_ancestors(conn, touched)
+
+        def in_scope(col):
+            return col == any_(_node_array("closure_scope", scope))
+
+    # Rows that are gone or whose depth changed, then rows that are missing
+    fresh = _reachable(in_scope)
+    deleted = await conn.execute(
+        delete(closure).where(
+            in_scope(closure.c.ancestor_node_id),
+            ~exists().where(and_(
+                fresh.c.ancestor_node_id == closure.c.ancestor_node_id,
+                fresh.c.descendant_node_id == closure.c.descendant_node_id,
+                fresh.c.depth == closure.c.depth,
+            )),
+        )
+    )
+    fresh = _reachable(in_scope)
+    inserted = await conn.execute(
+        pg_insert(closure)
+        .from_select(
+            ["ancestor_node_id", "descendant_node_id", "depth"],
+            select(fresh.c.ancestor_node_id, fresh.c.descendant_node_id, fresh.c.depth),
+        )
+        .on_conflict_do_nothing(index_elements=[closure.c.ancestor_node_id, closure.c.descendant_node_id])
+    )
+    counts = max(inserted.rowcount or 0, 0), max(deleted.rowcount or 0, 0)
+    logger.info(
+        "Org closure '{}': +{} / -{} rows ({})",
+        tree, counts[0], counts[1], "full rebuild" if touched_node_ids is None else f"{len(touched)} touched nodes",
+    )
+    return counts
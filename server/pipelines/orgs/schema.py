@@ -1,7 +1,8 @@
 """PostgreSQL schema for the orgs domain (SQLAlchemy Table objects).
 
 6 tables: ref_node, 3 version tables (function/location/consolidated),
-rel_child, rel_cross_link.
+rel_child, rel_cross_link. Plus rel_closure, the materialized descendant
+closure of the current rel_child edges (see closure.py).
 
 All tables are registered on the shared ``metadata`` instance so that
 Alembic can manage every domain in a single migration chain.
@@ -12,10 +13,12 @@ from sqlalchemy import (
     Column,
     Text,
     BigInteger,
+    SmallInteger,
     DateTime,
     Index,
     ForeignKey,
     CheckConstraint,
+    PrimaryKeyConstraint,
     text,
 )
 from sqlalchemy.dialects.postgresql import ARRAY
@@ -241,6 +244,22 @@ src_orgs_meta_source_date = Table(
     ),
 )
 
+# ── 8. src_orgs_rel_closure (derived, current edges only) ─────────────────────
+
+# One row per (ancestor, descendant) pair reachable over current rel_child
+# edges, at the shortest depth (>= 1). Maintained by context-provider
+# ingestion; not temporal.
+src_orgs_rel_closure = Table(
+    "src_orgs_rel_closure",
+    metadata,
+    Column("ancestor_node_id", Text, nullable=False),
+    Column("descendant_node_id", Text, nullable=False),
+    Column("depth", SmallInteger, nullable=False),
+    PrimaryKeyConstraint("ancestor_node_id", "descendant_node_id", name="pk_rel_closure"),
+    CheckConstraint("depth >= 1", name="ck_rel_closure_depth"),
+    Index("ix_rel_closure_descendant", "descendant_node_id"),
+)
+
 # ── Backward-compatible list of table names ─────────────────────────────────
 
 ORGS_TABLES = [
@@ -251,4 +270,5 @@ ORGS_TABLES = [
     "src_orgs_rel_child",
     "src_orgs_rel_cross_link",
     "src_orgs_meta_source_date",
+    "src_orgs_rel_closure",
 ]
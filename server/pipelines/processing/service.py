@@ -3,7 +3,7 @@
 Provides batch listing with readiness status for the ingestion API.
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -68,3 +68,58 @@ async def get_validated_batches(db: AsyncSession) -> List[Dict]:
         })
 
     return output
+
+
+def _profile_summary(batch: UploadBatch) -> Dict:
+    """Flatten a batch's stored ingestion profile for side-by-side comparison."""
+    profile = batch.ingestion_profile or {}
+    return {
+        "batch_id": batch.id,
+        "upload_id": batch.upload_id,
+        "status": batch.status,
+        "total_records": batch.total_records,
+        "total_seconds": profile.get("total_seconds"),
+        "max_rss_mb_approx": profile.get("max_rss_mb_approx"),
+        "db_round_trips": profile.get("db_round_trips"),
+        # Version 1 profiles stored the same estimate unsuffixed
+        "qdrant_bytes_approx": profile.get("qdrant_bytes_approx", profile.get("qdrant_bytes")),
+        "stage_seconds": {
+            st["name"]: st.get("wall_seconds")
+            for st in profile.get("stages", [])
+            if isinstance(st, dict) and "name" in st
+        },
+    }
+
+
+async def get_ingestion_profiles(db: AsyncSession, limit: int = 20) -> List[Dict]:
+    """Get stored ingestion profiles of the most recent batches (newest first)."""
+    result = await db.execute(
+        select(UploadBatch)
+        .where(UploadBatch.ingestion_profile.is_not(None))
+        .order_by(UploadBatch.created_at.desc())
+        .limit(limit)
+    )
+    return [_profile_summary(batch) for batch in result.scalars().all()]
+
+
+async def get_successful_ingestion_profiles(db: AsyncSession, limit: int = 20) -> List[Dict]:
+    """Get the raw stored profiles of the most recent successful ingestions (newest first)."""
+    result = await db.execute(
+        select(UploadBatch.ingestion_profile)
+        .where(UploadBatch.status == "success")
+        .where(UploadBatch.ingestion_profile.is_not(None))
+        .order_by(UploadBatch.created_at.desc())
+        .limit(limit)
+    )
+    return [profile for profile in result.scalars().all() if isinstance(profile, dict)]
+
+
+async def get_ingestion_profile(db: AsyncSession, batch_id: int) -> Optional[Dict]:
+    """Get the full stored ingestion profile for one batch, or None if the batch is unknown."""
+    batch = await db.get(UploadBatch, batch_id)
+    if batch is None:
+        return None
+    return {
+        **_profile_summary(batch),
+        "profile": batch.ingestion_profile,
+    }
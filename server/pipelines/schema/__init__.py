@@ -10,4 +10,7 @@ Import table objects directly from domain schema modules:
 
 Or import aggregated lists from definitions:
     from server.pipelines.schema.definitions import ALL_TABLES, metadata
+
+Set-based temporal closes (one array parameter per statement):
+    from server.pipelines.schema.temporal import close_current
 """
@@ -36,6 +36,7 @@ from server.pipelines.controls.schema import (  # noqa: F401
     FTS_TRIGGER_DROP_SQL,
     src_controls_ref_control,
     src_controls_ver_control,
+    src_controls_ver_control_diff,
     src_controls_rel_parent,
     src_controls_rel_owns_function,
     src_controls_rel_owns_location,
@@ -46,6 +47,7 @@ from server.pipelines.controls.schema import (  # noqa: F401
     ai_controls_model_taxonomy,
     ai_controls_model_feature_prep,
     ai_controls_similar_controls,
+    controls_ingest_checkpoint,
 )
 from server.pipelines.assessment_units.schema import (  # noqa: F401
     AU_TABLES,
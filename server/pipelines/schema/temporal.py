@@ -0,0 +1,69 @@
+"""Set-based writes for temporal (tx_from / tx_to) tables.
+
+Closing the current rows of a set of keys is the most common temporal
+write. The keys are bound as a single array parameter
+(``col = ANY(:keys)``), so a close is one statement, one bind parameter
+and one cached plan however many keys it covers — ``IN (:p1, ..., :pN)``
+re-plans for every distinct N and is capped by asyncpg's 32,767-parameter
+limit.
+
+Usage:
+    from server.pipelines.schema.temporal import close_current
+
+    await close_current(conn, ver_table, ver_table.c.ref_node_id, node_ids, tx_to=now)
+    # edges touching any of the nodes, on either end
+    await close_current(conn, rel_child, (rel_child.c.in_node_id, rel_child.c.out_node_id), node_ids, tx_to=now)
+"""
+
+from datetime import datetime
+from typing import Iterable, Sequence, Union
+
+from sqlalchemy import Column, Table, any_, bindparam, or_, update
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from server.logging_config import get_logger
+
+logger = get_logger(name=__name__)
+
+
+async def close_current(
+    conn,
+    table: Table,
+    key_columns: Union[Column, Sequence[Column]],
+    keys: Iterable,
+    tx_to: datetime,
+) -> int:
+    """Close the current rows (``tx_to IS NULL``) of ``table`` matching ``keys``.
+
+    Args:
+        conn: Connection inside the caller's transaction.
+        table: Temporal table with a ``tx_to`` column.
+        key_columns: Column to match, or several columns matched with OR
+            (e.g. both ends of an edge table).
+        keys: Key values; duplicates are dropped.
+        tx_to: Close timestamp.
+
+    The update locks rows in whatever order the plan visits them, not in
+    key order, so writers that may close overlapping keys concurrently
+    must be serialized by the caller (ingestions hold the ingestion lock).
+
+    Returns:
+        Number of rows closed.
+    """
+    key_list = sorted(set(keys))
+    if not key_list:
+        return 0
+    if isinstance(key_columns, Column):
+        key_columns = (key_columns,)
+
+    # Every column shares the one array; the columns are of the same type
+    param = bindparam("close_keys", value=key_list, type_=ARRAY(key_columns[0].type))
+    match = or_(*(col == any_(param) for col in key_columns))
+    result = await conn.execute(
+        update(table)
+        .where(table.c.tx_to.is_(None), match)
+        .values(tx_to=tx_to)
+    )
+    closed = max(result.rowcount or 0, 0)
+    logger.debug("Closed {} current rows in {} for {} keys", closed, table.name, len(key_list))
+    return closed
@@ -13,7 +13,7 @@ DATA_INGESTED_PATH/
 │   └── embeddings/
 ├── jobs/              PostgreSQL job tracking (managed by Alembic)
 ├── .tus_temp/         TUS temporary uploads
-└── .state/            Lock files
+└── .state/            Lock files + ingestion rollback records
 
 CONTEXT_PROVIDERS_PATH/
 ├── organization/      Org chart JSONL (date-partitioned)
@@ -50,6 +50,11 @@ def get_state_path() -> Path:
     return get_settings().data_ingested_path / STATE_DIR
 
 
+def get_ingestion_rollback_path(upload_id: str) -> Path:
+    """Get path for the compensating rollback record of a failed ingestion."""
+    return get_state_path() / f"ingestion_rollback_{upload_id}.json"
+
+
 # ── Data ingested path (controls + model runs) ───────────────────────
 
 def get_controls_path() -> Path:
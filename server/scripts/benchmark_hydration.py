@@ -0,0 +1,232 @@
+"""Benchmark search-page hydration: per-table queries vs one statement.
+
+Samples random current control_ids (biased towards Level 2 controls so
+the inherited parent L1 score is exercised), then hydrates pages of each
+size with the per-table loaders and with the single LATERAL / JSON
+statement, alternating the two so both see the same cache state, and
+prints p50 / p95 latency per page size. ``--check`` also asserts that
+both paths return identical documents.
+
+Usage:
+    python -m server.scripts.benchmark_hydration
+    python -m server.scripts.benchmark_hydration --page-sizes 25 50 100 --repeats 50 --check
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+
+def _normalized(item) -> Dict:
+    """Model dump with list order fixed (the per-table path returns rows unordered)."""
+    data = item.model_dump(mode="json")
+    for key, value in data["relationships"].items():
+        if isinstance(value, list):
+            value.sort(key=lambda v: v["id"])
+    return data
+
+
+async def _sample_ids(conn, limit: int) -> List[str]:
+    from sqlalchemy import func, select
+
+    from server.pipelines.controls.schema import src_controls_ver_control as ver_control
+
+    q = (
+        select(ver_control.c.ref_control_id)
+        .where(ver_control.c.tx_to.is_(None))
+        .order_by((ver_control.c.hierarchy_level == "Level 2").desc(), func.random())
+        .limit(limit)
+    )
+    return [row[0] for row in await conn.execute(q)]
+
+
+async def _load_controls(conn, control_ids: List[str]) -> Dict:
+    """Load core control fields from ver_control."""
+    from sqlalchemy import select
+
+    from server.explorer.controls.hydration import CONTROL_COLS
+    from server.explorer.shared.models import ControlResponse
+    from server.pipelines.controls.schema import src_controls_ver_control as ver_control
+
+    q = (
+        select(ver_control.c.ref_control_id, *(ver_control.c[col] for col in CONTROL_COLS))
+        .where(ver_control.c.tx_to.is_(None))
+        .where(ver_control.c.ref_control_id.in_(control_ids))
+    )
+    rows = (await conn.execute(q)).mappings().all()
+    return {
+        r["ref_control_id"]: ControlResponse(
+            control_id=r["ref_control_id"], **{col: r[col] for col in CONTROL_COLS},
+        )
+        for r in rows
+    }
+
+
+async def _hydrate_per_table(conn, control_ids: List[str], score_map: Dict[str, float]) -> List:
+    """Per-table hydration (one query per table, assembled in Python).
+
+    The search path's original implementation, superseded by ``hydrate_page``;
+    kept here as the baseline and the ``--check`` reference.
+    """
+    from server.explorer.controls.service import (
+        _build_parent_l1_score,
+        _load_enrichment,
+        _load_relationships,
+        _load_similar_controls,
+        _load_taxonomy,
+    )
+    from server.explorer.shared.models import (
+        AIEnrichmentResponse,
+        ControlRelationshipsResponse,
+        ControlWithDetailsResponse,
+    )
+
+    if not control_ids:
+        return []
+
+    # Run 5 queries in parallel
+    controls_task = _load_controls(conn, control_ids)
+    rels_task = _load_relationships(conn, control_ids)
+    enrichment_task = _load_enrichment(conn, control_ids)
+    taxonomy_task = _load_taxonomy(conn, control_ids)
+    similar_task = _load_similar_controls(conn, control_ids)
+
+    controls_map, rels_map, enrichment_map, taxonomy_map, similar_map = await asyncio.gather(
+        controls_task, rels_task, enrichment_task, taxonomy_task, similar_task,
+    )
+
+    # For L2 controls, load their parent's L1 enrichment so we can include
+    # the inherited 7W score regardless of whether the parent is on the page.
+    parent_l1_map: Dict = {}
+    parent_ids_needed: Dict[str, str] = {}  # child_cid → parent_cid
+    for cid in control_ids:
+        control = controls_map.get(cid)
+        if not control or control.hierarchy_level != "Level 2":
+            continue
+        rels = rels_map.get(cid)
+        if rels and rels.parent:
+            parent_id = rels.parent.id
+            # Check if parent enrichment is already loaded (parent on same page)
+            if parent_id in enrichment_map:
+                parent_l1_map[cid] = _build_parent_l1_score(parent_id, enrichment_map[parent_id])
+            else:
+                parent_ids_needed[cid] = parent_id
+
+    # Batch-load any missing parent enrichments
+    if parent_ids_needed:
+        unique_parent_ids = list(set(parent_ids_needed.values()))
+        parent_enrichments = await _load_enrichment(conn, unique_parent_ids)
+        for child_cid, parent_id in parent_ids_needed.items():
+            p_data = parent_enrichments.get(parent_id)
+            if p_data:
+                parent_l1_map[child_cid] = _build_parent_l1_score(parent_id, p_data)
+
+    # Assemble in original ranked order
+    items = []
+    for cid in control_ids:
+        control = controls_map.get(cid)
+        if not control:
+            continue
+
+        ai_data = enrichment_map.get(cid)
+        tax_data = taxonomy_map.get(cid)
+
+        ai_response = None
+        if ai_data or tax_data:
+            ai_response = AIEnrichmentResponse(
+                **(ai_data or {}),
+                **({"primary_risk_theme_id": tax_data.get("primary_risk_theme_id"),
+                    "secondary_risk_theme_id": tax_data.get("secondary_risk_theme_id")}
+                   if tax_data else {}),
+            )
+
+        items.append(ControlWithDetailsResponse(
+            control=control,
+            relationships=rels_map.get(cid, ControlRelationshipsResponse()),
+            ai=ai_response,
+            parent_l1_score=parent_l1_map.get(cid),
+            similar_controls=similar_map.get(cid, []),
+            search_score=score_map.get(cid),
+        ))
+
+    return items
+
+
+async def _time(fn, conn, ids: List[str], scores: Dict[str, float]) -> float:
+    t0 = time.perf_counter()
+    await fn(conn, ids, scores)
+    return time.perf_counter() - t0
+
+
+async def _run(page_sizes: List[int], repeats: int, check: bool, seed: int) -> List[Dict]:
+    from server.config.postgres import dispose_engine, get_engine, init_engine
+    from server.explorer.controls.hydration import hydrate_page
+    from server.settings import get_settings
+
+    settings = get_settings()
+    init_engine(settings.postgres_url, settings.postgres_pool_size, settings.postgres_max_overflow)
+    rng = random.Random(seed)
+    results = []
+    try:
+        async with get_engine().connect() as conn:
+            pool = await _sample_ids(conn, max(page_sizes) * 20)
+            if not pool:
+                raise SystemExit("No current controls to hydrate")
+            for size in page_sizes:
+                timings: Dict[str, List[float]] = {"per_table": [], "single": []}
+                for i in range(repeats):
+                    ids = rng.sample(pool, min(size, len(pool)))
+                    scores = {cid: 1.0 / (rank + 60) for rank, cid in enumerate(ids)}
+                    runs = [("per_table", _hydrate_per_table), ("single", hydrate_page)]
+                    if i % 2:
+                        runs.reverse()
+                    for name, fn in runs:
+                        timings[name].append(await _time(fn, conn, ids, scores))
+                    if check and i == 0:
+                        old = await _hydrate_per_table(conn, ids, scores)
+                        new = await hydrate_page(conn, ids, scores)
+                        assert [_normalized(x) for x in old] == [_normalized(x) for x in new], (
+                            f"page size {size}: hydration paths disagree"
+                        )
+                for name, values in timings.items():
+                    values.sort()
+                    results.append({
+                        "page_size": size,
+                        "path": name,
+                        "p50_ms": statistics.median(values) * 1000,
+                        "p95_ms": values[max(int(len(values) * 0.95) - 1, 0)] * 1000,
+                    })
+    finally:
+        await dispose_engine()
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m server.scripts.benchmark_hydration",
+        description="Compare per-table and single-statement hydration of search pages.",
+    )
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[25, 50, 100], help="Page sizes to measure.")
+    parser.add_argument("--repeats", type=int, default=30, help="Pages hydrated per size and path.")
+    parser.add_argument("--check", action="store_true", help="Assert both paths return the same documents.")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = asyncio.run(_run(args.page_sizes, args.repeats, args.check, args.seed))
+
+    print(f"\nrepeats={args.repeats}{' (checked)' if args.check else ''}")
+    print(f"{'page size':>10}{'path':>12}{'p50 ms':>9}{'p95 ms':>9}")
+    for r in results:
+        print(f"{r['page_size']:>10}{r['path']:>12}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
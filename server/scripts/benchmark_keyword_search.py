@@ -0,0 +1,189 @@
+"""Benchmark keyword search: per-field rank sum vs weighted combined tsvector.
+
+Generates a synthetic feature_prep-shaped corpus (Zipf-distributed
+control vocabulary, seven text fields) in a scratch table, builds both
+index layouts — one GIN index per field tsvector, as in
+ai_controls_model_feature_prep, and the weighted ``ts_combined`` vector
+with its single GIN index — then runs the same queries through:
+
+- per-field: OR of seven ``@@`` matches, ``ORDER BY`` the sum of seven
+  ``ts_rank`` values (the narrow-selection path of ``_search_by_keyword``);
+- combined: ``ts_combined @@ q ORDER BY ts_rank_cd(ts_combined, q)``;
+
+and prints p50 / p95 latency for each. The scratch table lives in its own
+schema and is dropped afterwards unless ``--keep`` is given.
+
+Usage:
+    python -m server.scripts.benchmark_keyword_search --rows 200000
+    python -m server.scripts.benchmark_keyword_search --rows 500000 --repeats 20 --keep
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+SEED = 42
+SCHEMA = "bench_fts"
+TABLE = f"{SCHEMA}.feature_prep"
+FIELDS = [
+    "control_title", "control_description", "what", "why", "where",
+    "evidence_description", "local_functional_information",
+]
+# Words per generated field value (min, max)
+FIELD_LENGTHS = {
+    "control_title": (4, 10),
+    "control_description": (30, 120),
+    "what": (15, 60),
+    "why": (15, 60),
+    "where": (10, 40),
+    "evidence_description": (20, 80),
+    "local_functional_information": (10, 50),
+}
+VOCABULARY = (
+    "access review reconciliation approval ledger evidence exception threshold segregation duties "
+    "payment vendor change management monthly quarterly daily annual manual automated preventative "
+    "detective escalation sign-off report variance journal entry account balance system user "
+    "privileged password firewall backup restore incident problem release deployment testing "
+    "validation completeness accuracy authorization custody valuation trade settlement collateral "
+    "margin liquidity capital risk limit breach monitoring surveillance sanctions screening onboarding "
+    "client kyc aml fraud complaint conduct policy procedure governance committee board oversight "
+    "audit finding remediation issue owner delegate assessor inventory asset depreciation tax "
+    "invoice purchase order receipt matching interface feed extract upload batch job schedule"
+).split()
+QUERIES = [
+    "access review", "reconciliation", "payment approval", "privileged user access",
+    "journal entry variance", "sanctions screening", "backup restore testing",
+    "trade settlement exception", "vendor invoice matching", "escalation", "kyc onboarding review",
+]
+WEIGHTS = {
+    "control_title": "A", "control_description": "B", "what": "C", "why": "C", "where": "C",
+    "evidence_description": "D", "local_functional_information": "D",
+}
+
+
+def _text(rng: random.Random, field: str) -> str:
+    lo, hi = FIELD_LENGTHS[field]
+    n = len(VOCABULARY)
+    # Zipf-ish: low indexes are much more frequent
+    return " ".join(VOCABULARY[min(int(rng.paretovariate(1.2)) - 1, n - 1)] for _ in range(rng.randint(lo, hi)))
+
+
+async def _generate(conn, rows: int, batch: int) -> float:
+    from sqlalchemy import text
+
+    rng = random.Random(SEED)
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    # "where" is a reserved word
+    quoted = [f'"{f}"' for f in FIELDS]
+    columns = ", ".join(f"{col} text" for col in quoted)
+    await conn.execute(text(f"CREATE TABLE {TABLE} (ref_control_id text PRIMARY KEY, {columns}, tx_to timestamptz)"))
+
+    started = time.perf_counter()
+    insert = text(
+        f"INSERT INTO {TABLE} (ref_control_id, {', '.join(quoted)}) "
+        f"VALUES (:id, {', '.join(':' + f for f in FIELDS)})"
+    )
+    for start in range(0, rows, batch):
+        await conn.execute(insert, [
+            {"id": f"CTRL-{i:08d}", **{f: _text(rng, f) for f in FIELDS}}
+            for i in range(start, min(start + batch, rows))
+        ])
+
+    per_field = ", ".join(f"ts_{f} = to_tsvector('english', coalesce(\"{f}\", ''))" for f in FIELDS)
+    combined = " || ".join(
+        f"setweight(to_tsvector('english', coalesce(\"{f}\", '')), '{WEIGHTS[f]}')" for f in FIELDS
+    )
+    await conn.execute(text(
+        f"ALTER TABLE {TABLE} " + ", ".join(f"ADD COLUMN ts_{f} tsvector" for f in FIELDS) + ", ADD COLUMN ts_combined tsvector"
+    ))
+    await conn.execute(text(f"UPDATE {TABLE} SET {per_field}, ts_combined = {combined}"))
+    for f in FIELDS:
+        await conn.execute(text(f"CREATE INDEX ON {TABLE} USING gin (ts_{f}) WHERE tx_to IS NULL"))
+    await conn.execute(text(f"CREATE INDEX ON {TABLE} USING gin (ts_combined) WHERE tx_to IS NULL"))
+    await conn.execute(text(f"ANALYZE {TABLE}"))
+    return time.perf_counter() - started
+
+
+def _queries(limit: int) -> Dict[str, str]:
+    q = "plainto_tsquery('english', :q)"
+    rank_sum = " + ".join(f"coalesce(ts_rank(ts_{f}, {q}), 0)" for f in FIELDS)
+    match_any = " OR ".join(f"ts_{f} @@ {q}" for f in FIELDS)
+    return {
+        "per_field": (
+            f"SELECT ref_control_id, {rank_sum} AS rank FROM {TABLE} "
+            f"WHERE tx_to IS NULL AND ({match_any}) ORDER BY rank DESC LIMIT {limit}"
+        ),
+        "combined": (
+            f"SELECT ref_control_id, ts_rank_cd(ts_combined, {q}) AS rank FROM {TABLE} "
+            f"WHERE tx_to IS NULL AND ts_combined @@ {q} ORDER BY rank DESC LIMIT {limit}"
+        ),
+    }
+
+
+async def _run(rows: int, repeats: int, limit: int, keep: bool) -> None:
+    from sqlalchemy import text
+
+    from server.config.postgres import dispose_engine, get_engine, init_engine
+    from server.settings import get_settings
+
+    settings = get_settings()
+    init_engine(settings.postgres_url, settings.postgres_pool_size, settings.postgres_max_overflow)
+    try:
+        async with get_engine().begin() as conn:
+            seconds = await _generate(conn, rows, batch=5_000)
+        print(f"\nGenerated {rows:,} rows and both index layouts in {seconds:.1f}s")
+
+        statements = {name: text(sql) for name, sql in _queries(limit).items()}
+        timings: Dict[str, List[float]] = {name: [] for name in statements}
+        async with get_engine().connect() as conn:
+            for query in QUERIES:  # warm-up
+                for stmt in statements.values():
+                    await conn.execute(stmt, {"q": query})
+            for i in range(repeats):
+                for query in QUERIES:
+                    order = list(statements.items())
+                    if i % 2:
+                        order.reverse()
+                    for name, stmt in order:
+                        t0 = time.perf_counter()
+                        (await conn.execute(stmt, {"q": query})).fetchall()
+                        timings[name].append(time.perf_counter() - t0)
+
+        print(f"queries={len(QUERIES)} repeats={repeats} limit={limit}")
+        print(f"{'path':>10}{'p50 ms':>9}{'p95 ms':>9}")
+        for name, values in timings.items():
+            values.sort()
+            p95 = values[max(int(len(values) * 0.95) - 1, 0)]
+            print(f"{name:>10}{statistics.median(values) * 1000:>9.2f}{p95 * 1000:>9.2f}")
+    finally:
+        if not keep:
+            async with get_engine().begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await dispose_engine()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m server.scripts.benchmark_keyword_search",
+        description="Compare per-field and combined weighted tsvector keyword search.",
+    )
+    parser.add_argument("--rows", type=int, default=200_000, help="Generated corpus size.")
+    parser.add_argument("--repeats", type=int, default=10, help="Passes over the query set.")
+    parser.add_argument("--limit", type=int, default=2000, help="Top-N per query (as in the explorer).")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    asyncio.run(_run(args.rows, args.repeats, args.limit, args.keep))
+
+
+if __name__ == "__main__":
+    main()
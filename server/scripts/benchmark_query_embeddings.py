@@ -0,0 +1,109 @@
+"""Benchmark query embedding latency and micro-batching.
+
+Fires bursts of concurrent ``embed_query`` calls with distinct queries
+(so every call misses the cache) and reports per-query latency
+percentiles and how many backend calls the micro-batcher made. The
+default ``hash`` backend needs no network, so runs are reproducible;
+pass ``--backend openai`` to measure the real upstream. Redis is not
+initialized, so only the in-process cache takes part.
+
+Usage:
+    python -m server.scripts.benchmark_query_embeddings --queries 2000 --concurrency 64
+    python -m server.scripts.benchmark_query_embeddings --window-ms 0 2 5 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List, Optional
+
+SEED_WORDS = (
+    "access", "review", "reconciliation", "approval", "ledger", "evidence", "exception",
+    "threshold", "segregation", "duties", "payment", "vendor", "change", "management",
+)
+
+
+def _queries(count: int, offset: int) -> List[str]:
+    n = len(SEED_WORDS)
+    return [
+        f"{SEED_WORDS[i % n]} {SEED_WORDS[(i // n) % n]} control {offset + i}"
+        for i in range(count)
+    ]
+
+
+async def _run_window(window_ms: float, queries: int, concurrency: int, offset: int) -> Dict:
+    from server.explorer.shared import embeddings
+    from server.explorer.shared.embedding_providers import load_embedding_backend
+    from server.settings import get_settings
+
+    await load_embedding_backend()
+    settings = get_settings()
+    settings.query_embedding_batch_window_ms = window_ms
+    embeddings._lru.clear()
+    batcher = embeddings._batcher
+    batches_before = batcher.batches
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def _one(text: str) -> None:
+        async with semaphore:
+            t0 = time.perf_counter()
+            await embeddings.embed_query(text)
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_one(q) for q in _queries(queries, offset)))
+    seconds = time.perf_counter() - t0
+
+    latencies.sort()
+    batches = batcher.batches - batches_before
+    return {
+        "window_ms": window_ms,
+        "seconds": seconds,
+        "qps": queries / seconds if seconds > 0 else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "batches": batches,
+        "avg_batch": queries / batches if batches else 0.0,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m server.scripts.benchmark_query_embeddings",
+        description="Measure query embedding latency and micro-batching.",
+    )
+    parser.add_argument("--backend", choices=("hash", "openai", "sentence-transformers"), default="hash")
+    parser.add_argument("--queries", type=int, default=1000, help="Distinct queries per window setting.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent in-flight queries.")
+    parser.add_argument("--window-ms", type=float, nargs="+", default=[0.0, 5.0], help="Batch windows to compare.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+
+    from server.explorer.shared.embedding_providers import get_embedding_backend
+    from server.settings import get_settings
+
+    get_settings().query_embedding_backend = args.backend
+    get_embedding_backend.cache_clear()
+
+    results = [
+        asyncio.run(_run_window(window, args.queries, args.concurrency, offset=i * args.queries))
+        for i, window in enumerate(args.window_ms)
+    ]
+
+    print(f"\nbackend={args.backend} queries={args.queries:,} concurrency={args.concurrency}")
+    print(f"{'window ms':>10}{'seconds':>10}{'queries/s':>12}{'p50 ms':>9}{'p95 ms':>9}{'calls':>8}{'avg batch':>11}")
+    for r in results:
+        print(f"{r['window_ms']:>10.1f}{r['seconds']:>10.2f}{r['qps']:>12,.0f}{r['p50_ms']:>9.2f}"
+              f"{r['p95_ms']:>9.2f}{r['batches']:>8,}{r['avg_batch']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
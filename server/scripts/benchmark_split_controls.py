@@ -0,0 +1,238 @@
+"""Benchmark the pandas and streaming enterprise-CSV splitters.
+
+Generates a synthetic enterprise-format controls extract (blank preamble,
+timestamp row, header with a blank leading column, quoted multiline
+free-text cells) and runs each splitter in a fresh process so peak RSS is
+measured per mode, then prints rows/s, wall time and peak RSS.
+
+Usage:
+    python -m server.scripts.benchmark_split_controls --rows 500000
+    python -m server.scripts.benchmark_split_controls --input extract.csv --modes streaming-csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import multiprocessing
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SEED = 42
+DEFAULT_ROWS = 200_000
+MODES = ("pandas", "streaming-csv", "streaming-parquet")
+
+_MULTI_VALUE_COLUMNS = [
+    "category_flags",
+    "sox_assertions",
+    "risk_themes",
+    "risk_theme_taxonomy_numbers",
+    "risk_theme_numbers",
+    "related_function_ids",
+    "related_function_names",
+    "related_functions_comments",
+    "related_location_ids",
+    "related_location_names",
+    "related_locations_comments",
+]
+
+_BOOL_COLUMNS = {
+    "key_control", "four_eyes_check", "performance_measures_required", "is_assessor_control_owner",
+    "sox_relevant", "ccar_relevant", "bcbs239_relevant", "ey_reliant",
+}
+
+
+# ---------------------------------------------------------------------------
+# Extract generator
+# ---------------------------------------------------------------------------
+
+def _extract_columns() -> List[str]:
+    from server.pipelines.controls.upload.split_controls import (
+        CONTROLS_MAIN_COLUMNS,
+        FUNCTION_HIERARCHY_COLUMNS,
+        LOCATION_HIERARCHY_COLUMNS,
+        METADATA_COLUMNS,
+    )
+
+    return (
+        CONTROLS_MAIN_COLUMNS + FUNCTION_HIERARCHY_COLUMNS + LOCATION_HIERARCHY_COLUMNS
+        + METADATA_COLUMNS + _MULTI_VALUE_COLUMNS
+    )
+
+
+_MULTILINE_COLUMNS = {"control_description", "evidence_description", "local_functional_information"}
+
+_WORDS = (
+    "control", "review", "reconciliation", "approval", "monthly", "quarterly", "access", "ledger",
+    "evidence", "exception", "threshold", "report", "system", "owner", "sign-off", "variance",
+)
+
+
+def _cell(rng: random.Random, column: str, i: int, n_level1: int) -> str:
+    if column == "control_id":
+        return f"CTRL-{i:010d}"
+    if column == "parent_control_id":
+        return f"CTRL-{rng.randint(1, n_level1):010d}" if i > n_level1 else ""
+    if column == "hierarchy_level":
+        return "Level 1" if i <= n_level1 else "Level 2"
+    if column == "control_administrator_gpn":
+        return ""  # filled in parallel with control_administrator
+    if column in _BOOL_COLUMNS:
+        return rng.choice(("Yes", "No", ""))
+    if column.endswith("_id"):
+        return f"{column[:3].upper()}{rng.randint(1, 20000):06d}"
+    if column == "control_title":
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 60)))
+    if column in _MULTILINE_COLUMNS:
+        # Quoted multiline cells, as in real extracts (see mock_generator._make_multiline)
+        return "\n".join(
+            f"({section}) " + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 15)))
+            for section in ("WHEN", "WHO", "WHAT", "WHY")
+        )
+    if column == "category_flags":
+        return ", ".join(rng.sample(("SOX", "CCAR", "BCBS239", "Regulatory", "Financial"), k=rng.randint(0, 3)))
+    if column == "sox_assertions":
+        return ", ".join(rng.sample(("Existence", "Completeness", "Valuation", "Presentation"), k=rng.randint(0, 2)))
+    if column in ("risk_themes", "risk_theme_taxonomy_numbers", "risk_theme_numbers"):
+        return ", ".join(f"{column[:4]}{k}" for k in range(1 + i % 3))
+    if column.startswith("related_") and not column.endswith("comments"):
+        return ", ".join(f"{column[8:11].upper()}{rng.randint(1, 20000):06d}" for _ in range(i % 4))
+    return rng.choice(_WORDS) if rng.random() > 0.3 else ""
+
+
+def generate_enterprise_csv(out_path: Path, *, rows: int, seed: int = SEED) -> Path:
+    """Write a synthetic enterprise-format extract with *rows* controls."""
+    rng = random.Random(seed)
+    columns = _extract_columns()
+    admin_idx = columns.index("control_administrator")
+    gpn_idx = columns.index("control_administrator_gpn")
+    n_level1 = max(1, rows // 5)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", newline="", encoding="utf-8") as f:
+        f.write("\n" * 9)
+        f.write(f"Extracted on {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        writer = csv.writer(f)
+        writer.writerow([""] + columns)
+        for i in range(1, rows + 1):
+            row = [_cell(rng, col, i, n_level1) for col in columns]
+            if row[admin_idx]:
+                row[gpn_idx] = f"{rng.randint(0, 99999999):08d}"
+            writer.writerow([""] + row)
+    return out_path
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_mode(mode: str, input_path: str, work_dir: str, block_size: int, queue) -> None:
+    """Run one splitter in a child process and report timing + peak RSS."""
+    out_dir = Path(work_dir) / mode
+    baseline = _peak_rss_mb()
+    t0 = time.perf_counter()
+    if mode == "pandas":
+        from server.pipelines.controls.upload.split_controls import split_controls_csv
+
+        tables = split_controls_csv(Path(input_path), out_dir)
+        rows = len(tables["controls_main"])
+    else:
+        from server.pipelines.controls.upload.stream_split import split_controls_csv_streaming
+
+        result = split_controls_csv_streaming(
+            Path(input_path),
+            out_dir,
+            jsonl_path=out_dir / "controls.jsonl",
+            output_format=mode.split("-", 1)[1],
+            block_size=block_size,
+        )
+        rows = result.rows
+    seconds = time.perf_counter() - t0
+    queue.put({
+        "mode": mode,
+        "rows": rows,
+        "seconds": seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+        "baseline_rss_mb": baseline,
+    })
+
+
+def run_benchmark(input_path: Path, modes: List[str], block_size: int) -> List[Dict]:
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    work_dir = Path(tempfile.mkdtemp(prefix="split_bench_"))
+    try:
+        for mode in modes:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_mode, args=(mode, str(input_path), str(work_dir), block_size, queue))
+            proc.start()
+            proc.join()
+            if proc.exitcode != 0:
+                print(f"{mode}: failed (exit code {proc.exitcode})", file=sys.stderr)
+                continue
+            results.append(queue.get())
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m server.scripts.benchmark_split_controls",
+        description="Compare throughput and peak memory of the enterprise CSV splitters.",
+    )
+    parser.add_argument("--input", type=Path, default=None, help="Existing extract (skips generation).")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="Rows in the generated extract.")
+    parser.add_argument("--seed", type=int, default=SEED, help="RNG seed.")
+    parser.add_argument(
+        "--modes", nargs="+", choices=MODES, default=list(MODES), help="Splitters to run.",
+    )
+    parser.add_argument("--block-size-mb", type=int, default=8, help="Streaming reader block size (MiB).")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated extract.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+
+    generated = args.input is None
+    if generated:
+        input_path = Path(tempfile.mkdtemp(prefix="split_bench_src_")) / "controls_extract.csv"
+        t0 = time.perf_counter()
+        generate_enterprise_csv(input_path, rows=args.rows, seed=args.seed)
+        print(f"Generated {args.rows:,} rows ({input_path.stat().st_size / 2**20:,.1f} MiB) "
+              f"in {time.perf_counter() - t0:.1f}s -> {input_path}")
+    else:
+        input_path = args.input.resolve()
+
+    size_mb = input_path.stat().st_size / 2**20
+    try:
+        results = run_benchmark(input_path, args.modes, args.block_size_mb * 1024 * 1024)
+    finally:
+        if generated and not args.keep:
+            shutil.rmtree(input_path.parent, ignore_errors=True)
+
+    print(f"\n{'mode':<20}{'rows':>12}{'seconds':>10}{'rows/s':>12}{'MiB/s':>9}{'peak RSS MiB':>14}")
+    for r in results:
+        rate = r["rows"] / r["seconds"] if r["seconds"] > 0 else 0.0
+        mib_s = f"{size_mb / r['seconds']:.1f}" if r["seconds"] > 0 else "-"
+        print(f"{r['mode']:<20}{r['rows']:>12,}{r['seconds']:>10.2f}{rate:>12,.0f}{mib_s:>9}"
+              f"{r['peak_rss_mb']:>14,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Benchmark control ID typeahead lookups.
+
+Generates a synthetic current-controls table (CTRL-########## IDs and
+short titles) in a scratch schema with the same pg_trgm GIN indexes as
+src_controls_ver_control, then times:
+
+- memory_prefix: ``FacetIndex.id_prefix`` on the in-process sorted ID array;
+- sql_prefix: ``ILIKE 'prefix%'`` served by the trigram index;
+- sql_fuzzy: substring / ``%`` similarity on IDs plus ``<%`` word
+  similarity on titles, for bare numbers and mistyped IDs;
+
+over a mix of partial IDs, bare numbers and typos, and prints p50 / p99
+latency for each. The scratch schema is dropped afterwards unless
+``--keep`` is given.
+
+Usage:
+    python -m server.scripts.benchmark_typeahead --rows 200000
+    python -m server.scripts.benchmark_typeahead --rows 500000 --lookups 2000 --keep
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+SEED = 42
+SCHEMA = "bench_typeahead"
+TABLE = f"{SCHEMA}.ver_control"
+TITLE_WORDS = (
+    "access review reconciliation approval payment vendor change monthly quarterly privileged "
+    "backup restore journal entry variance sanctions screening trade settlement invoice matching"
+).split()
+
+
+def _control_id(n: int) -> str:
+    return f"CTRL-{n:010d}"
+
+
+def _typo(rng: random.Random, value: str) -> str:
+    i = rng.randrange(5, len(value) - 1)
+    if rng.random() < 0.5:
+        return value[:i] + value[i + 1] + value[i] + value[i + 2:]  # transposition
+    return value[:i] + value[i + 1:]  # deletion
+
+
+def _lookups(rng: random.Random, rows: int, count: int) -> Dict[str, List[str]]:
+    """Prefix queries and fuzzy queries (bare numbers, typos, title words)."""
+    prefixes, fuzzy = [], []
+    for _ in range(count):
+        cid = _control_id(rng.randrange(1, rows + 1))
+        prefixes.append(cid[:rng.randint(8, len(cid))])
+        kind = rng.random()
+        if kind < 0.4:
+            fuzzy.append(cid[-rng.randint(4, 7):])
+        elif kind < 0.8:
+            fuzzy.append(_typo(rng, cid))
+        else:
+            fuzzy.append(" ".join(rng.sample(TITLE_WORDS, 2)))
+    return {"prefix": prefixes, "fuzzy": fuzzy}
+
+
+async def _generate(conn, rows: int, batch: int) -> float:
+    from sqlalchemy import text
+
+    rng = random.Random(SEED)
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    await conn.execute(text(
+        f"CREATE TABLE {TABLE} (ref_control_id text NOT NULL, control_title text, tx_to timestamptz)"
+    ))
+
+    started = time.perf_counter()
+    insert = text(f"INSERT INTO {TABLE} (ref_control_id, control_title) VALUES (:id, :title)")
+    for start in range(1, rows + 1, batch):
+        await conn.execute(insert, [
+            {"id": _control_id(n), "title": " ".join(rng.choices(TITLE_WORDS, k=rng.randint(3, 8)))}
+            for n in range(start, min(start + batch, rows + 1))
+        ])
+    for col in ("ref_control_id", "control_title"):
+        await conn.execute(text(
+            f"CREATE INDEX ON {TABLE} USING gin ({col} gin_trgm_ops) WHERE tx_to IS NULL"
+        ))
+    await conn.execute(text(f"ANALYZE {TABLE}"))
+    return time.perf_counter() - started
+
+
+def _memory_index(rows: int):
+    import numpy as np
+
+    from server.explorer.controls.facet_index import FacetIndex
+
+    control_ids = [None] + [_control_id(n) for n in range(1, rows + 1)]
+    started = time.perf_counter()
+    index = FacetIndex(
+        generation=0,
+        control_ids=control_ids,
+        columns={"current": np.array([cid is not None for cid in control_ids])},
+        relations={},
+        risk_themes={},
+        descendants={},
+        au_nodes={},
+        ce_links={},
+        build_seconds=0.0,
+    )
+    return index, time.perf_counter() - started
+
+
+def _percentiles(values: List[float]) -> tuple[float, float]:
+    values = sorted(values)
+    p99 = values[max(int(len(values) * 0.99) - 1, 0)]
+    return statistics.median(values) * 1000, p99 * 1000
+
+
+async def _run(rows: int, lookups: int, limit: int, keep: bool) -> None:
+    from sqlalchemy import text
+
+    from server.config.postgres import dispose_engine, get_engine, init_engine
+    from server.settings import get_settings
+
+    settings = get_settings()
+    init_engine(settings.postgres_url, settings.postgres_pool_size, settings.postgres_max_overflow)
+    queries = _lookups(random.Random(SEED + 1), rows, lookups)
+    timings: Dict[str, List[float]] = {"memory_prefix": [], "sql_prefix": [], "sql_fuzzy": []}
+    try:
+        async with get_engine().begin() as conn:
+            seconds = await _generate(conn, rows, batch=5_000)
+        print(f"\nGenerated {rows:,} controls and trigram indexes in {seconds:.1f}s")
+
+        index, build_seconds = _memory_index(rows)
+        print(f"In-process prefix index: {index.id_key_seqs.nbytes / 2**20:.1f} MiB seqs, built in {build_seconds * 1000:.0f} ms")
+        for prefix in queries["prefix"]:
+            t0 = time.perf_counter()
+            index.id_prefix(prefix, limit=limit)
+            timings["memory_prefix"].append(time.perf_counter() - t0)
+
+        sql_prefix = text(
+            f"SELECT ref_control_id FROM {TABLE} WHERE tx_to IS NULL AND ref_control_id ILIKE :p "
+            f"ORDER BY ref_control_id LIMIT {limit}"
+        )
+        sql_fuzzy = text(
+            f"SELECT ref_control_id, control_title, "
+            f"greatest(similarity(ref_control_id, :q), word_similarity(:q, control_title)) AS score "
+            f"FROM {TABLE} WHERE tx_to IS NULL AND (ref_control_id ILIKE :sub OR ref_control_id % :q "
+            f"OR :q <% control_title) "
+            f"ORDER BY ref_control_id ILIKE :sub DESC, score DESC LIMIT {limit}"
+        )
+        async with get_engine().connect() as conn:
+            for prefix in queries["prefix"][:20]:  # warm-up
+                await conn.execute(sql_prefix, {"p": prefix + "%"})
+            for prefix in queries["prefix"]:
+                t0 = time.perf_counter()
+                (await conn.execute(sql_prefix, {"p": prefix + "%"})).fetchall()
+                timings["sql_prefix"].append(time.perf_counter() - t0)
+            for q in queries["fuzzy"]:
+                t0 = time.perf_counter()
+                (await conn.execute(sql_fuzzy, {"q": q, "sub": f"%{q}%"})).fetchall()
+                timings["sql_fuzzy"].append(time.perf_counter() - t0)
+
+        print(f"lookups={lookups} limit={limit}")
+        print(f"{'path':>14}{'p50 ms':>9}{'p99 ms':>9}")
+        for name, values in timings.items():
+            p50, p99 = _percentiles(values)
+            print(f"{name:>14}{p50:>9.3f}{p99:>9.3f}")
+    finally:
+        if not keep:
+            async with get_engine().begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await dispose_engine()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m server.scripts.benchmark_typeahead",
+        description="Measure in-process prefix and pg_trgm control ID lookup latency.",
+    )
+    parser.add_argument("--rows", type=int, default=200_000, help="Generated controls.")
+    parser.add_argument("--lookups", type=int, default=1000, help="Queries per path.")
+    parser.add_argument("--limit", type=int, default=10, help="Suggestions per query (as in the typeahead).")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    asyncio.run(_run(args.rows, args.lookups, args.limit, args.keep))
+
+
+if __name__ == "__main__":
+    main()
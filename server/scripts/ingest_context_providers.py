@@ -5,10 +5,19 @@ hierarchies, risk-theme taxonomies, and assessment units) from
 date-partitioned JSONL files.
 
 Supports delta detection: compares file contents against the current DB
-state and creates / closes / updates version records accordingly.
+state and creates / closes / updates version records accordingly. The
+default engine diffs in Python; ``--delta-engine sql`` COPYs each file into
+temporary staging tables and computes the delta set-based in PostgreSQL,
+with ``--verify-delta`` checking it against the Python diff before writing.
+
+After each org tree, the descendant closure (src_orgs_rel_closure) is
+refreshed for the nodes whose child edges changed; ``--rebuild-org-closure``
+recomputes it for every tree instead.
 
 Usage:
     python -m server.scripts.ingest_context_providers
+    python -m server.scripts.ingest_context_providers --delta-engine sql --verify-delta
+    python -m server.scripts.ingest_context_providers --rebuild-org-closure
 
 Reads CONTEXT_PROVIDERS_PATH from .env by default. Override with --context-providers-path.
 
@@ -33,13 +42,37 @@ import argparse
 import asyncio
 import hashlib
 import sys
-from dataclasses import dataclass, field
+import time
+from dataclasses import dataclass, field, fields
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 import orjson
-from sqlalchemy import func, insert, update, select, and_
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    MetaData,
+    Table,
+    Text,
+    and_,
+    case,
+    exists,
+    false,
+    func,
+    insert,
+    literal,
+    literal_column,
+    not_,
+    null,
+    or_,
+    select,
+    text,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, array
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncEngine
 
@@ -54,6 +87,7 @@ logger = get_logger(name=__name__)
 # PostgreSQL config + schema table objects
 # ---------------------------------------------------------------------------
 from server.config.postgres import init_engine, get_engine, dispose_engine  # noqa: E402
+from server.pipelines.orgs.closure import refresh_org_closure  # noqa: E402
 from server.pipelines.orgs.schema import (  # noqa: E402
     src_orgs_ref_node,
     src_orgs_ver_function,
@@ -73,6 +107,7 @@ from server.pipelines.assessment_units.schema import (  # noqa: E402
     src_au_ref_unit,
     src_au_ver_unit,
 )
+from server.pipelines.schema.temporal import close_current  # noqa: E402
 from server.settings import get_settings  # noqa: E402
 
 # ---------------------------------------------------------------------------
@@ -419,20 +454,27 @@ async def _execute_batch(
     ref_inserts: List[Dict[str, Any]],
     ver_inserts: List[Dict[str, Any]],
     edge_inserts: List[Dict[str, Any]],
-    ver_close_stmts: List[Any],
-    edge_close_stmts: List[Any],
+    ver_close_ids: List[str],
+    edge_close_parent_ids: List[str],
+    edge_close_node_ids: List[str],
     ref_table,
     ver_table,
     edge_table,
     stats: IngestionStats,
     label: str,
     dry_run: bool = False,
+    close_tx: Optional[datetime] = None,
 ) -> None:
     """Execute a batch of inserts and updates within a single transaction.
 
+    Closes are set-based (one array-parameter UPDATE per kind, at ``close_tx``):
+    current versions of ``ver_close_ids``, child edges of
+    ``edge_close_parent_ids`` and edges on either end of ``edge_close_node_ids``.
+
     On dry_run, just log counts.
     """
-    total = len(ref_inserts) + len(ver_inserts) + len(edge_inserts) + len(ver_close_stmts) + len(edge_close_stmts)
+    num_closes = len(ver_close_ids) + len(edge_close_parent_ids) + len(edge_close_node_ids)
+    total = len(ref_inserts) + len(ver_inserts) + len(edge_inserts) + num_closes
     if total == 0:
         return
     if dry_run:
@@ -440,9 +482,11 @@ async def _execute_batch(
             "[DRY RUN] [{}] ref_inserts={}, ver_inserts={}, edge_inserts={}, "
             "ver_closes={}, edge_closes={}",
             label, len(ref_inserts), len(ver_inserts), len(edge_inserts),
-            len(ver_close_stmts), len(edge_close_stmts),
+            len(ver_close_ids), len(edge_close_parent_ids) + len(edge_close_node_ids),
         )
         return
+    if num_closes and close_tx is None:
+        raise ValueError(f"[{label}] close_tx is required when closing rows")
 
     try:
         async with engine.begin() as conn:
@@ -466,12 +510,14 @@ async def _execute_batch(
                     await conn.execute(stmt, batch)
 
             # 2. Close old versions (UPDATE tx_to)
-            for close_stmt in ver_close_stmts:
-                await conn.execute(close_stmt)
+            await close_current(conn, ver_table, ver_table.c.ref_node_id, ver_close_ids, close_tx)
 
             # 3. Close old edges (UPDATE tx_to)
-            for close_stmt in edge_close_stmts:
-                await conn.execute(close_stmt)
+            await close_current(conn, edge_table, edge_table.c.in_node_id, edge_close_parent_ids, close_tx)
+            await close_current(
+                conn, edge_table, (edge_table.c.in_node_id, edge_table.c.out_node_id),
+                edge_close_node_ids, close_tx,
+            )
 
             # 4. Insert new versions
             if ver_inserts:
@@ -495,12 +541,51 @@ async def _execute_batch(
 # Org ingestion
 # ---------------------------------------------------------------------------
 
+def _parse_org_rows(tree: str, rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Build the file-side lookup ``{source_id: node}`` for one org tree.
+
+    Later rows win for duplicate ids.
+    """
+    cfg = TREE_CONFIGS[tree]
+    id_field = cfg.get("id_field", "id")
+    file_nodes: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        sid = str(row.get(id_field, "")).strip()
+        if not sid:
+            continue
+        raw_name = row.get(cfg["name_field"])
+        names = _normalise_names(raw_name)
+        status = _normalise_str(row.get(cfg["status_field"]))
+        children = set()
+        for child_id in (row.get("out_id") or []):
+            child_id_str = str(child_id).strip()
+            if child_id_str:
+                children.add(child_id_str)
+        file_nodes[sid] = {
+            "names": names,
+            "status": status,
+            "children": children,
+            "node_type": _normalise_str(row.get("id_type")),
+            "raw_name": raw_name,
+        }
+    return file_nodes
+
+
+def _org_node_changes(file_node: Dict[str, Any], db_node: Dict[str, Any]) -> Tuple[bool, bool]:
+    """Return ``(changed, children_changed)`` for a node present in file and DB."""
+    names_changed = file_node["names"] != db_node.get("names", set())
+    status_changed = file_node["status"] != db_node.get("status")
+    children_changed = file_node["children"] != db_node.get("children", set())
+    return names_changed or status_changed or children_changed, children_changed
+
+
 async def ingest_org_tree(
     engine: AsyncEngine,
     tree: str,
     date_dir: Path,
     stats: IngestionStats,
     dry_run: bool,
+    rebuild_closure: bool = False,
 ) -> None:
     """Ingest one org tree (function / location / consolidated)."""
     cfg = TREE_CONFIGS[tree]
@@ -520,27 +605,7 @@ async def ingest_org_tree(
     logger.info("Loaded {} rows for tree '{}'", len(rows), tree)
 
     # Build file-side lookup: source_id -> row data
-    id_field = cfg.get("id_field", "id")
-    file_nodes: Dict[str, Dict[str, Any]] = {}
-    for row in rows:
-        sid = str(row.get(id_field, "")).strip()
-        if not sid:
-            continue
-        raw_name = row.get(cfg["name_field"])
-        names = _normalise_names(raw_name)
-        status = _normalise_str(row.get(cfg["status_field"]))
-        children = set()
-        for child_id in (row.get("out_id") or []):
-            child_id_str = str(child_id).strip()
-            if child_id_str:
-                children.add(child_id_str)
-        file_nodes[sid] = {
-            "names": names,
-            "status": status,
-            "children": children,
-            "node_type": _normalise_str(row.get("id_type")),
-            "raw_name": raw_name,
-        }
+    file_nodes = _parse_org_rows(tree, rows)
 
     # 2. Load DB current state
     db_nodes = await _get_current_org_nodes(engine, tree, ver_table, cfg["name_is_set"])
@@ -563,6 +628,8 @@ async def ingest_org_tree(
     ref_inserts: List[Dict[str, Any]] = []
     ver_inserts: List[Dict[str, Any]] = []
     edge_inserts: List[Dict[str, Any]] = []
+    # Nodes whose child edges are opened or closed (closure refresh scope)
+    closure_touched: Set[str] = {_node_id(tree, sid) for sid in new_ids | disappeared_ids}
 
     for sid in new_ids:
         node = file_nodes[sid]
@@ -618,7 +685,7 @@ async def ingest_org_tree(
 
         if len(ref_inserts) + len(ver_inserts) + len(edge_inserts) >= BATCH_SIZE:
             await _execute_batch(
-                engine, ref_inserts, ver_inserts, edge_inserts, [], [],
+                engine, ref_inserts, ver_inserts, edge_inserts, [], [], [],
                 src_orgs_ref_node, ver_table, src_orgs_rel_child,
                 stats, f"new-{tree}", dry_run,
             )
@@ -627,7 +694,7 @@ async def ingest_org_tree(
             edge_inserts.clear()
 
     await _execute_batch(
-        engine, ref_inserts, ver_inserts, edge_inserts, [], [],
+        engine, ref_inserts, ver_inserts, edge_inserts, [], [], [],
         src_orgs_ref_node, ver_table, src_orgs_rel_child,
         stats, f"new-{tree}", dry_run,
     )
@@ -639,18 +706,15 @@ async def ingest_org_tree(
     # 4. DISAPPEARED nodes – close current ver, create Inactive ver,
     #    close child edges
     # ------------------------------------------------------------------
-    ver_close_stmts: List[Any] = []
-    edge_close_stmts: List[Any] = []
+    ver_close_ids: List[str] = []
+    edge_close_parent_ids: List[str] = []
+    edge_close_node_ids: List[str] = []
 
     for sid in disappeared_ids:
         nid = _node_id(tree, sid)
 
         # Close current version
-        ver_close_stmts.append(
-            update(ver_table)
-            .where(and_(ver_table.c.ref_node_id == nid, ver_table.c.tx_to.is_(None)))
-            .values(tx_to=now_dt)
-        )
+        ver_close_ids.append(nid)
 
         # Create new Inactive version
         if cfg["name_is_set"]:
@@ -672,76 +736,48 @@ async def ingest_org_tree(
                 "tx_to": None,
             })
 
-        # Close child edges where this node is parent
-        edge_close_stmts.append(
-            update(src_orgs_rel_child)
-            .where(and_(
-                src_orgs_rel_child.c.in_node_id == nid,
-                src_orgs_rel_child.c.tx_to.is_(None),
-            ))
-            .values(tx_to=now_dt)
-        )
-        # Close child edges where this node is child
-        edge_close_stmts.append(
-            update(src_orgs_rel_child)
-            .where(and_(
-                src_orgs_rel_child.c.out_node_id == nid,
-                src_orgs_rel_child.c.tx_to.is_(None),
-            ))
-            .values(tx_to=now_dt)
-        )
+        # Close child edges where this node is parent or child
+        edge_close_node_ids.append(nid)
 
         stats.disappeared += 1
 
-        if len(ver_inserts) + len(ver_close_stmts) + len(edge_close_stmts) >= BATCH_SIZE:
+        if len(ver_inserts) + len(ver_close_ids) + len(edge_close_node_ids) >= BATCH_SIZE:
             await _execute_batch(
-                engine, [], ver_inserts, [], ver_close_stmts, edge_close_stmts,
+                engine, [], ver_inserts, [], ver_close_ids, [], edge_close_node_ids,
                 src_orgs_ref_node, ver_table, src_orgs_rel_child,
-                stats, f"disappeared-{tree}", dry_run,
+                stats, f"disappeared-{tree}", dry_run, close_tx=now_dt,
             )
             ver_inserts.clear()
-            ver_close_stmts.clear()
-            edge_close_stmts.clear()
+            ver_close_ids.clear()
+            edge_close_node_ids.clear()
 
     await _execute_batch(
-        engine, [], ver_inserts, [], ver_close_stmts, edge_close_stmts,
+        engine, [], ver_inserts, [], ver_close_ids, [], edge_close_node_ids,
         src_orgs_ref_node, ver_table, src_orgs_rel_child,
-        stats, f"disappeared-{tree}", dry_run,
+        stats, f"disappeared-{tree}", dry_run, close_tx=now_dt,
     )
     ver_inserts.clear()
-    ver_close_stmts.clear()
-    edge_close_stmts.clear()
+    ver_close_ids.clear()
+    edge_close_node_ids.clear()
 
     # ------------------------------------------------------------------
     # 5. EXISTING – compare and update if changed
     # ------------------------------------------------------------------
     for sid in common_ids:
         file_node = file_nodes[sid]
-        db_node = db_nodes[sid]
-
         file_names = file_node["names"]
-        db_names = db_node.get("names", set())
         file_status = file_node["status"]
-        db_status = db_node.get("status")
         file_children = file_node["children"]
-        db_children = db_node.get("children", set())
-
-        names_changed = file_names != db_names
-        status_changed = file_status != db_status
-        children_changed = file_children != db_children
 
-        if not (names_changed or status_changed or children_changed):
+        changed, children_changed = _org_node_changes(file_node, db_nodes[sid])
+        if not changed:
             stats.unchanged += 1
             continue
 
         nid = _node_id(tree, sid)
 
         # Close old version
-        ver_close_stmts.append(
-            update(ver_table)
-            .where(and_(ver_table.c.ref_node_id == nid, ver_table.c.tx_to.is_(None)))
-            .values(tx_to=now_dt)
-        )
+        ver_close_ids.append(nid)
 
         # Create new version
         if cfg["name_is_set"]:
@@ -763,14 +799,8 @@ async def ingest_org_tree(
 
         if children_changed:
             # Close all current child edges for this parent
-            edge_close_stmts.append(
-                update(src_orgs_rel_child)
-                .where(and_(
-                    src_orgs_rel_child.c.in_node_id == nid,
-                    src_orgs_rel_child.c.tx_to.is_(None),
-                ))
-                .values(tx_to=now_dt)
-            )
+            edge_close_parent_ids.append(nid)
+            closure_touched.add(nid)
             # Re-create child edges from file
             for child_sid in file_children:
                 child_nid = _node_id(tree, child_sid)
@@ -791,26 +821,40 @@ async def ingest_org_tree(
 
         stats.changed += 1
 
-        if len(ref_inserts) + len(ver_inserts) + len(edge_inserts) + len(ver_close_stmts) + len(edge_close_stmts) >= BATCH_SIZE:
+        if len(ref_inserts) + len(ver_inserts) + len(edge_inserts) + len(ver_close_ids) + len(edge_close_parent_ids) >= BATCH_SIZE:
             await _execute_batch(
                 engine, ref_inserts, ver_inserts, edge_inserts,
-                ver_close_stmts, edge_close_stmts,
+                ver_close_ids, edge_close_parent_ids, [],
                 src_orgs_ref_node, ver_table, src_orgs_rel_child,
-                stats, f"existing-{tree}", dry_run,
+                stats, f"existing-{tree}", dry_run, close_tx=now_dt,
             )
             ref_inserts.clear()
             ver_inserts.clear()
             edge_inserts.clear()
-            ver_close_stmts.clear()
-            edge_close_stmts.clear()
+            ver_close_ids.clear()
+            edge_close_parent_ids.clear()
 
     await _execute_batch(
         engine, ref_inserts, ver_inserts, edge_inserts,
-        ver_close_stmts, edge_close_stmts,
+        ver_close_ids, edge_close_parent_ids, [],
         src_orgs_ref_node, ver_table, src_orgs_rel_child,
-        stats, f"existing-{tree}", dry_run,
+        stats, f"existing-{tree}", dry_run, close_tx=now_dt,
     )
 
+    # ------------------------------------------------------------------
+    # 6. Descendant closure of the touched subtrees
+    # ------------------------------------------------------------------
+    if dry_run:
+        logger.info("[DRY RUN] [closure-{}] {} nodes with changed child edges", tree, len(closure_touched))
+        return
+    try:
+        async with engine.begin() as conn:
+            await refresh_org_closure(conn, tree, None if rebuild_closure else closure_touched)
+    except Exception as exc:
+        msg = f"[closure-{tree}] Closure refresh failed (rerun with --rebuild-org-closure): {exc}"
+        logger.error(msg)
+        stats.add_error(msg)
+
 
 # ---------------------------------------------------------------------------
 # Risk theme ingestion
@@ -827,36 +871,14 @@ def _compute_theme_id(source_id: str, name: str) -> str:
     return "RTH-" + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:12]
 
 
-async def ingest_risk_themes(
-    engine: AsyncEngine,
-    date_dir: Path,
-    tax_stats: IngestionStats,
-    theme_stats: IngestionStats,
-    dry_run: bool,
-) -> None:
-    """Ingest risk_theme.jsonl (denormalized: taxonomy + theme per row).
-
-    Supports duplicate source risk_theme_ids (e.g. an active and expired theme
-    sharing the same ID but different names). Internal uniqueness uses a
-    hash-based theme_id: RTH-{sha256(source_id|name)[:12]}.
+def _parse_risk_rows(
+    rows: List[Dict[str, Any]],
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """De-duplicate taxonomies and themes from the denormalized file.
 
-    Expired themes have a parent_id pointing to an active theme's source_id.
-    Parent resolution is done in a second pass after all themes are inserted.
+    Returns ``(file_taxonomies, file_themes)``; themes are keyed by the
+    hash-based internal theme_id and carry a resolved ``parent_theme_id``.
     """
-    file_path = date_dir / "risk_theme.jsonl"
-    if not file_path.exists():
-        logger.warning("risk_theme.jsonl not found: {}", file_path)
-        return
-
-    tx_from = _date_dir_to_tx_from(date_dir)
-    tx_from_dt = _parse_iso(tx_from)
-    now = _now_iso()
-    now_dt = _parse_iso(now)
-
-    rows = load_jsonl(file_path)
-    logger.info("Loaded {} risk theme rows", len(rows))
-
-    # De-duplicate taxonomies and themes from the denormalized file
     file_taxonomies: Dict[str, Dict[str, Any]] = {}
     # Keyed by internal hash-based theme_id (not raw source_id)
     file_themes: Dict[str, Dict[str, Any]] = {}
@@ -902,6 +924,52 @@ async def ingest_risk_themes(
         sum(1 for d in file_themes.values() if d["status"] != "Active"),
         len(rows),
     )
+    return file_taxonomies, file_themes
+
+
+def _taxonomy_changed(file_tax: Dict[str, Any], db_tax: Dict[str, Any]) -> bool:
+    return file_tax["name"] != db_tax["name"] or file_tax["description"] != db_tax["description"]
+
+
+def _theme_changed(file_theme: Dict[str, Any], db_theme: Dict[str, Any]) -> bool:
+    return (
+        file_theme["name"] != db_theme.get("name")
+        or file_theme["description"] != db_theme.get("description")
+        or file_theme["mapping_considerations"] != db_theme.get("mapping_considerations")
+        or file_theme["status"] != db_theme.get("status")
+    )
+
+
+async def ingest_risk_themes(
+    engine: AsyncEngine,
+    date_dir: Path,
+    tax_stats: IngestionStats,
+    theme_stats: IngestionStats,
+    dry_run: bool,
+) -> None:
+    """Ingest risk_theme.jsonl (denormalized: taxonomy + theme per row).
+
+    Supports duplicate source risk_theme_ids (e.g. an active and expired theme
+    sharing the same ID but different names). Internal uniqueness uses a
+    hash-based theme_id: RTH-{sha256(source_id|name)[:12]}.
+
+    Expired themes have a parent_id pointing to an active theme's source_id.
+    Parent resolution is done in a second pass after all themes are inserted.
+    """
+    file_path = date_dir / "risk_theme.jsonl"
+    if not file_path.exists():
+        logger.warning("risk_theme.jsonl not found: {}", file_path)
+        return
+
+    tx_from = _date_dir_to_tx_from(date_dir)
+    tx_from_dt = _parse_iso(tx_from)
+    now = _now_iso()
+    now_dt = _parse_iso(now)
+
+    rows = load_jsonl(file_path)
+    logger.info("Loaded {} risk theme rows", len(rows))
+
+    file_taxonomies, file_themes = _parse_risk_rows(rows)
 
     # Load DB current state
     db_taxonomies = await _get_current_taxonomies(engine)
@@ -917,7 +985,7 @@ async def ingest_risk_themes(
 
     ref_inserts: List[Dict[str, Any]] = []
     ver_inserts: List[Dict[str, Any]] = []
-    ver_close_stmts: List[Any] = []
+    ver_close_ids: List[str] = []
 
     # New taxonomies
     for tid in new_tax_ids:
@@ -937,19 +1005,11 @@ async def ingest_risk_themes(
     # Existing taxonomies – compare
     for tid in common_tax_ids:
         file_tax = file_taxonomies[tid]
-        db_tax = db_taxonomies[tid]
-        if file_tax["name"] == db_tax["name"] and file_tax["description"] == db_tax["description"]:
+        if not _taxonomy_changed(file_tax, db_taxonomies[tid]):
             tax_stats.unchanged += 1
             continue
 
-        ver_close_stmts.append(
-            update(src_risks_ver_taxonomy)
-            .where(and_(
-                src_risks_ver_taxonomy.c.ref_taxonomy_id == tid,
-                src_risks_ver_taxonomy.c.tx_to.is_(None),
-            ))
-            .values(tx_to=now_dt)
-        )
+        ver_close_ids.append(tid)
         ver_inserts.append({
             "ref_taxonomy_id": tid,
             "name": file_tax["name"],
@@ -960,11 +1020,11 @@ async def ingest_risk_themes(
         tax_stats.changed += 1
 
     # Execute taxonomy batch
-    if ref_inserts or ver_inserts or ver_close_stmts:
+    if ref_inserts or ver_inserts or ver_close_ids:
         if dry_run:
             logger.info(
                 "[DRY RUN] [taxonomy] ref_inserts={}, ver_inserts={}, ver_closes={}",
-                len(ref_inserts), len(ver_inserts), len(ver_close_stmts),
+                len(ref_inserts), len(ver_inserts), len(ver_close_ids),
             )
         else:
             try:
@@ -974,8 +1034,10 @@ async def ingest_risk_themes(
                             index_elements=["taxonomy_id"]
                         )
                         await conn.execute(stmt, ref_inserts)
-                    for close_stmt in ver_close_stmts:
-                        await conn.execute(close_stmt)
+                    await close_current(
+                        conn, src_risks_ver_taxonomy, src_risks_ver_taxonomy.c.ref_taxonomy_id,
+                        ver_close_ids, now_dt,
+                    )
                     if ver_inserts:
                         await conn.execute(insert(src_risks_ver_taxonomy), ver_inserts)
             except Exception as exc:
@@ -985,7 +1047,7 @@ async def ingest_risk_themes(
 
     ref_inserts.clear()
     ver_inserts.clear()
-    ver_close_stmts.clear()
+    ver_close_ids.clear()
 
     # ------------------------------------------------------------------
     # Themes (keyed by hash-based internal_id)
@@ -998,7 +1060,7 @@ async def ingest_risk_themes(
     theme_ref_inserts: List[Dict[str, Any]] = []
     theme_ver_inserts: List[Dict[str, Any]] = []
     theme_rel_inserts: List[Dict[str, Any]] = []
-    theme_ver_close_stmts: List[Any] = []
+    theme_ver_close_ids: List[str] = []
 
     # New themes
     for internal_id in new_theme_ids:
@@ -1028,26 +1090,11 @@ async def ingest_risk_themes(
     # Existing themes – compare
     for internal_id in common_theme_ids:
         file_theme = file_themes[internal_id]
-        db_theme = db_themes[internal_id]
-
-        changed = (
-            file_theme["name"] != db_theme.get("name")
-            or file_theme["description"] != db_theme.get("description")
-            or file_theme["mapping_considerations"] != db_theme.get("mapping_considerations")
-            or file_theme["status"] != db_theme.get("status")
-        )
-        if not changed:
+        if not _theme_changed(file_theme, db_themes[internal_id]):
             theme_stats.unchanged += 1
             continue
 
-        theme_ver_close_stmts.append(
-            update(src_risks_ver_theme)
-            .where(and_(
-                src_risks_ver_theme.c.ref_theme_id == internal_id,
-                src_risks_ver_theme.c.tx_to.is_(None),
-            ))
-            .values(tx_to=now_dt)
-        )
+        theme_ver_close_ids.append(internal_id)
         theme_ver_inserts.append({
             "ref_theme_id": internal_id,
             "name": file_theme["name"],
@@ -1060,12 +1107,12 @@ async def ingest_risk_themes(
         theme_stats.changed += 1
 
     # Execute theme batch
-    if theme_ref_inserts or theme_ver_inserts or theme_rel_inserts or theme_ver_close_stmts:
+    if theme_ref_inserts or theme_ver_inserts or theme_rel_inserts or theme_ver_close_ids:
         if dry_run:
             logger.info(
                 "[DRY RUN] [theme] ref_inserts={}, ver_inserts={}, rel_inserts={}, ver_closes={}",
                 len(theme_ref_inserts), len(theme_ver_inserts),
-                len(theme_rel_inserts), len(theme_ver_close_stmts),
+                len(theme_rel_inserts), len(theme_ver_close_ids),
             )
         else:
             try:
@@ -1075,8 +1122,10 @@ async def ingest_risk_themes(
                             index_elements=["theme_id"]
                         )
                         await conn.execute(stmt, theme_ref_inserts)
-                    for close_stmt in theme_ver_close_stmts:
-                        await conn.execute(close_stmt)
+                    await close_current(
+                        conn, src_risks_ver_theme, src_risks_ver_theme.c.ref_theme_id,
+                        theme_ver_close_ids, now_dt,
+                    )
                     if theme_ver_inserts:
                         await conn.execute(insert(src_risks_ver_theme), theme_ver_inserts)
                     if theme_rel_inserts:
@@ -1135,6 +1184,36 @@ async def _get_current_au_units(engine: AsyncEngine) -> Dict[str, Dict[str, Any]
     return result_map
 
 
+def _parse_au_rows(rows: List[Dict[str, Any]], stats: IngestionStats) -> Dict[str, Dict[str, Any]]:
+    """Build the file-side lookup ``{source_id: unit}``; rows missing fields are reported."""
+    file_units: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        sid = str(row.get("id", "")).strip()
+        if not sid:
+            continue
+        loc_type = _normalise_str(row.get("location_type"))
+        func_id = _normalise_str(row.get("function_id"))
+        loc_id = _normalise_str(row.get("location_id"))
+        if not loc_type or not func_id or not loc_id:
+            stats.add_error(f"Skipping AU row with missing fields: {sid}")
+            continue
+        file_units[sid] = {
+            "name": _normalise_str(row.get("name")),
+            "description": _normalise_str(row.get("description")),
+            "function_node_id": f"function:{func_id}",
+            "location_node_id": f"{loc_type}:{loc_id}",
+            "location_type": loc_type,
+        }
+    return file_units
+
+
+_AU_COMPARED_FIELDS = ("name", "description", "function_node_id", "location_node_id", "location_type")
+
+
+def _au_unit_changed(file_unit: Dict[str, Any], db_unit: Dict[str, Any]) -> bool:
+    return any(file_unit[f] != db_unit.get(f) for f in _AU_COMPARED_FIELDS)
+
+
 async def ingest_assessment_units(
     engine: AsyncEngine,
     date_dir: Path,
@@ -1156,24 +1235,7 @@ async def ingest_assessment_units(
     logger.info("Loaded {} assessment-unit rows", len(rows))
 
     # Build file-side lookup
-    file_units: Dict[str, Dict[str, Any]] = {}
-    for row in rows:
-        sid = str(row.get("id", "")).strip()
-        if not sid:
-            continue
-        loc_type = _normalise_str(row.get("location_type"))
-        func_id = _normalise_str(row.get("function_id"))
-        loc_id = _normalise_str(row.get("location_id"))
-        if not loc_type or not func_id or not loc_id:
-            stats.add_error(f"Skipping AU row with missing fields: {sid}")
-            continue
-        file_units[sid] = {
-            "name": _normalise_str(row.get("name")),
-            "description": _normalise_str(row.get("description")),
-            "function_node_id": f"function:{func_id}",
-            "location_node_id": f"{loc_type}:{loc_id}",
-            "location_type": loc_type,
-        }
+    file_units = _parse_au_rows(rows, stats)
 
     # Load DB current state
     db_units = await _get_current_au_units(engine)
@@ -1239,21 +1301,14 @@ async def ingest_assessment_units(
     # ------------------------------------------------------------------
     # DISAPPEARED units — close current ver, create Inactive ver
     # ------------------------------------------------------------------
-    ver_close_stmts: List[Any] = []
+    ver_close_ids: List[str] = []
     ver_inserts_dis: List[Dict[str, Any]] = []
 
     for sid in disappeared_ids:
         uid = _au_unit_id(sid)
         db_unit = db_units[sid]
 
-        ver_close_stmts.append(
-            update(src_au_ver_unit)
-            .where(and_(
-                src_au_ver_unit.c.ref_unit_id == uid,
-                src_au_ver_unit.c.tx_to.is_(None),
-            ))
-            .values(tx_to=now_dt)
-        )
+        ver_close_ids.append(uid)
         ver_inserts_dis.append({
             "ref_unit_id": uid,
             "name": db_unit["name"],
@@ -1266,17 +1321,16 @@ async def ingest_assessment_units(
         })
         stats.disappeared += 1
 
-    if ver_close_stmts or ver_inserts_dis:
+    if ver_close_ids or ver_inserts_dis:
         if dry_run:
             logger.info(
                 "[DRY RUN] [assessment_units] disappeared: ver_closes={}, ver_inserts={}",
-                len(ver_close_stmts), len(ver_inserts_dis),
+                len(ver_close_ids), len(ver_inserts_dis),
             )
         else:
             try:
                 async with engine.begin() as conn:
-                    for close_stmt in ver_close_stmts:
-                        await conn.execute(close_stmt)
+                    await close_current(conn, src_au_ver_unit, src_au_ver_unit.c.ref_unit_id, ver_close_ids, now_dt)
                     if ver_inserts_dis:
                         await conn.execute(insert(src_au_ver_unit), ver_inserts_dis)
             except Exception as exc:
@@ -1287,33 +1341,17 @@ async def ingest_assessment_units(
     # ------------------------------------------------------------------
     # EXISTING — compare and update if changed
     # ------------------------------------------------------------------
-    ver_close_stmts_chg: List[Any] = []
+    ver_close_ids_chg: List[str] = []
     ver_inserts_chg: List[Dict[str, Any]] = []
 
     for sid in common_ids:
         file_unit = file_units[sid]
-        db_unit = db_units[sid]
-
-        changed = (
-            file_unit["name"] != db_unit.get("name")
-            or file_unit["description"] != db_unit.get("description")
-            or file_unit["function_node_id"] != db_unit.get("function_node_id")
-            or file_unit["location_node_id"] != db_unit.get("location_node_id")
-            or file_unit["location_type"] != db_unit.get("location_type")
-        )
-        if not changed:
+        if not _au_unit_changed(file_unit, db_units[sid]):
             stats.unchanged += 1
             continue
 
         uid = _au_unit_id(sid)
-        ver_close_stmts_chg.append(
-            update(src_au_ver_unit)
-            .where(and_(
-                src_au_ver_unit.c.ref_unit_id == uid,
-                src_au_ver_unit.c.tx_to.is_(None),
-            ))
-            .values(tx_to=now_dt)
-        )
+        ver_close_ids_chg.append(uid)
         ver_inserts_chg.append({
             "ref_unit_id": uid,
             "name": file_unit["name"],
@@ -1326,17 +1364,18 @@ async def ingest_assessment_units(
         })
         stats.changed += 1
 
-    if ver_close_stmts_chg or ver_inserts_chg:
+    if ver_close_ids_chg or ver_inserts_chg:
         if dry_run:
             logger.info(
                 "[DRY RUN] [assessment_units] changed: ver_closes={}, ver_inserts={}",
-                len(ver_close_stmts_chg), len(ver_inserts_chg),
+                len(ver_close_ids_chg), len(ver_inserts_chg),
             )
         else:
             try:
                 async with engine.begin() as conn:
-                    for close_stmt in ver_close_stmts_chg:
-                        await conn.execute(close_stmt)
+                    await close_current(
+                        conn, src_au_ver_unit, src_au_ver_unit.c.ref_unit_id, ver_close_ids_chg, now_dt,
+                    )
                     if ver_inserts_chg:
                         await conn.execute(insert(src_au_ver_unit), ver_inserts_chg)
             except Exception as exc:
@@ -1345,6 +1384,745 @@ async def ingest_assessment_units(
                 stats.add_error(msg)
 
 
+# ---------------------------------------------------------------------------
+# Set-based (SQL) delta engine
+#
+# ``--delta-engine sql`` COPYs the parsed file rows into temporary staging
+# tables, computes the new / changed / disappeared sets with joins against
+# the current rows into a delta table, and applies it with INSERT ... SELECT
+# and UPDATE statements – all in one transaction per entity type. The write
+# semantics match the Python diff above; ``--verify-delta`` re-runs that diff
+# and compares its key sets before anything is written.
+# ---------------------------------------------------------------------------
+
+DELTA_ENGINES = ("python", "sql")
+
+_stage_metadata = MetaData()
+
+
+def _temp_table(name: str, *columns: Column) -> Table:
+    """Session-local staging table, dropped when the transaction commits."""
+    return Table(name, _stage_metadata, *columns, prefixes=["TEMPORARY"], postgresql_on_commit="DROP")
+
+
+_stg_org_node = _temp_table(
+    "stg_org_node",
+    Column("node_id", Text, primary_key=True),
+    Column("source_id", Text, nullable=False),
+    Column("node_type", Text),
+    Column("names", ARRAY(Text), nullable=False),  # sorted, so names[1] is deterministic
+    Column("status", Text),
+)
+_stg_org_child = _temp_table(
+    "stg_org_child",
+    Column("in_node_id", Text, nullable=False),
+    Column("out_node_id", Text, nullable=False),
+    Column("out_source_id", Text, nullable=False),
+)
+_stg_org_delta = _temp_table(
+    "stg_org_delta",
+    Column("node_id", Text, primary_key=True),
+    Column("action", Text, nullable=False),
+    Column("children_changed", Boolean, nullable=False),
+    Column("old_names", ARRAY(Text)),  # disappeared nodes: names carried onto the Inactive version
+)
+_stg_taxonomy = _temp_table(
+    "stg_taxonomy",
+    Column("taxonomy_id", Text, primary_key=True),
+    Column("name", Text),
+    Column("description", Text),
+)
+_stg_theme = _temp_table(
+    "stg_theme",
+    Column("theme_id", Text, primary_key=True),
+    Column("source_id", Text, nullable=False),
+    Column("taxonomy_id", Text),
+    Column("name", Text),
+    Column("description", Text),
+    Column("mapping_considerations", Text),
+    Column("status", Text),
+    Column("parent_theme_id", Text),
+)
+_stg_taxonomy_delta = _temp_table(
+    "stg_taxonomy_delta",
+    Column("taxonomy_id", Text, primary_key=True),
+    Column("action", Text, nullable=False),
+)
+_stg_theme_delta = _temp_table(
+    "stg_theme_delta",
+    Column("theme_id", Text, primary_key=True),
+    Column("action", Text, nullable=False),
+)
+_stg_au = _temp_table(
+    "stg_au",
+    Column("unit_id", Text, primary_key=True),
+    Column("source_id", Text, nullable=False),
+    *(Column(name, Text) for name in _AU_COMPARED_FIELDS),
+)
+_stg_au_delta = _temp_table(
+    "stg_au_delta",
+    Column("unit_id", Text, primary_key=True),
+    Column("action", Text, nullable=False),
+    # disappeared units: current values carried onto the new version
+    *(Column(name, Text) for name in _AU_COMPARED_FIELDS),
+)
+
+
+@dataclass
+class DeltaSets:
+    """Keys per delta action for one entity type, as computed by either engine."""
+
+    new: Set[str] = field(default_factory=set)
+    changed: Set[str] = field(default_factory=set)
+    disappeared: Set[str] = field(default_factory=set)
+    children_changed: Set[str] = field(default_factory=set)
+
+    def mismatches(self, expected: "DeltaSets", limit: int = 5) -> List[str]:
+        """Describe each action whose key set differs from *expected*."""
+        out: List[str] = []
+        for f in fields(self):
+            got, want = getattr(self, f.name), getattr(expected, f.name)
+            if got != want:
+                out.append(
+                    f"{f.name}: only in SQL {sorted(got - want)[:limit]}, "
+                    f"only in Python {sorted(want - got)[:limit]}"
+                )
+        return out
+
+
+def _verify_delta(label: str, sql_delta: DeltaSets, python_delta: DeltaSets) -> None:
+    """Raise if the SQL delta disagrees with the Python diff (rolls back the caller's transaction)."""
+    problems = sql_delta.mismatches(python_delta)
+    if problems:
+        for problem in problems:
+            logger.error("[{}] delta mismatch – {}", label, problem)
+        raise RuntimeError(f"[{label}] SQL delta disagrees with the Python diff; nothing was written")
+    logger.info("[{}] SQL delta verified against the Python diff", label)
+
+
+def _sql_normalise_str(col):
+    """SQL twin of ``_normalise_str``: trimmed text, empty -> NULL."""
+    return func.nullif(func.btrim(col, " \t\r\n\f\v"), "")
+
+
+async def _create_stage_tables(conn, *tables: Table) -> None:
+    await conn.run_sync(lambda sync_conn: _stage_metadata.create_all(sync_conn, tables=list(tables), checkfirst=False))
+
+
+async def _copy_into(conn, table: Table, records: List[Tuple]) -> None:
+    """COPY *records* (tuples in column order) into a staging table, then ANALYZE it.
+
+    Temporary tables are never auto-analyzed, and the delta joins need row
+    estimates to pick hash joins on large trees.
+    """
+    if records:
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name, records=records, columns=[c.name for c in table.columns],
+        )
+    await conn.execute(text(f"ANALYZE {table.name}"))
+
+
+async def _action_counts(conn, delta_table: Table) -> Dict[str, int]:
+    result = await conn.execute(
+        select(delta_table.c.action, func.count()).group_by(delta_table.c.action)
+    )
+    return {row[0]: int(row[1]) for row in result}
+
+
+async def _read_delta(conn, delta_table: Table, key_col: str) -> DeltaSets:
+    has_children = "children_changed" in delta_table.c
+    cols = [delta_table.c[key_col], delta_table.c.action]
+    if has_children:
+        cols.append(delta_table.c.children_changed)
+    delta = DeltaSets()
+    for row in await conn.execute(select(*cols)):
+        getattr(delta, row[1]).add(row[0])
+        if has_children and row[2]:
+            delta.children_changed.add(row[0])
+    return delta
+
+
+def _delta_keys(delta_table: Table, key_col: str, *actions: str):
+    return select(delta_table.c[key_col]).where(delta_table.c.action.in_(actions))
+
+
+def _apply_stats(stats: IngestionStats, counts: Dict[str, int], staged: int) -> None:
+    stats.new += counts.get("new", 0)
+    stats.changed += counts.get("changed", 0)
+    stats.disappeared += counts.get("disappeared", 0)
+    stats.unchanged += staged - counts.get("new", 0) - counts.get("changed", 0)
+
+
+# ── Org trees ───────────────────────────────────────────────────────────────
+
+def _python_org_delta(
+    tree: str,
+    file_nodes: Dict[str, Dict[str, Any]],
+    db_nodes: Dict[str, Dict[str, Any]],
+) -> DeltaSets:
+    """The Python diff of ``ingest_org_tree`` expressed as node-id key sets."""
+    delta = DeltaSets(
+        new={_node_id(tree, sid) for sid in file_nodes.keys() - db_nodes.keys()},
+        disappeared={_node_id(tree, sid) for sid in db_nodes.keys() - file_nodes.keys()},
+    )
+    for sid in file_nodes.keys() & db_nodes.keys():
+        changed, children_changed = _org_node_changes(file_nodes[sid], db_nodes[sid])
+        if changed:
+            delta.changed.add(_node_id(tree, sid))
+        if children_changed:
+            delta.children_changed.add(_node_id(tree, sid))
+
+    return delta
+
+
+async def _stage_org_tree(conn, tree: str, file_nodes: Dict[str, Dict[str, Any]]) -> None:
+    """COPY one tree's file rows into the org staging tables."""
+    node_records: List[Tuple] = []
+    child_records: List[Tuple] = []
+    for sid, node in file_nodes.items():
+        nid = _node_id(tree, sid)
+        node_records.append((nid, sid, node["node_type"], sorted(node["names"]), node["status"]))
+        child_records.extend((nid, _node_id(tree, child), child) for child in node["children"])
+
+    await _create_stage_tables(conn, _stg_org_node, _stg_org_child, _stg_org_delta)
+    await _copy_into(conn, _stg_org_node, node_records)
+    await _copy_into(conn, _stg_org_child, child_records)
+
+
+async def _compute_org_delta(conn, tree: str, ver_table, name_is_set: bool) -> None:
+    """Fill stg_org_delta from staging vs current rows."""
+    s, e, d = _stg_org_node, _stg_org_child, _stg_org_delta
+    prefix = f"{tree}:%"
+    empty_names = literal_column("'{}'::text[]", ARRAY(Text))
+
+    if name_is_set:
+        cur_names = func.coalesce(ver_table.c.names, empty_names)
+    else:
+        cur_names = case(
+            (func.coalesce(ver_table.c.name, "") == "", empty_names),
+            else_=array([ver_table.c.name]),
+        )
+    cur = (
+        select(
+            ver_table.c.ref_node_id.label("node_id"),
+            cur_names.label("names"),
+            _sql_normalise_str(ver_table.c.status).label("status"),
+        )
+        .where(ver_table.c.tx_to.is_(None), ver_table.c.ref_node_id.like(prefix))
+        .cte("cur")
+    )
+
+    # Parents whose staged child set differs from their current same-tree edges
+    cur_edges = (
+        select(src_orgs_rel_child.c.in_node_id, src_orgs_rel_child.c.out_node_id)
+        .where(
+            src_orgs_rel_child.c.tx_to.is_(None),
+            src_orgs_rel_child.c.in_node_id.like(prefix),
+            src_orgs_rel_child.c.out_node_id.like(prefix),
+        )
+        .subquery("cur_edges")
+    )
+    edge_diff = (
+        select(func.coalesce(e.c.in_node_id, cur_edges.c.in_node_id).label("node_id"))
+        .select_from(
+            e.join(
+                cur_edges,
+                and_(e.c.in_node_id == cur_edges.c.in_node_id, e.c.out_node_id == cur_edges.c.out_node_id),
+                full=True,
+            )
+        )
+        .where(or_(e.c.in_node_id.is_(None), cur_edges.c.in_node_id.is_(None)))
+        .distinct()
+        .cte("edge_diff")
+    )
+
+    # Old names as a sorted set, matching sorted(set(...)) in the Python path
+    old_names = literal_column(
+        'ARRAY(SELECT DISTINCT n FROM unnest(cur.names) AS n ORDER BY n COLLATE "C")', ARRAY(Text),
+    )
+    children_changed = edge_diff.c.node_id.is_not(None)
+    names_differ = not_(and_(cur.c.names.contains(s.c.names), cur.c.names.contained_by(s.c.names)))
+
+    new_q = select(
+        s.c.node_id, literal("new"), false(), null(),
+    ).where(~exists().where(cur.c.node_id == s.c.node_id))
+    disappeared_q = select(
+        cur.c.node_id, literal("disappeared"), false(), old_names,
+    ).where(~exists().where(s.c.node_id == cur.c.node_id))
+    changed_q = (
+        select(s.c.node_id, literal("changed"), children_changed, null())
+        .select_from(
+            s.join(cur, cur.c.node_id == s.c.node_id)
+            .outerjoin(edge_diff, edge_diff.c.node_id == s.c.node_id)
+        )
+        .where(or_(names_differ, cur.c.status.is_distinct_from(s.c.status), children_changed))
+    )
+    await conn.execute(
+        insert(d).from_select(
+            ["node_id", "action", "children_changed", "old_names"],
+            union_all(new_q, disappeared_q, changed_q),
+        )
+    )
+
+
+async def _apply_org_delta(
+    conn, tree: str, ver_table, name_is_set: bool, tx_from_dt: datetime, now_dt: datetime,
+) -> None:
+    """Apply stg_org_delta in the order of ``_execute_batch``."""
+    s, e, d = _stg_org_node, _stg_org_child, _stg_org_delta
+    ref = src_orgs_ref_node
+    tx_from_lit = literal(tx_from_dt, DateTime(timezone=True))
+    now_lit = literal(now_dt, DateTime(timezone=True))
+    rebuilds_children = or_(d.c.action == "new", d.c.children_changed)
+
+    # 1. Ref nodes: new nodes plus the children of rebuilt parents, keeping
+    #    a non-null node_type per node (COALESCE keeps an existing one)
+    child_type = s.alias("child_node")
+    ref_rows = union_all(
+        select(s.c.node_id, s.c.source_id, s.c.node_type)
+        .join(d, d.c.node_id == s.c.node_id)
+        .where(d.c.action == "new"),
+        select(e.c.out_node_id, e.c.out_source_id, child_type.c.node_type)
+        .select_from(
+            e.join(d, d.c.node_id == e.c.in_node_id)
+            .outerjoin(child_type, child_type.c.node_id == e.c.out_node_id)
+        )
+        .where(rebuilds_children),
+    ).subquery("ref_rows")
+    ref_select = (
+        select(ref_rows.c.node_id, literal(tree), ref_rows.c.source_id, ref_rows.c.node_type)
+        .distinct(ref_rows.c.node_id)
+        .order_by(ref_rows.c.node_id, ref_rows.c.node_type.asc().nulls_last())
+    )
+    ref_stmt = pg_insert(ref).from_select(["node_id", "tree", "source_id", "node_type"], ref_select)
+    await conn.execute(
+        ref_stmt.on_conflict_do_update(
+            index_elements=[ref.c.node_id],
+            set_={"node_type": func.coalesce(ref_stmt.excluded.node_type, ref.c.node_type)},
+        )
+    )
+
+    # 2. Close superseded versions
+    await conn.execute(
+        update(ver_table)
+        .where(
+            ver_table.c.tx_to.is_(None),
+            ver_table.c.ref_node_id.in_(_delta_keys(d, "node_id", "changed", "disappeared")),
+        )
+        .values(tx_to=now_dt)
+    )
+
+    # 3. Close edges: either end of disappeared nodes, parent end of rebuilt children
+    edge = src_orgs_rel_child
+    await conn.execute(
+        update(edge)
+        .where(
+            edge.c.tx_to.is_(None),
+            or_(
+                edge.c.in_node_id.in_(_delta_keys(d, "node_id", "disappeared")),
+                edge.c.out_node_id.in_(_delta_keys(d, "node_id", "disappeared")),
+                edge.c.in_node_id.in_(
+                    select(d.c.node_id).where(d.c.action == "changed", d.c.children_changed)
+                ),
+            ),
+        )
+        .values(tx_to=now_dt)
+    )
+
+    # 4. Insert versions: new at the file date, changed and Inactive copies now
+    name_col = "names" if name_is_set else "name"
+
+    def _names(col):
+        return col if name_is_set else col[1]
+
+    ver_rows = union_all(
+        select(s.c.node_id, _names(s.c.names), s.c.status, tx_from_lit)
+        .join(d, d.c.node_id == s.c.node_id)
+        .where(d.c.action == "new"),
+        select(s.c.node_id, _names(s.c.names), s.c.status, now_lit)
+        .join(d, d.c.node_id == s.c.node_id)
+        .where(d.c.action == "changed"),
+        select(d.c.node_id, _names(d.c.old_names), literal("Inactive"), now_lit)
+        .where(d.c.action == "disappeared"),
+    )
+    await conn.execute(
+        insert(ver_table).from_select(["ref_node_id", name_col, "status", "tx_from"], ver_rows)
+    )
+
+    # 5. Insert child edges of new and rebuilt parents
+    await conn.execute(
+        insert(edge).from_select(
+            ["in_node_id", "out_node_id", "tx_from"],
+            select(
+                e.c.in_node_id, e.c.out_node_id,
+                case((d.c.action == "new", tx_from_lit), else_=now_lit),
+            )
+            .join(d, d.c.node_id == e.c.in_node_id)
+            .where(rebuilds_children),
+        )
+    )
+
+
+async def ingest_org_tree_sql(
+    engine: AsyncEngine,
+    tree: str,
+    date_dir: Path,
+    stats: IngestionStats,
+    dry_run: bool,
+    verify: bool = False,
+    rebuild_closure: bool = False,
+) -> None:
+    """Set-based twin of ``ingest_org_tree``, including rel_child edges."""
+    cfg = TREE_CONFIGS[tree]
+    file_path = date_dir / cfg["file"]
+    if not file_path.exists():
+        logger.warning("File not found, skipping tree '{}': {}", tree, file_path)
+        return
+
+    tx_from_dt = _parse_iso(_date_dir_to_tx_from(date_dir))
+    now_dt = _parse_iso(_now_iso())
+    ver_table = cfg["ver_table"]
+
+    rows = load_jsonl(file_path)
+    logger.info("Loaded {} rows for tree '{}'", len(rows), tree)
+    file_nodes = _parse_org_rows(tree, rows)
+
+    t0 = time.perf_counter()
+    async with engine.connect() as conn:
+        async with conn.begin() as trans:
+            await _stage_org_tree(conn, tree, file_nodes)
+            t_staged = time.perf_counter()
+            await _compute_org_delta(conn, tree, ver_table, cfg["name_is_set"])
+            counts = await _action_counts(conn, _stg_org_delta)
+            t_diffed = time.perf_counter()
+            logger.info(
+                "Tree '{}' SQL delta: new={}, changed={}, disappeared={} (stage {:.2f}s, diff {:.2f}s)",
+                tree, counts.get("new", 0), counts.get("changed", 0), counts.get("disappeared", 0),
+                t_staged - t0, t_diffed - t_staged,
+            )
+
+            if verify:
+                sql_delta = await _read_delta(conn, _stg_org_delta, "node_id")
+                db_nodes = await _get_current_org_nodes(engine, tree, ver_table, cfg["name_is_set"])
+                _verify_delta(f"tree-{tree}", sql_delta, _python_org_delta(tree, file_nodes, db_nodes))
+
+            _apply_stats(stats, counts, len(file_nodes))
+            if dry_run:
+                logger.info("[DRY RUN] [tree-{}] SQL delta computed, rolling back", tree)
+                await trans.rollback()
+                return
+
+            await _apply_org_delta(conn, tree, ver_table, cfg["name_is_set"], tx_from_dt, now_dt)
+
+            closure_touched = None
+            if not rebuild_closure:
+                d = _stg_org_delta
+                closure_touched = (await conn.execute(
+                    select(d.c.node_id).where(or_(d.c.action.in_(("new", "disappeared")), d.c.children_changed))
+                )).scalars().all()
+            await refresh_org_closure(conn, tree, closure_touched)
+    logger.info("Tree '{}' applied in {:.2f}s", tree, time.perf_counter() - t_diffed)
+
+
+# ── Risk themes ─────────────────────────────────────────────────────────────
+
+async def ingest_risk_themes_sql(
+    engine: AsyncEngine,
+    date_dir: Path,
+    tax_stats: IngestionStats,
+    theme_stats: IngestionStats,
+    dry_run: bool,
+    verify: bool = False,
+) -> None:
+    """Set-based twin of ``ingest_risk_themes`` (new and changed rows only, as there)."""
+    file_path = date_dir / "risk_theme.jsonl"
+    if not file_path.exists():
+        logger.warning("risk_theme.jsonl not found: {}", file_path)
+        return
+
+    tx_from_lit = literal(_parse_iso(_date_dir_to_tx_from(date_dir)), DateTime(timezone=True))
+    now_dt = _parse_iso(_now_iso())
+    now_lit = literal(now_dt, DateTime(timezone=True))
+
+    rows = load_jsonl(file_path)
+    logger.info("Loaded {} risk theme rows", len(rows))
+    file_taxonomies, file_themes = _parse_risk_rows(rows)
+
+    st, sth = _stg_taxonomy, _stg_theme
+    dt, dth = _stg_taxonomy_delta, _stg_theme_delta
+    vt, vth, rth = src_risks_ver_taxonomy, src_risks_ver_theme, src_risks_ref_theme
+
+    async with engine.connect() as conn:
+        async with conn.begin() as trans:
+            await _create_stage_tables(conn, st, sth, dt, dth)
+            await _copy_into(conn, st, [
+                (tid, tax["name"], tax["description"]) for tid, tax in file_taxonomies.items()
+            ])
+            await _copy_into(conn, sth, [
+                (
+                    iid, theme["source_id"], theme["taxonomy_id"], theme["name"], theme["description"],
+                    theme["mapping_considerations"], theme["status"], theme["parent_theme_id"],
+                )
+                for iid, theme in file_themes.items()
+            ])
+
+            cur_tax = (
+                select(
+                    vt.c.ref_taxonomy_id.label("taxonomy_id"),
+                    _sql_normalise_str(vt.c.name).label("name"),
+                    _sql_normalise_str(vt.c.description).label("description"),
+                )
+                .where(vt.c.tx_to.is_(None))
+                .subquery("cur_tax")
+            )
+            await conn.execute(
+                insert(dt).from_select(
+                    ["taxonomy_id", "action"],
+                    select(
+                        st.c.taxonomy_id,
+                        case((cur_tax.c.taxonomy_id.is_(None), "new"), else_="changed"),
+                    )
+                    .select_from(st.outerjoin(cur_tax, cur_tax.c.taxonomy_id == st.c.taxonomy_id))
+                    .where(or_(
+                        cur_tax.c.taxonomy_id.is_(None),
+                        cur_tax.c.name.is_distinct_from(st.c.name),
+                        cur_tax.c.description.is_distinct_from(st.c.description),
+                    )),
+                )
+            )
+            cur_theme = (
+                select(
+                    rth.c.theme_id,
+                    *(
+                        _sql_normalise_str(vth.c[name]).label(name)
+                        for name in ("name", "description", "mapping_considerations", "status")
+                    ),
+                )
+                .select_from(vth.join(rth, vth.c.ref_theme_id == rth.c.theme_id))
+                .where(vth.c.tx_to.is_(None))
+                .subquery("cur_theme")
+            )
+            await conn.execute(
+                insert(dth).from_select(
+                    ["theme_id", "action"],
+                    select(
+                        sth.c.theme_id,
+                        case((cur_theme.c.theme_id.is_(None), "new"), else_="changed"),
+                    )
+                    .select_from(sth.outerjoin(cur_theme, cur_theme.c.theme_id == sth.c.theme_id))
+                    .where(or_(
+                        cur_theme.c.theme_id.is_(None),
+                        *(
+                            cur_theme.c[name].is_distinct_from(sth.c[name])
+                            for name in ("name", "description", "mapping_considerations", "status")
+                        ),
+                    )),
+                )
+            )
+            tax_counts = await _action_counts(conn, dt)
+            theme_counts = await _action_counts(conn, dth)
+            logger.info(
+                "Risk SQL delta: taxonomies new={} changed={}, themes new={} changed={}",
+                tax_counts.get("new", 0), tax_counts.get("changed", 0),
+                theme_counts.get("new", 0), theme_counts.get("changed", 0),
+            )
+
+            if verify:
+                db_taxonomies = await _get_current_taxonomies(engine)
+                db_themes = await _get_current_themes(engine)
+                _verify_delta("taxonomy", await _read_delta(conn, dt, "taxonomy_id"), DeltaSets(
+                    new=file_taxonomies.keys() - db_taxonomies.keys(),
+                    changed={
+                        tid for tid in file_taxonomies.keys() & db_taxonomies.keys()
+                        if _taxonomy_changed(file_taxonomies[tid], db_taxonomies[tid])
+                    },
+                ))
+                _verify_delta("theme", await _read_delta(conn, dth, "theme_id"), DeltaSets(
+                    new=file_themes.keys() - db_themes.keys(),
+                    changed={
+                        iid for iid in file_themes.keys() & db_themes.keys()
+                        if _theme_changed(file_themes[iid], db_themes[iid])
+                    },
+                ))
+
+            _apply_stats(tax_stats, tax_counts, len(file_taxonomies))
+            _apply_stats(theme_stats, theme_counts, len(file_themes))
+            if dry_run:
+                logger.info("[DRY RUN] [risk_themes] SQL delta computed, rolling back")
+                await trans.rollback()
+                return
+
+            # Taxonomies
+            await conn.execute(
+                pg_insert(src_risks_ref_taxonomy)
+                .from_select(["taxonomy_id"], _delta_keys(dt, "taxonomy_id", "new"))
+                .on_conflict_do_nothing(index_elements=["taxonomy_id"])
+            )
+            await conn.execute(
+                update(vt)
+                .where(vt.c.tx_to.is_(None), vt.c.ref_taxonomy_id.in_(_delta_keys(dt, "taxonomy_id", "changed")))
+                .values(tx_to=now_dt)
+            )
+            await conn.execute(
+                insert(vt).from_select(
+                    ["ref_taxonomy_id", "name", "description", "tx_from"],
+                    select(
+                        st.c.taxonomy_id, st.c.name, st.c.description,
+                        case((dt.c.action == "new", tx_from_lit), else_=now_lit),
+                    ).join(dt, dt.c.taxonomy_id == st.c.taxonomy_id),
+                )
+            )
+
+            # Themes
+            await conn.execute(
+                pg_insert(rth)
+                .from_select(
+                    ["theme_id", "source_id", "parent_theme_id"],
+                    select(sth.c.theme_id, sth.c.source_id, sth.c.parent_theme_id)
+                    .join(dth, dth.c.theme_id == sth.c.theme_id)
+                    .where(dth.c.action == "new"),
+                )
+                .on_conflict_do_nothing(index_elements=["theme_id"])
+            )
+            await conn.execute(
+                update(vth)
+                .where(vth.c.tx_to.is_(None), vth.c.ref_theme_id.in_(_delta_keys(dth, "theme_id", "changed")))
+                .values(tx_to=now_dt)
+            )
+            await conn.execute(
+                insert(vth).from_select(
+                    ["ref_theme_id", "name", "description", "mapping_considerations", "status", "tx_from"],
+                    select(
+                        sth.c.theme_id, sth.c.name, sth.c.description,
+                        sth.c.mapping_considerations, sth.c.status,
+                        case((dth.c.action == "new", tx_from_lit), else_=now_lit),
+                    ).join(dth, dth.c.theme_id == sth.c.theme_id),
+                )
+            )
+            await conn.execute(
+                pg_insert(src_risks_rel_taxonomy_theme)
+                .from_select(
+                    ["taxonomy_id", "theme_id"],
+                    select(sth.c.taxonomy_id, sth.c.theme_id)
+                    .join(dth, dth.c.theme_id == sth.c.theme_id)
+                    .where(dth.c.action == "new", func.coalesce(sth.c.taxonomy_id, "") != ""),
+                )
+                .on_conflict_do_nothing(index_elements=["taxonomy_id", "theme_id"])
+            )
+
+
+# ── Assessment units ────────────────────────────────────────────────────────
+
+async def ingest_assessment_units_sql(
+    engine: AsyncEngine,
+    date_dir: Path,
+    stats: IngestionStats,
+    dry_run: bool,
+    verify: bool = False,
+) -> None:
+    """Set-based twin of ``ingest_assessment_units``."""
+    file_path = date_dir / "assessment_units.jsonl"
+    if not file_path.exists():
+        logger.warning("assessment_units.jsonl not found: {}", file_path)
+        return
+
+    tx_from_lit = literal(_parse_iso(_date_dir_to_tx_from(date_dir)), DateTime(timezone=True))
+    now_dt = _parse_iso(_now_iso())
+    now_lit = literal(now_dt, DateTime(timezone=True))
+
+    rows = load_jsonl(file_path)
+    logger.info("Loaded {} assessment-unit rows", len(rows))
+    file_units = _parse_au_rows(rows, stats)
+
+    s, d = _stg_au, _stg_au_delta
+    ref, ver = src_au_ref_unit, src_au_ver_unit
+    fields_ = list(_AU_COMPARED_FIELDS)
+
+    async with engine.connect() as conn:
+        async with conn.begin() as trans:
+            await _create_stage_tables(conn, s, d)
+            await _copy_into(conn, s, [
+                (_au_unit_id(sid), sid, *(unit[f] for f in fields_)) for sid, unit in file_units.items()
+            ])
+
+            cur = (
+                select(ref.c.unit_id, *(_sql_normalise_str(ver.c[f]).label(f) for f in fields_))
+                .select_from(ver.join(ref, ver.c.ref_unit_id == ref.c.unit_id))
+                .where(ver.c.tx_to.is_(None), func.coalesce(ref.c.source_id, "") != "")
+                .cte("cur")
+            )
+            await conn.execute(
+                insert(d).from_select(
+                    ["unit_id", "action", *fields_],
+                    union_all(
+                        select(s.c.unit_id, literal("new"), *(null() for _ in fields_))
+                        .where(~exists().where(cur.c.unit_id == s.c.unit_id)),
+                        select(cur.c.unit_id, literal("disappeared"), *(cur.c[f] for f in fields_))
+                        .where(~exists().where(s.c.unit_id == cur.c.unit_id)),
+                        select(s.c.unit_id, literal("changed"), *(null() for _ in fields_))
+                        .join(cur, cur.c.unit_id == s.c.unit_id)
+                        .where(or_(*(cur.c[f].is_distinct_from(s.c[f]) for f in fields_))),
+                    ),
+                )
+            )
+            counts = await _action_counts(conn, d)
+            logger.info(
+                "Assessment units SQL delta: new={}, changed={}, disappeared={}",
+                counts.get("new", 0), counts.get("changed", 0), counts.get("disappeared", 0),
+            )
+
+            if verify:
+                db_units = await _get_current_au_units(engine)
+                _verify_delta("assessment_units", await _read_delta(conn, d, "unit_id"), DeltaSets(
+                    new={_au_unit_id(sid) for sid in file_units.keys() - db_units.keys()},
+                    disappeared={_au_unit_id(sid) for sid in db_units.keys() - file_units.keys()},
+                    changed={
+                        _au_unit_id(sid) for sid in file_units.keys() & db_units.keys()
+                        if _au_unit_changed(file_units[sid], db_units[sid])
+                    },
+                ))
+
+            _apply_stats(stats, counts, len(file_units))
+            if dry_run:
+                logger.info("[DRY RUN] [assessment_units] SQL delta computed, rolling back")
+                await trans.rollback()
+                return
+
+            await conn.execute(
+                pg_insert(ref)
+                .from_select(
+                    ["unit_id", "source_id"],
+                    select(s.c.unit_id, s.c.source_id)
+                    .join(d, d.c.unit_id == s.c.unit_id)
+                    .where(d.c.action == "new"),
+                )
+                .on_conflict_do_nothing(index_elements=["unit_id"])
+            )
+            await conn.execute(
+                update(ver)
+                .where(
+                    ver.c.tx_to.is_(None),
+                    ver.c.ref_unit_id.in_(_delta_keys(d, "unit_id", "changed", "disappeared")),
+                )
+                .values(tx_to=now_dt)
+            )
+            # Disappeared units carry their current values forward, as in the Python path
+            await conn.execute(
+                insert(ver).from_select(
+                    ["ref_unit_id", *fields_, "tx_from"],
+                    union_all(
+                        select(
+                            s.c.unit_id, *(s.c[f] for f in fields_),
+                            case((d.c.action == "new", tx_from_lit), else_=now_lit),
+                        ).join(d, d.c.unit_id == s.c.unit_id),
+                        select(d.c.unit_id, *(d.c[f] for f in fields_), now_lit)
+                        .where(d.c.action == "disappeared"),
+                    ),
+                )
+            )
+
+
 # ---------------------------------------------------------------------------
 # Source-date metadata
 # ---------------------------------------------------------------------------
@@ -1384,8 +2162,14 @@ async def run_ingestion(
     context_providers_path: Path,
     dry_run: bool,
     postgres_url: Optional[str] = None,
+    delta_engine: str = "python",
+    verify_delta: bool = False,
+    rebuild_closure: bool = False,
 ) -> AllStats:
     """Top-level async entry point."""
+    if delta_engine not in DELTA_ENGINES:
+        raise ValueError(f"Unknown delta engine {delta_engine!r}; expected one of {DELTA_ENGINES}")
+    use_sql = delta_engine == "sql"
     all_stats = AllStats()
 
     # ----- Resolve directory structure -----
@@ -1421,7 +2205,7 @@ async def run_ingestion(
     )
     engine = get_engine()
     logger.info("Connected to PostgreSQL")
-    logger.info("Writer config: batch_size={}", BATCH_SIZE)
+    logger.info("Writer config: batch_size={}, delta_engine={}", BATCH_SIZE, delta_engine)
 
     try:
         # ----- Orgs -----
@@ -1434,7 +2218,12 @@ async def run_ingestion(
             ]:
                 tree_stats: IngestionStats = getattr(all_stats, stats_attr)
                 try:
-                    await ingest_org_tree(engine, tree, org_date_dir, tree_stats, dry_run)
+                    if use_sql:
+                        await ingest_org_tree_sql(
+                            engine, tree, org_date_dir, tree_stats, dry_run, verify_delta, rebuild_closure,
+                        )
+                    else:
+                        await ingest_org_tree(engine, tree, org_date_dir, tree_stats, dry_run, rebuild_closure)
                 except Exception as exc:
                     logger.error("Failed ingesting tree '{}': {}", tree, exc, exc_info=True)
                     tree_stats.add_error(str(exc))
@@ -1447,12 +2236,21 @@ async def run_ingestion(
         if risk_date_dir:
             logger.info("--- Ingesting risk themes ---")
             try:
-                await ingest_risk_themes(
-                    engine, risk_date_dir,
-                    all_stats.risks_taxonomy,
-                    all_stats.risks_theme,
-                    dry_run,
-                )
+                if use_sql:
+                    await ingest_risk_themes_sql(
+                        engine, risk_date_dir,
+                        all_stats.risks_taxonomy,
+                        all_stats.risks_theme,
+                        dry_run,
+                        verify_delta,
+                    )
+                else:
+                    await ingest_risk_themes(
+                        engine, risk_date_dir,
+                        all_stats.risks_taxonomy,
+                        all_stats.risks_theme,
+                        dry_run,
+                    )
             except Exception as exc:
                 logger.error("Failed ingesting risk themes: {}", exc, exc_info=True)
                 all_stats.risks_taxonomy.add_error(str(exc))
@@ -1462,11 +2260,19 @@ async def run_ingestion(
         if au_date_dir:
             logger.info("--- Ingesting assessment units ---")
             try:
-                await ingest_assessment_units(
-                    engine, au_date_dir,
-                    all_stats.assessment_units,
-                    dry_run,
-                )
+                if use_sql:
+                    await ingest_assessment_units_sql(
+                        engine, au_date_dir,
+                        all_stats.assessment_units,
+                        dry_run,
+                        verify_delta,
+                    )
+                else:
+                    await ingest_assessment_units(
+                        engine, au_date_dir,
+                        all_stats.assessment_units,
+                        dry_run,
+                    )
             except Exception as exc:
                 logger.error("Failed ingesting assessment units: {}", exc, exc_info=True)
                 all_stats.assessment_units.add_error(str(exc))
@@ -1505,6 +2311,27 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
         default=False,
         help="Print what would be done without writing to the database.",
     )
+    parser.add_argument(
+        "--delta-engine",
+        choices=DELTA_ENGINES,
+        default="python",
+        help="Where the file-vs-DB delta is computed: 'python' (row-by-row diff) or 'sql' "
+             "(COPY into staging tables, set-based diff in PostgreSQL). Default: python.",
+    )
+    parser.add_argument(
+        "--verify-delta",
+        action="store_true",
+        default=False,
+        help="With --delta-engine sql, also run the Python diff and abort an entity type "
+             "(nothing written) if the two disagree.",
+    )
+    parser.add_argument(
+        "--rebuild-org-closure",
+        action="store_true",
+        default=False,
+        help="Recompute the org descendant closure for every tree instead of only the "
+             "subtrees whose edges changed (repairs a failed refresh).",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -1538,6 +2365,8 @@ def main(argv: Optional[List[str]] = None) -> None:
     logger.info("Starting context-provider ingestion from {}", ctx_path)
     if args.dry_run:
         logger.info("DRY RUN mode enabled — no data will be written")
+    if args.verify_delta and args.delta_engine != "sql":
+        logger.warning("--verify-delta only applies to --delta-engine sql; ignoring")
 
     try:
         all_stats = asyncio.run(
@@ -1545,6 +2374,9 @@ def main(argv: Optional[List[str]] = None) -> None:
                 context_providers_path=ctx_path,
                 dry_run=args.dry_run,
                 postgres_url=args.postgres_url,
+                delta_engine=args.delta_engine,
+                verify_delta=args.verify_delta,
+                rebuild_closure=args.rebuild_org_closure,
             )
         )
     except SystemExit:
@@ -1558,6 +2390,26 @@ def main(argv: Optional[List[str]] = None) -> None:
 
     all_stats.print_summary()
 
+    # Org / risk / AU membership changed: API workers rebuild their facet index
+    if not args.dry_run:
+        try:
+            from server.explorer.controls.facet_index import signal_facet_index_reload_sync
+            logger.info("Facet index reload signalled (generation {})", signal_facet_index_reload_sync())
+        except Exception as exc:
+            logger.warning("Facet index reload signal failed (API workers keep their index): {}", exc)
+        # Org trees changed: API workers rebuild their filter tree snapshot
+        try:
+            from server.explorer.filters.org_tree import signal_org_tree_reload_sync
+            logger.info("Org tree reload signalled (generation {})", signal_org_tree_reload_sync())
+        except Exception as exc:
+            logger.warning("Org tree reload signal failed (API workers keep their snapshot): {}", exc)
+        # Cached control cards embed org node names
+        try:
+            from server.explorer.controls.card_cache import drop_card_cache_sync
+            logger.info("Dropped {} cached control cards", drop_card_cache_sync())
+        except Exception as exc:
+            logger.warning("Card cache drop failed (cards expire with their TTL): {}", exc)
+
     # Check for errors
     total_errors = sum(
         getattr(all_stats, attr).errors
@@ -8,7 +8,7 @@ from pathlib import Path
 from functools import lru_cache
 from typing import List, Optional
 
-from pydantic import Field, field_validator
+from pydantic import Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -61,6 +61,20 @@ class Settings(BaseSettings):
         description="Batch size for ingestion writers",
         ge=1,
     )
+    controls_validation_workers: int = Field(
+        default=0,
+        description="Process pool size for controls JSONL validation (0 = CPU count)",
+        ge=0,
+    )
+    controls_validation_max_errors: int = Field(
+        default=100,
+        description="Maximum validation errors kept per upload",
+        ge=1,
+    )
+    ingestion_resumable: bool = Field(
+        default=True,
+        description="Commit controls ingestion per batch into staging with checkpoints so a failed run can resume",
+    )
 
     # === PostgreSQL Backup Settings ===
     postgres_backup_retention_days: int = Field(
@@ -148,6 +162,77 @@ class Settings(BaseSettings):
         default=None,
         description="OpenAI API key for query embeddings (text-embedding-3-large)",
     )
+    query_embedding_backend: str = Field(
+        default="openai",
+        description="Query embedding backend: openai | hash (deterministic, offline) | sentence-transformers (local CPU model)",
+        pattern="^(openai|hash|sentence-transformers)$",
+    )
+    query_embedding_local_model: Optional[str] = Field(
+        default=None,
+        description=(
+            "Model for the sentence-transformers backend; required with that backend. "
+            "It must produce 3072-dim vectors from the same model the collection was embedded with"
+        ),
+    )
+    query_embedding_batch_window_ms: float = Field(
+        default=5.0,
+        description="How long concurrent query embeddings are collected into one backend call",
+        ge=0,
+    )
+    query_embedding_max_batch: int = Field(
+        default=32,
+        description="Max queries per embedding backend call",
+        ge=1,
+    )
+    query_embedding_lru_size: int = Field(
+        default=1024,
+        description="Query embeddings kept in each worker's in-process LRU (~12 KiB each)",
+        ge=0,
+    )
+    query_embedding_cache_ttl: int = Field(
+        default=7 * 24 * 3600,
+        description="TTL in seconds of query embeddings cached in Redis",
+        ge=60,
+    )
+
+    # === Explorer search ===
+    search_session_ttl: int = Field(
+        default=300,
+        description="Sliding TTL in seconds of cached ranked search results (pagination sessions)",
+        ge=10,
+    )
+    facet_index_enabled: bool = Field(
+        default=True,
+        description="Answer sidebar/toolbar filters from each worker's in-memory facet index",
+    )
+    facet_index_check_interval: float = Field(
+        default=2.0,
+        description="Seconds between checks of the facet index reload signal (Redis generation counter)",
+        gt=0,
+    )
+    org_tree_snapshot_enabled: bool = Field(
+        default=True,
+        description="Serve the function / location / consolidated filter trees from each worker's in-memory snapshot",
+    )
+    org_tree_check_interval: float = Field(
+        default=2.0,
+        description="Seconds between checks of the org tree reload signal (Redis generation counter)",
+        gt=0,
+    )
+    card_cache_enabled: bool = Field(
+        default=True,
+        description="Cache hydrated search result cards per control in Redis",
+    )
+    card_cache_ttl: int = Field(
+        default=24 * 3600,
+        description="TTL in seconds of cached control cards (safety net; ingestion invalidates precisely)",
+        ge=60,
+    )
+    export_stream_chunk_size: int = Field(
+        default=500,
+        description="Rows fetched per server-side cursor round trip when streaming a search export",
+        ge=1,
+    )
 
     # === Mock Data ===
     mock_qdrant_dataset_path: Optional[Path] = Field(
@@ -195,6 +280,15 @@ class Settings(BaseSettings):
             raise ValueError("Path must be specified in .env file")
         return Path(v)
 
+    @model_validator(mode='after')
+    def require_local_embedding_model(self):
+        if self.query_embedding_backend == "sentence-transformers" and not self.query_embedding_local_model:
+            raise ValueError(
+                "query_embedding_local_model must be specified in .env file "
+                "when query_embedding_backend=sentence-transformers"
+            )
+        return self
+
     # === Computed Properties (derived, not from .env) ===
     @property
     def authority(self) -> str:
@@ -0,0 +1,50 @@
+"""Tests for server.pipelines.controls.jsonl_validation."""
+
+import importlib.util
+import multiprocessing
+import tempfile
+import unittest
+from pathlib import Path
+
+from server.pipelines.controls import jsonl_validation
+
+
+def _validate_in_child(path: str, queue) -> None:
+    # Force the pooled path regardless of the file size
+    jsonl_validation.PARALLEL_MIN_BYTES = 0
+    jsonl_validation.MIN_CHUNK_BYTES = 1
+    try:
+        report = jsonl_validation.validate_controls_jsonl(Path(path), workers=4)
+        queue.put(("ok", None, report.workers, report.chunks, report.records, report.error_count))
+    except BaseException as exc:
+        queue.put(("error", repr(exc), None, None, None, None))
+
+
+@unittest.skipUnless(importlib.util.find_spec("billiard"), "billiard (installed with Celery) is required")
+class ValidateFromDaemonicProcessTest(unittest.TestCase):
+    """A Celery prefork worker is daemonic; the chunks must still be validated in a pool."""
+
+    def test_validates_in_pool(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "controls.jsonl"
+            lines = [f'{{"control_id": "CTRL-{i:010d}"}}\n' for i in range(64)]
+            lines.append("not json\n")
+            path.write_text("".join(lines))
+            serial = jsonl_validation.validate_controls_jsonl(path, workers=1)
+
+            ctx = multiprocessing.get_context("fork")
+            queue = ctx.Queue()
+            child = ctx.Process(target=_validate_in_child, args=(str(path), queue), daemon=True)
+            child.start()
+            status, detail, workers, chunks, records, error_count = queue.get(timeout=120)
+            child.join(timeout=60)
+
+        self.assertEqual(status, "ok", detail)
+        self.assertGreater(workers, 1)
+        self.assertGreater(chunks, 1)
+        self.assertEqual(records, serial.records)
+        self.assertEqual(error_count, serial.error_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
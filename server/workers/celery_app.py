@@ -22,6 +22,7 @@ celery_app = Celery(
         'server.workers.tasks.ingestion',
         'server.workers.tasks.export',
         'server.workers.tasks.snapshots',
+        'server.workers.tasks.validation',
     ]
 )
 
@@ -73,6 +74,7 @@ celery_app.conf.update(
     task_routes={
         'server.workers.tasks.ingestion.*': {'queue': 'ingestion'},
         'server.workers.tasks.compute.*': {'queue': 'compute'},
+        'server.workers.tasks.validation.*': {'queue': 'compute'},
         'server.workers.tasks.export.*': {'queue': 'export'},
         'server.workers.tasks.snapshots.*': {'queue': 'snapshot'},
     },
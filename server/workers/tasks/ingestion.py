@@ -306,6 +306,7 @@ async def _run_async_ingestion(task: IngestionTask, batch_id: int, upload_id: st
 
             # Update batch status based on result
             batch.status = "success" if ingestion_result.success else "failed"
+            batch.ingestion_profile = ingestion_result.profile
             await db.commit()
 
             # Invalidate caches after successful ingestion
@@ -319,6 +320,22 @@ async def _run_async_ingestion(task: IngestionTask, batch_id: int, upload_id: st
                 except Exception as e:
                     logger.warning("Cache invalidation failed (non-fatal): {}", e)
 
+                # Cached search result cards: only the controls this run touched
+                if ingestion_result.tx_from is not None:
+                    try:
+                        from server.explorer.controls.card_cache import invalidate_changed_cards
+                        await invalidate_changed_cards(ingestion_result.tx_from)
+                    except Exception as e:
+                        logger.warning("Card cache invalidation failed (non-fatal): {}", e)
+
+                # Tell API workers to rebuild their in-memory facet index
+                try:
+                    from server.explorer.controls.facet_index import signal_facet_index_reload
+                    generation = await signal_facet_index_reload()
+                    logger.info("Facet index reload signalled (generation {})", generation)
+                except Exception as e:
+                    logger.warning("Facet index reload signal failed (non-fatal): {}", e)
+
                 # Capture dashboard snapshot
                 try:
                     from server.explorer.dashboard.snapshot_builder import capture_dashboard_snapshot
@@ -339,6 +356,7 @@ async def _run_async_ingestion(task: IngestionTask, batch_id: int, upload_id: st
                     'unchanged': ingestion_result.counts.unchanged,
                     'failed': ingestion_result.counts.failed
                 },
+                'profile': ingestion_result.profile,
                 'completed_at': datetime.now(timezone.utc).isoformat()
                 # Note: started_at is added by the parent function
             }
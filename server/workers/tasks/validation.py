@@ -0,0 +1,160 @@
+"""Celery tasks for controls upload validation.
+
+Validates an uploaded controls JSONL in the background (parallel, chunked
+validation via ``pipelines.controls.jsonl_validation``) and moves the
+UploadBatch from 'validating' to 'validated' or 'failed', so upload
+completion does not wait on a multi-minute validation.
+"""
+
+import asyncio
+import traceback
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from celery import Task
+
+from server.workers.celery_app import celery_app
+from server.logging_config import get_logger
+
+logger = get_logger(name=__name__)
+
+
+class ValidationTask(Task):
+    """Base class for validation tasks with progress tracking."""
+
+    def update_progress(self, step: str, percent: int):
+        self.update_state(
+            state='PROGRESS',
+            meta={
+                'current_step': step,
+                'progress_percent': percent,
+                'updated_at': datetime.now(timezone.utc).isoformat(),
+            },
+        )
+
+
+@celery_app.task(
+    bind=True,
+    base=ValidationTask,
+    name='server.workers.tasks.validation.validate_controls_upload',
+    queue='compute',
+    time_limit=1800,  # 30 min hard limit
+    soft_time_limit=1680,  # 28 min soft limit
+)
+def validate_controls_upload_task(self, batch_id: int, upload_id: str) -> Dict[str, Any]:
+    """Validate the controls JSONL of an upload batch.
+
+    Args:
+        batch_id: UploadBatch ID (must be in 'validating' status)
+        upload_id: Upload ID whose JSONL is validated
+
+    Returns:
+        Dict with the validation report.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(_run_async_validation(self, batch_id, upload_id))
+    except Exception as e:
+        logger.exception("Validation task failed: {}", e)
+        try:
+            loop.run_until_complete(_mark_batch_failed(batch_id, "unexpected_error", str(e)))
+        except Exception:
+            logger.exception("Failed to record validation failure for batch {}", batch_id)
+        return {
+            'batch_id': batch_id,
+            'success': False,
+            'message': f"Validation failed: {e}",
+            'error': str(e),
+            'traceback': traceback.format_exc(),
+        }
+    finally:
+        loop.close()
+
+
+async def _get_batch(db, batch_id: int):
+    from sqlalchemy import select
+    from server.jobs import UploadBatch
+
+    result = await db.execute(select(UploadBatch).where(UploadBatch.id == batch_id))
+    return result.scalar_one_or_none()
+
+
+async def _mark_batch_failed(batch_id: int, error_code: str, error_details: str) -> None:
+    from server.jobs import get_session_factory_for_background
+
+    session_factory = get_session_factory_for_background()
+    async with session_factory() as db:
+        batch = await _get_batch(db, batch_id)
+        if batch is None or batch.status != "validating":
+            return
+        batch.status = "failed"
+        batch.error_code = error_code
+        batch.error_details = error_details
+        batch.completed_at = datetime.now(timezone.utc)
+        await db.commit()
+
+
+async def _run_async_validation(task: ValidationTask, batch_id: int, upload_id: str) -> Dict[str, Any]:
+    """Run validation and record the outcome on the batch."""
+    from server.jobs import get_session_factory_for_background
+    from server.pipelines import storage
+    from server.pipelines.controls.jsonl_validation import validate_controls_jsonl
+    from server.settings import get_settings
+
+    settings = get_settings()
+    jsonl_path = storage.get_control_jsonl_path(upload_id)
+
+    session_factory = get_session_factory_for_background()
+    async with session_factory() as db:
+        batch = await _get_batch(db, batch_id)
+        if batch is None:
+            return {'batch_id': batch_id, 'success': False, 'message': f"Batch {batch_id} not found"}
+        if batch.status != "validating":
+            return {
+                'batch_id': batch_id,
+                'success': False,
+                'message': f"Batch {batch_id} is not awaiting validation (status: {batch.status})",
+            }
+
+    if not jsonl_path.exists():
+        await _mark_batch_failed(batch_id, "unexpected_error", f"JSONL not found: {jsonl_path}")
+        return {'batch_id': batch_id, 'success': False, 'message': f"JSONL not found: {jsonl_path}"}
+
+    task.update_progress("Validating JSONL...", 0)
+
+    def _progress(done: int, total: int) -> None:
+        task.update_progress(f"Validated {done}/{total} chunks", int(done / max(total, 1) * 100))
+
+    # CPU-bound and pooled; keep the event loop free while it runs
+    loop = asyncio.get_running_loop()
+    report = await loop.run_in_executor(
+        None,
+        lambda: validate_controls_jsonl(
+            jsonl_path,
+            max_errors=settings.controls_validation_max_errors,
+            workers=settings.controls_validation_workers or None,
+            progress_callback=_progress,
+        ),
+    )
+
+    async with session_factory() as db:
+        batch = await _get_batch(db, batch_id)
+        if batch is None or batch.status != "validating":
+            logger.warning("Batch {} changed state during validation; result not recorded", batch_id)
+        elif report.ok:
+            batch.status = "validated"
+            batch.total_records = report.records
+            batch.completed_at = datetime.now(timezone.utc)
+        else:
+            batch.status = "failed"
+            batch.error_code = "schema_validation_error"
+            batch.error_details = report.summary()
+            batch.completed_at = datetime.now(timezone.utc)
+        await db.commit()
+
+    logger.info(
+        "Controls upload validation {}: upload_id={}, records={}, errors={}",
+        "passed" if report.ok else "failed", upload_id, report.records, report.error_count,
+    )
+    return {'batch_id': batch_id, 'success': report.ok, 'report': report.to_dict()}